@@ -0,0 +1,441 @@
+# -*- coding: utf-8 -*-
+"""
+Struct-of-arrays storage for the IMT beamforming antennas of many stations.
+
+All the stations of a StationManager share the same array pattern (element,
+subarray, dimensions and normalization data), so AntennaArrayBank keeps a
+single pattern definition and stores only the per-station state as stacked
+arrays: the antenna pose (azimuth, elevation and rotation matrix) and the
+beams (tilts, weight vectors and co-channel correction factors).
+
+Indexing the bank with a station index returns an AntennaBeamformingImtView,
+a lightweight AntennaBeamformingImt that reads and writes its state in the
+bank, so code written for a list of antennas keeps working.
+"""
+import copy
+import operator
+
+import numpy as np
+
+from sharc.antenna.antenna import Antenna
+from sharc.antenna.antenna_beamforming_imt import AntennaBeamformingImt
+from sharc.parameters.imt.parameters_antenna_imt import ParametersAntennaImt
+
+
+class AntennaArrayBank(object):
+    """
+    Holds the beamforming antennas of many stations as stacked arrays.
+
+    Attributes
+    ----------
+        pattern (AntennaBeamformingImt): array pattern shared by all stations
+        num_stations (int): number of antennas in the bank
+        azimuth (np.array): physical azimuth of each antenna [degrees]
+        elevation (np.array): physical elevation of each antenna [degrees]
+        rotation_mtx (np.array): rotation matrix of each antenna, with shape
+            (num_stations, 3, 3)
+        num_beams (np.array of int): number of beams of each antenna
+        beams (np.array): (phi, theta) tilts of the beams in the local
+            coordinate system, with shape (num_stations, capacity, 2)
+        w_vec (np.array): weight vectors of the beams, with shape
+            (num_stations, capacity, n_rows, n_cols)
+        co_correction_factor (np.array): co-channel correction factor of the
+            beams, with shape (num_stations, capacity)
+    """
+
+    def __init__(
+        self,
+        par: ParametersAntennaImt,
+        azimuth: np.array,
+        elevation: np.array,
+    ):
+        """
+        Constructs the antennas of all stations.
+
+        Parameters
+        ----------
+            par (ParametersAntennaImt): antenna IMT parameters
+            azimuth (np.array): physical azimuth of each antenna [degrees]
+            elevation (np.array): physical elevation of each antenna
+                [degrees], referenced in the x axis
+        """
+        self.pattern = AntennaBeamformingImt(par, 0.0, 0.0)
+
+        self.azimuth = np.array(azimuth, dtype=float).ravel()
+        self.elevation = np.array(elevation, dtype=float).ravel()
+        if self.azimuth.shape != self.elevation.shape:
+            raise ValueError(
+                "AntennaArrayBank: azimuth and elevation must have the same length",
+            )
+        self.num_stations = len(self.azimuth)
+        self.rotation_mtx = self._calculate_rotation_matrices(
+            self.azimuth, self.elevation,
+        )
+
+        self.num_beams = np.zeros(self.num_stations, dtype=int)
+        self._allocate_beams(0)
+
+    def __len__(self) -> int:
+        return self.num_stations
+
+    def __getitem__(self, idx):
+        """
+        Returns a view of the antenna of a station, or an object array of
+        views if idx selects many stations.
+        """
+        if isinstance(idx, (slice, list, np.ndarray)):
+            return np.array(
+                [self[i] for i in np.arange(self.num_stations)[idx]],
+                dtype=Antenna,
+            )
+        idx = operator.index(idx)
+        if idx < 0:
+            idx += self.num_stations
+        if not 0 <= idx < self.num_stations:
+            raise IndexError(
+                f"AntennaArrayBank: station index {idx} is out of range",
+            )
+        return AntennaBeamformingImtView(self, idx)
+
+    def __setitem__(self, idx: int, antenna: AntennaBeamformingImt):
+        """
+        Copies the pose and beams of a beamforming antenna to a station.
+        The antenna must have the same parameters as the bank pattern.
+        """
+        if antenna.param != self.pattern.param:
+            raise ValueError(
+                "AntennaArrayBank: antenna parameters differ from the bank pattern",
+            )
+        self.azimuth[idx] = antenna.azimuth
+        self.elevation[idx] = antenna.elevation
+        self.rotation_mtx[idx] = np.asarray(antenna.rotation_mtx)
+
+        beams = list(antenna.beams_list)
+        w_vecs = list(antenna.w_vec_list)
+        correction_factors = list(antenna.co_correction_factor_list)
+        self.reset_beams(idx)
+        for beam, w_vec, correction_factor in zip(beams, w_vecs, correction_factors):
+            self._append_beam(idx, beam, w_vec, correction_factor)
+
+    def __iter__(self):
+        for idx in range(self.num_stations):
+            yield AntennaBeamformingImtView(self, idx)
+
+    def subset(self, indices: np.array):
+        """
+        Returns a new bank with copies of the antennas of some stations. The
+        pattern is shared with this bank.
+
+        Parameters
+        ----------
+            indices (np.array of int): indices of the stations
+
+        Returns
+        -------
+            AntennaArrayBank: bank with the antennas in the order of indices
+        """
+        indices = np.asarray(indices, dtype=int)
+        bank = copy.copy(self)
+        bank.num_stations = len(indices)
+        for name in [
+            "azimuth", "elevation", "rotation_mtx", "num_beams", "beams",
+            "w_vec", "co_correction_factor",
+        ]:
+            setattr(bank, name, getattr(self, name)[indices])
+        return bank
+
+    def calculate_gains(
+        self,
+        stations: np.array,
+        phi: np.array,
+        theta: np.array,
+        beams: np.array,
+        co_channel: bool = True,
+    ) -> np.array:
+        """
+        Calculates the gains of many antennas at once, with the same results
+        as calling AntennaBeamformingImt.calculate_gain with beams_l for the
+        antenna of each station.
+
+        Parameters
+        ----------
+            stations (np.array of int): index of the station of each
+                direction
+            phi (np.array): azimuth angles [degrees], in the global
+                coordinate system
+            theta (np.array): elevation angles [degrees], in the global
+                coordinate system
+            beams (np.array of int): beam index of each direction. Index -1
+                corresponds to the beam of maximum gain in the direction.
+            co_channel (bool): optional, default is True. Indicates whether
+                the antenna array pattern (co-channel case), or the element
+                pattern (adjacent channel case) will be used.
+
+        Returns
+        -------
+            gains (np.array): gain in each direction [dBi]
+        """
+        stations = np.ravel(np.asarray(stations, dtype=int))
+        beams = np.ravel(np.asarray(beams, dtype=int))
+        pattern = self.pattern
+
+        # same adjacent channel models as AntennaBeamformingImt.calculate_gain
+        if not co_channel:
+            if pattern.adjacent_antenna_model == "BEAMFORMING":
+                co_channel = True
+            elif pattern.adjacent_antenna_model != "SINGLE_ELEMENT":
+                raise ValueError(
+                    "AntennaArrayBank: invalid antenna pattern for adjacent "
+                    f"channel calculations: {pattern.adjacent_antenna_model}",
+                )
+
+        lo_phi, lo_theta = self.to_local_coord(stations, phi, theta)
+
+        if co_channel:
+            # index -1 reads the correction factor of the last beam
+            correction_factor = self.co_correction_factor[
+                stations, np.where(beams < 0, self.num_beams[stations] + beams, beams)
+            ]
+            gains = self._beam_gains(stations, lo_phi, lo_theta, beams) + \
+                correction_factor
+        else:
+            gains = pattern.element.element_pattern(lo_phi, lo_theta) + \
+                pattern.adj_correction_factor
+
+        return np.maximum(gains, pattern.minimum_array_gain)
+
+    def to_local_coord(
+        self,
+        stations: np.array,
+        phi: np.array,
+        theta: np.array,
+    ) -> tuple:
+        """
+        Returns phi and theta in the local coordinate system of the antenna
+        of each station. Same as AntennaBeamformingImt.to_local_coord.
+        """
+        phi_rad = np.deg2rad(np.ravel(phi))
+        theta_rad = np.deg2rad(np.ravel(theta))
+
+        x = np.sin(theta_rad) * np.cos(phi_rad)
+        y = np.sin(theta_rad) * np.sin(phi_rad)
+        z = np.cos(theta_rad)
+
+        # product of the rotation matrix of each station and its point,
+        # written out element by element
+        rotation_mtx = self.rotation_mtx[stations]
+        rotated_x, rotated_y, rotated_z = [
+            rotation_mtx[:, i, 0] * x + rotation_mtx[:, i, 1] * y +
+            rotation_mtx[:, i, 2] * z
+            for i in range(3)
+        ]
+
+        lo_phi = np.rad2deg(np.arctan2(rotated_y, rotated_x))
+        lo_theta = np.rad2deg(np.arccos(rotated_z))
+
+        return lo_phi, lo_theta
+
+    def _beam_gains(
+        self,
+        stations: np.array,
+        phi: np.array,
+        theta: np.array,
+        beams: np.array,
+    ) -> np.array:
+        """
+        Calculates the gain of a beam of a station in each of the given
+        directions, in chunks of at most GAIN_CHUNK_ELEMENTS array elements.
+        Same as AntennaBeamformingImt._beam_gains. Angles are in the local
+        coordinate system.
+        """
+        pattern = self.pattern
+        if pattern.subarray is None:
+            element_g = pattern.element.element_pattern(phi, theta)
+        else:
+            element_g = pattern.subarray.calculate_gain(phi, theta)
+
+        array_g = np.zeros(len(phi))
+        chunk_size = max(
+            1, pattern.GAIN_CHUNK_ELEMENTS // (pattern.n_rows * pattern.n_cols),
+        )
+        for start in range(0, len(phi), chunk_size):
+            chunk = slice(start, start + chunk_size)
+            chunk_phi = phi[chunk]
+            chunk_theta = theta[chunk]
+            chunk_beams = beams[chunk]
+
+            v_vec = pattern._super_position_vector(chunk_phi, chunk_theta)
+
+            max_gain = chunk_beams == -1
+            if np.all(max_gain):
+                w_vec = pattern._weight_vector(chunk_phi, chunk_theta - 90)
+            else:
+                w_vec = self.w_vec[
+                    stations[chunk], np.where(max_gain, 0, chunk_beams)
+                ]
+                if np.any(max_gain):
+                    w_vec[max_gain] = pattern._weight_vector(
+                        chunk_phi[max_gain], chunk_theta[max_gain] - 90,
+                    )
+
+            array_factor = np.einsum("dnm,dnm->d", v_vec, w_vec)
+            array_g[chunk] = 10 * np.log10(np.abs(array_factor)**2)
+
+        return element_g + array_g
+
+    def reset_beams(self, station=None):
+        """
+        Removes the beams of a station, or of all stations.
+
+        Parameters
+        ----------
+            station (int): optional, index of the station. If not given, the
+                beams of every station are removed.
+        """
+        if station is None:
+            self.num_beams[:] = 0
+            self._allocate_beams(0)
+        else:
+            self.num_beams[station] = 0
+
+    def _append_beam(
+        self,
+        station: int,
+        beam: tuple,
+        w_vec: np.array,
+        correction_factor: float,
+    ):
+        """
+        Stores a new beam of a station, growing the beam arrays if needed.
+        """
+        n = self.num_beams[station]
+        capacity = self.beams.shape[1]
+        if n == capacity:
+            self._allocate_beams(max(1, 2 * capacity))
+
+        self.beams[station, n] = beam
+        self.w_vec[station, n] = w_vec
+        self.co_correction_factor[station, n] = correction_factor
+        self.num_beams[station] = n + 1
+
+    def _allocate_beams(self, capacity: int):
+        """
+        Allocates the beam arrays with room for capacity beams per station,
+        keeping the beams already stored.
+        """
+        beams = np.zeros((self.num_stations, capacity, 2))
+        w_vec = np.zeros(
+            (self.num_stations, capacity, self.pattern.n_rows, self.pattern.n_cols),
+            dtype=complex,
+        )
+        co_correction_factor = np.zeros((self.num_stations, capacity))
+
+        if hasattr(self, "beams"):
+            n = min(capacity, self.beams.shape[1])
+            beams[:, :n] = self.beams[:, :n]
+            w_vec[:, :n] = self.w_vec[:, :n]
+            co_correction_factor[:, :n] = self.co_correction_factor[:, :n]
+
+        self.beams = beams
+        self.w_vec = w_vec
+        self.co_correction_factor = co_correction_factor
+
+    @staticmethod
+    def _calculate_rotation_matrices(
+        azimuth: np.array,
+        elevation: np.array,
+    ) -> np.array:
+        """
+        Calculates the rotation matrix of every antenna at once. Same as
+        AntennaBeamformingImt._calculate_rotation_matrix.
+        """
+        alpha = np.deg2rad(azimuth)
+        beta = np.deg2rad(elevation)
+        zeros = np.zeros_like(alpha)
+        ones = np.ones_like(alpha)
+
+        ry = np.stack([
+            np.stack([np.cos(beta), zeros, np.sin(beta)], axis=-1),
+            np.stack([zeros, ones, zeros], axis=-1),
+            np.stack([-np.sin(beta), zeros, np.cos(beta)], axis=-1),
+        ], axis=-2)
+        rz = np.stack([
+            np.stack([np.cos(alpha), -np.sin(alpha), zeros], axis=-1),
+            np.stack([np.sin(alpha), np.cos(alpha), zeros], axis=-1),
+            np.stack([zeros, zeros, ones], axis=-1),
+        ], axis=-2)
+
+        return ry @ np.swapaxes(rz, -1, -2)
+
+
+class AntennaBeamformingImtView(AntennaBeamformingImt):
+    """
+    Beamforming antenna of a single station of an AntennaArrayBank.
+
+    The pose and beams of the antenna are read from and written to the bank,
+    and the pattern attributes are read from the shared pattern, so creating a
+    view costs nothing.
+    """
+
+    def __init__(self, bank: AntennaArrayBank, idx: int):
+        """
+        Parameters
+        ----------
+            bank (AntennaArrayBank): bank that holds the antenna
+            idx (int): index of the station in the bank
+        """
+        self.bank = bank
+        self.idx = idx
+
+    def __getattr__(self, name):
+        # called only for attributes that are not set on the view, which are
+        # the attributes of the shared pattern
+        if name.startswith("__") or name in ("bank", "idx"):
+            raise AttributeError(name)
+        return getattr(self.bank.pattern, name)
+
+    @property
+    def azimuth(self) -> float:
+        """Physical azimuth of the antenna [degrees]."""
+        return self.bank.azimuth[self.idx]
+
+    @property
+    def elevation(self) -> float:
+        """Physical elevation of the antenna [degrees]."""
+        return self.bank.elevation[self.idx]
+
+    @property
+    def rotation_mtx(self) -> np.array:
+        """Rotation matrix from the global to the local coordinate system."""
+        return self.bank.rotation_mtx[self.idx]
+
+    @property
+    def beams_list(self) -> list:
+        """(phi, theta) tilts of the beams in the local coordinate system."""
+        n = self.bank.num_beams[self.idx]
+        return [tuple(beam) for beam in self.bank.beams[self.idx, :n].tolist()]
+
+    @property
+    def w_vec_list(self) -> np.array:
+        """Weight vectors of the beams."""
+        return self.bank.w_vec[self.idx, :self.bank.num_beams[self.idx]]
+
+    @property
+    def co_correction_factor_list(self) -> np.array:
+        """Co-channel correction factors of the beams."""
+        return self.bank.co_correction_factor[
+            self.idx, :self.bank.num_beams[self.idx]
+        ]
+
+    def add_beam(self, phi_etilt: float, theta_etilt: float):
+        """
+        Add new beam to antenna. See AntennaBeamformingImt.add_beam.
+        """
+        self.bank._append_beam(
+            self.idx, *self._new_beam(phi_etilt, theta_etilt),
+        )
+
+    def reset_beams(self):
+        """Reset beams lists
+        """
+        self.bank.reset_beams(self.idx)
@@ -42,6 +42,11 @@ class AntennaBeamformingImt(Antenna):
         minimum_array_gain (float): minimum array gain for beamforming
     """
 
+    # Maximum number of complex array elements (directions x rows x columns)
+    # evaluated at once by _beam_gains. Bounds the memory used by the
+    # superposition and weight vectors of large direction sets.
+    GAIN_CHUNK_ELEMENTS = 2**20
+
     def __init__(
             self,
             par: ParametersAntennaImt,
@@ -100,6 +105,11 @@ class AntennaBeamformingImt(Antenna):
         self.co_correction_factor_list = []
         self.adj_correction_factor = 0.0
         if self.normalize:
+            if par.normalization_data is None:
+                # no normalization file: calculate the correction factors, or
+                # load them from the files of previous runs
+                from sharc.antenna.beamforming_normalization.beamforming_normalizer import BeamformingNormalizer
+                par.normalization_data = BeamformingNormalizer.get_normalization_data(par)
             # Load co-channel data
             self.norm_data = par.normalization_data
             self.adj_correction_factor = self.norm_data["correction_factor_adj_channel"]
@@ -117,26 +127,46 @@ class AntennaBeamformingImt(Antenna):
             phi_etilt (float): azimuth electrical tilt angle [degrees]
             theta_etilt (float): elevation electrical tilt angle [degrees]
         """
+        beam, w_vec, correction_factor = self._new_beam(phi_etilt, theta_etilt)
+        self.beams_list.append(beam)
+        self.w_vec_list.append(w_vec)
+        self.co_correction_factor_list.append(correction_factor)
+
+    def _new_beam(self, phi_etilt: float, theta_etilt: float) -> tuple:
+        """
+        Calculates the tilts, weight vector and co-channel correction factor
+        of a new beam, without adding it to the antenna.
+
+        Parameters
+        ----------
+            phi_etilt (float): azimuth electrical tilt angle [degrees]
+            theta_etilt (float): elevation electrical tilt angle [degrees]
+
+        Returns
+        -------
+            tuple: (phi, theta) tilts in the local coordinate system, weight
+                vector and correction factor of the beam
+        """
         phi, theta = self.to_local_coord(phi_etilt, theta_etilt)
-        self.beams_list.append(
-            (np.ndarray.item(phi), np.ndarray.item(theta - 90)),
-        )
-        self.w_vec_list.append(self._weight_vector(phi, theta - 90))
+        phi = np.ndarray.item(phi)
+        theta = np.ndarray.item(theta)
+        w_vec = self._weight_vector(phi, theta - 90)
 
         if self.normalize:
             lin = int(phi / self.resolution)
             col = int(theta / self.resolution)
-            self.co_correction_factor_list.append(
-                self.co_correction_factor[lin, col],
-            )
+            correction_factor = self.co_correction_factor[lin, col]
         else:
-            self.co_correction_factor_list.append(0.0)
+            correction_factor = 0.0
+
+        return (phi, theta - 90), w_vec, correction_factor
 
     def calculate_gain(self, *args, **kwargs) -> np.array:
         """
         Calculates the gain in the given direction.
         Does not receive angles in local coordinate system.
         Theta taken with z axis as reference.
+        All directions are evaluated at once, see _beam_gains.
 
         Parameters
         ----------
@@ -184,7 +214,7 @@ class AntennaBeamformingImt(Antenna):
             correction_factor = self.co_correction_factor_list
             correction_factor_idx = beams_l
         else:
-            beams_l = -1 * np.ones_like(phi_vec)
+            beams_l = -1 * np.ones(np.size(phi_vec), dtype=int)
             if co_channel:
                 if self.normalize:
                     lin_f = phi_vec / self.resolution
@@ -194,32 +224,21 @@ class AntennaBeamformingImt(Antenna):
                     correction_factor = self.co_correction_factor[lin, col]
                 else:
                     correction_factor = np.zeros_like(phi_vec)
-                correction_factor_idx = [
-                    i for i in range(len(correction_factor))
-                ]
+                correction_factor = np.ravel(correction_factor)
+                correction_factor_idx = np.arange(len(correction_factor))
 
         lo_phi_vec, lo_theta_vec = self.to_local_coord(phi_vec, theta_vec)
 
         n_direct = len(lo_theta_vec)
 
-        gains = np.zeros(n_direct)
-
         if co_channel:
-            for g in range(n_direct):
-                gains[g] = self._beam_gain(
-                    lo_phi_vec[g], lo_theta_vec[g],
-                    beams_l[g],
-                )\
-                    + correction_factor[correction_factor_idx[g]]
+            beams_l = np.ravel(beams_l)[:n_direct]
+            correction_factor_idx = np.ravel(correction_factor_idx)[:n_direct]
+            gains = self._beam_gains(lo_phi_vec, lo_theta_vec, beams_l) + \
+                np.asarray(correction_factor, dtype=float)[correction_factor_idx]
         else:
-            for g in range(n_direct):
-                elem_g = self.element.element_pattern(
-                    lo_phi_vec[g],
-                    lo_theta_vec[g],
-                )
-
-                gains[g] = elem_g \
-                    + self.adj_correction_factor
+            gains = self.element.element_pattern(lo_phi_vec, lo_theta_vec) + \
+                self.adj_correction_factor
 
         gains = np.maximum(gains, self.minimum_array_gain)
 
@@ -239,15 +258,17 @@ class AntennaBeamformingImt(Antenna):
 
         Parameters
         ----------
-            theta (float): elevation angle [degrees]
-            phi (float): azimuth angle [degrees]
+            theta (float or np.array): elevation angle [degrees]
+            phi (float or np.array): azimuth angle [degrees]
 
         Returns
         -------
-            v_vec (np.array): superposition vector
+            v_vec (np.array): superposition vector, with shape
+                (n_rows, n_cols) for scalar angles or
+                (n_direct, n_rows, n_cols) for arrays of angles
         """
-        r_phi = np.deg2rad(phi)
-        r_theta = np.deg2rad(theta)
+        r_phi = np.deg2rad(np.asarray(phi))[..., np.newaxis, np.newaxis]
+        r_theta = np.deg2rad(np.asarray(theta))[..., np.newaxis, np.newaxis]
 
         n = np.arange(self.n_rows) + 1
         m = np.arange(self.n_cols) + 1
@@ -266,15 +287,17 @@ class AntennaBeamformingImt(Antenna):
 
         Parameters
         ----------
-            phi_tilt (float): electrical horizontal steering [degrees]
-            theta_tilt (float): electrical down-tilt steering [degrees]
+            phi_tilt (float or np.array): electrical horizontal steering [degrees]
+            theta_tilt (float or np.array): electrical down-tilt steering [degrees]
 
         Returns
         -------
-            w_vec (np.array): weighting vector
+            w_vec (np.array): weighting vector, with shape (n_rows, n_cols)
+                for scalar angles or (n_direct, n_rows, n_cols) for arrays
+                of angles
         """
-        r_phi = np.deg2rad(phi_tilt)
-        r_theta = np.deg2rad(theta_tilt)
+        r_phi = np.deg2rad(np.asarray(phi_tilt))[..., np.newaxis, np.newaxis]
+        r_theta = np.deg2rad(np.asarray(theta_tilt))[..., np.newaxis, np.newaxis]
 
         n = np.arange(self.n_rows) + 1
         m = np.arange(self.n_cols) + 1
@@ -303,32 +326,72 @@ class AntennaBeamformingImt(Antenna):
         -------
             gain (float): beam gain [dBi]
         """
+        gain = self._beam_gains(
+            np.atleast_1d(phi), np.atleast_1d(theta),
+            np.atleast_1d(np.asarray(beam, dtype=int)),
+        )
+
+        return gain.reshape(np.shape(phi))[()]
+
+    def _beam_gains(
+        self,
+        phi: np.array,
+        theta: np.array,
+        beams: np.array,
+    ) -> np.array:
+        """
+        Calculates the gain of a beam in each of the given directions.
+        Angles are in the local coordinate system.
+
+        The array factor of all (direction, beam) pairs is computed with
+        broadcast complex array operations, in chunks of at most
+        GAIN_CHUNK_ELEMENTS array elements.
+
+        Parameters
+        ----------
+            phi (np.array): azimuth angles [degrees]
+            theta (np.array): elevation angles [degrees]
+            beams (np.array of int): beam index for each direction. Index -1
+                corresponds to the beam of maximum gain in the direction.
 
+        Returns
+        -------
+            gains (np.array): beam gain in each direction [dBi]
+        """
         if self.subarray is None:
             element_g = self.element.element_pattern(phi, theta)
         else:
             element_g = self.subarray.calculate_gain(phi, theta)
 
-        v_vec = self._super_position_vector(phi, theta)
+        if len(self.w_vec_list) > 0:
+            w_beams = np.asarray(self.w_vec_list)
 
-        if beam == -1:
-            w_vec = self._weight_vector(phi, theta - 90)
-            array_g = 10 * np.log10(abs(np.sum(np.multiply(v_vec, w_vec)))**2)
-        else:
-            array_g = 10 * np.log10(
-                abs(
-                    np.sum(
-                        np.multiply(
-                            v_vec,
-                            self.w_vec_list[beam],
-                        ),
-                    ),
-                )**2,
-            )
+        array_g = np.zeros(len(phi))
+        chunk_size = max(
+            1, self.GAIN_CHUNK_ELEMENTS // (self.n_rows * self.n_cols),
+        )
+        for start in range(0, len(phi), chunk_size):
+            chunk = slice(start, start + chunk_size)
+            chunk_phi = phi[chunk]
+            chunk_theta = theta[chunk]
+            chunk_beams = beams[chunk]
+
+            v_vec = self._super_position_vector(chunk_phi, chunk_theta)
+
+            max_gain = chunk_beams == -1
+            if np.all(max_gain):
+                w_vec = self._weight_vector(chunk_phi, chunk_theta - 90)
+            else:
+                w_vec = w_beams[np.where(max_gain, 0, chunk_beams)]
+                if np.any(max_gain):
+                    w_vec[max_gain] = self._weight_vector(
+                        chunk_phi[max_gain], chunk_theta[max_gain] - 90,
+                    )
 
-        gain = element_g + array_g
+            array_factor = np.einsum("dnm,dnm->d", v_vec, w_vec)
+            array_g[chunk] = 10 * np.log10(np.abs(array_factor)**2)
 
-        return gain
+        return element_g + array_g
 
     def to_local_coord(self, phi: float, theta: float) -> tuple:
         """Returns phi and theta to antennas local coordintate system
@@ -349,13 +412,13 @@ class AntennaBeamformingImt(Antenna):
         phi_rad = np.ravel(np.array([np.deg2rad(phi)]))
         theta_rad = np.ravel(np.array([np.deg2rad(theta)]))
 
-        points = np.matrix([
+        points = np.array([
             np.sin(theta_rad) * np.cos(phi_rad),
             np.sin(theta_rad) * np.sin(phi_rad),
             np.cos(theta_rad),
         ])
 
-        rotated_points = self.rotation_mtx * points
+        rotated_points = np.asarray(self.rotation_mtx) @ points
 
         lo_phi = np.ravel(
             np.asarray(
@@ -14,6 +14,7 @@ from sharc.antenna.antenna_s1528 import AntennaS1528
 from sharc.antenna.antenna_s1855 import AntennaS1855
 from sharc.antenna.antenna_s1528 import AntennaS1528, AntennaS1528Leo, AntennaS1528Taylor
 from sharc.antenna.antenna_beamforming_imt import AntennaBeamformingImt
+from sharc.antenna.antenna_array_bank import AntennaArrayBank
 
 import numpy as np
 
@@ -78,17 +79,21 @@ class AntennaFactory():
         only a single antenna object will be created, and every position
         in the array will point to it.
         This is much more performant.
+        Beamforming antennas share their pattern and keep their pose and
+        beams in an AntennaArrayBank, which is returned instead of an
+        object array.
         """
-        antennas = np.empty((n_stations,), dtype=Antenna)
         assert n_stations == len(azimuth)
         assert n_stations == len(elevation)
 
         if antenna_params.pattern == "ARRAY":
-            for i in range(n_stations):
-                antennas[i] = AntennaFactory.create_antenna(
-                    antenna_params, azimuth[i], elevation[i],
-                )
+            antennas = AntennaArrayBank(
+                antenna_params.array.get_antenna_parameters(),
+                azimuth,
+                elevation,
+            )
         else:
+            antennas = np.empty((n_stations,), dtype=Antenna)
             # some antennas don't need azimuth and elevation at all
             # this makes it much faster
             antennas[:] = AntennaFactory.create_antenna(
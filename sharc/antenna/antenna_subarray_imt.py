@@ -66,14 +66,15 @@ class AntennaSubarrayIMT(object):
 
         Returns
         -------
-            v_vec (np.array): superposition vector
+            v_vec (np.array): superposition vector, with shape (n_rows,) for
+                a scalar angle or (n_direct, n_rows) for an array of angles
         """
-        r_theta = np.deg2rad(theta)
+        r_theta = np.deg2rad(np.asarray(theta))[..., np.newaxis]
 
         m = np.arange(n_rows) + 1
 
         v_n = np.exp(
-            1.0j * 2 * np.pi * (m[: np.newaxis] - 1) * dv_sub * np.cos(r_theta)
+            1.0j * 2 * np.pi * (m - 1) * dv_sub * np.cos(r_theta)
         )
 
         return v_n
@@ -104,23 +105,6 @@ class AntennaSubarrayIMT(object):
         return 1 / np.sqrt(n_rows) * np.exp(1.0j * 2 * np.pi *
                                             (m - 1) * dv_sub * np.sin(np.deg2rad(eletrical_downtilt)))
 
-    def _calculate_single_dir_gain(self, phi: float, theta: float):
-        """
-        There is no beamforming, this is just for better code
-        """
-        elem_g = self.element.element_pattern(
-            phi, theta
-        )
-
-        v_vec = self._super_position_vector(theta, self.n_rows, self.dv_sub)
-
-        w_vec = self._weight_vector(
-            self.eletrical_downtilt, self.n_rows, self.dv_sub)
-
-        array_g = 10 * np.log10(abs(np.sum(np.multiply(v_vec, w_vec)))**2)
-
-        return array_g + elem_g
-
     def calculate_gain(
         self,
         phi_arr: typing.Union[np.array, float],
@@ -128,7 +112,9 @@ class AntennaSubarrayIMT(object):
     ) -> typing.Union[np.array, float]:
         """
         Calculates the subarray radiation pattern gain.
-        Assumes the angles are already received as local coordinates
+        Assumes the angles are already received as local coordinates.
+        There is no beamforming, so the same weight vector is applied to
+        every direction.
 
         Parameters
         ----------
@@ -139,18 +125,19 @@ class AntennaSubarrayIMT(object):
         -------
             gain (np.array): element radiation pattern gain value [dBi]
         """
-        if isinstance(phi_arr, float) and isinstance(theta_arr, float):
-            return self._calculate_single_dir_gain(phi_arr, theta_arr)
+        elem_g = self.element.element_pattern(
+            phi_arr, theta_arr
+        )
 
-        n_direct = len(phi_arr)
+        v_vec = self._super_position_vector(
+            theta_arr, self.n_rows, self.dv_sub)
 
-        gains = np.zeros(n_direct)
+        w_vec = self._weight_vector(
+            self.eletrical_downtilt, self.n_rows, self.dv_sub)
 
-        for i in range(n_direct):
-            gains[i] = self._calculate_single_dir_gain(
-                phi_arr[i], theta_arr[i])
+        array_g = 10 * np.log10(np.abs(np.sum(v_vec * w_vec, axis=-1))**2)
 
-        return gains
+        return array_g + elem_g
 
 
 if __name__ == '__main__':
@@ -5,12 +5,17 @@ Created on Fri Mar  2 14:28:25 2018
 @author: Calil
 """
 
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+import json
+import os
+from itertools import repeat
+
 import numpy as np
-from scipy.integrate import dblquad
-from sys import stdout
 
 from sharc.antenna.antenna_beamforming_imt import AntennaBeamformingImt
 from sharc.parameters.imt.parameters_antenna_imt import ParametersAntennaImt
+from sharc.support.sharc_utils import get_cache_file_path, write_cache_file
 
 
 class BeamformingNormalizer(object):
@@ -18,6 +23,12 @@ class BeamformingNormalizer(object):
     Calculates the total integrated gain of given antenna array or element and
     returns its correction factor.
 
+    The gain is integrated over the sphere with a product quadrature rule:
+    Gauss-Legendre in theta and the rectangle rule in phi, which is exact for
+    periodic functions. The gains of many beams are evaluated at all the
+    quadrature points at once, and the number of points is doubled until
+    the integrals of all beams change by less than the tolerance.
+
     Attributes:
         resolution_deg (float): correction factor matrix resolution [degreees]
         tolerance (float): integral absolute tolerance
@@ -40,6 +51,23 @@ class BeamformingNormalizer(object):
             normalization
     """
 
+    # number of theta points of the first quadrature grid. The grid has
+    # twice as many phi points
+    MIN_THETA_POINTS = 32
+    # number of theta points after which the grid is no longer refined
+    MAX_THETA_POINTS = 1024
+    # number of beams integrated together
+    BEAMS_PER_CHUNK = 64
+    # number of quadrature points at which the gains are evaluated at once
+    POINTS_PER_CHUNK = 2**15
+
+    # correction factors computed automatically, see get_normalization_data
+    DEFAULT_RESOLUTION_DEG = 5
+    DEFAULT_TOLERANCE = 1e-2
+
+    # normalization data already loaded in this process
+    _normalization_data = {}
+
     def __init__(self, res_deg: float, tol: float):
         """
         Class constructor
@@ -72,11 +100,85 @@ class BeamformingNormalizer(object):
         )
         self.antenna = None
 
+    @classmethod
+    def get_normalization_data(
+        cls,
+        par: ParametersAntennaImt,
+        cache_dir: str = None,
+        num_workers: int = 1,
+    ) -> dict:
+        """
+        Returns the normalization data of an antenna, with the default
+        resolution and tolerance.
+
+        The data is stored in the cache directory, in a file named after a
+        hash of the array geometry and element pattern, and is calculated
+        only if there is no such file. If the file cannot be written (e.g.,
+        the directory is read-only), the data is only kept in memory.
+
+        Parameters:
+            par (ParametersAntennaImt): antenna parameters
+            cache_dir (str): directory of the normalization files. Defaults
+                to the one of sharc_utils.get_cache_dir
+            num_workers (int): number of processes among which the
+                correction factors are calculated
+
+        Returns:
+            dict: normalization data, as returned by
+                calculate_correction_matrix
+        """
+        norm = cls(cls.DEFAULT_RESOLUTION_DEG, cls.DEFAULT_TOLERANCE)
+        key = repr(("BeamformingNormalizer", norm._parameters_description(par)))
+        file_name = get_cache_file_path(key, ".npz", cache_dir)
+        if file_name not in cls._normalization_data:
+            if os.path.exists(file_name):
+                with np.load(file_name) as data:
+                    cls._normalization_data[file_name] = {
+                        key: data[key] for key in data
+                    }
+            else:
+                data = norm.calculate_correction_matrix(
+                    par, testing=True, num_workers=num_workers,
+                )
+                write_cache_file(file_name, lambda f: np.savez(f, **data))
+                cls._normalization_data[file_name] = data
+        return cls._normalization_data[file_name]
+
+    def _parameters_description(self, par: ParametersAntennaImt) -> str:
+        """
+        Returns the parameters that determine the correction factors (array
+        geometry, element pattern, resolution and tolerance), as a JSON
+        string.
+        """
+        description = {
+            "resolution": self.resolution_deg,
+            "tolerance": self.tolerance,
+            "element_pattern": par.element_pattern.upper(),
+            "element_max_g": par.element_max_g,
+            "element_phi_3db": par.element_phi_3db,
+            "element_theta_3db": par.element_theta_3db,
+            "element_am": par.element_am,
+            "element_sla_v": par.element_sla_v,
+            "multiplication_factor": par.multiplication_factor,
+            "n_rows": par.n_rows,
+            "n_columns": par.n_columns,
+            "element_horiz_spacing": par.element_horiz_spacing,
+            "element_vert_spacing": par.element_vert_spacing,
+        }
+        if par.subarray.is_enabled:
+            description["subarray"] = {
+                "n_rows": par.subarray.n_rows,
+                "element_vert_spacing": par.subarray.element_vert_spacing,
+                "eletrical_downtilt": par.subarray.eletrical_downtilt,
+            }
+        return json.dumps(description, sort_keys=True, default=float)
+
     def generate_correction_matrix(
         self,
         par: ParametersAntennaImt,
         file_name: str,
         testing=False,
+        num_workers: int = 1,
     ):
         """
         Generates the correction factor matrix and saves it in a file
@@ -85,46 +187,76 @@ class BeamformingNormalizer(object):
             par (ParametersAntennaImt): set of antenna parameters to which calculate the
                 correction factor
             file_name (str): name of file to which save the correction matrix
+            testing (bool): if True, progress is not printed
+            num_workers (int): number of processes among which the phi escan
+                values are split
+        """
+        data = self.calculate_correction_matrix(par, testing, num_workers)
+        self._save_files(data, file_name)
+
+    def calculate_correction_matrix(
+        self,
+        par: ParametersAntennaImt,
+        testing=False,
+        num_workers: int = 1,
+    ) -> dict:
+        """
+        Calculates the correction factor matrix
+
+        Parameters:
+            par (ParametersAntennaImt): set of antenna parameters to which calculate the
+                correction factor
+            testing (bool): if True, progress is not printed
+            num_workers (int): number of processes among which the phi escan
+                values are split
+
+        Returns:
+            dict: normalization data, with the keys described in _save_files
         """
-        # Create antenna object
+        # Create antenna object, without normalization
         azi = 0  # Antenna azimuth: 0 degrees for simplicity
         ele = 0  # Antenna elevation: 0 degrees as well
-        self.antenna = AntennaBeamformingImt(par, azi, ele)
-
-        # For co-channel beamforming
-        # Correction factor numpy array
-        correction_factor_co = np.zeros(
-            (len(self.phi_vals_deg), len(self.theta_vals_deg)),
-        )
-        error_co = np.empty(
-            (len(self.phi_vals_deg), len(self.theta_vals_deg)), dtype=tuple,
+        self.antenna = AntennaBeamformingImt(
+            replace(par, normalization=False), azi, ele,
         )
 
-        # Loop throug all the possible beams
-        for phi_idx, phi in enumerate(self.phi_vals_deg):
-            if not testing:
-                print('\n' + str(100 * phi_idx / len(self.phi_vals_deg)) + '%')
-            for theta_idx, theta in enumerate(self.theta_vals_deg):
-                s = '\tphi = ' + str(phi) + ', theta = ' + str(theta)
+        # For co-channel beamforming
+        if num_workers > 1:
+            phi_chunks = np.array_split(self.phi_vals_deg, num_workers)
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                results = list(executor.map(
+                    _correction_factor_rows, repeat(self), phi_chunks,
+                ))
+            correction_factor_co = np.concatenate([r[0] for r in results])
+            error_co = np.concatenate([r[1] for r in results])
+        else:
+            correction_factor_co = np.zeros(
+                (len(self.phi_vals_deg), len(self.theta_vals_deg)),
+            )
+            error_co = np.zeros(correction_factor_co.shape + (2,))
+            # Loop throug the rows of beams
+            for phi_idx, phi in enumerate(self.phi_vals_deg):
                 if not testing:
-                    print(s)
-                stdout.flush()
-                correction_factor_co[phi_idx, theta_idx], error_co[phi_idx,
-                                                                   theta_idx] = self.calculate_correction_factor(phi, theta, True)
+                    print(str(100 * phi_idx / len(self.phi_vals_deg)) + '%')
+                correction_factor_co[phi_idx], error_co[phi_idx] = \
+                    _correction_factor_rows(self, [phi])
 
         correction_factor_adj, error_adj = self.calculate_correction_factor(
             0, 0, False,
         )
 
-        # Save in file
-        self._save_files(
-            correction_factor_co,
-            error_co,
-            correction_factor_adj,
-            error_adj,
-            par,
-            file_name,
+        data = dict(
+            resolution=self.resolution_deg,
+            phi_range=(self.phi_min_deg, self.phi_max_deg),
+            theta_range=(self.theta_min_deg, self.theta_max_deg),
+            correction_factor_co_channel=correction_factor_co,
+            error_co_channel=error_co,
+            correction_factor_adj_channel=correction_factor_adj,
+            error_adj_channel=error_adj,
+            parameters=self._parameters_description(par),
         )
+        # same types as the data read from the files
+        return {key: np.asarray(value) for key, value in data.items()}
 
     def calculate_correction_factor(
             self,
@@ -146,38 +278,145 @@ class BeamformingNormalizer(object):
             error (tuple): upper and lower error bounds [dB]
         """
         if c_chan:
-            self.antenna.add_beam(phi_beam, theta_beam)
-            beam = int(len(self.antenna.beams_list) - 1)
-
-            def int_f(t, p):
-                return np.power(
-                    10,
-                    self.antenna._beam_gain(
-                        np.rad2deg(p),
-                        np.rad2deg(t),
-                        beam) / 10) * np.sin(t)
+            correction_factor, error = self.calculate_correction_factors(
+                np.atleast_1d(phi_beam), np.atleast_1d(theta_beam),
+            )
         else:
-            def int_f(t, p):
+            def gain_function(phi, theta):
                 return np.power(
-                    10, self.antenna.element.element_pattern(
-                        np.rad2deg(p), np.rad2deg(t)) / 10) * np.sin(t)
-
-        integral_val, err = dblquad(
-            int_f, self.phi_min_rad, self.phi_max_rad,
-            lambda p: self.theta_min_rad,
-            lambda p: self.theta_max_rad,
-            epsabs=self.tolerance,
-            epsrel=0.0,
-        )
+                    10, self.antenna.element.element_pattern(phi, theta) / 10,
+                )[:, np.newaxis]
+
+            integral_val, err = self._integrate(gain_function)
+            correction_factor, error = self._correction_factor(
+                integral_val, err,
+            )
+
+        return correction_factor[0], tuple(error[0])
+
+    def calculate_correction_factors(
+        self,
+        phi_beams: np.array,
+        theta_beams: np.array,
+    ) -> tuple:
+        """
+        Calculates the correction factors of the antenna array for many beam
+        pointing directions.
+
+        Parameters:
+            phi_beams (np.array): azimuth angles of beam pointing directions
+                [deg]
+            theta_beams (np.array): elevation angles of beam pointing
+                directions [deg]
+
+        Returns:
+            correction_factor (np.array): correction factor values [dB]
+            error (np.array): lower and upper error bounds [dB], along the
+                last axis
+        """
+        lo_phi, lo_theta = self.antenna.to_local_coord(phi_beams, theta_beams)
+        w_vec = self.antenna._weight_vector(
+            np.ravel(lo_phi), np.ravel(lo_theta) - 90,
+        ).reshape(np.size(lo_phi), -1)
+
+        integral_val = np.zeros(len(w_vec))
+        err = np.zeros(len(w_vec))
+        for start in range(0, len(w_vec), self.BEAMS_PER_CHUNK):
+            chunk = slice(start, start + self.BEAMS_PER_CHUNK)
+            integral_val[chunk], err[chunk] = self._integrate(
+                lambda phi, theta: self._array_gains(phi, theta, w_vec[chunk]),
+            )
+
+        return self._correction_factor(integral_val, err)
+
+    def _array_gains(
+        self,
+        phi: np.array,
+        theta: np.array,
+        w_vec: np.array,
+    ) -> np.array:
+        """
+        Returns the linear gains of the beams with the given flattened weight
+        vectors at each of the directions, with shape (directions, beams).
+        Same as AntennaBeamformingImt._beam_gains.
+        """
+        if self.antenna.subarray is None:
+            element_g = self.antenna.element.element_pattern(phi, theta)
+        else:
+            element_g = self.antenna.subarray.calculate_gain(phi, theta)
+
+        v_vec = self.antenna._super_position_vector(phi, theta)
+        array_factor = v_vec.reshape(len(phi), -1) @ w_vec.T
+
+        return np.power(10, element_g / 10)[:, np.newaxis] * \
+            np.abs(array_factor) ** 2
+
+    def _integrate(self, gain_function) -> tuple:
+        """
+        Integrates gains over the sphere, refining the quadrature grid until
+        all integrals change by less than the tolerance.
+
+        Parameters:
+            gain_function (callable): returns the linear gains at the given
+                phi and theta values [deg], with shape (directions, values)
 
+        Returns:
+            integral_val (np.array): integral of each of the gains
+            err (np.array): estimated absolute error of the integrals
+        """
+        num_theta = self.MIN_THETA_POINTS
+        previous = self._quadrature(gain_function, num_theta)
+        while True:
+            num_theta *= 2
+            integral_val = self._quadrature(gain_function, num_theta)
+            err = np.abs(integral_val - previous)
+            if np.all(err <= self.tolerance) or \
+                    num_theta >= self.MAX_THETA_POINTS:
+                return integral_val, err
+            previous = integral_val
+
+    def _quadrature(self, gain_function, num_theta: int) -> np.array:
+        """
+        Returns the integral of the gains over the sphere, with a grid of
+        num_theta Gauss-Legendre points in theta and 2 * num_theta equally
+        spaced points in phi.
+        """
+        x, w = np.polynomial.legendre.leggauss(num_theta)
+        half_range = (self.theta_max_rad - self.theta_min_rad) / 2
+        theta = self.theta_min_rad + (x + 1) * half_range
+        theta_weights = w * half_range * np.sin(theta)
+
+        num_phi = 2 * num_theta
+        phi_step = (self.phi_max_rad - self.phi_min_rad) / num_phi
+        phi = self.phi_min_rad + (np.arange(num_phi) + .5) * phi_step
+
+        phi_grid = np.repeat(np.rad2deg(phi), num_theta)
+        theta_grid = np.tile(np.rad2deg(theta), num_phi)
+        weights = np.tile(theta_weights, num_phi) * phi_step
+
+        integral_val = 0
+        for start in range(0, len(weights), self.POINTS_PER_CHUNK):
+            chunk = slice(start, start + self.POINTS_PER_CHUNK)
+            integral_val = integral_val + weights[chunk] @ gain_function(
+                phi_grid[chunk], theta_grid[chunk],
+            )
+        return integral_val
+
+    @staticmethod
+    def _correction_factor(integral_val: np.array, err: np.array) -> tuple:
+        """
+        Returns the correction factors [dB] of the integrated gains and their
+        lower and upper bounds [dB] considering the integration errors.
+        """
         correction_factor = -10 * np.log10(integral_val / (4 * np.pi))
 
-        hig_bound = -10 * np.log10((integral_val - err) / (4 * np.pi))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            hig_bound = -10 * np.log10((integral_val - err) / (4 * np.pi))
         low_bound = -10 * np.log10((integral_val + err) / (4 * np.pi))
 
-        return correction_factor, (low_bound, hig_bound)
+        return correction_factor, np.stack([low_bound, hig_bound], axis=-1)
 
-    def _save_files(self, cf_co, err_co, cf_adj, err_adj, par, file_name):
+    def _save_files(self, data, file_name):
         """
         Saves input correction factor and error values to npz file.
         Data is saved in an .npz file in a dict like data structure with the
@@ -193,37 +432,46 @@ class BeamformingNormalizer(object):
                 theta pairs in phi_range and theta_range. Phi is associated
                 with the lines and Theta is associated with the columns of the
                 array
-            error_co_channel (2D np.array of tuples): lower and upper bounds of
+            error_co_channel (3D np.array): lower and upper bounds of
                 calculated correction factors [dB], considering integration
-                error
+                error, along the last axis
             correction_factor_adj_channel (float):correction factor for single
                 antenna element
             error_adj_channel (tuple): lower and upper bounds [dB] of single
                 antenna element correction factor
-            parameters (ParametersAntennaImt): antenna parameters used in the
-                normalization
+            parameters (str): antenna parameters used in the normalization,
+                as a JSON string
 
         Parameters:
-            cf_co (2D np.array): co-channel correction factor [dB]
-            err_co (2D np.array): co-channel correction factor lower and upper
-                bounds considering integration errors [dB]
-            cf_adj (float): adjacent channel correction factor [dB]
-            err_adj (float): adjancet channel correction factor lower and upper
-                bounds considering integration errors [dB]
-            par (AtennaPar): antenna parameters used in normalization
+            data (dict): normalization data, as returned by
+                calculate_correction_matrix
             file_name (str): name of file to which save normalization data
         """
-        np.savez(
-            file_name,
-            resolution=self.resolution_deg,
-            phi_range=(self.phi_min_deg, self.phi_max_deg),
-            theta_range=(self.theta_min_deg, self.theta_max_deg),
-            correction_factor_co_channel=cf_co,
-            error_co_channel=err_co,
-            correction_factor_adj_channel=cf_adj,
-            error_adj_channel=err_adj,
-            parameters=par,
-        )
+        np.savez(file_name, **data)
+
+
+def _correction_factor_rows(
+    norm: BeamformingNormalizer,
+    phi_vals_deg: np.array,
+) -> tuple:
+    """
+    Calculates the co-channel correction factors of the beams with the given
+    phi escan values and all the theta tilt values of the normalizer.
+    Runs in the worker processes of generate_correction_matrix.
+
+    Returns:
+        tuple: correction factors [dB] with shape (phi values, theta values)
+            and their error bounds [dB] with shape
+            (phi values, theta values, 2)
+    """
+    phi, theta = np.meshgrid(phi_vals_deg, norm.theta_vals_deg, indexing="ij")
+    correction_factor, error = norm.calculate_correction_factors(
+        phi.ravel(), theta.ravel(),
+    )
+    return (
+        correction_factor.reshape(phi.shape),
+        error.reshape(phi.shape + (2,)),
+    )
 
 
 if __name__ == '__main__':
@@ -263,7 +511,8 @@ if __name__ == '__main__':
     norm.generate_correction_matrix(par, file_name)
     data = np.load(file_name)
     correction_factor = data['correction_factor_co_channel']
-    err_low, err_high = zip(*np.ravel(data['error_co_channel']))
+    err_low = data['error_co_channel'][..., 0]
+    err_high = data['error_co_channel'][..., 1]
 
     plt.plot(
         norm.phi_vals_deg, correction_factor,
@@ -283,7 +532,8 @@ if __name__ == '__main__':
     norm.generate_correction_matrix(par, file_name)
     data = np.load(file_name)
     correction_factor = data['correction_factor_co_channel']
-    err_low, err_high = zip(*np.ravel(data['error_co_channel']))
+    err_low = data['error_co_channel'][..., 0]
+    err_high = data['error_co_channel'][..., 1]
 
     plt.plot(
         norm.theta_vals_deg, np.transpose(correction_factor),
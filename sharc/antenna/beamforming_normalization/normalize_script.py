@@ -6,9 +6,11 @@ Created on Mon Mar 12 13:26:45 2018
 
 This script generates the correction factors for the IMT Beamforming Antennas,
 both array and single element, and saves them in files with the given names.
-This script must be ran with the appropriate parameters prior to using any
-normalization in the SHARC simulator, since the simulator merely reads the
-correction factor values from the saved files.
+The simulator reads the correction factor values from the normalization_file
+of the antenna parameters. If that file does not exist, the correction factors
+are calculated with the default resolution and tolerance of
+BeamformingNormalizer and cached, so this script is only needed for other
+resolutions or tolerances.
 For the co-channel scenario (antenna array) the correction factor is a 2-D
 array with the lines representing the azimuth and the columns representing the
 elevation of the beam direction.
@@ -58,13 +60,15 @@ following keys:
         co-channel scenario (antenna array) for each of the phi theta pairs in
         phi_range and theta_range. Phi is associated with the lines and Theta
         is associated with the columns of the array.
-    error_co_channel (2D np.array of tuples): lower and upper bounds of
-        calculated correction factors [dB], considering integral error
+    error_co_channel (3D np.array): lower and upper bounds of calculated
+        correction factors [dB], considering integral error, along the last
+        axis
     correction_factor_adj_channel (float):correction factor for single antenna
         element
     error_adj_channel (tuple): lower and upper bounds [dB] of single antenna
         element correction factor
-    parameters (ParametersAntennaImt): antenna parameters used in the normalization
+    parameters (str): antenna parameters used in the normalization, as a JSON
+        string
 """
 
 from sharc.antenna.beamforming_normalization.beamforming_normalizer import BeamformingNormalizer
@@ -108,6 +112,9 @@ if __name__ == "__main__":
     resolution = 5
     tolerance = 1e-2
 
+    # Number of processes among which the correction factors are calculated
+    num_workers = 1
+
     # Create object
     norm = BeamformingNormalizer(resolution, tolerance)
     ###########################################################################
@@ -116,4 +123,4 @@ if __name__ == "__main__":
         s = 'Generating ' + file
         print(s)
 
-        norm.generate_correction_matrix(par, file)
+        norm.generate_correction_matrix(par, file, num_workers=num_workers)
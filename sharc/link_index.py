@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Array-based index of the links between IMT base stations and their UEs.
+"""
+import numpy as np
+
+
+class LinkIndex(object):
+    """
+    Links between base stations and the UEs they serve, stored in compressed
+    sparse row (CSR) form: the UEs served by base station bs are
+    ue[offsets[bs]:offsets[bs + 1]], in the order of the beams (resource block
+    groups) allocated to them.
+
+    Calculations over all the links are done with whole-array operations on
+    the per link arrays, and the segment helpers reduce them per base station
+    or spread per base station values to the links.
+
+    Attributes
+    ----------
+        offsets (np.array): offsets of the links of each base station, with
+            num_bs + 1 elements
+        ue (np.array): UE of each link
+        bs (np.array): serving base station of each link
+        beam (np.array): beam of the serving base station used by each link
+        serving_bs (np.array): serving base station of each UE, or -1 if the
+            UE is not linked
+    """
+
+    def __init__(self, offsets: np.array, ue: np.array, num_ue: int = None):
+        """
+        Parameters
+        ----------
+            offsets (np.array): offsets of the links of each base station,
+                with one more element than base stations
+            ue (np.array): UE of each link, grouped by base station
+            num_ue (int): optional, total number of UEs. By default, the
+                highest linked UE index plus one.
+        """
+        self.offsets = np.asarray(offsets, dtype=int)
+        self.ue = np.asarray(ue, dtype=int)
+        if self.offsets.ndim != 1 or len(self.offsets) == 0 or self.offsets[0] != 0 or \
+                np.any(np.diff(self.offsets) < 0) or self.offsets[-1] != len(self.ue):
+            raise ValueError("LinkIndex: invalid link offsets")
+
+        self.bs = np.repeat(np.arange(self.num_bs), np.diff(self.offsets))
+        self.beam = np.arange(len(self.ue)) - self.offsets[self.bs]
+
+        if num_ue is None:
+            num_ue = self.ue.max() + 1 if len(self.ue) else 0
+        self.serving_bs = -np.ones(num_ue, dtype=int)
+        self.serving_bs[self.ue] = self.bs
+
+    @classmethod
+    def from_lists(cls, links, num_bs: int = None, num_ue: int = None):
+        """
+        Creates the index from the lists of UEs served by each base station.
+
+        Parameters
+        ----------
+            links (dict or list): lists of UEs, indexed by base station
+            num_bs (int): optional, number of base stations. By default, the
+                highest base station index plus one.
+            num_ue (int): optional, total number of UEs
+
+        Returns
+        -------
+            LinkIndex: the link index
+        """
+        if not isinstance(links, dict):
+            links = dict(enumerate(links))
+        if num_bs is None:
+            num_bs = max(links) + 1 if links else 0
+
+        num_links = np.zeros(num_bs, dtype=int)
+        for bs, ue in links.items():
+            num_links[bs] = len(ue)
+        offsets = np.concatenate(([0], np.cumsum(num_links)))
+        ue = np.array(
+            [u for bs in range(num_bs) for u in links.get(bs, [])], dtype=int,
+        )
+
+        return cls(offsets, ue, num_ue)
+
+    @property
+    def num_bs(self) -> int:
+        """Number of base stations."""
+        return len(self.offsets) - 1
+
+    @property
+    def num_links(self) -> np.array:
+        """Number of links of each base station."""
+        return np.diff(self.offsets)
+
+    def __len__(self) -> int:
+        return self.num_bs
+
+    def __getitem__(self, bs: int) -> np.array:
+        """Returns the UEs served by a base station."""
+        return self.ue[self.offsets[bs]:self.offsets[bs + 1]]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, dict):
+            other = LinkIndex.from_lists(other, self.num_bs)
+        if not isinstance(other, LinkIndex):
+            return NotImplemented
+        return np.array_equal(self.offsets, other.offsets) and \
+            np.array_equal(self.ue, other.ue)
+
+    def __repr__(self) -> str:
+        return f"LinkIndex({self.to_dict()})"
+
+    def to_dict(self) -> dict:
+        """Returns the lists of UEs served by each base station."""
+        return dict([(bs, self[bs].tolist()) for bs in range(self.num_bs)])
+
+    def select(self, bs: np.array) -> "LinkIndex":
+        """
+        Returns the links of some base stations. The i-th base station of the
+        new index is bs[i].
+
+        Parameters
+        ----------
+            bs (np.array): indices of the base stations
+
+        Returns
+        -------
+            LinkIndex: the links of the given base stations
+        """
+        bs = np.asarray(bs, dtype=int)
+        num_links = self.num_links[bs]
+        offsets = np.concatenate(([0], np.cumsum(num_links)))
+        links = np.repeat(self.offsets[bs] - offsets[:-1], num_links) + \
+            np.arange(offsets[-1])
+
+        return LinkIndex(offsets, self.ue[links], len(self.serving_bs))
+
+    def truncate(self, max_links: int) -> "LinkIndex":
+        """
+        Returns the first max_links links of each base station.
+
+        Parameters
+        ----------
+            max_links (int): maximum number of links per base station
+
+        Returns
+        -------
+            LinkIndex: the truncated links
+        """
+        num_links = np.minimum(self.num_links, max_links)
+        offsets = np.concatenate(([0], np.cumsum(num_links)))
+
+        return LinkIndex(
+            offsets, self.ue[self.beam < max_links], len(self.serving_bs),
+        )
+
+    def segment_sum(self, values: np.array) -> np.array:
+        """
+        Sums per link values over the links of each base station.
+
+        Parameters
+        ----------
+            values (np.array): values of the links, along the first axis
+
+        Returns
+        -------
+            np.array: sum of the values of the links of each base station,
+                with num_bs elements along the first axis
+        """
+        values = np.asarray(values)
+        sums = np.zeros((self.num_bs,) + values.shape[1:], dtype=values.dtype)
+        if len(values):
+            nonempty = self.num_links > 0
+            sums[nonempty] = np.add.reduceat(
+                values, self.offsets[:-1][nonempty], axis=0,
+            )
+
+        return sums
+
+    def segment_gather(self, values: np.array) -> np.array:
+        """
+        Spreads per base station values to their links.
+
+        Parameters
+        ----------
+            values (np.array): values of the base stations, along the first
+                axis. If it is two-dimensional, the value of each link is
+                taken from the column of its beam.
+
+        Returns
+        -------
+            np.array: value of the serving base station of each link
+        """
+        values = np.asarray(values)
+        if values.ndim == 2:
+            return values[self.bs, self.beam]
+
+        return values[self.bs]
+
+    def flatten(self, values: np.array) -> np.array:
+        """
+        Flattens per link values grouped by base station, i.e., in the same
+        order as concatenating values[..., self[bs]].flatten() for every base
+        station.
+
+        Parameters
+        ----------
+            values (np.array): values of the links, along the last axis
+
+        Returns
+        -------
+            np.array: the flattened values
+        """
+        values = np.asarray(values)
+        order = np.argsort(
+            np.broadcast_to(self.bs, values.shape), axis=None, kind="stable",
+        )
+
+        return values.ravel()[order]
@@ -25,6 +25,15 @@ def main(argv):
     Parses command-line arguments, sets up logging, initializes the Model, ViewCli, and Controller,
     connects them, and starts the simulation using the provided parameter file.
 
+    The snapshots can be split among several processes with `-w <num_workers>`
+    (or `--workers <num_workers>`). The results are the same as the ones of a
+    single process run. Workers that compute the same cache file (e.g. the
+    beamforming normalization or the atmospheric loss tables) in their first
+    snapshots write it to a temporary file and move it into place, so no
+    worker reads an incomplete file. The cache files are stored in
+    ~/.cache/sharc, or in the directory set in the SHARC_CACHE_DIR
+    environment variable.
+
     Parameters
     ----------
     argv : list
@@ -32,23 +41,30 @@ def main(argv):
     """
     print("Welcome to SHARC!\n")
 
-    param_file = ""
+    usage = "usage: main_cli.py -p <param_file> [-w <num_workers>]"
+    param_file = os.path.join(os.getcwd(), "input", "parameters.yaml")
+    num_workers = 1
 
     try:
-        opts, _ = getopt.getopt(argv, "hp:")
+        opts, _ = getopt.getopt(argv, "hp:w:", ["workers="])
     except getopt.GetoptError:
-        print("usage: main_cli.py -p <param_file>")
+        print(usage)
         sys.exit(2)
 
-    if not opts:
-        param_file = os.path.join(os.getcwd(), "input", "parameters.yaml")
-    else:
-        for opt, arg in opts:
-            if opt == "-h":
-                print("usage: main_cli.py -p <param_file>")
-                sys.exit()
-            elif opt == "-p":
-                param_file = os.path.join(os.getcwd(), arg)
+    for opt, arg in opts:
+        if opt == "-h":
+            print(usage)
+            sys.exit()
+        elif opt == "-p":
+            param_file = os.path.join(os.getcwd(), arg)
+        elif opt in ("-w", "--workers"):
+            try:
+                num_workers = int(arg)
+            except ValueError:
+                num_workers = 0
+            if num_workers < 1:
+                print(usage)
+                sys.exit(2)
 
     # Logger setup start
     sim_logger = SimulationLogger(param_file)
@@ -57,6 +73,7 @@ def main(argv):
     Logging.setup_logging()
 
     model = Model()
+    model.set_num_workers(num_workers)
     view_cli = ViewCli()
     controller = Controller()
 
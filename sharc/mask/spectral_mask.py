@@ -17,6 +17,9 @@ class SpectralMask(ABC):
     implementations, including mask definition and out-of-band power calculation.
     """
 
+    # Maximum number of band powers kept by power_calc_many
+    MAX_CACHED_BANDS = 4096
+
     def __init__(self) -> None:
         """
         Initialize the SpectralMask base class.
@@ -50,57 +53,95 @@ class SpectralMask(ABC):
             band (float): bandwidth of band in which out-of-band power is to
                 be calculated
         """
-        # Limit delta f: edges of band
+        return self.power_calc_many(center_f, band)[()]
+
+    def power_calc_many(self, center_f: np.array, band: np.array) -> np.array:
+        """
+        Calculates out-of-band power in many bands at once, as power_calc.
+
+        The area of the mask rectangles is accumulated once per mask (prefix
+        sums over the breakpoints), so the power in a band is its two partial
+        edge rectangles plus a difference of prefix sums. The power of each
+        distinct band is calculated only once and kept, together with the
+        transmit power, until the mask is set again.
+
+        Parameters:
+            center_f (np.array): center frequencies of the bands in which
+                out-of-band power is to be calculated
+            band (np.array): bandwidths of the bands
+
+        Returns:
+            np.array: out-of-band power in each band, with the broadcast shape
+                of center_f and band
+        """
+        center_f, band = np.broadcast_arrays(
+            np.asarray(center_f, dtype=float), np.asarray(band, dtype=float),
+        )
+        self._update_prefix_sums()
+
+        bands, inverse = np.unique(
+            np.stack([center_f.ravel(), band.ravel()], axis=-1),
+            axis=0,
+            return_inverse=True,
+        )
+        powers = np.array([
+            self._power_cache.get((f, b, self.p_tx), np.nan) for f, b in bands.tolist()
+        ])
+        missing = np.isnan(powers)
+        if np.any(missing):
+            powers[missing] = self._integrate(bands[missing, 0], bands[missing, 1])
+            if len(self._power_cache) + np.count_nonzero(missing) > self.MAX_CACHED_BANDS:
+                self._power_cache.clear()
+            self._power_cache.update(zip(
+                [(f, b, self.p_tx) for f, b in bands[missing].tolist()],
+                powers[missing],
+            ))
+
+        return powers[np.ravel(inverse)].reshape(center_f.shape)
+
+    def _update_prefix_sums(self):
+        """
+        Calculates the linear power density of each mask section and the
+        prefix sums of the section areas, if the mask was set since they were
+        last calculated.
+        """
+        if getattr(self, "_prefix_mask", None) is self.mask_dbm and \
+                self._prefix_freq_lim is self.freq_lim:
+            return
+
+        # power density of each section [mW/MHz]. Sections at the transmit
+        # power level are in-band and do not count
+        self._density = np.where(
+            self.mask_dbm != self.p_tx, np.power(10, self.mask_dbm / 10), 0.,
+        )
+        # area of the sections between consecutive breakpoints
+        self._prefix_area = np.concatenate((
+            [0.], np.cumsum(np.diff(self.freq_lim) * self._density[1:-1]),
+        ))
+        self._prefix_mask = self.mask_dbm
+        self._prefix_freq_lim = self.freq_lim
+        self._power_cache = dict()
+
+    def _integrate(self, center_f: np.array, band: np.array) -> np.array:
+        """
+        Integrates the mask over the given bands using the prefix sums.
+        """
         df_min = center_f - band / 2
         df_max = center_f + band / 2
 
-        # Power in mW
-        power_oob = 0  # Out-of-band power
-
-        # Included delta f values: values of spectral mask delta f break limist
-        # which are contained within the band
-        inc_df = np.where(
-            np.logical_and(
-                self.freq_lim > df_min,
-                self.freq_lim < df_max,
-            ),
-        )[0]
-
-        # If no break limits are within band: the band does not need to be
-        # divided into rectangles
-        if len(inc_df) == 0:
-
-            # Define what is the power emission level at that frequency
-            msk = self.mask_dbm[np.where(self.freq_lim >= df_max)]
-            # If df_max is below smallest break limit
-            if len(msk) == 0:
-                msk = np.array([self.mask_dbm[-1]])
-            # Turn it into scalar
-            pwr_lvl = msk[0]
-
-            if pwr_lvl != self.p_tx:
-                power_oob += band * np.power(10, (pwr_lvl / 10))
-        # If one or more break limitas are within band
-        else:
-
-            # Lower and upper power emission levels
-            pwr_lvl_1 = self.mask_dbm[inc_df[0]]
-            pwr_lvl_2 = self.mask_dbm[inc_df[-1] + 1]
-
-            # Upper and lower rectangles
-            if pwr_lvl_1 != self.p_tx:
-                power_oob += (self.freq_lim[inc_df[0]] - df_min) *\
-                    np.power(10, (pwr_lvl_1 / 10))
-            if pwr_lvl_2 != self.p_tx:
-                power_oob += (df_max - self.freq_lim[inc_df[-1]]) *\
-                    np.power(10, (pwr_lvl_2 / 10))
-
-            # Middle rectangles
-            for df in inc_df[0:-1]:
-                pwr_lvl = self.mask_dbm[df + 1]
-
-                if pwr_lvl != self.p_tx:
-                    power_oob += (self.freq_lim[df + 1] - self.freq_lim[df]) *\
-                        np.power(10, (pwr_lvl / 10))
+        # breakpoints strictly within each band are freq_lim[first:last]
+        first = np.searchsorted(self.freq_lim, df_min, side="right")
+        last = np.searchsorted(self.freq_lim, df_max, side="left")
+        inside = first < last
+
+        # bands with no break limits within them lie in a single section
+        power_oob = band * self._density[last]
+
+        first = first[inside]
+        last = last[inside]
+        power_oob[inside] = \
+            (self.freq_lim[first] - df_min[inside]) * self._density[first] + \
+            (df_max[inside] - self.freq_lim[last - 1]) * self._density[last] + \
+            self._prefix_area[last - 1] - self._prefix_area[first]
 
         return 10 * np.log10(power_oob)
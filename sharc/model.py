@@ -8,11 +8,73 @@ Created on Mon Dec 26 17:03:51 2016
 from sharc.support.observable import Observable
 from sharc.support.observer import Observer
 from sharc.support.enumerations import State
+from sharc.simulation import Simulation
 from sharc.simulation_downlink import SimulationDownlink
 from sharc.simulation_uplink import SimulationUplink
 from sharc.parameters.parameters import Parameters
+from sharc.results import Results
 
+import multiprocessing
 import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Samples are flushed to the output files every SNAPSHOTS_PER_WRITE snapshots
+SNAPSHOTS_PER_WRITE = 10
+
+# Simulation object owned by a snapshot worker process. It is created once per
+# process by _init_snapshot_worker and reused for every batch of snapshots.
+_worker_simulation = None
+
+
+def _init_snapshot_worker(param_file: str):
+    """
+    Initializes a snapshot worker process: reads the parameter file and builds
+    the process' own simulation object.
+
+    Parameters
+    ----------
+    param_file : str
+        Path to the parameter file
+    """
+    global _worker_simulation
+
+    parameters = Parameters()
+    parameters.set_file_name(param_file)
+    parameters.read_params()
+
+    _worker_simulation = Model.create_simulation(parameters, param_file)
+    _worker_simulation.initialize(prepare_output=False)
+
+
+def _run_snapshot_batch(snapshot_numbers: list, seeds: list) -> Results:
+    """
+    Runs a batch of snapshots in a worker process.
+
+    Parameters
+    ----------
+    snapshot_numbers : list
+        Numbers of the snapshots to run, in ascending order
+    seeds : list
+        Seed of each snapshot
+
+    Returns
+    -------
+    Results
+        Samples collected in this batch
+    """
+    simulation = _worker_simulation
+    for snapshot_number, seed in zip(snapshot_numbers, seeds):
+        simulation.snapshot(
+            write_to_file=False,
+            snapshot_number=snapshot_number,
+            seed=seed,
+        )
+
+    results = simulation.results
+    simulation.results = Results()
+
+    return results
 
 
 class Model(Observable):
@@ -26,6 +88,7 @@ class Model(Observable):
         self.simulation = None
         self.parameters = None
         self.param_file = None
+        self.num_workers = 1
 
     def add_observer(self, observer: Observer):
         """
@@ -53,6 +116,46 @@ class Model(Observable):
             message="Loading file:\n" + self.param_file,
         )
 
+    def set_num_workers(self, num_workers: int):
+        """
+        Set the number of processes among which the snapshots are split.
+
+        Parameters
+        ----------
+        num_workers : int
+            Number of worker processes. If 1, snapshots run in this process.
+        """
+        if num_workers < 1:
+            raise ValueError(
+                f"Model: number of workers must be positive, got {num_workers}",
+            )
+        self.num_workers = num_workers
+
+    @staticmethod
+    def create_simulation(
+        parameters: Parameters,
+        param_file: str,
+    ) -> Simulation:
+        """
+        Creates the simulation object for the link direction in the parameters.
+
+        Parameters
+        ----------
+        parameters : Parameters
+            Simulation parameters
+        param_file : str
+            Path to the parameter file
+
+        Returns
+        -------
+        Simulation
+            SimulationDownlink or SimulationUplink object
+        """
+        if parameters.general.imt_link == "DOWNLINK":
+            return SimulationDownlink(parameters, param_file)
+        else:
+            return SimulationUplink(parameters, param_file)
+
     def initialize(self):
         """
         Initializes the simulation and performs all pre-simulation tasks, such
@@ -62,14 +165,9 @@ class Model(Observable):
         self.parameters.set_file_name(self.param_file)
         self.parameters.read_params()
 
-        if self.parameters.general.imt_link == "DOWNLINK":
-            self.simulation = SimulationDownlink(
-                self.parameters, self.param_file,
-            )
-        else:
-            self.simulation = SimulationUplink(
-                self.parameters, self.param_file,
-            )
+        self.simulation = Model.create_simulation(
+            self.parameters, self.param_file,
+        )
         self.simulation.add_observer_list(self.observers)
 
         description = self.get_description()
@@ -129,7 +227,7 @@ class Model(Observable):
         write_to_file = False
         self.current_snapshot += 1
 
-        if not self.current_snapshot % 10:
+        if not self.current_snapshot % SNAPSHOTS_PER_WRITE:
             write_to_file = True
             self.notify_observers(
                 source=__name__,
@@ -142,6 +240,99 @@ class Model(Observable):
             seed=self.secondary_seeds[self.current_snapshot - 1],
         )
 
+    def run_snapshots_in_parallel(self, is_stopped=lambda: False):
+        """
+        Runs all snapshots split among `num_workers` processes.
+
+        The snapshot range is divided into batches that end where a serial run
+        would write its results to file. Each worker process builds its own
+        simulation object and runs whole batches, using the same snapshot
+        seeds as a serial run. Batches are merged back in snapshot order, so
+        the output files are identical to the ones of a serial run.
+
+        The workers are spawned rather than forked, since forking while other
+        threads (e.g., the GUI or the simulation thread) hold locks can
+        deadlock the children.
+
+        Parameters
+        ----------
+        is_stopped : callable, optional
+            Returns True when the simulation has been stopped by the user. It
+            is checked before each batch is merged.
+        """
+        num_snapshots = self.parameters.general.num_snapshots
+        batches = iter([
+            range(first, min(first + SNAPSHOTS_PER_WRITE, num_snapshots + 1))
+            for first in range(1, num_snapshots + 1, SNAPSHOTS_PER_WRITE)
+        ])
+
+        with ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_snapshot_worker,
+            initargs=(self.param_file,),
+        ) as executor:
+            # keep a bounded number of batches in flight so that finished
+            # batches waiting to be merged do not pile up in memory
+            pending = deque()
+            for batch in batches:
+                pending.append(self._submit_snapshot_batch(executor, batch))
+                if len(pending) == 2 * self.num_workers:
+                    break
+
+            while pending:
+                batch, future = pending.popleft()
+                if is_stopped():
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    break
+
+                self.simulation.results.merge(future.result())
+                self.current_snapshot = batch[-1]
+
+                next_batch = next(batches, None)
+                if next_batch is not None:
+                    pending.append(
+                        self._submit_snapshot_batch(executor, next_batch),
+                    )
+
+                if not self.current_snapshot % SNAPSHOTS_PER_WRITE:
+                    self.notify_observers(
+                        source=__name__,
+                        message="Snapshot #" + str(self.current_snapshot),
+                    )
+                    self.simulation.results.write_files(self.current_snapshot)
+                    self.simulation.notify_observers(
+                        source=self.simulation.__module__,
+                        results=self.simulation.results,
+                    )
+
+    def _submit_snapshot_batch(
+        self,
+        executor: ProcessPoolExecutor,
+        batch: range,
+    ) -> tuple:
+        """
+        Submits a batch of snapshots to the worker processes.
+
+        Parameters
+        ----------
+        executor : ProcessPoolExecutor
+            Pool of worker processes
+        batch : range
+            Numbers of the snapshots in the batch
+
+        Returns
+        -------
+        tuple
+            The batch and the future that holds its Results
+        """
+        future = executor.submit(
+            _run_snapshot_batch,
+            list(batch),
+            [self.secondary_seeds[n - 1] for n in batch],
+        )
+        return batch, future
+
     def is_finished(self) -> bool:
         """
         Checks is simulation is finished by checking if maximum number of
@@ -6,6 +6,7 @@ Created on Sat Apr 15 16:29:36 2017
 """
 
 from numpy import load
+import os
 import typing
 
 from dataclasses import dataclass, field
@@ -44,8 +45,10 @@ class ParametersAntennaImt(ParametersBase):
     # (UE).
     normalization: bool = False
 
-    # Normalization files for BS and UE beamforming.
-    normalization_file: str = "antenna/beamforming_normalization/norm.npz"
+    # Normalization files for BS and UE beamforming. If not set, the
+    # correction factors are calculated and cached by the
+    # BeamformingNormalizer.
+    normalization_file: str = None
 
     # Radiation pattern of each antenna element.
     element_pattern: str = "M2101"
@@ -208,9 +211,18 @@ class ParametersAntennaImt(ParametersBase):
 
     def get_normalization_data_if_needed(self):
         """
-        This loads normalization data if normalization should be applied
+        This loads normalization data if normalization should be applied.
+        If no normalization file is set, the data is left empty and
+        AntennaBeamformingImt gets it from the BeamformingNormalizer cache.
         """
-        if self.normalization:
+        if self.normalization and self.normalization_file is not None:
+            if not os.path.exists(self.normalization_file):
+                raise FileNotFoundError(
+                    f"Normalization file {self.normalization_file} does not exist.\n"
+                    "Generate it with the normalize_script.py script or leave "
+                    "normalization_file unset to calculate and cache the "
+                    "correction factors",
+                )
             # Load data, save it in dict and close it
             data = load(self.normalization_file)
             data_dict = {key: data[key] for key in data}
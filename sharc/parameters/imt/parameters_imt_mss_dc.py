@@ -5,8 +5,7 @@ import typing
 from pathlib import Path
 import shapely as shp
 
-from sharc.support.sharc_utils import load_gdf
-from sharc.support.sharc_geom import shrink_countries_by_km, generate_grid_in_multipolygon
+from sharc.support.sharc_geom import load_countries_polygon, generate_grid_in_multipolygon
 from sharc.satellite.utils.sat_utils import lla2ecef
 from sharc.parameters.parameters_base import ParametersBase
 from sharc.parameters.parameters_orbit import ParametersOrbit
@@ -245,20 +244,14 @@ class ParametersSectorPositioning(ParametersBase):
         def _load_geom_from_file_if_needed(self, ctx: str, force_update=False):
             if self.eligibility_polygon is not None and not force_update:
                 return
-            filtered_gdf = load_gdf(
-                self.country_shapes_filename,
-                {
-                    "NAME": self.country_names
-                },
-                ctx,
-            )
-
             # shrink countries and unite
             # them into a single MultiPolygon
-            shrinked = shrink_countries_by_km(
-                filtered_gdf.geometry.values, self.grid_margin_from_border
+            self.grid_borders_polygon = load_countries_polygon(
+                self.country_shapes_filename,
+                self.country_names,
+                self.grid_margin_from_border,
+                ctx,
             )
-            self.grid_borders_polygon = shp.ops.unary_union(shrinked)
 
             assert self.grid_borders_polygon.is_valid, \
                 shp.validation.explain_validity(self.grid_borders_polygon)
@@ -266,9 +259,12 @@ class ParametersSectorPositioning(ParametersBase):
             assert not self.grid_borders_polygon.is_empty, \
                 "Can't have a empty grid_borders_polygon as filter"
 
-            self.eligibility_polygon = shp.ops.unary_union(shrink_countries_by_km(
-                filtered_gdf.geometry.values, self.eligible_sats_margin_from_border
-            ))
+            self.eligibility_polygon = load_countries_polygon(
+                self.country_shapes_filename,
+                self.country_names,
+                self.eligible_sats_margin_from_border,
+                ctx,
+            )
 
     __ALLOWED_TYPES = [
         "ANGLE_FROM_SUBSATELLITE",
@@ -388,20 +384,15 @@ class ParametersSelectActiveSatellite(ParametersBase):
             if self.filter_polygon is not None and not force_update:
                 return
 
-            filtered_gdf = load_gdf(
+            # shrink countries and unite
+            # them into a single MultiPolygon
+            self.filter_polygon = load_countries_polygon(
                 self.country_shapes_filename,
-                {
-                    "NAME": self.country_names
-                },
+                self.country_names,
+                self.margin_from_border,
                 ctx,
             )
 
-            # shrink countries and unite
-            # them into a single MultiPolygon
-            self.filter_polygon = shp.ops.unary_union(shrink_countries_by_km(
-                filtered_gdf.geometry.values, self.margin_from_border
-            ))
-
             assert self.filter_polygon.is_valid, shp.validation.explain_validity(
                 self.filter_polygon)
 
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+import typing
 from sharc.parameters.parameters_base import ParametersBase
 from warnings import warn
 
@@ -31,6 +32,21 @@ class ParametersOrbit(ParametersBase):
     # or let a default be chosen where needed
     t_max: float = None
 
+    # You may tabulate the positions of eccentric orbits over one orbital
+    # period with this time step [s], so that they are interpolated from an
+    # ephemeris cached on disk instead of propagated on every snapshot
+    ephemeris_step_secs: float = None
+
+    __ALLOWED_KEPLER_SOLVERS = [
+        "BESSEL_SERIES",
+        "HALLEY",
+    ]
+
+    # Method used to solve Kepler's equation for eccentric orbits.
+    # The Bessel series is only accurate for eccentricities below ~0.66,
+    # use HALLEY for highly eccentric orbits
+    kepler_solver: typing.Literal["BESSEL_SERIES", "HALLEY"] = "BESSEL_SERIES"
+
     def load_parameters_from_file(self, config_file: str):
         """Load parameters from file and validate."""
         super().load_parameters_from_file(config_file)
@@ -71,6 +87,18 @@ class ParametersOrbit(ParametersBase):
                     self.phasing_deg}. \
                              Must be in the range [0, 360] degrees.")
 
+        if self.kepler_solver not in self.__ALLOWED_KEPLER_SOLVERS:
+            raise ValueError(
+                f"Invalid {ctx}.kepler_solver = {
+                    self.kepler_solver}. \
+                             Must be one of {self.__ALLOWED_KEPLER_SOLVERS}.")
+
+        if self.ephemeris_step_secs is not None and self.ephemeris_step_secs <= 0:
+            raise ValueError(
+                f"Invalid {ctx}.ephemeris_step_secs = {
+                    self.ephemeris_step_secs}. \
+                             Must be positive.")
+
         if self.enable_time_as_only_random_variable:
             if self.t_max is None:
                 warn(
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from dataclasses import dataclass
+import os
 
 from sharc.parameters.parameters_base import ParametersBase
 
@@ -39,6 +40,29 @@ class ParametersP452(ParametersBase):
     clutter_loss: bool = True
     # Determine if clutter is applied to "one_end" or "both_ends"
     clutter_type: str = "one_end"
+    # Directory with SRTM HGT terrain tiles (e.g. S24W047.hgt). If not set,
+    # flat path profiles are considered
+    terrain_dir: str = None
+    # Number of points of the path profiles
+    profile_length: int = 100
+    # Maximum number of terrain tiles kept memory-mapped
+    terrain_cache_size: int = 16
+
+    def validate(self, ctx: str):
+        """Validate the P.452 parameters
+
+        Parameters
+        ----------
+        ctx : str
+            Context of the parameters, used in error messages
+        """
+        if self.profile_length < 4:
+            raise ValueError(f"{ctx}.profile_length must be at least 4")
+        if self.terrain_dir is not None and not os.path.isdir(self.terrain_dir):
+            raise ValueError(
+                f"{ctx}.terrain_dir {self.terrain_dir} is not a directory",
+            )
+        super().validate(ctx)
 
     def load_from_paramters(self, param: ParametersBase):
         """Used to load parameters of P.452 from IMT or system parameters
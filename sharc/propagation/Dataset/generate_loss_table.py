@@ -7,7 +7,8 @@ Created on Thu Aug 31 12:59:12 2017
 import os
 import csv
 import numpy as np
-from sharc.propagation.propagation_p619 import PropagationP619
+from sharc.propagation.atmosphere import ReferenceAtmosphere
+from sharc.propagation.atmospheric_loss_table import trace_atmospheric_gasses_loss
 
 # Constants
 frequency_MHz = 2680.0
@@ -17,23 +18,18 @@ season = "SUMMER"
 apparent_elevation = np.arange(0, 90)  # Elevation angles from 0 to 90 degrees
 city_name = "BRASILIA"
 
-# Initialize the propagation model
-random_number_gen = np.random.RandomState(101)
-propagation = PropagationP619(
-    random_number_gen=random_number_gen,
-    earth_station_alt_m=earth_station_alt_m,
-    earth_station_lat_deg=earth_station_lat_deg,
-    season=season,
+# Calculate the loss for all elevation angles at once
+atmosphere = ReferenceAtmosphere()
+_, _, surf_water_vapour_density = atmosphere.get_reference_atmosphere_p835(
+    earth_station_lat_deg, 0, season=season,
+)
+losses = trace_atmospheric_gasses_loss(
+    atmosphere,
+    frequency_MHz,
+    apparent_elevation,
+    earth_station_alt_m,
+    surf_water_vapour_density,
 )
-
-# Calculate the loss for each elevation angle
-losses = []
-for elevation in apparent_elevation:
-    loss = propagation._get_atmospheric_gasses_loss(
-        frequency_MHz=frequency_MHz,
-        apparent_elevation=elevation,
-    )
-    losses.append(loss)
 
 # Save results to CSV file
 output_dir = os.path.join(os.path.dirname(__file__), 'BRASILIA')
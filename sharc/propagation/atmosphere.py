@@ -242,15 +242,20 @@ class ReferenceAtmosphere:
 
          Parameters
          ----------
-             pressure (float): dry-air partial pressure (hPa)
-             water_vapour_pressure (float): water-vapour partial pressure (hPa)
-             temperature (float): temperature(K)
+             pressure (float or np.array): dry-air partial pressure (hPa)
+             water_vapour_pressure (float or np.array): water-vapour partial pressure (hPa)
+             temperature (float or np.array): temperature(K)
              frequency_MHz (float) : carrier frequency (MHz)
 
          Returns
          -------
-             specific_attenuation (float): specific gaseous attenuation (dB/km)
+             specific_attenuation (float or np.array): specific gaseous attenuation (dB/km)
+                of each layer
          """
+        # the layers are along the first axes and the spectral lines along the last one
+        pressure = np.asarray(pressure, dtype=float)[..., np.newaxis]
+        water_vapour_pressure = np.asarray(water_vapour_pressure, dtype=float)[..., np.newaxis]
+        temperature = np.asarray(temperature, dtype=float)[..., np.newaxis]
 
         theta = 300 / temperature
         f_GHz = frequency_MHz / 1000
@@ -296,12 +301,12 @@ class ReferenceAtmosphere:
                 6.14e-5 / (dw * (1 + (f_GHz / dw) ** 2)) +
                 1.4e-12 * pressure * theta ** 1.5 / (1 + 1.9e-5 * f_GHz ** 1.5)
             )
-        att_oxygen = 0.182 * f_GHz * (np.sum(s_oxygen * sf_oxygen) + nd)
-        att_vapour = 0.182 * f_GHz * np.sum(s_vapour * sf_vapour)
+        att_oxygen = 0.182 * f_GHz * (np.sum(s_oxygen * sf_oxygen, axis=-1) + nd[..., 0])
+        att_vapour = 0.182 * f_GHz * np.sum(s_vapour * sf_vapour, axis=-1)
 
         specific_attenuation = att_oxygen + att_vapour
 
-        return specific_attenuation
+        return specific_attenuation[()]
 
     def get_atmospheric_params(
             self,
@@ -313,7 +318,7 @@ class ReferenceAtmosphere:
 
          Parameters
          ----------
-             altitude_km (float) : altitude [km]
+             altitude_km (float or np.array) : altitude [km]
              water_vapour_density_sea_level (float) : water vapour density at sea level (g/m**3)
              f_MHz (float) : carrier frequency (MHz)
 
@@ -324,24 +329,25 @@ class ReferenceAtmosphere:
              water_vapour_pressure (float): water-vapour partial pressure at altitude_km in reference atmosphere (hPa)
              refractive_index (float) : index of refraction of atmospheric layer at altitude_km
              specific_attenuation (float): specific gaseous attenuation (dB/km)
+             All of them with the shape of altitude_km.
          """
+        altitude_km = np.asarray(altitude_km, dtype=float)
+        index = np.searchsorted(
+            self.ref_atmosphere_altitude_km, altitude_km, side='right',
+        ) - 1
 
-        index = np.where(altitude_km >= np.array(
-            self.ref_atmosphere_altitude_km,),)[0][-1]
-
-        Ti = self.ref_atmosphere_temperature[index]
-        Li = self.ref_atmosphere_temp_grad[index]
-        Hi = self.ref_atmosphere_altitude_km[index]
-        if Hi < 0:
-            Hi = 0
-        Pi = self.ref_atmosphere_pressure[index]
+        Ti = np.array(self.ref_atmosphere_temperature)[index]
+        Li = np.array(self.ref_atmosphere_temp_grad)[index]
+        Hi = np.maximum(np.array(self.ref_atmosphere_altitude_km)[index], 0)
+        Pi = np.array(self.ref_atmosphere_pressure)[index]
 
         temperature = Ti + Li * (altitude_km - Hi)
-        if Li:
-            pressure = Pi * \
-                (Ti / (Ti + Li * (altitude_km - Hi))) ** (34.163 / Li)
-        else:
-            pressure = Pi * np.exp(-34.163 * (altitude_km - Hi) / Ti)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pressure = np.where(
+                Li != 0,
+                Pi * (Ti / (Ti + Li * (altitude_km - Hi))) ** (34.163 / Li),
+                Pi * np.exp(-34.163 * (altitude_km - Hi) / Ti),
+            )
 
         water_vapour_density = water_vapour_density_sea_level * \
             np.exp(-altitude_km / 2)
@@ -359,10 +365,10 @@ class ReferenceAtmosphere:
         )
 
         return [
-            temperature,
-            pressure,
-            water_vapour_pressure,
-            refractive_index,
+            temperature[()],
+            pressure[()],
+            water_vapour_pressure[()],
+            refractive_index[()],
             specific_attenuation]
 
     @staticmethod
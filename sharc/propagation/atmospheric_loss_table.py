@@ -0,0 +1,465 @@
+# -*- coding: utf-8 -*-
+"""
+Tables of the atmospheric gasses loss of Earth-space paths (ITU-R P.619,
+Attachment C).
+
+Ray tracing the reference atmosphere is expensive, so the loss is computed
+once per process over a grid of apparent elevation angles, for each carrier
+frequency and Earth station altitude, and interpolated for every link.
+Below the horizontal, the grid goes down to the horizon dip of the Earth
+station, where the rays become tangent to the ground.
+Computed tables are also stored as binary files, named after a hash of
+their inputs, so later runs load them instead of tracing again.
+"""
+import os
+
+import numpy as np
+from scipy.interpolate import interp1d
+
+from sharc.parameters.constants import EARTH_RADIUS
+from sharc.propagation.atmosphere import ReferenceAtmosphere
+from sharc.support.sharc_utils import get_cache_file_path, write_cache_file
+
+# number of atmosphere layers traced at once
+LAYERS_PER_CHUNK = 10000
+
+
+class AtmosphericLossTable(object):
+    """
+    Atmospheric gasses loss over an (apparent elevation x frequency x
+    altitude) grid, for a given surface water vapour density.
+
+    Attributes
+    ----------
+        surf_water_vapour_density (float): surface water vapour density
+            (g/m**3)
+        elevations (np.array): apparent elevation angles of the grid
+            above the horizontal (degrees)
+        horizon_fractions (np.array): apparent elevation angles of the grid
+            below the horizontal, as fractions of the horizon dip
+        frequencies (np.array): carrier frequencies of the grid (MHz)
+        altitudes (np.array): Earth station altitudes of the grid (m)
+        losses (np.array): atmospheric gasses loss (dB), with shape
+            (horizon_fractions + elevations, frequencies, altitudes)
+        cache_dir (str): directory of the binary table files, or None for
+            the one of sharc_utils.get_cache_dir
+    """
+
+    # apparent elevation angles of the tables [degrees], denser near the
+    # horizon where the loss changes faster
+    ELEVATIONS = np.concatenate([np.arange(0., 10., .25), np.arange(10., 90.5, 1.)])
+
+    # apparent elevation angles of the tables below the horizontal, as
+    # fractions of the horizon dip of the Earth station
+    HORIZON_FRACTIONS = np.linspace(-1., 0., 11)[:-1]
+
+    # tables already built in this process
+    _tables = {}
+
+    def __init__(
+        self,
+        surf_water_vapour_density: float,
+        elevations: np.array = None,
+        cache_dir: str = None,
+        horizon_fractions: np.array = None,
+    ):
+        """
+        Parameters
+        ----------
+            surf_water_vapour_density (float): surface water vapour density
+                (g/m**3)
+            elevations (np.array): apparent elevation angles of the grid
+                above the horizontal (degrees). Defaults to ELEVATIONS
+            cache_dir (str): directory of the binary table files. Defaults
+                to the one of sharc_utils.get_cache_dir
+            horizon_fractions (np.array): apparent elevation angles of the
+                grid below the horizontal, as fractions in [-1, 0) of the
+                horizon dip. Defaults to HORIZON_FRACTIONS
+        """
+        self.surf_water_vapour_density = float(surf_water_vapour_density)
+        self.elevations = np.array(
+            self.ELEVATIONS if elevations is None else elevations, dtype=float,
+        )
+        self.horizon_fractions = np.array(
+            self.HORIZON_FRACTIONS if horizon_fractions is None else horizon_fractions,
+            dtype=float,
+        )
+        self.cache_dir = cache_dir
+        self.atmosphere = ReferenceAtmosphere()
+
+        self.frequencies = np.empty(0)
+        self.altitudes = np.empty(0)
+        self.losses = np.empty(
+            (self.horizon_fractions.size + self.elevations.size, 0, 0),
+        )
+
+    @classmethod
+    def get_table(
+        cls,
+        surf_water_vapour_density: float,
+        cache_dir: str = None,
+    ):
+        """
+        Returns the table of a surface water vapour density, creating it
+        only once per process.
+        """
+        key = (float(surf_water_vapour_density), cache_dir)
+        if key not in cls._tables:
+            cls._tables[key] = cls(surf_water_vapour_density, cache_dir=cache_dir)
+        return cls._tables[key]
+
+    def get_loss(
+        self,
+        apparent_elevation: np.array,
+        frequency_MHz: float,
+        altitude_m: float,
+    ) -> np.array:
+        """
+        Returns the atmospheric gasses loss of each link, interpolated
+        linearly between the apparent elevations of the grid (and
+        extrapolated outside it, e.g. for rays below the horizon dip, which
+        hit the ground).
+
+        Parameters
+        ----------
+            apparent_elevation (np.array): apparent elevation angles at the
+                Earth station (degrees)
+            frequency_MHz (float): carrier frequency (MHz)
+            altitude_m (float): Earth station altitude (m)
+
+        Returns
+        -------
+            np.array: atmospheric gasses loss (dB) with the shape of
+                apparent_elevation
+        """
+        frequency_MHz = float(np.ravel(frequency_MHz)[0])
+        altitude_m = float(altitude_m)
+        self._extend(frequency_MHz, altitude_m)
+
+        freq_index = np.nonzero(self.frequencies == frequency_MHz)[0][0]
+        alt_index = np.nonzero(self.altitudes == altitude_m)[0][0]
+        dip = self.get_horizon_dip(frequency_MHz, altitude_m)
+        losses = self.losses[:, freq_index, alt_index]
+        if dip > 0:
+            elevations = np.concatenate([dip * self.horizon_fractions, self.elevations])
+        else:
+            # stations on the ground have no rays below the horizontal
+            elevations = self.elevations
+            losses = losses[self.horizon_fractions.size:]
+        interpolation_function = interp1d(
+            elevations,
+            losses,
+            kind='linear',
+            fill_value='extrapolate',
+        )
+        return interpolation_function(apparent_elevation)
+
+    def get_horizon_dip(self, frequency_MHz: float, altitude_m: float) -> float:
+        """
+        Returns the horizon dip of an Earth station, i.e. minus the apparent
+        elevation of the rays that become tangent to the ground.
+
+        Parameters
+        ----------
+            frequency_MHz (float): carrier frequency (MHz)
+            altitude_m (float): Earth station altitude (m)
+
+        Returns
+        -------
+            float: horizon dip (degrees), 0 for stations on the ground
+        """
+        return get_horizon_dip(
+            self.atmosphere, frequency_MHz, altitude_m,
+            self.surf_water_vapour_density,
+        )
+
+    def _extend(self, frequency_MHz: float, altitude_m: float):
+        """
+        Adds a frequency and an altitude to the grid, computing the missing
+        table columns.
+        """
+        if frequency_MHz in self.frequencies and altitude_m in self.altitudes:
+            return
+
+        frequencies = np.union1d(self.frequencies, [frequency_MHz])
+        altitudes = np.union1d(self.altitudes, [altitude_m])
+        losses = np.empty((self.losses.shape[0], frequencies.size, altitudes.size))
+
+        for i, frequency in enumerate(frequencies):
+            for j, altitude in enumerate(altitudes):
+                old_i = np.nonzero(self.frequencies == frequency)[0]
+                old_j = np.nonzero(self.altitudes == altitude)[0]
+                if old_i.size and old_j.size:
+                    losses[:, i, j] = self.losses[:, old_i[0], old_j[0]]
+                else:
+                    losses[:, i, j] = self._get_column(frequency, altitude)
+
+        self.frequencies = frequencies
+        self.altitudes = altitudes
+        self.losses = losses
+
+    def _get_column(self, frequency_MHz: float, altitude_m: float) -> np.array:
+        """
+        Returns the loss over the grid elevations for a frequency and an
+        altitude, loading it from the binary table file when available.
+        """
+        dip = self.get_horizon_dip(frequency_MHz, altitude_m)
+        elevations = np.concatenate([dip * self.horizon_fractions, self.elevations])
+        key = repr((
+            "P619-C", self.surf_water_vapour_density, frequency_MHz,
+            altitude_m, elevations.tolist(),
+        ))
+        file_path = get_cache_file_path(key, ".npy", self.cache_dir)
+        if os.path.exists(file_path):
+            return np.load(file_path)
+
+        column = trace_atmospheric_gasses_loss(
+            self.atmosphere, frequency_MHz, elevations, altitude_m,
+            self.surf_water_vapour_density,
+        )
+
+        write_cache_file(file_path, lambda f: np.save(f, column))
+
+        return column
+
+
+def get_horizon_dip(
+    atmosphere: ReferenceAtmosphere,
+    frequency_MHz: float,
+    altitude_m: float,
+    surf_water_vapour_density: float,
+) -> float:
+    """
+    Returns the horizon dip of an Earth station, i.e. minus the apparent
+    elevation of the rays that become tangent to the ground.
+
+    Parameters
+    ----------
+        atmosphere (ReferenceAtmosphere) : reference atmosphere
+        frequency_MHz (float) : center frequency [MHz]
+        altitude_m (float) : Earth station altitude [m]
+        surf_water_vapour_density (float) : surface water vapour density
+            (g/m**3)
+
+    Returns
+    -------
+        float: horizon dip (degrees), 0 for stations on the ground
+    """
+    h = max(altitude_m / 1000, 0)
+    rho_s = surf_water_vapour_density * np.exp(h / 2)
+    n_0 = atmosphere.get_atmospheric_params(0., rho_s, frequency_MHz)[3]
+    n_h = atmosphere.get_atmospheric_params(h, rho_s, frequency_MHz)[3]
+
+    # n * r * cos(elevation) is the same along the ray
+    earth_radius_km = EARTH_RADIUS / 1000
+    cos_dip = n_0 * earth_radius_km / (n_h * (earth_radius_km + h))
+    return float(np.degrees(np.arccos(min(cos_dip, 1.))))
+
+
+def trace_atmospheric_gasses_loss(
+    atmosphere: ReferenceAtmosphere,
+    frequency_MHz: float,
+    apparent_elevation: np.array,
+    altitude_m: float,
+    surf_water_vapour_density: float,
+    layers_per_chunk: int = LAYERS_PER_CHUNK,
+) -> np.array:
+    """
+    Calculates atmospheric gasses loss based on ITU-R P.619, Attachment C,
+    tracing rays through the layers of the reference atmosphere.
+
+    The layer grid, with its refractive index and specific attenuation, does
+    not depend on the elevation, so it is computed once and all rays are
+    traced together. The incidence angle of a ray in each layer follows from
+    the products of the refraction (Snell's law) and curvature factors of the
+    layers below it.
+
+    Rays below the horizon dip (see get_horizon_dip) hit the ground before
+    becoming horizontal, so they cannot be traced.
+
+    Parameters
+    ----------
+        atmosphere (ReferenceAtmosphere) : reference atmosphere
+        frequency_MHz (float) : center frequency [MHz]
+        apparent_elevation (np.array) : apparent elevation angles at the
+            Earth-based station (degrees), not below minus the horizon dip
+        altitude_m (float) : Earth station altitude [m]
+        surf_water_vapour_density (float) : surface water vapour density
+            (g/m**3)
+        layers_per_chunk (int) : number of layers traced at once, which
+            bounds the memory used
+
+    Returns
+    -------
+        np.array: atmospheric loss (dB) with the shape of apparent_elevation
+
+    Raises
+    ------
+        ValueError: if an apparent elevation is below minus the horizon dip
+    """
+    elevation = np.asarray(apparent_elevation, dtype=float)
+    flat_elevation = elevation.ravel()
+
+    dip = get_horizon_dip(
+        atmosphere, frequency_MHz, altitude_m, surf_water_vapour_density,
+    )
+    if np.any(flat_elevation < -dip):
+        raise ValueError(
+            "trace_atmospheric_gasses_loss: apparent elevation "
+            f"{np.min(flat_elevation)} is below the horizon dip (-{dip} degrees) "
+            f"of an Earth station at {altitude_m} m",
+        )
+
+    h = altitude_m / 1000  # ray altitude in km
+    rho_s = surf_water_vapour_density * \
+        np.exp(h / 2)  # water vapour density at h
+    # sine of the incidence angle
+    sin_beta = np.sin((90 - np.abs(flat_elevation)) * np.pi / 180.)
+
+    a_acc = np.zeros(flat_elevation.size)  # accumulated attenuation (in dB)
+    start_altitude = np.full(flat_elevation.size, h)
+
+    # rays below the horizontal go down to their tangent layer first
+    down = flat_elevation < 0
+    if np.any(down):
+        a_acc[down], start_altitude[down], sin_beta[down] = _trace_down(
+            atmosphere, frequency_MHz, sin_beta[down], h, rho_s,
+            layers_per_chunk,
+        )
+
+    for altitude in np.unique(start_altitude):
+        rays = start_altitude == altitude
+        a_acc[rays] += _trace_up(
+            atmosphere, frequency_MHz, sin_beta[rays], altitude, rho_s,
+            layers_per_chunk,
+        )
+
+    return a_acc.reshape(elevation.shape)
+
+
+def _trace_up(
+    atmosphere: ReferenceAtmosphere,
+    frequency_MHz: float,
+    sin_beta: np.array,
+    h: float,
+    rho_s: float,
+    layers_per_chunk: int,
+) -> np.array:
+    """
+    Returns the attenuation of rays going up from altitude h [km] to the top
+    of the atmosphere, given the sine of their incidence angles at h.
+    """
+    earth_radius_km = EARTH_RADIUS / 1000
+    delta = .0001 + .01 * max(h, 0)  # layer thickness
+
+    # lower altitude and radius of the layers, up to the first one above
+    # 100 km, accumulated layer by layer
+    num_layers = max(int(np.ceil((100 - h) / delta)), 0) + 2
+    steps = np.full(num_layers, delta)
+    altitudes = np.cumsum(np.concatenate([[h], steps]))
+    radii = np.cumsum(np.concatenate([[earth_radius_km + h], steps]))
+    num_layers = 1 + np.count_nonzero(altitudes[1:] < 100)
+
+    # n * r * sin(beta) is the same in every layer
+    n_0 = atmosphere.get_atmospheric_params(h, rho_s, frequency_MHz)[3]
+    ray_constant = n_0 * radii[0] * sin_beta[:, np.newaxis]
+
+    a_acc = np.zeros(sin_beta.size)
+    for first in range(0, num_layers, layers_per_chunk):
+        layers = slice(first, min(first + layers_per_chunk, num_layers))
+        r = radii[layers]
+        t, p, e, n, gamma = atmosphere.get_atmospheric_params(
+            altitudes[layers], rho_s, frequency_MHz,
+        )
+        sin_b = np.minimum(ray_constant / (n * r), 1)
+        r_cos_b = r * np.sqrt(1 - sin_b ** 2)
+        # path length in the layer
+        ds = (2 * r * delta + delta ** 2) / \
+            (np.sqrt(r_cos_b ** 2 + 2 * r * delta + delta ** 2) + r_cos_b)
+        a_acc += ds @ np.atleast_1d(gamma)
+
+    return a_acc
+
+
+def _trace_down(
+    atmosphere: ReferenceAtmosphere,
+    frequency_MHz: float,
+    sin_beta: np.array,
+    h: float,
+    rho_s: float,
+    layers_per_chunk: int,
+) -> tuple:
+    """
+    Traces rays going down from altitude h [km] until they become horizontal,
+    given the sine of their incidence angles at h.
+
+    Returns
+    -------
+        tuple: attenuation (dB) of the rays, altitude [km] of their tangent
+            layers and the sine of their incidence angles there
+    """
+    earth_radius_km = EARTH_RADIUS / 1000
+    delta = .0001 + 0.01 * max(h, 0)  # layer thickness
+    r = earth_radius_km + h - delta  # radius of lower edge
+
+    a_acc = np.zeros(sin_beta.size)
+    tangent_altitude = np.zeros(sin_beta.size)
+    tangent_sin_beta = np.zeros(sin_beta.size)
+    rays = np.arange(sin_beta.size)
+
+    while rays.size:
+        # upper altitude, lower edge radius and thickness of the next layers,
+        # plus the first layer of the next chunk
+        altitudes = np.zeros(layers_per_chunk + 1)
+        radii = np.zeros(layers_per_chunk + 1)
+        deltas = np.zeros(layers_per_chunk + 1)
+        for k in range(layers_per_chunk + 1):
+            altitudes[k], radii[k], deltas[k] = h, r, delta
+            h -= delta
+            r -= delta
+            delta = 0.0001 + 0.01 * max(h, 0)
+        h, r, delta = altitudes[-1], radii[-1], deltas[-1]
+
+        t, p, e, n, gamma = atmosphere.get_atmospheric_params(
+            altitudes, rho_s, frequency_MHz,
+        )
+        r_up = radii + deltas
+        # sine of the incidence angle of the rays in each layer
+        factors = n[:-1] / n[1:] * r_up[:-1] / radii[:-1]
+        sin_b = sin_beta[:, np.newaxis] * np.concatenate(
+            [[1], np.cumprod(factors)],
+        )[np.newaxis, :]
+
+        # the ray becomes horizontal in the first layer with m >= 0
+        m = r_up[:-1] * sin_b[:, :-1] - radii[:-1]
+        is_tangent = m >= 0
+        tangent = np.where(
+            np.any(is_tangent, axis=1),
+            np.argmax(is_tangent, axis=1),
+            layers_per_chunk,
+        )
+        crossed = np.arange(layers_per_chunk) < tangent[:, np.newaxis]
+
+        with np.errstate(invalid='ignore'):
+            r_up_cos_b = r_up[:-1] * np.sqrt(1 - sin_b[:, :-1] ** 2)
+            ds = (2 * radii[:-1] * deltas[:-1] + deltas[:-1] ** 2) / (
+                r_up_cos_b +
+                np.sqrt(radii[:-1] ** 2 - (r_up[:-1] * sin_b[:, :-1]) ** 2)
+            )
+        a_acc[rays] += np.where(crossed, ds, 0) @ gamma[:-1]
+
+        done = tangent < layers_per_chunk
+        j = tangent[done]
+        m_j = m[done, j]
+        dh = 2 * np.sqrt(
+            2 * radii[j] * (deltas[j] - m_j) +
+            deltas[j] ** 2 - m_j ** 2,
+        )  # horizontal path
+        a_acc[rays[done]] += dh * gamma[j]
+        tangent_altitude[rays[done]] = altitudes[j]
+        tangent_sin_beta[rays[done]] = sin_b[done, j]
+
+        sin_beta = sin_b[~done, -1]
+        rays = rays[~done]
+
+    return a_acc, tangent_altitude, tangent_sin_beta
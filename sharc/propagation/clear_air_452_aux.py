@@ -2,11 +2,11 @@ import numpy as np
 
 
 def inv_cum_norm(x):
-    """Compute the inverse cumulative normal distribution for a given probability x."""
-    if x < 0.000001:
-        x = 0.000001
+    """Compute the inverse cumulative normal distribution for a given probability x.
+    x may be a scalar or an array of probabilities."""
+    x = np.maximum(x, 0.000001)
 
-    if x > 0.5:
+    if np.any(x > 0.5):
         error_message = "WARNING: This function (inv_cum_norm) is defined for arguments not larger than 0.5"
         print(error_message)
 
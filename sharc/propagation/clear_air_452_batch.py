@@ -0,0 +1,545 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized ITU-R P.452 clear-air calculations for many links at once.
+
+Each function mirrors the static method of PropagationClearAir with the same
+name, but receives the path profiles of N links as (N x profile length)
+arrays and the per-link parameters as arrays of length N. Branches of the
+scalar implementation are replaced by masked selections, so every link goes
+through exactly the same equations as in the per-link implementation.
+"""
+import numpy as np
+
+from sharc.propagation.clear_air_452_aux import p676_ga
+from sharc.propagation.clear_air_452_aux import inv_cum_norm
+
+
+def gas_attenuation(f, press, rho, T):
+    """Specific attenuation due to dry air and water vapour (dB/km) for each
+    link. p676_ga is evaluated once for every distinct water vapour density.
+
+    Parameters
+    ----------
+    f : float
+        Frequency in GHz.
+    press : float
+        Pressure in hPa.
+    rho : np.ndarray
+        Water vapour density of each link (g/m^3).
+    T : float
+        Temperature in Kelvin.
+
+    Returns
+    -------
+    np.ndarray
+        Specific attenuation of each link.
+    """
+    rho = np.asarray(rho, dtype=float)
+    unique_rho, inverse = np.unique(rho, return_inverse=True)
+    gamma = np.array([
+        np.sum(p676_ga(f, press, r, T, True)) for r in unique_rho
+    ])
+    return gamma[inverse].reshape(rho.shape)
+
+
+def _zone_runs(d, zone, zone_r):
+    """Length of each continuous section of the profiles in zone zone_r,
+    following PropagationClearAir.longest_cont_dist.
+
+    Returns
+    -------
+    tuple
+        Link index and length (km) of every section.
+    """
+    n_points = d.shape[1]
+    zone = np.broadcast_to(zone, d.shape)
+    if zone_r == 12:
+        aux = (zone == 1) | (zone == 2)
+    else:
+        aux = zone == zone_r
+
+    aux = np.pad(aux.astype(int), ((0, 0), (1, 1)))
+    aux = np.diff(aux, axis=1)
+    rows, start = np.nonzero(aux == 1)
+    _, stop = np.nonzero(aux == -1)
+    stop = stop - 1
+
+    d_stop = d[rows, stop]
+    delta = np.where(
+        d_stop < d[rows, -1],
+        (d[rows, np.minimum(stop + 1, n_points - 1)] - d_stop) / 2.0,
+        0.0,
+    )
+    delta = delta + np.where(
+        d[rows, start] > 0,
+        (d_stop - d[rows, stop - 1]) / 2.0,
+        0.0,
+    )
+
+    return rows, d_stop - d[rows, start] + delta
+
+
+def longest_cont_dist(d, zone, zone_r):
+    """Longest continuous distance of each profile in a given zone."""
+    rows, lengths = _zone_runs(d, zone, zone_r)
+    dm = np.zeros(d.shape[0])
+    np.maximum.at(dm, rows, lengths)
+    return dm
+
+
+def path_fraction(d, zone, zone_r):
+    """Fraction of each profile in a given zone."""
+    rows, lengths = _zone_runs(d, zone, zone_r)
+    dm = np.bincount(rows, weights=lengths, minlength=d.shape[0])
+    return dm / (d[:, -1] - d[:, 0])
+
+
+def smooth_earth_heights(d, h, htg, hrg, ae, f):
+    """Smooth Earth heights and related parameters of each profile.
+    See PropagationClearAir.smooth_earth_heights.
+    """
+    n_links, n = d.shape
+    dtot = d[:, -1]
+    link = np.arange(n_links)
+
+    # Tx and Rx antenna heights above mean sea level amsl(m)
+    hts = h[:, 0] + htg
+    hrs = h[:, -1] + hrg
+
+    # Section 5.1.6.2
+    v1 = np.sum((d[:, 1:] - d[:, :-1]) * (h[:, 1:] + h[:, :-1]), axis=1)  # Eq(161)
+    v2 = np.sum(
+        (d[:, 2:] - d[:, 1:-1]) * (
+            h[:, 2:] * (2 * d[:, 2:] + d[:, 1:-1]) +
+            h[:, 1:-1] * (d[:, 2:] + 2 * d[:, 1:-1])  # Eq(162)
+        ),
+        axis=1,
+    )
+
+    hst = (2 * v1 * dtot - v2) / dtot ** 2  # Eq(163)
+    hsr = (v2 - v1 * dtot) / dtot ** 2  # Eq(164)
+
+    # Section 5.1.6.3
+    di = d[:, 1:n - 1]
+    hi = h[:, 1:n - 1]
+    dtot_c = dtot[:, np.newaxis]
+    HH = hi - (hts[:, np.newaxis] * (dtot_c - di) + hrs[:, np.newaxis] * di) / dtot_c  # Eq(165d)
+    hobs = np.max(HH, axis=1)  # Eq(165a)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        alpha_obt = np.max(HH / di, axis=1)  # Eq(165b)
+        alpha_obr = np.max(HH / (dtot_c - di), axis=1)  # Eq(165c)
+
+        # provisional values for the Tx and Rx smooth surface heights
+        gt = alpha_obt / (alpha_obt + alpha_obr)  # Eq(166e)
+        gr = alpha_obr / (alpha_obt + alpha_obr)  # Eq(166f)
+
+    hstp = np.where(hobs <= 0, hst, hst - hobs * gt)
+    hsrp = np.where(hobs <= 0, hsr, hsr - hobs * gr)
+
+    # final values as required by the diffraction model
+    hstd = np.where(hstp >= h[:, 0], h[:, 0], hstp)
+    hsrd = np.where(hsrp > h[:, -1], h[:, -1], hsrp)
+
+    # Interfering antenna horizon elevation angle and distance
+    theta = 1000 * np.arctan(
+        (hi - hts[:, np.newaxis]) / (1000 * di) - di / (2 * ae),
+    )
+    theta_t = np.max(theta, axis=1)
+
+    theta_td = 1000 * np.arctan((hrs - hts) / (1000 * dtot) - dtot / (2 * ae))
+    theta_rd = 1000 * np.arctan((hts - hrs) / (1000 * dtot) - dtot / (2 * ae))
+
+    pathtype = np.where(theta_t > theta_td, 2, 1)  # 2: transhorizon, 1: los
+
+    lt = np.argmax(theta, axis=1) + 1
+    dlt = d[link, lt]
+
+    # Interfered-with antenna horizon elevation angle and distance
+    theta = 1000 * np.arctan(
+        (hi - hrs[:, np.newaxis]) / (1000 * (dtot_c - di)) - (dtot_c - di) / (2 * ae),
+    )
+    theta_r = np.max(theta, axis=1)
+
+    lr = np.argmax(theta, axis=1) + 1
+    dlr = dtot - d[link, lr]
+
+    # LoS paths
+    los = pathtype == 1
+    theta_t = np.where(los, theta_td, theta_t)
+    theta_r = np.where(los, theta_rd, theta_r)
+
+    lamb = 0.3 / f
+    Ce = 1 / ae
+    with np.errstate(divide="ignore", invalid="ignore"):
+        nu = (
+            hi + 500 * Ce * di * (dtot_c - di) -
+            (hts[:, np.newaxis] * (dtot_c - di) + hrs[:, np.newaxis] * di) / dtot_c
+        ) * np.sqrt(0.002 * dtot_c / (lamb * di * (dtot_c - di)))
+    lt_los = np.argmax(nu, axis=1) + 1
+    dlt_los = d[link, lt_los]
+    dlr_los = dtot - dlt_los
+    # last intermediate point not beyond the LoS horizon
+    beyond = dlr_los[:, np.newaxis] <= dtot_c - di
+    lr_los = n - 2 - np.argmax(beyond[:, ::-1], axis=1)
+
+    lt = np.where(los, lt_los, lt)
+    lr = np.where(los, lr_los, lr)
+    dlt = np.where(los, dlt_los, dlt)
+    dlr = np.where(los, dlr_los, dlr)
+
+    # Angular distance
+    theta_tot = 1e3 * dtot / ae + theta_t + theta_r
+
+    # Section 5.1.6.4 Ducting / layer-reflection model
+    hst = np.minimum(hst, h[:, 0])
+    hsr = np.minimum(hsr, h[:, -1])
+
+    # Slope of the smooth - Earth surface
+    m = (hsr - hst) / dtot
+
+    # The terminal effective heigts for the ducting / layer - reflection
+    # model
+    hte = htg + h[:, 0] - hst
+    hre = hrg + h[:, -1] - hsr
+
+    point = np.arange(n)
+    between = (point >= lt[:, np.newaxis]) & (point <= lr[:, np.newaxis])
+    hm = np.max(
+        np.where(between, h - (hst[:, np.newaxis] + m[:, np.newaxis] * d), -np.inf),
+        axis=1,
+    )
+
+    return hst, hsr, hstd, hsrd, hte, hre, hm, dlt, dlr, theta_t, theta_r, theta_tot, pathtype
+
+
+def pl_los(d, f, p, b0, w, T, press, dlt, dlr):
+    """Basic transmission loss due to LoS propagation of each link.
+    See PropagationClearAir.pl_los.
+    """
+    # water vapor density
+    rho = 7.5 + 2.5 * w
+
+    Ag = gas_attenuation(f, press, rho, T) * d
+
+    Lbfsg = 92.5 + 20.0 * np.log10(f) + 20.0 * np.log10(d) + Ag
+
+    # Corrections for multipath and focusing effects at p and b0
+    Esp = 2.6 * (1 - np.exp(-0.1 * (dlt + dlr))) * np.log10(p / 50)
+    Esb = 2.6 * (1 - np.exp(-0.1 * (dlt + dlr))) * np.log10(b0 / 50)
+
+    return Lbfsg, Lbfsg + Esp, Lbfsg + Esb
+
+
+def tl_tropo(dtot, theta, f, p, T, press, N0, Gt, Gr):
+    """Basic transmission loss due to troposcatter of each link.
+    See PropagationClearAir.tl_tropo.
+    """
+    Lf = 25 * np.log10(f) - 2.5 * (np.log10(f / 2)) ** 2
+
+    # aperture to medium coupling loss(dB)
+    Lc = 0.051 * np.exp(0.055 * (Gt + Gr))
+
+    Ag = gas_attenuation(f, press, np.full(np.shape(dtot), 3.0), T) * dtot
+
+    return 190 + Lf + 20 * np.log10(dtot) + 0.573 * theta - \
+        0.15 * N0 + Lc + Ag - 10.1 * (-np.log10(p / 50)) ** (0.7)
+
+
+def tl_anomalous(
+    dtot, dlt, dlr, dct, dcr, dlm, hts, hrs, hte, hre, hm,
+    theta_t, theta_r, f, p, T, press, omega, ae, b0,
+):
+    """Basic transmission loss due to anomalous propagation of each link.
+    See PropagationClearAir.tl_anomalous.
+    """
+    Alf = 0
+    if f < 0.5:
+        Alf = 45.375 - 137.0 * f + 92.5 * f * f
+
+    # site - shielding diffraction losses (48)
+    theta_t1 = theta_t - 0.1 * dlt
+    theta_r1 = theta_r - 0.1 * dlr
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        Ast = np.where(
+            theta_t1 > 0,
+            20 * np.log10(1 + 0.361 * theta_t1 * np.sqrt(f * dlt)) +
+            0.264 * theta_t1 * f ** (1 / 3),
+            0,
+        )
+        Asr = np.where(
+            theta_r1 > 0,
+            20 * np.log10(1 + 0.361 * theta_r1 * np.sqrt(f * dlr)) +
+            0.264 * theta_r1 * f ** (1 / 3),
+            0,
+        )
+
+    # over - sea surface duct coupling correction (49) and (49a)
+    Act = np.where(
+        (dct <= 5) & (dct <= dlt) & (omega >= 0.75),
+        -3 * np.exp(-0.25 * dct * dct) * (1 + np.tanh(0.07 * (50 - hts))),
+        0,
+    )
+    Acr = np.where(
+        (dcr <= 5) & (dcr <= dlr) & (omega >= 0.75),
+        -3 * np.exp(-0.25 * dcr * dcr) * (1 + np.tanh(0.07 * (50 - hrs))),
+        0,
+    )
+
+    # specific attenuation(51)
+    gamma_d = 5e-5 * ae * f ** (1 / 3)
+
+    # angular distance(corrected where appropriate) (52 - 52a)
+    theta_t1 = np.where(theta_t > 0.1 * dlt, 0.1 * dlt, theta_t)
+    theta_r1 = np.where(theta_r > 0.1 * dlr, 0.1 * dlr, theta_r)
+
+    theta1 = 1e3 * dtot / ae + theta_t1 + theta_r1
+
+    dI = np.minimum(dtot - dlt - dlr, 40)
+
+    mu3 = np.where(hm > 10, np.exp(-4.6e-5 * (hm - 10) * (43 + 6 * dI)), 1)
+
+    tau = 1 - np.exp(-(4.12e-4 * dlm ** 2.41))
+
+    epsilon = 3.5
+
+    alpha = np.maximum(-0.6 - epsilon * 1e-9 * dtot ** (3.1) * tau, -3.4)
+
+    # correction for path geometry:
+    mu2 = np.minimum(
+        (500 / ae * dtot ** 2 / (np.sqrt(hte) + np.sqrt(hre)) ** 2) ** alpha,
+        1,
+    )
+
+    beta = b0 * mu2 * mu3
+
+    Gamma = 1.076 / (2.0058 - np.log10(beta)) ** 1.012 * np.exp(
+        -(9.51 - 4.8 * np.log10(beta) + 0.198 * (np.log10(beta)) ** 2) * 1e-6 * dtot ** (1.13),
+    )
+
+    # time percentage variablity(cumulative distribution):
+    Ap = -12 + (1.2 + 3.7e-3 * dtot) * \
+        np.log10(p / beta) + 12 * (p / beta) ** Gamma
+
+    Adp = gamma_d * theta1 + Ap
+
+    # water vapor density
+    rho = 7.5 + 2.5 * omega
+
+    Ag = gas_attenuation(f, press, rho, T) * dtot
+
+    # total of fixed coupling losses (47)
+    Af = 102.45 + 20 * np.log10(f) + 20 * np.log10(dlt + dlr) + \
+        Alf + Ast + Asr + Act + Acr
+
+    return Af + Adp + Ag
+
+
+def dl_bull(d, h, hts, hrs, ap, f):
+    """Bullington diffraction loss of each profile.
+    See PropagationClearAir.dl_bull.
+    """
+    Ce = 1 / ap
+    lamb = 0.3 / f
+
+    dtot = (d[:, -1] - d[:, 0])[:, np.newaxis]
+    hts = hts[:, np.newaxis]
+    hrs = hrs[:, np.newaxis]
+
+    di = d[:, 1:-1]
+    hi = h[:, 1:-1]
+
+    Stim = np.max((hi + 500 * Ce * di * (dtot - di) - hts) / di, axis=1)
+
+    # slope of the line from transmitter to receiver assuming a LoS path
+    Str = (hrs - hts)[:, 0] / dtot[:, 0]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # LoS path: intermediate point with the highest diffraction parameter
+        nu_los = np.max(
+            (
+                hi + 500 * Ce * di * (dtot - di) -
+                (hts * (dtot - di) + hrs * di) / dtot
+            ) * np.sqrt(0.002 * dtot / (lamb * di * (dtot - di))),
+            axis=1,
+        )
+
+        # transhorizon path: diffraction parameter of the Bullington point
+        Srim = np.max(
+            (hi + 500 * Ce * di * (dtot - di) - hrs) / (dtot - di), axis=1,
+        )
+        dtot = dtot[:, 0]
+        hts = hts[:, 0]
+        hrs = hrs[:, 0]
+        dbp = (hrs - hts + Srim * dtot) / (Stim + Srim)
+        nu_bp = (hts + Stim * dbp - (hts * (dtot - dbp) + hrs * dbp) / dtot) * \
+            np.sqrt(0.002 * dtot / (lamb * dbp * (dtot - dbp)))
+
+        nu = np.where(Stim < Str, nu_los, nu_bp)
+        Luc = np.where(
+            nu > -0.78,
+            6.9 + 20 * np.log10(np.sqrt((nu - 0.1) ** 2 + 1) + nu - 0.1),
+            0,
+        )
+
+    return Luc + (1 - np.exp(-Luc / 6.0)) * (10 + 0.02 * dtot)
+
+
+def dl_se_ft_inner(epsr, sigma, d, hte, hre, adft, f):
+    """First-term spherical-Earth diffraction loss of each link, for
+    horizontal and vertical polarizations (N x 2).
+    See PropagationClearAir.dl_se_ft_inner.
+    """
+    adft = np.asarray(adft)[..., np.newaxis]
+    d = np.asarray(d)[..., np.newaxis]
+    hte = np.asarray(hte)[..., np.newaxis]
+    hre = np.asarray(hre)[..., np.newaxis]
+
+    # Normalized factor for surface admittance
+    K0 = 0.036 * (adft * f) ** (-1 / 3) * (
+        (epsr - 1) ** 2 + (18 * sigma / f) ** 2
+    ) ** (-1 / 4)
+    K = np.concatenate(
+        [K0, K0 * (epsr ** 2 + (18 * sigma / f) ** 2) ** (1 / 2)], axis=-1,
+    )
+
+    # Earth ground / polarization parameter
+    beta_dft = (1 + 1.6 * K ** 2 + 0.67 * K**4) / \
+        (1 + 4.5 * K ** 2 + 1.53 * K ** 4)
+
+    # Normalized distance
+    X = 21.88 * beta_dft * (f / adft ** 2) ** (1 / 3) * d
+
+    # Normalized transmitter and receiver heights
+    Yt = 0.9575 * beta_dft * (f ** 2 / adft) ** (1 / 3) * hte
+    Yr = 0.9575 * beta_dft * (f ** 2 / adft) ** (1 / 3) * hre
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        Fx = np.where(
+            X >= 1.6,
+            11 + 10 * np.log10(X) - 17.6 * X,
+            -20 * np.log10(X) - 5.6488 * X ** 1.425,
+        )
+
+        Bt = beta_dft * Yt
+        Br = beta_dft * Yr
+
+        GYt = np.where(
+            Bt > 2,
+            17.6 * (Bt - 1.1) ** 0.5 - 5 * np.log10(Bt - 1.1) - 8,
+            20 * np.log10(Bt + 0.1 * Bt ** 3),
+        )
+        GYr = np.where(
+            Br > 2,
+            17.6 * (Br - 1.1) ** 0.5 - 5 * np.log10(Br - 1.1) - 8,
+            20 * np.log10(Br + 0.1 * Br ** 3),
+        )
+
+    GY_min = 2 + 20 * np.log10(K)
+    GYt = np.where(GYt < GY_min, GY_min, GYt)
+    GYr = np.where(GYr < GY_min, GY_min, GYr)
+
+    return -Fx - GYt - GYr
+
+
+def dl_se_ft(d, hte, hre, adft, f, omega):
+    """First-term spherical-Earth diffraction loss over land and sea.
+    See PropagationClearAir.dl_se_ft.
+    """
+    Ldft_land = dl_se_ft_inner(22, 0.003, d, hte, hre, adft, f)
+    Ldft_sea = dl_se_ft_inner(80, 5, d, hte, hre, adft, f)
+
+    omega = np.asarray(omega)[..., np.newaxis]
+    return omega * Ldft_sea + (1 - omega) * Ldft_land
+
+
+def dl_se(d, hte, hre, ap, f, omega):
+    """Spherical-Earth diffraction loss of each link (N x 2).
+    See PropagationClearAir.dl_se.
+    """
+    lamb = 0.3 / f
+
+    # marginal LoS distance for a smooth path
+    dlos = np.sqrt(2 * ap) * (np.sqrt(0.001 * hte) + np.sqrt(0.001 * hre))
+
+    Ldft_ap = dl_se_ft(d, hte, hre, ap, f, omega)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # smallest clearance between the curved - Earth path and the ray
+        # between the antennas, hse
+        c = (hte - hre) / (hte + hre)
+        m = 250 * d * d / (ap * (hte + hre))
+
+        b = 2 * np.sqrt((m + 1) / (3 * m)) * np.cos(
+            np.pi / 3 +
+            1 / 3 * np.arccos(3 * c / 2 * np.sqrt(3 * m / (m + 1) ** 3)),
+        )
+
+        dse1 = d / 2 * (1 + b)
+        dse2 = d - dse1
+
+        hse = (hte - 500 * dse1 * dse1 / ap) * dse2 + \
+            (hre - 500 * dse2 * dse2 / ap) * dse1
+        hse = hse / d
+
+        # required clearance for zero diffraction loss
+        hreq = 17.456 * np.sqrt(dse1 * dse2 * lamb / d)
+
+        # modified effective Earth radius which gives marginal LoS at
+        # distance d
+        aem = 500 * (d / (np.sqrt(hte) + np.sqrt(hre)))**2
+        Ldft_aem = dl_se_ft(d, hte, hre, aem, f, omega)
+
+        no_loss = (hse > hreq) | np.any(Ldft_aem < 0, axis=-1)
+        Ldsph_los = np.where(
+            no_loss[..., np.newaxis],
+            0,
+            (1 - hse / hreq)[..., np.newaxis] * Ldft_aem,
+        )
+
+    return np.where((d >= dlos)[..., np.newaxis], Ldft_ap, Ldsph_los)
+
+
+def dl_delta_bull(d, h, hts, hrs, hstd, hsrd, ap, f, omega):
+    """General diffraction loss of each link (N x 2).
+    See PropagationClearAir.dl_delta_bull.
+    """
+    Lbulla = dl_bull(d, h, hts, hrs, ap, f)
+
+    # smooth path with modified antenna heights
+    hts1 = hts - hstd
+    hrs1 = hrs - hsrd
+    Lbulls = dl_bull(d, np.zeros(h.shape), hts1, hrs1, ap, f)
+
+    Ldsph = dl_se(d[:, -1] - d[:, 0], hts1, hrs1, ap, f, omega)
+
+    return Lbulla[:, np.newaxis] + np.maximum(Ldsph - Lbulls[:, np.newaxis], 0)
+
+
+def dl_p(d, h, hts, hrs, hstd, hsrd, f, omega, p, b0, ae, ab):
+    """Diffraction loss not exceeded for p% and 50% of the time (N x 2).
+    See PropagationClearAir.dl_p.
+    """
+    Ld50 = dl_delta_bull(d, h, hts, hrs, hstd, hsrd, ae, f, omega)
+
+    below_50 = p < 50
+    if not np.any(below_50):
+        return Ld50, Ld50
+
+    Ldb = dl_delta_bull(d, h, hts, hrs, hstd, hsrd, ab, f, omega)
+
+    # interpolation factor
+    Fi = np.where(
+        p > b0,
+        inv_cum_norm(p / 100) / inv_cum_norm(b0 / 100),
+        1,
+    )
+
+    Ldp = np.where(
+        below_50[:, np.newaxis],
+        Ld50 + Fi[:, np.newaxis] * (Ldb - Ld50),
+        Ld50,
+    )
+
+    return Ldp, Ld50
@@ -8,7 +8,7 @@ Created on Thu Feb 16 12:03:12 2017
 from abc import ABC, abstractmethod
 import numpy as np
 
-from sharc.station_manager import StationManager
+from sharc.station_manager import StationManager, copy_stations
 from sharc.parameters.parameters import Parameters
 
 
@@ -50,3 +50,93 @@ class Propagation(ABC):
             Return an array station_a.num_stations x station_b.num_stations with the path loss
             between each station
         """
+
+    def get_active_loss(
+        self,
+        params: Parameters,
+        frequency: float,
+        station_a: StationManager,
+        station_b: StationManager,
+        station_a_gains=None,
+        station_b_gains=None,
+        fill_value: float = np.inf,
+    ) -> np.array:
+        """Calculates the loss only between the active stations of station_a
+        and station_b and scatters it back into the full loss matrix.
+
+        The gains are indexed as blocks of rows per station_a station and
+        blocks of columns per station_b station, so that gains with one column
+        per beam of a multi-beam station are also supported.
+
+        Parameters
+        ----------
+        params : Parameters
+            Simulation parameters needed for the propagation class.
+        frequency : float
+            Center frequency
+        station_a : StationManager
+            StationManager container representing station_a
+        station_b : StationManager
+            StationManager container representing station_b
+        station_a_gains : np.ndarray, optional
+            Gains of station_a, with a multiple of station_a.num_stations rows
+            and of station_b.num_stations columns
+        station_b_gains : np.ndarray, optional
+            Gains of station_b, with the same layout as station_a_gains
+        fill_value : float, optional
+            Loss of the pairs with an inactive station, by default np.inf
+
+        Returns
+        -------
+        np.array
+            Return an array station_a.num_stations x station_b.num_stations with the path loss
+            between each station, or a tuple of them if the model returns
+            several losses
+        """
+        active_a = np.flatnonzero(station_a.active)
+        active_b = np.flatnonzero(station_b.active)
+        if len(active_a) == station_a.num_stations and len(active_b) == station_b.num_stations:
+            return self.get_loss(
+                params, frequency, station_a, station_b, station_a_gains, station_b_gains,
+            )
+
+        loss = self.get_loss(
+            params,
+            frequency,
+            copy_stations(station_a, active_a),
+            copy_stations(station_b, active_b),
+            _select_gain_blocks(station_a_gains, station_a, station_b, active_a, active_b),
+            _select_gain_blocks(station_b_gains, station_a, station_b, active_a, active_b),
+        )
+
+        def scatter(active_loss):
+            full_loss = np.full((station_a.num_stations, station_b.num_stations), fill_value)
+            full_loss[np.ix_(active_a, active_b)] = active_loss
+            return full_loss
+
+        if isinstance(loss, tuple):
+            return tuple(scatter(x) for x in loss)
+        return scatter(loss)
+
+
+def _select_gain_blocks(
+    gains: np.ndarray,
+    station_a: StationManager,
+    station_b: StationManager,
+    active_a: np.ndarray,
+    active_b: np.ndarray,
+) -> np.ndarray:
+    """Returns the blocks of rows of the active station_a stations and the
+    blocks of columns of the active station_b stations of a gain array."""
+    if gains is None:
+        return None
+    rows, cols = np.shape(gains)
+    if rows % max(station_a.num_stations, 1) or cols % max(station_b.num_stations, 1):
+        raise ValueError(
+            f"Propagation: gains of shape {np.shape(gains)} are not blocks of "
+            f"{station_a.num_stations} x {station_b.num_stations} stations")
+    rows_per_station = rows // max(station_a.num_stations, 1)
+    cols_per_station = cols // max(station_b.num_stations, 1)
+    row_idx = (active_a[:, np.newaxis] * rows_per_station + np.arange(rows_per_station)).ravel()
+    col_idx = (active_b[:, np.newaxis] * cols_per_station + np.arange(cols_per_station)).ravel()
+    return gains[np.ix_(row_idx, col_idx)]
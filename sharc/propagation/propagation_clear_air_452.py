@@ -10,14 +10,21 @@ from sharc.parameters.parameters import Parameters
 from sharc.parameters.parameters_p452 import ParametersP452
 from sharc.propagation.clear_air_452_aux import p676_ga
 from sharc.propagation.clear_air_452_aux import inv_cum_norm
+from sharc.propagation import clear_air_452_batch
 from sharc.support.enumerations import StationType
 from sharc.propagation.propagation_clutter_loss import PropagationClutterLoss
 from sharc.propagation.propagation_building_entry_loss import PropagationBuildingEntryLoss
+from sharc.propagation.terrain import TerrainDatabase
+from sharc.satellite.utils.sat_utils import ecef2lla
+from sharc.support.sharc_geom import GeometryConverter
 
 
 class PropagationClearAir(Propagation):
     """Basic transmission loss due to free-space propagation and attenuation by atmospheric gases."""
 
+    # maximum number of links computed at once by basic_loss
+    LINKS_PER_CHUNK = 1000
+
     def __init__(
             self,
             random_number_gen: np.random.RandomState,
@@ -32,6 +39,14 @@ class PropagationClearAir(Propagation):
         self.building_loss = 20
         self.model_params = model_params
 
+        # terrain tiles are kept open between snapshots
+        self.terrain = None
+        if model_params.terrain_dir is not None:
+            self.terrain = TerrainDatabase(
+                model_params.terrain_dir, model_params.terrain_cache_size,
+            )
+        self.geometry_converter = None
+
     @staticmethod
     def closs_corr(f, d, h, zone, htg, hrg, ha_t, ha_r, dk_t, dk_r):
         """Apply clutter loss correction according to ITU-R P.452-16."""
@@ -475,6 +490,14 @@ class PropagationClearAir(Propagation):
         self.building_loss = 20
         self.model_params = model_params
 
+        # terrain tiles are kept open between snapshots
+        self.terrain = None
+        if model_params.terrain_dir is not None:
+            self.terrain = TerrainDatabase(
+                model_params.terrain_dir, model_params.terrain_cache_size,
+            )
+        self.geometry_converter = None
+
     @staticmethod
     def closs_corr(f, d, h, zone, htg, hrg, ha_t, ha_r, dk_t, dk_r):
         """Apply clutter loss correction according to ITU-R P.452-16."""
@@ -1508,6 +1531,387 @@ class PropagationClearAir(Propagation):
 
         return Ldp, Ld50
 
+    def basic_loss(
+        self,
+        d: np.ndarray,
+        h: np.ndarray,
+        f: float,
+        p: np.ndarray,
+        tx_gain: np.ndarray,
+        rx_gain: np.ndarray,
+        zone: np.ndarray = None,
+        chunk_size: int = None,
+    ) -> np.ndarray:
+        """Calculates the basic transmission loss of many links at once.
+
+        All links are computed together with the vectorized functions in
+        clear_air_452_batch. The links may be split in chunks to bound the
+        memory used by the intermediate (links x profile length) arrays.
+
+        Parameters
+        ----------
+        d : np.ndarray
+            Distances of the path profile points of each link in km, with
+            shape (number of links, profile length)
+        h : np.ndarray
+            Heights of the path profile points of each link in m, with the
+            same shape as d
+        f : float
+            Frequency in GHz
+        p : np.ndarray
+            Time percentage of each link
+        tx_gain : np.ndarray
+            Transmitter antenna gain of each link
+        rx_gain : np.ndarray
+            Receiver antenna gain of each link
+        zone : np.ndarray, optional
+            Zone of the path profile points, 1 for coastal land, 2 for inland
+            and 3 for sea, with the same shape as d. Defaults to inland
+        chunk_size : int, optional
+            Maximum number of links computed at once. Defaults to
+            LINKS_PER_CHUNK
+
+        Returns
+        -------
+        np.ndarray
+            Basic transmission loss not exceeded for p% of the time, for each
+            link
+        """
+        d = np.atleast_2d(d)
+        h = np.broadcast_to(h, d.shape)
+        zone = np.broadcast_to(2 if zone is None else zone, d.shape)
+        if d.shape[1] < 4:
+            error_message = "tl_p452: path profile requires at least 4 points."
+            raise ValueError(error_message)
+
+        polarization = self.model_params.polarization.lower()
+        if polarization not in ("horizontal", "vertical"):
+            error_message = "invalid polarization"
+            raise ValueError(error_message)
+
+        num_links = d.shape[0]
+        p = np.broadcast_to(np.ravel(p), (num_links,))
+        tx_gain = np.broadcast_to(np.ravel(tx_gain), (num_links,))
+        rx_gain = np.broadcast_to(np.ravel(rx_gain), (num_links,))
+
+        if chunk_size is None:
+            chunk_size = self.LINKS_PER_CHUNK
+
+        Lb = np.empty(num_links)
+        for start in range(0, num_links, chunk_size):
+            chunk = slice(start, start + chunk_size)
+            Lb_pol = self._basic_loss_chunk(
+                d[chunk], h[chunk], zone[chunk], f,
+                p[chunk], tx_gain[chunk], rx_gain[chunk],
+            )
+            if polarization == "horizontal":
+                Lb[chunk] = Lb_pol[:, 0]
+            else:
+                Lb[chunk] = Lb_pol[:, 1]
+
+        return Lb
+
+    def _basic_loss_chunk(self, d, h, zone, f, p, tx_gain, rx_gain):
+        """Basic transmission loss of a set of links, for horizontal and
+        vertical polarizations. See basic_loss.
+        """
+        Ph = self.model_params.atmospheric_pressure
+        T = self.model_params.air_temperature
+        Dct = self.model_params.Dct
+        Dcr = self.model_params.Dcr
+        htg = self.model_params.Hte
+        hrg = self.model_params.Hre
+        N0 = self.model_params.N0
+        deltaN = self.model_params.delta_N
+
+        # Path center latitude
+        phi_path = (self.model_params.tx_lat + self.model_params.rx_lat) / 2
+
+        # dtm - the longest continuous land(inland + coastal) section of the
+        # great - circle path(km)
+        # dlm - the longest continuous inland section of the great-circle path (km)
+        dtm = clear_air_452_batch.longest_cont_dist(d, zone, 12)
+        dlm = clear_air_452_batch.longest_cont_dist(d, zone, 2)
+
+        b0 = self.beta0(phi_path, dtm, dlm)
+        [ae, ab] = self.earth_rad_eff(deltaN)
+
+        # path fraction over sea
+        omega = clear_air_452_batch.path_fraction(d, zone, 3)
+
+        # Clutter losses of Section 4.5.4 are not applied, as no nominal
+        # clutter heights are given (Aht = Ahr = 0)
+        [
+            hst, hsr, hstd, hsrd, hte, hre, hm, dlt,
+            dlr, theta_t, theta_r, theta, pathtype,
+        ] = clear_air_452_batch.smooth_earth_heights(d, h, htg, hrg, ae, f)
+
+        dtot = d[:, -1] - d[:, 0]
+
+        # Tx and Rx antenna heights above mean sea level amsl(m)
+        hts = h[:, 0] + htg
+        hrs = h[:, -1] + hrg
+
+        # Effective Earth curvature Ce(km ^ -1)
+        Ce = 1 / ae
+
+        # Find the intermediate profile point with the highest slope of the line
+        # from the transmitter to the point
+        di = d[:, 1: -1]
+        hi = h[:, 1: -1]
+
+        Stim = np.max(
+            (hi + 500 * Ce * di * (dtot[:, np.newaxis] - di) - hts[:, np.newaxis]) / di,
+            axis=1,
+        )
+
+        # Calculate the slope of the line from transmitter to receiver assuming a
+        # LoS path
+        Str = (hrs - hts) / dtot
+
+        # Calculate an interpolation factor Fj to take account of the path angular
+        # distance(58)
+        THETA = 0.3
+        KSI = 0.8
+        Fj = 1.0 - 0.5 * (1.0 + np.tanh(3.0 * KSI * (Stim - Str) / THETA))
+
+        # Calculate an interpolation factor, Fk, to take account of the great
+        # circle path distance:
+        dsw = 20
+        kappa = 0.5
+        Fk = 1.0 - 0.5 * (1.0 + np.tanh(3.0 * kappa * (dtot - dsw) / dsw))
+
+        [Lbfsg, Lb0p, Lb0b] = clear_air_452_batch.pl_los(
+            dtot, f, p, b0, omega, T, Ph, dlt, dlr,
+        )
+
+        [Ldp, Ld50] = clear_air_452_batch.dl_p(
+            d, h, hts, hrs, hstd, hsrd, f, omega, p, b0, ae, ab,
+        )
+
+        # per link values as columns, to broadcast with both polarizations
+        Lbfsg, Lb0p, Lb0b = Lbfsg[:, np.newaxis], Lb0p[:, np.newaxis], Lb0b[:, np.newaxis]
+        omega_c = omega[:, np.newaxis]
+
+        # The median basic transmission loss associated with diffraction Eq
+        # (43)
+        Lbd50 = Lbfsg + Ld50
+
+        # The basic tranmission loss associated with diffraction not
+        # exceeded for p % time Eq(44)
+        Lbd = Lb0p + Ldp
+
+        # A notional minimum basic transmission loss associated with LoS
+        # propagation and over-sea sub-path diffraction
+        Fi = inv_cum_norm(p / 100) / inv_cum_norm(b0 / 100)
+        Lminb0p = np.where(
+            (p >= b0)[:, np.newaxis],
+            Lbd50 + (Lb0b + (1 - omega_c) * Ldp - Lbd50) * Fi[:, np.newaxis],
+            Lb0p + (1 - omega_c) * Ldp,
+        )
+
+        # Calculate a notional minimum basic transmission loss associated with LoS
+        # and transhorizon signal enhancements
+        eta = 2.5
+
+        Lba = clear_air_452_batch.tl_anomalous(
+            dtot, dlt, dlr, Dct, Dcr, dlm, hts, hrs, hte, hre, hm,
+            theta_t, theta_r, f, p, T, Ph, omega, ae, b0,
+        )
+
+        Lminbap = (eta * np.log(np.exp(Lba / eta) + np.exp(Lb0p[:, 0] / eta)))[:, np.newaxis]
+
+        # Calculate a notional basic transmission loss associated with diffraction
+        # and LoS or ducting / layer reflection enhancements
+        Lbda = np.where(
+            np.any(Lbd >= Lminbap, axis=1, keepdims=True),
+            Lminbap + (Lbd - Lminbap) * Fk[:, np.newaxis],
+            Lbd,
+        )
+
+        # Calculate a modified basic transmission loss, which takes diffraction and
+        # LoS or ducting / layer - reflection enhancements into account
+        Lbam = Lbda + (Lminb0p - Lbda) * Fj[:, np.newaxis]
+
+        # Calculate the basic transmission loss due to troposcatter not exceeded
+        # for any time percantage p
+        Lbs = clear_air_452_batch.tl_tropo(
+            dtot, theta, f, p, T, Ph, N0, tx_gain, rx_gain,
+        )
+
+        # Calculate the final transmission loss not exceeded for p % time
+        return -5 * np.log10(
+            10 ** (-0.2 * Lbs[:, np.newaxis]) +
+            10 ** (-0.2 * Lbam),
+        )
+
+    def basic_loss_single_link(
+        self,
+        d: np.ndarray,
+        h: np.ndarray,
+        f: float,
+        p: float,
+        tx_gain: float,
+        rx_gain: float,
+    ) -> float:
+        """Calculates the basic transmission loss of a single link.
+
+        This is the reference per-link implementation of basic_loss.
+
+        Parameters
+        ----------
+        d : np.ndarray
+            Distances of the path profile points in km
+        h : np.ndarray
+            Heights of the path profile points in m
+        f : float
+            Frequency in GHz
+        p : float
+            Time percentage
+        tx_gain : float
+            Transmitter antenna gain
+        rx_gain : float
+            Receiver antenna gain
+
+        Returns
+        -------
+        float
+            Basic transmission loss not exceeded for p% of the time
+        """
+        Ph = np.asarray(self.model_params.atmospheric_pressure)
+        T = np.asarray(self.model_params.air_temperature)
+        Dct = np.asarray(self.model_params.Dct)
+        Dcr = np.asarray(self.model_params.Dcr)
+        htg = np.asarray(self.model_params.Hte)
+        hrg = np.asarray(self.model_params.Hre)
+        N0 = np.asarray(self.model_params.N0)
+        deltaN = np.asarray(self.model_params.delta_N)
+
+        # Path center latitude
+        phi_path = (self.model_params.tx_lat + self.model_params.rx_lat) / 2
+
+        # consider inland profiles only
+        zone = np.ones(d.size) * 2
+
+        dtm = self.longest_cont_dist(d, zone, 12)
+        dlm = self.longest_cont_dist(d, zone, 2)
+
+        b0 = self.beta0(phi_path, np.atleast_1d(dtm), np.atleast_1d(dlm))[0]
+        [ae, ab] = self.earth_rad_eff(deltaN)
+
+        omega = self.path_fraction(d, zone, 3)
+
+        # Effective Earth curvature Ce(km ^ -1)
+        Ce = 1 / ae
+
+        # Calculate an interpolation factor Fj to take account of the path angular
+        # distance(58)
+        THETA = 0.3
+        KSI = 0.8
+
+        [
+            hst, hsr, hstd, hsrd, hte, hre, hm, dlt,
+            dlr, theta_t, theta_r, theta, pathtype,
+        ] = self.smooth_earth_heights(d, h, htg, hrg, ae, f)
+
+        dtot = d[-1] - d[0]
+
+        # Tx and Rx antenna heights above mean sea level amsl(m)
+        hts = h[0] + htg
+        hrs = h[-1] + hrg
+
+        # Find the intermediate profile point with the highest slope of the line
+        # from the transmitter to the point
+
+        if len(d) < 4:
+            error_message = "tl_p452: path profile requires at least 4 points."
+            raise ValueError(error_message)
+
+        di = d[1: -1]
+        hi = h[1: -1]
+
+        Stim = max((hi + 500 * Ce * di * (dtot - di) - hts) / di)
+
+        # Calculate the slope of the line from transmitter to receiver assuming a
+        # LoS path
+        Str = (hrs - hts) / dtot
+
+        # changed the definition for Fj on 15DEC16.
+        # Fj = 1.0 - 0.5 * (1.0 + tanh(3.0 * KSI * (theta - THETA) / THETA))
+        Fj = 1.0 - 0.5 * (1.0 + np.tanh(3.0 * KSI * (Stim - Str) / THETA))
+
+        # Calculate an interpolation factor, Fk, to take account of the great
+        # circle path distance:
+        dsw = 20
+        kappa = 0.5
+
+        Fk = 1.0 - 0.5 * (1.0 + np.tanh(3.0 * kappa * (dtot - dsw) / dsw))
+
+        [Lbfsg, Lb0p, Lb0b] = self.pl_los(
+            dtot, f, p, b0, omega, T, Ph, dlt, dlr,
+        )
+
+        [Ldp, Ld50] = self.dl_p(
+            d, h, hts, hrs, hstd, hsrd, f, omega, p, b0, deltaN,
+        )
+
+        # The median basic transmission loss associated with diffraction Eq
+        # (43)
+        Lbd50 = Lbfsg + Ld50
+
+        # The basic tranmission loss associated with diffraction not
+        # exceeded for p % time Eq(44)
+        Lbd = Lb0p + Ldp
+
+        # A notional minimum basic transmission loss associated with LoS
+        # propagation and over-sea sub-path diffraction
+        Lminb0p = Lb0p + (1 - omega) * Ldp
+
+        if p >= b0:
+            Fi = inv_cum_norm(p / 100) / inv_cum_norm(b0 / 100)
+            Lminb0p = Lbd50 + (Lb0b + (1 - omega) * Ldp - Lbd50) * Fi
+
+        # Calculate a notional minimum basic transmission loss associated with LoS
+        # and transhorizon signal enhancements
+        eta = 2.5
+
+        Lba = self.tl_anomalous(
+            dtot, dlt, dlr, Dct, Dcr, dlm, hts, hrs, hte, hre, hm,
+            theta_t, theta_r, f, p, T, Ph, omega, ae, b0,
+        )
+
+        Lminbap = eta * np.log(np.exp(Lba / eta) + np.exp(Lb0p / eta))
+
+        # Calculate a notional basic transmission loss associated with diffraction
+        # and LoS or ducting / layer reflection enhancements
+        Lbda = Lbd
+        if (Lbd >= Lminbap).any():
+            Lbda = Lminbap + (Lbd - Lminbap) * Fk
+
+        # Calculate a modified basic transmission loss, which takes diffraction and
+        # LoS or ducting / layer - reflection enhancements into account
+        Lbam = Lbda + (Lminb0p - Lbda) * Fj
+
+        # Calculate the basic transmission loss due to troposcatter not exceeded
+        # for any time percantage p
+        Lbs = self.tl_tropo(
+            dtot, theta, f, p, T, Ph, N0, tx_gain, rx_gain,
+        )
+
+        # Calculate the final transmission loss not exceeded for p % time
+        Lb_pol = -5 * np.log10(
+            10 ** (-0.2 * Lbs) +
+            10 ** (-0.2 * Lbam),
+        )
+
+        if (self.model_params.polarization).lower() == "horizontal":
+            return Lb_pol[0]
+        elif (self.model_params.polarization).lower() == "vertical":
+            return Lb_pol[1]
+        else:
+            error_message = "invalid polarization"
+            raise ValueError(error_message)
+
     @dispatch(Parameters, float, StationManager,
               StationManager, np.ndarray, np.ndarray)
     def get_loss(
@@ -1559,6 +1963,20 @@ class PropagationClearAir(Propagation):
             tx_gain = station_b_gains
             rx_gain = station_a_gains
 
+        profiles = None
+        if self.terrain is not None:
+            if params.imt.interfered_with:
+                profiles = self.get_terrain_profiles(params, station_a, station_b)
+            else:
+                # profiles from the IMT stations, in the order of the
+                # station_a x station_b links
+                profiles = tuple(
+                    np.swapaxes(
+                        x.reshape(station_b.num_stations, station_a.num_stations, -1), 0, 1,
+                    ).reshape(distance.size, -1)
+                    for x in self.get_terrain_profiles(params, station_b, station_a)
+                )
+
         return self.get_loss(
             distance,
             frequency_array,
@@ -1566,8 +1984,74 @@ class PropagationClearAir(Propagation):
             elevation,
             tx_gain,
             rx_gain,
+            profiles=profiles,
         )
 
+    def get_terrain_profiles(
+        self,
+        params: Parameters,
+        tx_station: StationManager,
+        rx_station: StationManager,
+    ) -> tuple:
+        """Returns the terrain path profiles of the links between two sets of
+        stations. The geodetic position of the stations is given by the
+        reference of the IMT topology.
+
+        Parameters
+        ----------
+        params : Parameters
+            Simulation parameters
+        tx_station : StationManager
+            Transmitting stations
+        rx_station : StationManager
+            Receiving stations
+
+        Returns
+        -------
+        tuple
+            Distances from the transmitter (km), terrain heights (m) and zones
+            of the path profile points, with shape
+            (tx_station.num_stations * rx_station.num_stations, profile_length).
+            HGT tiles have no land/sea mask, and terrain at or below sea
+            level may be inland (e.g., depressions), so all the points are
+            considered inland (zone A2), as in the flat path profiles.
+        """
+        if self.geometry_converter is None:
+            topology = params.imt.topology
+            if topology.central_latitude is None or topology.central_longitude is None:
+                error_message = "P.452 terrain profiles require imt.topology.central_latitude " + \
+                    "and imt.topology.central_longitude"
+                raise ValueError(error_message)
+            self.geometry_converter = GeometryConverter()
+            self.geometry_converter.set_reference(
+                topology.central_latitude,
+                topology.central_longitude,
+                topology.central_altitude or 0.0,
+            )
+
+        lat_tx, lon_tx, _ = ecef2lla(
+            *self.geometry_converter.revert_transformed_cartesian_to_cartesian(
+                tx_station.x, tx_station.y, tx_station.z,
+            ),
+        )
+        lat_rx, lon_rx, _ = ecef2lla(
+            *self.geometry_converter.revert_transformed_cartesian_to_cartesian(
+                rx_station.x, rx_station.y, rx_station.z,
+            ),
+        )
+
+        d, h = self.terrain.get_profiles(
+            np.repeat(lat_tx, rx_station.num_stations),
+            np.repeat(lon_tx, rx_station.num_stations),
+            np.tile(lat_rx, tx_station.num_stations),
+            np.tile(lon_rx, tx_station.num_stations),
+            self.model_params.profile_length,
+        )
+
+        zone = np.full(h.shape, 2)
+
+        return d, h, zone
+
     # pylint: disable=arguments-differ
     @dispatch(np.ndarray, np.ndarray, np.ndarray,
               np.ndarray, np.ndarray, np.ndarray)
@@ -1575,6 +2059,7 @@ class PropagationClearAir(Propagation):
         self, distance: np.ndarray, frequency: np.ndarray,
         indoor_stations: np.ndarray, elevation: np.ndarray,
         tx_gain: np.ndarray, rx_gain: np.ndarray,
+        profiles: tuple = None,
     ) -> np.array:
         """Calculates the loss according to P.452
 
@@ -1592,6 +2077,10 @@ class PropagationClearAir(Propagation):
             transmitter antenna gains
         rx_gain: np.ndarray
             receiver antenna gains
+        profiles: tuple, optional
+            distances (km), heights (m) and zones of the path profile points
+            of each link, with shape (distance.size, profile length). If not
+            given, flat inland profiles are considered
 
         Returns
         -------
@@ -1603,222 +2092,29 @@ class PropagationClearAir(Propagation):
             error_message = "different frequencies not supported in P.452"
             raise ValueError(error_message)
 
-        # TODO: Remove unecessary assignments
-        Ph = np.asarray(self.model_params.atmospheric_pressure)
-        T = np.asarray(self.model_params.air_temperature)
-        Dct = np.asarray(self.model_params.Dct)
-        Dcr = np.asarray(self.model_params.Dcr)
-        Hte = np.asarray(self.model_params.Hte)
-        Hre = np.asarray(self.model_params.Hre)
-        N0 = np.asarray(self.model_params.N0)
-        deltaN = np.asarray(self.model_params.delta_N)
         if self.model_params.percentage_p == 'RANDOM':
             p = 50 * self.random_number_gen.rand(distance.size)
         else:
             p = float(self.model_params.percentage_p) * np.ones(distance.size)
 
-        tx_lat = self.model_params.tx_lat
-        rx_lat = self.model_params.rx_lat
-
-        tx_gain = np.ravel(tx_gain)
-        rx_gain = np.ravel(rx_gain)
-
-        # Modify the path according to Section 4.5.4, Step 1  and compute clutter losses
-        # consider no obstacles profile
-        profile_length = 100
-        num_dists = distance.size
-        d = np.empty([num_dists, profile_length])
-        for ii in range(num_dists):
-            d[ii, :] = np.linspace(0, distance[0][ii], profile_length)
-
-        h = np.zeros(d.shape)
-
-        ha_t = []
-        ha_r = []
-        dk_t = []
-        dk_r = []
-
-        # Compute the path profile parameters
-        # Path center latitude
-        phi_path = (tx_lat + rx_lat) / 2
-
-        # Compute dtm - the longest continuous land(inland + coastal) section of the great - circle path(km)
-        # Compute  dlm - the longest continuous inland section of the
-        # great-circle path (km)
-
-        dtm = np.empty(num_dists)
-        dlm = np.empty(num_dists)
-
-        zone = np.ones(profile_length) * 2
-        for index in range(num_dists):
-
-            zone_r = 12
-            dtm[index] = self.longest_cont_dist(d[index, :], zone, zone_r)
-
-            zone_r = 2
-            dlm[index] = self.longest_cont_dist(d[index, :], zone, zone_r)
-
-        # compute beta0
-        b0 = self.beta0(phi_path, dtm, dlm)
-        [ae, ab] = self.earth_rad_eff(deltaN)
-
-        # Compute the path fraction over sea
-        omega = self.path_fraction(d.transpose(), zone, 3)
-
-        # Modify the path according to Section 4.5.4, Step 1 and compute clutter losses
-        # only if not isempty ha_t and ha_r
-        # [dc, hc, zonec, htgc, hrgc, Aht, Ahr] = self.closs_corr(f, d, h, zone, Hte, Hre, ha_t, ha_r, dk_t, dk_r)
-
-        Lb = np.empty([1, num_dists])
-
-        # Effective Earth curvature Ce(km ^ -1)
-        Ce = 1 / ae
-
-        # Wavelength in meters
-
-        # Calculate an interpolation factor Fj to take account of the path angular
-        # distance(58)
-        THETA = 0.3
-        KSI = 0.8
-
-        for ii in range(num_dists):
-            [dc, hc, zonec, htg, hrg, Aht, Ahr] = self.closs_corr(
-                frequency, d[ii, :], h[ii, :], zone, Hte, Hre, ha_t, ha_r, dk_t, dk_r,
-            )
-            d[ii, :] = dc
-            h[ii, :] = hc
-
-            [
-                hst, hsr, hstd, hsrd, hte, hre, hm, dlt,
-                dlr, theta_t, theta_r, theta, pathtype,
-            ] = self.smooth_earth_heights(d[ii, :], h[ii, :], htg, hrg, ae, frequency)
-
-            dtot = d[ii, -1] - d[ii, 0]
-
-            # Tx and Rx antenna heights above mean sea level amsl(m)
-            hts = hc[0] + htg
-            hrs = hc[-1] + hrg
-
-            # Find the intermediate profile point with the highest slope of the line
-            # from the transmitter to the point
-
-            if len(d[ii]) < 4:
-                error_message = "tl_p452: path profile requires at least 4 points."
-                raise ValueError(error_message)
-
-            di = d[ii, 1: -1]
-            hi = h[ii, 1: -1]
-
-            Stim = max((hi + 500 * Ce * di * (dtot - di) - hts) / di)
-
-            # Calculate the slope of the line from transmitter to receiver assuming a
-            # LoS path
-            Str = (hrs - hts) / dtot
-
-            # changed the definition for Fj on 15DEC16.
-            # Fj = 1.0 - 0.5 * (1.0 + tanh(3.0 * KSI * (theta - THETA) / THETA))
-            Fj = 1.0 - 0.5 * (1.0 + np.tanh(3.0 * KSI * (Stim - Str) / THETA))
-
-            # Calculate an interpolation factor, Fk, to take account of the great
-            # circle path distance:
-            dsw = 20
-            kappa = 0.5
-
-            Fk = 1.0 - 0.5 * (1.0 + np.tanh(3.0 * kappa * (dtot - dsw) / dsw))
-
-            [Lbfsg, Lb0p, Lb0b] = self.pl_los(
-                dtot, frequency, p[ii], b0[ii], omega[ii], T, Ph, dlt, dlr,
-            )
-
-            [Ldp,
-             Ld50] = self.dl_p(d[ii],
-                               h[ii],
-                               hts,
-                               hrs,
-                               hstd,
-                               hsrd,
-                               frequency,
-                               omega[ii],
-                               p[ii],
-                               b0[ii],
-                               deltaN,
-                               )
-
-            # The median basic transmission loss associated with diffraction Eq
-            # (43)
-            Lbd50 = Lbfsg + Ld50
-
-            # The basic tranmission loss associated with diffraction not
-            # exceeded for p % time Eq(44)
-            Lbd = Lb0p + Ldp
-
-            # A notional minimum basic transmission loss associated with LoS
-            # propagation and over-sea sub-path diffraction
-            Lminb0p = Lb0p + (1 - omega[ii]) * Ldp
-
-            if p[ii] >= b0[ii]:
-                Fi = inv_cum_norm(p[ii] / 100) / inv_cum_norm(b0[ii] / 100)
-                Lminb0p = Lbd50 + (Lb0b + (1 - omega[ii]) * Ldp - Lbd50) * Fi
-
-            # Calculate a notional minimum basic transmission loss associated with LoS
-            # and transhorizon signal enhancements
-            eta = 2.5
-
-            Lba = self.tl_anomalous(
-                dtot,
-                dlt,
-                dlr,
-                Dct,
-                Dcr,
-                dlm[ii],
-                hts,
-                hrs,
-                hte,
-                hre,
-                hm,
-                theta_t,
-                theta_r,
-                frequency,
-                p[ii],
-                T,
-                Ph,
-                omega[ii],
-                ae,
-                b0[ii],
-            )
-
-            Lminbap = eta * np.log(np.exp(Lba / eta) + np.exp(Lb0p / eta))
-
-            # Calculate a notional basic transmission loss associated with diffraction
-            # and LoS or ducting / layer reflection enhancements
-            Lbda = Lbd
-            if (Lbd >= Lminbap).any():
-                Lbda = Lminbap + (Lbd - Lminbap) * Fk
-
-            # Calculate a modified basic transmission loss, which takes diffraction and
-            # LoS or ducting / layer - reflection enhancements into account
-            Lbam = Lbda + (Lminb0p - Lbda) * Fj
-
-            # Calculate the basic transmission loss due to troposcatter not exceeded
-            # for any time percantage p
-            Lbs = self.tl_tropo(
-                dtot, theta, frequency,
-                p[ii], T, Ph, N0, tx_gain[ii], rx_gain[ii],
+        if profiles is None:
+            # consider no obstacles profile
+            d = np.linspace(
+                0, np.ravel(distance), self.model_params.profile_length, axis=1,
             )
+            h = np.zeros(d.shape)
+            zone = None
+        else:
+            d, h, zone = profiles
 
-            # Calculate the final transmission loss not exceeded for p % time
-            Lb_pol = -5 * np.log10(
-                10 ** (-0.2 * Lbs) +
-                10 ** (-0.2 * Lbam),
-            ) + Aht + Ahr
+        # the gains may have more entries than links (e.g. one per beam); the
+        # i-th link uses the i-th gains
+        tx_gain = np.ravel(tx_gain)[:distance.size]
+        rx_gain = np.ravel(rx_gain)[:distance.size]
 
-            if (self.model_params.polarization).lower() == "horizontal":
-                Lb[0, ii] = Lb_pol[0]
-            elif (self.model_params.polarization).lower() == "vertical":
-                Lb[0, ii] = Lb_pol[1]
-            else:
-                error_message = "invalid polarization"
-                raise ValueError(error_message)
+        Lb = self.basic_loss(
+            d, h, frequency[0], p, tx_gain, rx_gain, zone,
+        ).reshape(distance.shape)
 
         if self.model_params.clutter_loss:
             clutter_loss = self.clutter.get_loss(
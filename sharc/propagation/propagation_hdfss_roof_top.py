@@ -7,7 +7,6 @@ Created on Mon Jul 30 17:28:47 2018
 
 import numpy as np
 import sys
-from shapely.geometry import LineString, Polygon, Point
 from sharc.parameters.constants import SPEED_OF_LIGHT
 
 from sharc.parameters.parameters_hdfss import ParametersHDFSS
@@ -402,25 +401,15 @@ class PropagationHDFSSRoofTop(Propagation):
             Distances for diffraction calculations (varies by dist_2D).
         """
 
-        build_poly = Polygon([
-            [es_x + self.b_w / 2, es_y + self.b_d / 2],
-            [es_x - self.b_w / 2, es_y + self.b_d / 2],
-            [es_x - self.b_w / 2, es_y - self.b_d / 2],
-            [es_x + self.b_w / 2, es_y - self.b_d / 2],
-        ])
-        es_point = Point([es_x, es_y])
-
-        d1_2D = np.zeros_like(imt_x)
-        d2_2D = np.zeros_like(imt_x)
-        dist = np.zeros_like(imt_x)
-        for k, (x, y) in enumerate(zip(imt_x, imt_y)):
-            line = LineString([[es_x, es_y], [x, y]])
-            intersection_line = line.intersection(build_poly)
-            d1_2D[k] = intersection_line.length
-
-            imt_point = Point([x, y])
-            dist[k] = es_point.distance(imt_point)
-            d2_2D[k] = dist[k] - d1_2D[k]
+        imt_x = np.asarray(imt_x, dtype=float)
+        imt_y = np.asarray(imt_y, dtype=float)
+        d1_2D = self.get_clipped_length(
+            es_x, es_y, imt_x, imt_y,
+            es_x - self.b_w / 2, es_x + self.b_w / 2,
+            es_y - self.b_d / 2, es_y + self.b_d / 2,
+        )
+        dist = np.sqrt(np.power(imt_x - es_x, 2) + np.power(imt_y - es_y, 2))
+        d2_2D = dist - d1_2D
 
         if dist_2D:
             return d1_2D, d2_2D
@@ -434,6 +423,45 @@ class PropagationHDFSSRoofTop(Propagation):
 
         return h, d1, d2
 
+    @staticmethod
+    def get_clipped_length(x0, y0, x1, y1, x_min, x_max, y_min, y_max):
+        """Compute the length of the part of segments inside an axis-aligned
+        rectangle, using Liang-Barsky clipping.
+
+        Parameters
+        ----------
+        x0, y0 : float or np.ndarray
+            Coordinates of the start of the segments.
+        x1, y1 : float or np.ndarray
+            Coordinates of the end of the segments.
+        x_min, x_max, y_min, y_max : float
+            Limits of the rectangle.
+
+        Returns
+        -------
+        np.ndarray
+            Length of each segment inside the rectangle.
+        """
+        dx = np.asarray(x1 - x0, dtype=float)
+        dy = np.asarray(y1 - y0, dtype=float)
+        t_enter = np.zeros(np.broadcast(dx, dy).shape)
+        t_exit = np.ones_like(t_enter)
+        for delta, start, low, high in ((dx, x0, x_min, x_max), (dy, y0, y_min, y_max)):
+            parallel = delta == 0
+            safe_delta = np.where(parallel, 1., delta)
+            t_low = (low - start) / safe_delta
+            t_high = (high - start) / safe_delta
+            # segments parallel to the edges cross the slab entirely or not at all
+            outside = parallel & ((start < low) | (start > high))
+            t_enter = np.maximum(
+                t_enter, np.where(parallel, np.where(outside, np.inf, -np.inf), np.minimum(t_low, t_high)),
+            )
+            t_exit = np.minimum(
+                t_exit, np.where(parallel, np.inf, np.maximum(t_low, t_high)),
+            )
+
+        return np.maximum(t_exit - t_enter, 0) * np.sqrt(dx**2 + dy**2)
+
     def get_diffraction_loss(self, h, d1, d2, f):
         """Calculate the diffraction loss for given geometry and frequency.
 
@@ -98,28 +98,43 @@ class PropagationIndoor(Propagation):
             wrap_around_enabled = params.imt.topology.hotspot.wrap_around \
                 and params.imt.topology.hotspot.num_clusters == 1
 
+        rows, cols = self.get_block_indices(station_b.num_stations, station_a.num_stations)
+        valid_cols = cols < station_a.num_stations
+        cols = np.minimum(cols, station_a.num_stations - 1)
+
+        # only the geometry between BS's and UE's of the same building is needed
         if wrap_around_enabled:
             bs_to_ue_dist_2d, bs_to_ue_dist_3d, _, _ = \
                 station_b.get_dist_angles_wrap_around(station_a)
+            bs_to_ue_dist_2d = bs_to_ue_dist_2d[rows[:, :, np.newaxis], cols[:, np.newaxis, :]]
+            bs_to_ue_dist_3d = bs_to_ue_dist_3d[rows[:, :, np.newaxis], cols[:, np.newaxis, :]]
         else:
-            bs_to_ue_dist_2d = station_b.get_distance_to(station_a)
-            bs_to_ue_dist_3d = station_b.get_3d_distance_to(station_a)
+            dx = station_a.x[cols][:, np.newaxis, :] - station_b.x[rows][:, :, np.newaxis]
+            dy = station_a.y[cols][:, np.newaxis, :] - station_b.y[rows][:, :, np.newaxis]
+            dz = station_a.z[cols][:, np.newaxis, :] - station_b.z[rows][:, :, np.newaxis]
+            bs_to_ue_dist_2d = np.sqrt(dx**2 + dy**2)
+            bs_to_ue_dist_3d = np.sqrt(dx**2 + dy**2 + dz**2)
 
-        frequency_array = frequency * np.ones(bs_to_ue_dist_2d.shape)
-        indoor_stations = np.tile(
-            station_a.indoor, (station_b.num_stations, 1),
-        )
-        elevation = np.transpose(station_a.get_elevation(station_b))
+        # elevation of the BS's as seen from the UE's
+        dx = station_b.x[rows][:, :, np.newaxis] - station_a.x[cols][:, np.newaxis, :]
+        dy = station_b.y[rows][:, :, np.newaxis] - station_a.y[cols][:, np.newaxis, :]
+        dz = station_b.z[rows][:, :, np.newaxis] - station_a.z[cols][:, np.newaxis, :]
+        elevation = np.degrees(np.arctan2(dz, np.sqrt(dx**2 + dy**2)))
 
-        return self.get_loss(
+        block_loss = self.get_block_loss(
             bs_to_ue_dist_3d,
             bs_to_ue_dist_2d,
-            frequency_array,
+            frequency * np.ones(bs_to_ue_dist_2d.shape),
             elevation,
-            indoor_stations,
+            station_a.indoor[cols],
             params.imt.shadowing,
         )
 
+        return self.blocks_to_dense(
+            block_loss, rows, cols, valid_cols,
+            (station_b.num_stations, station_a.num_stations),
+        )
+
     # pylint: disable=function-redefined
     # pylint: disable=arguments-renamed
     @dispatch(np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, bool)
@@ -150,35 +165,122 @@ class PropagationIndoor(Propagation):
             array with path loss values with dimensions of distance_2D
 
         """
-        loss = PropagationIndoor.HIGH_PATH_LOSS * np.ones(frequency.shape)
-        iter = int(frequency.shape[0] / self.bs_per_building)
-        for i in range(iter):
-            bi = int(self.bs_per_building * i)
-            bf = int(self.bs_per_building * (i + 1))
-            ui = int(self.ue_per_building * i)
-            uf = int(self.ue_per_building * (i + 1))
-
-            # calculate basic path loss
-            loss[bi:bf, ui:uf] = self.bpl.get_loss(
-                distance_3D=distance_3D[bi:bf, ui:uf],
-                distance_2D=distance_2D[bi:bf, ui:uf],
-                frequency=frequency[bi:bf, ui:uf],
-                indoor=indoor_stations[0, ui:uf],
-                shadowing=shadowing_flag,
-            )
+        rows, cols = self.get_block_indices(*frequency.shape)
+        valid_cols = cols < frequency.shape[1]
+        cols = np.minimum(cols, frequency.shape[1] - 1)
+        block_idx = (rows[:, :, np.newaxis], cols[:, np.newaxis, :])
+
+        block_loss = self.get_block_loss(
+            distance_3D[block_idx],
+            distance_2D[block_idx],
+            frequency[block_idx],
+            elevation[block_idx],
+            indoor_stations[0, cols],
+            shadowing_flag,
+        )
+
+        return self.blocks_to_dense(block_loss, rows, cols, valid_cols, frequency.shape)
+
+    def get_block_indices(self, num_bs: int, num_ue: int) -> tuple:
+        """
+        Returns the indices of the BS's and UE's of each building. The UE
+        indices may exceed the number of UE's if there are fewer UE's than
+        expected in the last buildings.
+
+        Parameters
+        ----------
+            num_bs (int) : number of BS's
+            num_ue (int) : number of UE's
+
+        Returns
+        -------
+            tuple with the BS indices, with shape (number of buildings, BS's
+            per building), and the UE indices, with shape (number of
+            buildings, UE's per building)
+        """
+        num_buildings = int(num_bs / self.bs_per_building)
+        building = np.arange(num_buildings)[:, np.newaxis]
+        rows = building * int(self.bs_per_building) + np.arange(int(self.bs_per_building))
+        cols = building * int(self.ue_per_building) + np.arange(int(self.ue_per_building))
+        if num_ue == 0:
+            cols = cols[:, :0]
+        return rows, cols
 
-            # calculates the additional building entry loss for outdoor UE's
-            # that are served by indoor BS's
-            bel = (~ indoor_stations[0,
-                                     ui:uf]) * self.bel.get_loss(frequency[bi:bf,
-                                                                           ui:uf],
-                                                                 elevation[bi:bf,
-                                                                           ui:uf],
-                                                                 "RANDOM",
-                                                                 self.building_class,
-                                                                 )
-
-            loss[bi:bf, ui:uf] = loss[bi:bf, ui:uf] + bel
+    def get_block_loss(
+        self,
+        distance_3D: np.ndarray,
+        distance_2D: np.ndarray,
+        frequency: np.ndarray,
+        elevation: np.ndarray,
+        indoor: np.ndarray,
+        shadowing_flag: bool,
+    ) -> np.ndarray:
+        """
+        Calculates the path loss between the BS's and UE's of each building,
+        stored as a block per building. The blocks of all buildings are
+        evaluated at once.
+
+        Parameters
+        ----------
+            distance_3D (np.array) : 3D distances between stations, with shape
+                (number of buildings, BS's per building, UE's per building)
+            distance_2D (np.array) : 2D distances between stations
+            frequency (np.array) : center frequencie [MHz]
+            elevation (np.array) : elevation angles from UE's to BS's
+            indoor (np.array) : indicates whether UE is indoor, with shape
+                (number of buildings, UE's per building)
+            shadowing (bool) : if shadowing should be added or not
+
+        Returns
+        -------
+            array with path loss values with dimensions of distance_3D
+        """
+        shape = distance_3D.shape
+        indoor = np.broadcast_to(indoor[:, np.newaxis, :], shape)
+
+        # the blocks are stacked along the BS's axis
+        def stack(x):
+            return np.reshape(x, (shape[0] * shape[1], shape[2]))
+
+        # calculate basic path loss
+        loss = self.bpl.get_loss(
+            distance_3D=stack(distance_3D),
+            distance_2D=stack(distance_2D),
+            frequency=stack(frequency),
+            indoor=stack(indoor),
+            shadowing=shadowing_flag,
+        )
+
+        # calculates the additional building entry loss for outdoor UE's
+        # that are served by indoor BS's
+        bel = (~ stack(indoor)) * self.bel.get_loss(
+            stack(frequency),
+            stack(elevation),
+            "RANDOM",
+            self.building_class,
+        )
+
+        return np.reshape(loss + bel, shape)
+
+    @staticmethod
+    def blocks_to_dense(
+        block_loss: np.ndarray,
+        rows: np.ndarray,
+        cols: np.ndarray,
+        valid_cols: np.ndarray,
+        shape: tuple,
+    ) -> np.ndarray:
+        """
+        Returns the dense BS x UE path loss matrix of the loss blocks of each
+        building, with HIGH_PATH_LOSS between BS's and UE's of different
+        buildings.
+        """
+        loss = PropagationIndoor.HIGH_PATH_LOSS * np.ones(shape)
+        valid = np.broadcast_to(valid_cols[:, np.newaxis, :], block_loss.shape)
+        loss[
+            np.broadcast_to(rows[:, :, np.newaxis], block_loss.shape)[valid],
+            np.broadcast_to(cols[:, np.newaxis, :], block_loss.shape)[valid],
+        ] = block_loss[valid]
 
         return loss
 
@@ -8,6 +8,7 @@ Created on Mon Apr 17 15:35:00 2017
 
 import os
 import csv
+from functools import lru_cache
 from scipy.interpolate import interp1d
 import numpy as np
 from multipledispatch import dispatch
@@ -21,7 +22,18 @@ from sharc.propagation.propagation_building_entry_loss import PropagationBuildin
 from sharc.propagation.atmosphere import ReferenceAtmosphere
 from sharc.support.enumerations import StationType
 from sharc.propagation.scintillation import Scintillation
-from sharc.parameters.constants import EARTH_RADIUS
+from sharc.propagation.atmospheric_loss_table import AtmosphericLossTable
+
+
+@lru_cache(maxsize=None)
+def _read_lookup_table(csv_file: str) -> interp1d:
+    """
+    Reads a city lookup table of atmospheric gasses loss once per process and
+    returns its interpolation function over the apparent elevation.
+    """
+    table = np.loadtxt(csv_file, delimiter=",", skiprows=1, ndmin=2)
+    return interp1d(
+        table[:, 0], table[:, 1], kind='linear', fill_value='extrapolate', )
 
 
 class PropagationP619(Propagation):
@@ -71,11 +83,6 @@ class PropagationP619(Propagation):
 
         self.depolarization_loss = 0
         self.polarization_mismatch_loss = 0
-        self.elevation_has_atmospheric_loss = []
-        self.freq_has_atmospheric_loss = []
-        self.surf_water_dens_has_atmospheric_loss = []
-        self.atmospheric_loss = []
-        self.elevation_delta = .01
         self.mean_clutter_height = mean_clutter_height
         self.below_rooftop = below_rooftop
 
@@ -109,17 +116,19 @@ class PropagationP619(Propagation):
                     return row['Cidade']
         return 'Unknown'
 
-    def _get_atmospheric_gasses_loss(self, *args, **kwargs) -> float:
+    def _get_atmospheric_gasses_loss(self, *args, **kwargs) -> np.array:
         """
-        Calculates atmospheric gasses loss based on ITU-R P.619, Attachment C
+        Calculates atmospheric gasses loss based on ITU-R P.619, Attachment C.
+        The loss is interpolated from the city lookup table, if available, or
+        from the AtmosphericLossTable of the surface water vapour density.
 
         Parameters
         ----------
             frequency_MHz (float) : center frequencies [MHz]
-            apparent_elevation (float) : apparent elevation angle at the Earth-based station (degrees)
+            apparent_elevation (np.array) : apparent elevation angles at the Earth-based station (degrees)
         Returns
         -------
-            path_loss (float): scalar with atmospheric loss
+            path_loss (np.array): atmospheric loss of each apparent elevation
         """
         frequency_MHz = kwargs["frequency_MHz"]
         apparent_elevation = kwargs["apparent_elevation"]
@@ -135,111 +144,21 @@ class PropagationP619(Propagation):
             csv_file = os.path.join(
                 output_dir, lookup_table_name)
             if os.path.exists(csv_file):
-                elevations = []
-                losses = []
-                with open(csv_file, mode='r') as file:
-                    reader = csv.reader(file)
-                    next(reader)  # Skip header
-                    for row in reader:
-                        elevations.append(float(row[0]))
-                        losses.append(float(row[1]))
-                interpolation_function = interp1d(
-                    elevations, losses, kind='linear', fill_value='extrapolate', )
+                interpolation_function = _read_lookup_table(csv_file)
                 return interpolation_function(apparent_elevation)
             else:
                 raise FileNotFoundError(
                     f"CSV file {lookup_table_name} not found but lookupTable is set to True. Did you configured the 'Dataset/locations.csv' lookup table correctly? ",
                 )
 
-        earth_radius_km = EARTH_RADIUS / 1000
-        a_acc = 0.  # accumulated attenuation (in dB)
-        h = self.earth_station_alt_m / 1000  # ray altitude in km
-        beta = (90 - abs(apparent_elevation)) * np.pi / 180.  # incidence angle
-
         if not surf_water_vapour_density:
             _, _, surf_water_vapour_density = self.atmosphere.get_reference_atmosphere_p835(
                 self.earth_station_lat_deg, 0, season=self.season, )
 
-        if len(self.elevation_has_atmospheric_loss):
-            elevation_diff = np.abs(
-                apparent_elevation -
-                np.array(
-                    self.elevation_has_atmospheric_loss),
-            )
-            elevation_diff = np.abs(
-                apparent_elevation -
-                np.array(
-                    self.elevation_has_atmospheric_loss),
-            )
-            indices = np.where(elevation_diff <= self.elevation_delta)
-            if indices[0].size:
-                index = np.argmin(elevation_diff)
-                if self.freq_has_atmospheric_loss[index] == frequency_MHz and \
-                   self.surf_water_dens_has_atmospheric_loss[index] == surf_water_vapour_density:
-                    return self.atmospheric_loss[index]
-
-        rho_s = surf_water_vapour_density * \
-            np.exp(h / 2)  # water vapour density at h
-        if apparent_elevation < 0:
-            t, p, e, n, gamma = self.atmosphere.get_atmospheric_params(
-                h, rho_s, frequency_MHz,
-            )
-            delta = .0001 + 0.01 * max(h, 0)  # layer thickness
-            r = earth_radius_km + h - delta  # radius of lower edge
-            while True:
-                m = (r + delta) * np.sin(beta) - r
-                if m >= 0:
-                    dh = 2 * np.sqrt(
-                        2 * r * (delta - m) +
-                        delta ** 2 - m ** 2,
-                    )  # horizontal path
-                    a_acc += dh * gamma
-                    break
-                ds = (r + delta) * np.cos(beta) - np.sqrt((r + delta) **
-                                                          2 * np.cos(beta) ** 2 - (2 * r * delta + delta ** 2))
-                a_acc += ds * gamma
-                # angle to vertical
-                alpha = np.arcsin((r + delta) / r * np.sin(beta))
-                h -= delta
-                r -= delta
-                t, p, e, n_new, gamma = self.atmosphere.get_atmospheric_params(
-                    h, rho_s, frequency_MHz,
-                )
-                delta = 0.0001 + 0.01 * max(h, 0)
-                beta = np.arcsin(n / n_new * np.sin(alpha))
-                n = n_new
-
-        t, p, e, n, gamma = self.atmosphere.get_atmospheric_params(
-            h, rho_s, frequency_MHz,
+        table = AtmosphericLossTable.get_table(surf_water_vapour_density)
+        return table.get_loss(
+            apparent_elevation, frequency_MHz, self.earth_station_alt_m,
         )
-        delta = .0001 + .01 * max(h, 0)
-        r = earth_radius_km + h
-
-        while True:
-            ds = np.sqrt(
-                r ** 2 * np.cos(beta) ** 2 + 2 * r *
-                delta + delta ** 2,
-            ) - r * np.cos(beta)
-            a_acc += ds * gamma
-            alpha = np.arcsin(r / (r + delta) * np.sin(beta))
-            h += delta
-            if h >= 100:
-                break
-            r += delta
-            t, p, e, n_new, gamma = self.atmosphere.get_atmospheric_params(
-                h, rho_s, frequency_MHz,
-            )
-            beta = np.arcsin(n / n_new * np.sin(alpha))
-            n = n_new
-
-        self.atmospheric_loss.append(a_acc)
-        self.elevation_has_atmospheric_loss.append(apparent_elevation)
-        self.freq_has_atmospheric_loss.append(frequency_MHz)
-        self.surf_water_dens_has_atmospheric_loss.append(
-            surf_water_vapour_density,
-        )
-
-        return a_acc
 
     @staticmethod
     def _get_beam_spreading_att(
@@ -396,7 +315,7 @@ class PropagationP619(Propagation):
             ) if station_a.is_imt_station() else (station_b, station_a)
             if params.imt.interfered_with:
                 is_earth_to_space_link = True if imt_station.is_space_station else False
-                if sys_station.num_stations > 1:
+                if sys_station.num_stations_total > 1:
                     is_single_entry_interf = False
                 else:
                     is_single_entry_interf = True
@@ -460,7 +379,7 @@ class PropagationP619(Propagation):
 
         atmospheric_gasses_loss = self._get_atmospheric_gasses_loss(
             frequency_MHz=freq_set,
-            apparent_elevation=np.mean(elevation["apparent"]),
+            apparent_elevation=elevation["apparent"],
         )
         beam_spreading_attenuation = self._get_beam_spreading_att(
             elevation["free_space"],
@@ -25,7 +25,7 @@ class PropagationTerSimple(Propagation):
 
     def __init__(self, random_number_gen: np.random.RandomState):
         super().__init__(random_number_gen)
-        self.clutter = PropagationClutterLoss(np.random.RandomState(101))
+        self.clutter = PropagationClutterLoss(random_number_gen)
         self.free_space = PropagationFreeSpace(np.random.RandomState(101))
         self.building_loss = 20
 
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+Terrain heights from SRTM HGT tiles, used to build the path profiles of the
+P.452 clear-air model.
+
+Each HGT tile covers one degree of latitude and longitude, and is named after
+its south-west corner (e.g. S24W047.hgt). Tiles are memory-mapped when first
+needed and kept in a least recently used cache, so only the pages holding the
+sampled heights are read from disk and tiles are not reloaded on every
+snapshot.
+"""
+from collections import OrderedDict
+import os
+
+import numpy as np
+
+from sharc.satellite.ngso.constants import EARTH_RADIUS_KM
+
+
+class TerrainDatabase(object):
+    """
+    Provides terrain heights and great-circle path profiles from a directory
+    of SRTM HGT tiles. Points not covered by any tile are considered at sea
+    level, as are the void samples of the tiles.
+
+    Attributes
+    ----------
+        tiles_dir (str): directory with the HGT tiles
+        cache_size (int): maximum number of tiles kept memory-mapped
+    """
+
+    # value of the void samples of HGT tiles
+    VOID = -32768
+
+    def __init__(self, tiles_dir: str, cache_size: int = 16):
+        """
+        Parameters
+        ----------
+            tiles_dir (str): directory with the HGT tiles
+            cache_size (int): maximum number of tiles kept memory-mapped
+        """
+        if not os.path.isdir(tiles_dir):
+            raise ValueError(
+                f"TerrainDatabase: terrain directory {tiles_dir} does not exist",
+            )
+        if cache_size < 1:
+            raise ValueError("TerrainDatabase: cache_size must be positive")
+        self.tiles_dir = tiles_dir
+        self.cache_size = cache_size
+        self._tiles = OrderedDict()
+
+    @staticmethod
+    def tile_name(lat: int, lon: int) -> str:
+        """
+        Returns the file name of the tile with south-west corner at the given
+        integer latitude and longitude [degrees].
+        """
+        return "{}{:02d}{}{:03d}.hgt".format(
+            "N" if lat >= 0 else "S", abs(lat),
+            "E" if lon >= 0 else "W", abs(lon),
+        )
+
+    def get_tile(self, lat: int, lon: int) -> np.ndarray:
+        """
+        Returns the memory-mapped heights of a tile, or None if there is no
+        tile for the given south-west corner.
+
+        Parameters
+        ----------
+            lat (int): latitude of the south-west corner [degrees]
+            lon (int): longitude of the south-west corner [degrees]
+
+        Returns
+        -------
+            np.ndarray: heights [m] of the tile samples, from north to south
+                and west to east
+        """
+        key = (lat, lon)
+        if key in self._tiles:
+            self._tiles.move_to_end(key)
+            return self._tiles[key]
+
+        tile = None
+        file_path = os.path.join(self.tiles_dir, self.tile_name(lat, lon))
+        if os.path.exists(file_path):
+            num_samples = int(round(np.sqrt(os.path.getsize(file_path) // 2)))
+            if 2 * num_samples ** 2 != os.path.getsize(file_path):
+                raise ValueError(
+                    f"TerrainDatabase: {file_path} is not a square HGT tile",
+                )
+            tile = np.memmap(
+                file_path,
+                dtype=">i2",
+                mode="r",
+                shape=(num_samples, num_samples),
+            )
+
+        self._tiles[key] = tile
+        if len(self._tiles) > self.cache_size:
+            self._tiles.popitem(last=False)
+
+        return tile
+
+    def get_heights(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """
+        Returns the terrain heights at the given points, interpolated
+        bilinearly between the tile samples.
+
+        Parameters
+        ----------
+            lat (np.ndarray): latitudes [degrees]
+            lon (np.ndarray): longitudes [degrees], wrapped to [-180, 180)
+
+        Returns
+        -------
+            np.ndarray: terrain heights [m] with the shape of lat
+        """
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        heights = np.zeros(lat.shape)
+
+        flat_lat = lat.ravel()
+        # e.g., longitude 180 is in the W180 tile, as there are no E180 tiles
+        flat_lon = (lon.ravel() + 180) % 360 - 180
+        flat_heights = heights.reshape(-1)
+
+        tile_lat = np.floor(flat_lat).astype(int)
+        tile_lon = np.floor(flat_lon).astype(int)
+        tiles, inverse = np.unique(
+            np.stack([tile_lat, tile_lon], axis=-1), axis=0, return_inverse=True,
+        )
+        inverse = np.ravel(inverse)
+
+        for k, (t_lat, t_lon) in enumerate(tiles):
+            tile = self.get_tile(int(t_lat), int(t_lon))
+            if tile is None:
+                continue
+            points = np.nonzero(inverse == k)[0]
+            last = tile.shape[0] - 1
+
+            # fractional row (from north) and column (from west) of the points
+            row = (t_lat + 1 - flat_lat[points]) * last
+            col = (flat_lon[points] - t_lon) * last
+            row0 = np.clip(np.floor(row).astype(int), 0, last - 1)
+            col0 = np.clip(np.floor(col).astype(int), 0, last - 1)
+            frac_row = row - row0
+            frac_col = col - col0
+
+            corners = tile[
+                row0[:, np.newaxis] + [0, 0, 1, 1],
+                col0[:, np.newaxis] + [0, 1, 0, 1],
+            ].astype(float)
+            corners[corners == self.VOID] = 0
+
+            flat_heights[points] = \
+                (1 - frac_row) * (1 - frac_col) * corners[:, 0] + \
+                (1 - frac_row) * frac_col * corners[:, 1] + \
+                frac_row * (1 - frac_col) * corners[:, 2] + \
+                frac_row * frac_col * corners[:, 3]
+
+        return heights
+
+    def get_profiles(
+        self,
+        lat_tx: np.ndarray,
+        lon_tx: np.ndarray,
+        lat_rx: np.ndarray,
+        lon_rx: np.ndarray,
+        profile_length: int,
+    ) -> tuple:
+        """
+        Returns the terrain profiles along the great-circle paths between
+        transmitters and receivers.
+
+        Parameters
+        ----------
+            lat_tx (np.ndarray): latitude of the transmitters [degrees]
+            lon_tx (np.ndarray): longitude of the transmitters [degrees]
+            lat_rx (np.ndarray): latitude of the receivers [degrees]
+            lon_rx (np.ndarray): longitude of the receivers [degrees]
+            profile_length (int): number of points of each profile
+
+        Returns
+        -------
+            tuple: distances from the transmitter [km] and terrain heights [m]
+                of the profile points, with shape
+                (number of links, profile_length)
+        """
+        lat, lon, d = great_circle_points(
+            lat_tx, lon_tx, lat_rx, lon_rx, profile_length,
+        )
+        return d, self.get_heights(lat, lon)
+
+
+def great_circle_points(
+    lat_a: np.ndarray,
+    lon_a: np.ndarray,
+    lat_b: np.ndarray,
+    lon_b: np.ndarray,
+    num_points: int,
+) -> tuple:
+    """
+    Returns equally spaced points along the great-circle paths between points
+    a and b, in a spherical Earth.
+
+    Parameters
+    ----------
+        lat_a (np.ndarray): latitude of the start points [degrees]
+        lon_a (np.ndarray): longitude of the start points [degrees]
+        lat_b (np.ndarray): latitude of the end points [degrees]
+        lon_b (np.ndarray): longitude of the end points [degrees]
+        num_points (int): number of points of each path, including the ends
+
+    Returns
+    -------
+        tuple: latitude [degrees], longitude [degrees] and distance from the
+            start point [km] of the path points, with shape
+            (number of paths, num_points)
+    """
+    def unit_vector(lat, lon):
+        lat = np.deg2rad(np.ravel(lat))[:, np.newaxis]
+        lon = np.deg2rad(np.ravel(lon))[:, np.newaxis]
+        return np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)
+
+    xa, ya, za = unit_vector(lat_a, lon_a)
+    xb, yb, zb = unit_vector(lat_b, lon_b)
+
+    # central angle between the ends
+    cross = np.sqrt(
+        (ya * zb - za * yb) ** 2 + (za * xb - xa * zb) ** 2 + (xa * yb - ya * xb) ** 2,
+    )
+    angle = np.arctan2(cross, xa * xb + ya * yb + za * zb)
+
+    t = np.linspace(0, 1, num_points)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        wa = np.where(angle > 0, np.sin((1 - t) * angle) / np.sin(angle), 1 - t)
+        wb = np.where(angle > 0, np.sin(t * angle) / np.sin(angle), t)
+
+    x = wa * xa + wb * xb
+    y = wa * ya + wb * yb
+    z = wa * za + wb * zb
+
+    lat = np.rad2deg(np.arctan2(z, np.sqrt(x ** 2 + y ** 2)))
+    lon = np.rad2deg(np.arctan2(y, x))
+
+    return lat, lon, t * angle * EARTH_RADIUS_KM
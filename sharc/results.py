@@ -10,16 +10,158 @@ import os
 import datetime
 import re
 import pathlib
-import pandas as pd
+import numpy as np
+from numpy.lib.mixins import NDArrayOperatorsMixin
 from shutil import copy
 from sharc.support.sharc_logger import SimulationLogger
+from sharc.results_store import ResultsStore, NpyResultsStore, CsvResultsStore
 
 
-class SampleList(list):
+class SampleList(NDArrayOperatorsMixin):
     """
-    This class only exists so that no list property can be confused with a SampleList
+    Growable buffer of samples backed by a NumPy array.
+
+    Samples are stored unboxed in a preallocated array whose capacity doubles
+    when it is full, so extending it with the per snapshot results costs an
+    amortized copy of the new samples only. It supports the list operations
+    used on results (extend, append, len, iteration, indexing and comparison
+    with lists), and it can be passed to NumPy functions and used in
+    arithmetic expressions, which return plain arrays.
+
+    Note that views returned by `view` (or by np.asarray) share memory with
+    the buffer and are only valid until the SampleList is modified.
     """
 
+    # Capacity of the first allocation
+    MIN_CAPACITY = 64
+
+    def __init__(self, samples=None, dtype=np.float64):
+        """
+        Parameters
+        ----------
+        samples : array_like, optional
+            Initial samples. A 1D array with the same dtype is used without
+            being copied until the SampleList grows (e.g. a memory-mapped
+            column).
+        dtype : data-type, optional
+            Data type of the samples, np.float64 or np.float32. By default
+            np.float64.
+        """
+        self._dtype = np.dtype(dtype)
+        self._buffer = np.empty(0, dtype=self._dtype)
+        self._size = 0
+        # True while the buffer is an array given by the caller, which must
+        # never be written to
+        self._shared = False
+
+        if samples is None:
+            return
+
+        if isinstance(samples, np.ndarray) and samples.ndim == 1 \
+                and samples.dtype == self._dtype:
+            self._buffer = samples
+            self._size = samples.size
+            self._shared = True
+        else:
+            self.extend(samples)
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Data type of the samples."""
+        return self._dtype
+
+    def view(self) -> np.ndarray:
+        """
+        Returns a 1D array with the samples, without copying them.
+        """
+        return self._buffer[:self._size]
+
+    def extend(self, samples):
+        """
+        Appends samples to the end of the buffer.
+
+        Parameters
+        ----------
+        samples : array_like
+            Samples to append. Multi-dimensional arrays are flattened.
+        """
+        samples = np.asarray(samples, dtype=self._dtype).ravel()
+        new_size = self._size + samples.size
+
+        if new_size > self._buffer.size:
+            capacity = max(
+                2 * self._buffer.size, new_size, self.MIN_CAPACITY,
+            )
+            buffer = np.empty(capacity, dtype=self._dtype)
+            buffer[:self._size] = self._buffer[:self._size]
+            self._buffer = buffer
+            self._shared = False
+
+        self._buffer[self._size:new_size] = samples
+        self._size = new_size
+
+    def append(self, sample):
+        """
+        Appends a single sample to the end of the buffer.
+        """
+        self.extend([sample])
+
+    def clear(self):
+        """
+        Removes all samples, keeping the allocated buffer for reuse.
+        """
+        if self._shared:
+            self._buffer = np.empty(0, dtype=self._dtype)
+            self._shared = False
+        self._size = 0
+
+    def tolist(self) -> list:
+        """
+        Returns the samples as a list of Python floats.
+        """
+        return self.view().tolist()
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return iter(self.view())
+
+    def __getitem__(self, index):
+        return self.view()[index]
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None:
+            return self.view()
+        return self.view().astype(dtype, copy=False)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        if any(isinstance(x, SampleList) for x in kwargs.get("out", ())):
+            return NotImplemented
+        inputs = tuple(
+            x.view() if isinstance(x, SampleList) else x for x in inputs
+        )
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    def __eq__(self, other):
+        # compare as a list would, so that SampleList == [...] is a bool
+        other = np.asarray(other)
+        return other.shape == (self._size,) and \
+            bool(np.array_equal(self.view(), other))
+
+    def __ne__(self, other):
+        return not self == other
+
+    # SampleList is mutable, so it must not be hashable
+    __hash__ = None
+
+    def __reduce__(self):
+        # pickle only the samples, not the unused capacity
+        return (SampleList, (self.view(), self._dtype))
+
+    def __repr__(self):
+        return f"SampleList({self.view()!r})"
+
 
 class Results(object):
     """Handle the output of the simulator"""
@@ -27,83 +169,96 @@ class Results(object):
     # This should always be true for 1st samples flush
     overwrite_sample_files = True
 
-    def __init__(self):
+    def __init__(self, store: ResultsStore = None, dtype=np.float64):
+        """
+        Parameters
+        ----------
+        store : ResultsStore, optional
+            Backend used to write and read the samples. By default, samples
+            are stored as memory-mappable binary columns (NpyResultsStore).
+        dtype : data-type, optional
+            Data type of the samples kept in memory and of the default store,
+            np.float64 or np.float32. By default np.float64.
+        """
+        self.dtype = np.dtype(dtype)
+        self.store = store if store is not None else NpyResultsStore(self.dtype)
+
         # Transmit power density [dBm/Hz]
-        self.imt_ul_tx_power_density = SampleList()
-        self.imt_ul_tx_power = SampleList()
+        self.imt_ul_tx_power_density = SampleList(dtype=dtype)
+        self.imt_ul_tx_power = SampleList(dtype=dtype)
         # SINR [dB]
-        self.imt_ul_sinr_ext = SampleList()
+        self.imt_ul_sinr_ext = SampleList(dtype=dtype)
         # SINR [dB]
-        self.imt_ul_sinr = SampleList()
+        self.imt_ul_sinr = SampleList(dtype=dtype)
         # SNR [dB]
-        self.imt_ul_snr = SampleList()
-        self.imt_ul_inr = SampleList()
+        self.imt_ul_snr = SampleList(dtype=dtype)
+        self.imt_ul_inr = SampleList(dtype=dtype)
         # Throughput [bits/s/Hz]
-        self.imt_ul_tput_ext = SampleList()
+        self.imt_ul_tput_ext = SampleList(dtype=dtype)
         # Throughput [bits/s/Hz]
-        self.imt_ul_tput = SampleList()
+        self.imt_ul_tput = SampleList(dtype=dtype)
 
-        self.imt_path_loss = SampleList()
-        self.imt_coupling_loss = SampleList()
+        self.imt_path_loss = SampleList(dtype=dtype)
+        self.imt_coupling_loss = SampleList(dtype=dtype)
         # Antenna gain [dBi]
-        self.imt_bs_antenna_gain = SampleList()
+        self.imt_bs_antenna_gain = SampleList(dtype=dtype)
         # Antenna gain [dBi]
-        self.imt_ue_antenna_gain = SampleList()
+        self.imt_ue_antenna_gain = SampleList(dtype=dtype)
 
         # Antenna gain [dBi]
-        self.system_imt_antenna_gain = SampleList()
+        self.system_imt_antenna_gain = SampleList(dtype=dtype)
         # Antenna gain [dBi]
-        self.imt_system_antenna_gain = SampleList()
+        self.imt_system_antenna_gain = SampleList(dtype=dtype)
         # Antenna gain [dBi]
-        self.imt_system_antenna_gain_adjacent = SampleList()
+        self.imt_system_antenna_gain_adjacent = SampleList(dtype=dtype)
 
         # Path Loss [dB]
-        self.imt_system_path_loss = SampleList()
+        self.imt_system_path_loss = SampleList(dtype=dtype)
         # Building entry loss [dB]
-        self.imt_system_build_entry_loss = SampleList()
+        self.imt_system_build_entry_loss = SampleList(dtype=dtype)
         # System diffraction loss [dB]
-        self.imt_system_diffraction_loss = SampleList()
+        self.imt_system_diffraction_loss = SampleList(dtype=dtype)
         # System to IMT coupling loss
-        self.sys_to_imt_coupling_loss = SampleList()
+        self.sys_to_imt_coupling_loss = SampleList(dtype=dtype)
 
-        self.imt_dl_tx_power_density = SampleList()
+        self.imt_dl_tx_power_density = SampleList(dtype=dtype)
         # Transmit power [dBm]
-        self.imt_dl_tx_power = SampleList()
+        self.imt_dl_tx_power = SampleList(dtype=dtype)
         # SINR [dB]
-        self.imt_dl_sinr_ext = SampleList()
+        self.imt_dl_sinr_ext = SampleList(dtype=dtype)
         # SINR [dB]
-        self.imt_dl_sinr = SampleList()
+        self.imt_dl_sinr = SampleList(dtype=dtype)
         # SNR [dB]
-        self.imt_dl_snr = SampleList()
+        self.imt_dl_snr = SampleList(dtype=dtype)
         # I/N [dB]
-        self.imt_dl_inr = SampleList()
+        self.imt_dl_inr = SampleList(dtype=dtype)
         # Throughput [bits/s/Hz]
-        self.imt_dl_tput_ext = SampleList()
+        self.imt_dl_tput_ext = SampleList(dtype=dtype)
         # Throughput [bits/s/Hz]
-        self.imt_dl_tput = SampleList()
+        self.imt_dl_tput = SampleList(dtype=dtype)
 
         # PFD
-        self.imt_dl_pfd_external = SampleList()
-        self.imt_dl_pfd_external_aggregated = SampleList()
+        self.imt_dl_pfd_external = SampleList(dtype=dtype)
+        self.imt_dl_pfd_external_aggregated = SampleList(dtype=dtype)
 
-        self.system_ul_coupling_loss = SampleList()
-        self.system_ul_interf_power = SampleList()
+        self.system_ul_coupling_loss = SampleList(dtype=dtype)
+        self.system_ul_interf_power = SampleList(dtype=dtype)
         # Interference Power [dBm]
 
-        self.system_dl_coupling_loss = SampleList()
-        self.system_dl_interf_power = SampleList()
+        self.system_dl_coupling_loss = SampleList(dtype=dtype)
+        self.system_dl_interf_power = SampleList(dtype=dtype)
         # Interference Power [dBm/MHz]
         # NOTE: this may not be what you want for a correct
         # protection criteria analysis since it is
         # a mean value. If you have both cochannel
         # and adjacent channel, the adjacent channel interference
         # will always drag the mean down
-        self.system_dl_interf_power_per_mhz = SampleList()
-        self.system_ul_interf_power_per_mhz = SampleList()
+        self.system_dl_interf_power_per_mhz = SampleList(dtype=dtype)
+        self.system_ul_interf_power_per_mhz = SampleList(dtype=dtype)
 
-        self.system_inr = SampleList()
-        self.system_pfd = SampleList()
-        self.system_rx_interf = SampleList()
+        self.system_inr = SampleList(dtype=dtype)
+        self.system_pfd = SampleList(dtype=dtype)
+        self.system_rx_interf = SampleList(dtype=dtype)
 
         self.__sharc_dir = pathlib.Path(__file__).parent.resolve()
 
@@ -194,32 +349,77 @@ class Results(object):
         return results_relevant_attr_names
 
     def write_files(self, snapshot_number: int):
-        """Writes the sample data to the output file
+        """Writes the sample data to the output directory
 
         Parameters
         ----------
         snapshot_number : int
             Current snapshot number
         """
-        results_relevant_attr_names = self.get_relevant_attributes()
-        for attr_name in results_relevant_attr_names:
-            file_path = os.path.join(
-                self.output_directory,
-                attr_name + ".csv",
-            )
-            samples = getattr(self, attr_name)
-            if len(samples) == 0:
+        samples = {}
+        for attr_name in self.get_relevant_attributes():
+            attr_samples = getattr(self, attr_name)
+            if len(attr_samples) == 0:
                 continue
-            df = pd.DataFrame({"samples": samples})
-            if self.overwrite_sample_files:
-                df.to_csv(file_path, mode="w", index=False)
-            else:
-                df.to_csv(file_path, mode="a", index=False, header=False)
-            setattr(self, attr_name, SampleList())
+            samples[attr_name] = attr_samples
+
+        self.store.write(
+            self.output_directory,
+            samples,
+            overwrite=self.overwrite_sample_files,
+        )
+
+        for attr_samples in samples.values():
+            attr_samples.clear()
 
         if self.overwrite_sample_files:
             self.overwrite_sample_files = False
 
+    def export_csv(self, export_dir: str = None):
+        """Exports the samples in the output directory to csv files, one
+        single column file per attribute.
+
+        Parameters
+        ----------
+        export_dir : str, optional
+            Directory where the csv files are written. By default, they are
+            written to the output directory.
+        """
+        if export_dir is None:
+            export_dir = self.output_directory
+        os.makedirs(export_dir, exist_ok=True)
+
+        samples = self.store.read(
+            self.output_directory,
+            self.get_relevant_attributes(),
+        )
+        CsvResultsStore().write(export_dir, samples, overwrite=True)
+
+    def merge(self, other: "Results") -> "Results":
+        """Appends the samples of another Results object to this one.
+
+        Samples are appended in the order they appear in `other`, so merging
+        the partial results of consecutive snapshot ranges in order yields the
+        same samples as running all snapshots in a single process.
+
+        Parameters
+        ----------
+        other : Results
+            Results object whose samples are appended
+
+        Returns
+        -------
+        Results
+            self, with the samples of `other` appended
+        """
+        for attr_name in other.get_relevant_attributes():
+            samples = getattr(other, attr_name)
+            if len(samples) == 0:
+                continue
+            getattr(self, attr_name).extend(samples)
+
+        return self
+
     @staticmethod
     def load_many_from_dir(
         root_dir: str,
@@ -268,6 +468,9 @@ class Results(object):
         """
         Load results from a specified directory, optionally loading only specified samples.
 
+        Samples written by the binary store are memory-mapped instead of parsed.
+        Directories that only have csv files are parsed as before.
+
         Args:
             abs_path (str): Absolute path to the output directory.
             only_samples (list[str], optional): List of sample names to load. If None, load all samples. Defaults to None.
@@ -277,45 +480,28 @@ class Results(object):
         """
         self.output_directory = abs_path
 
-        self_dict = self.__dict__
         if only_samples is not None:
             results_relevant_attr_names = only_samples
         else:
-            results_relevant_attr_names = filter(
-                lambda x: isinstance(getattr(self, x), SampleList), self_dict
+            results_relevant_attr_names = self.get_relevant_attributes()
+
+        # outputs written before the binary store was introduced only have
+        # csv files
+        store = self.store
+        if not store.has_results(abs_path):
+            store = CsvResultsStore()
+
+        samples = store.read(abs_path, results_relevant_attr_names)
+        for attr_name, attr_samples in samples.items():
+            # Ignore if there is no data
+            if len(attr_samples) == 0:
+                continue
+            setattr(
+                self,
+                attr_name,
+                SampleList(attr_samples, dtype=attr_samples.dtype),
             )
 
-        for attr_name in results_relevant_attr_names:
-            file_path = os.path.join(abs_path, f"{attr_name}.csv")
-            if os.path.exists(file_path):
-                try:
-                    # Try reading the .csv file using pandas with different
-                    # delimiters
-                    try:
-                        data = pd.read_csv(file_path, delimiter=",")
-                    except pd.errors.ParserError:
-                        data = pd.read_csv(file_path, delimiter=";")
-
-                    # Ensure the data has exactly one column
-                    if data.shape[1] != 1:
-                        raise Exception(
-                            f"The file with samples of {attr_name} should have a single column.", )
-
-                    # Remove rows that do not contain valid numeric values
-                    data = data.apply(pd.to_numeric, errors="coerce").dropna()
-
-                    # Ignore if there is no data
-                    if data.empty:
-                        continue
-                    # Check if there is enough data to load results from.
-
-                    setattr(self, attr_name, SampleList(data.to_numpy()[:, 0]))
-
-                except Exception as e:
-                    print(e)
-                    raise Exception(
-                        f"Error processing the sample file ({attr_name}.csv) for {attr_name}: {e}")
-
         return self
 
     @staticmethod
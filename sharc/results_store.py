@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+Storage backends for the samples collected by Results.
+
+NpyResultsStore is the default backend. Each sample attribute is kept as a
+binary column that grows by one chunk every time the results are flushed, and
+a json manifest records the data type and the length of every chunk. Columns
+are read back as memory-mapped arrays, so opening a large campaign does not
+parse or copy the samples.
+
+CsvResultsStore reads and writes the single column csv files used by older
+versions of SHARC. It is used to export results and to load old outputs.
+"""
+import json
+import os
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+
+class ResultsStore(ABC):
+    """
+    Interface of the backends used by Results to persist its samples.
+    """
+
+    @abstractmethod
+    def write(self, directory: str, samples: dict, overwrite: bool):
+        """
+        Writes samples to the directory.
+
+        Parameters
+        ----------
+        directory : str
+            Output directory
+        samples : dict
+            Maps sample attribute names to their new samples
+        overwrite : bool
+            If True, samples that were previously written to the directory are
+            discarded. Otherwise the new samples are appended to them.
+        """
+
+    @abstractmethod
+    def read(self, directory: str, names: list[str]) -> dict:
+        """
+        Reads samples from the directory.
+
+        Parameters
+        ----------
+        directory : str
+            Output directory
+        names : list[str]
+            Names of the sample attributes to read
+
+        Returns
+        -------
+        dict
+            Maps the names found in the directory to 1D arrays of samples
+        """
+
+    @abstractmethod
+    def has_results(self, directory: str) -> bool:
+        """
+        Checks if the directory holds samples written by this backend.
+
+        Parameters
+        ----------
+        directory : str
+            Output directory
+
+        Returns
+        -------
+        bool
+            True if there are samples that can be read
+        """
+
+
+class NpyResultsStore(ResultsStore):
+    """
+    Stores samples as chunked binary columns described by a json manifest.
+
+    The directory layout is
+
+        <directory>/samples/manifest.json
+        <directory>/samples/<attribute name>.bin
+
+    where each .bin file holds the raw samples of an attribute, chunk after
+    chunk, and the manifest holds their data type and chunk lengths. The
+    manifest is replaced only after the chunks are written, so samples of an
+    interrupted flush are never read back.
+
+    Columns are not compressed, since that would prevent memory-mapping them.
+    Simulation samples are dB values with noisy mantissas, which do not
+    compress well anyway.
+    """
+
+    SAMPLES_DIR = "samples"
+    MANIFEST_FILE = "manifest.json"
+    FORMAT = "sharc-npy-columns"
+    VERSION = 1
+
+    def __init__(self, dtype=np.float64):
+        """
+        Parameters
+        ----------
+        dtype : data-type, optional
+            Data type used to store the samples, by default np.float64
+        """
+        self.dtype = np.dtype(dtype)
+
+    def write(self, directory: str, samples: dict, overwrite: bool):
+        """
+        Appends a chunk to the column of each attribute in samples.
+
+        See ResultsStore.write.
+        """
+        samples_dir = os.path.join(directory, self.SAMPLES_DIR)
+        os.makedirs(samples_dir, exist_ok=True)
+
+        if overwrite:
+            manifest = self._empty_manifest()
+        else:
+            manifest = self._read_manifest(directory)
+
+        for name, values in samples.items():
+            values = np.asarray(values, dtype=self.dtype).ravel()
+            column = manifest["columns"].get(name)
+            if column is None:
+                column = {
+                    "file": name + ".bin",
+                    "dtype": self.dtype.str,
+                    "chunks": [],
+                }
+                manifest["columns"][name] = column
+            elif np.dtype(column["dtype"]) != self.dtype:
+                values = values.astype(column["dtype"])
+
+            file_path = os.path.join(samples_dir, column["file"])
+            # truncate the file to the length in the manifest, discarding any
+            # samples left by an interrupted flush
+            mode = "r+b" if column["chunks"] and os.path.exists(file_path) else "wb"
+            with open(file_path, mode) as f:
+                f.truncate(sum(column["chunks"]) * values.itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(values.tobytes())
+            column["chunks"].append(int(values.size))
+
+        self._write_manifest(directory, manifest)
+
+    def read(self, directory: str, names: list[str]) -> dict:
+        """
+        Returns read-only memory-mapped arrays with the samples of each name.
+
+        See ResultsStore.read.
+        """
+        manifest = self._read_manifest(directory)
+        samples = {}
+        for name in names:
+            column = manifest["columns"].get(name)
+            if column is None:
+                continue
+            length = sum(column["chunks"])
+            dtype = np.dtype(column["dtype"])
+            if length == 0:
+                samples[name] = np.empty(0, dtype=dtype)
+                continue
+            samples[name] = np.memmap(
+                os.path.join(directory, self.SAMPLES_DIR, column["file"]),
+                dtype=dtype,
+                mode="r",
+                shape=(length,),
+            )
+
+        return samples
+
+    def iter_chunks(self, directory: str, name: str):
+        """
+        Iterates over the samples of an attribute one flushed chunk at a time.
+
+        Parameters
+        ----------
+        directory : str
+            Output directory
+        name : str
+            Name of the sample attribute
+
+        Yields
+        ------
+        np.ndarray
+            Memory-mapped samples of each chunk
+        """
+        samples = self.read(directory, [name]).get(name)
+        if samples is None:
+            return
+        chunks = self._read_manifest(directory)["columns"][name]["chunks"]
+        start = 0
+        for length in chunks:
+            yield samples[start:start + length]
+            start += length
+
+    def has_results(self, directory: str) -> bool:
+        """
+        Checks if the directory holds a manifest. See ResultsStore.has_results.
+        """
+        return os.path.exists(self._manifest_path(directory))
+
+    def _manifest_path(self, directory: str) -> str:
+        return os.path.join(directory, self.SAMPLES_DIR, self.MANIFEST_FILE)
+
+    def _empty_manifest(self) -> dict:
+        return {"format": self.FORMAT, "version": self.VERSION, "columns": {}}
+
+    def _read_manifest(self, directory: str) -> dict:
+        if not self.has_results(directory):
+            return self._empty_manifest()
+        with open(self._manifest_path(directory), "r") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != self.FORMAT:
+            raise ValueError(
+                f"NpyResultsStore: {self._manifest_path(directory)} is not a SHARC samples manifest",
+            )
+        return manifest
+
+    def _write_manifest(self, directory: str, manifest: dict):
+        manifest_path = self._manifest_path(directory)
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, manifest_path)
+
+
+class CsvResultsStore(ResultsStore):
+    """
+    Stores each sample attribute as a single column csv file named
+    <attribute name>.csv, with a "samples" header.
+    """
+
+    def write(self, directory: str, samples: dict, overwrite: bool):
+        """
+        Writes (or appends to) a csv file for each attribute in samples.
+
+        See ResultsStore.write.
+        """
+        for name, values in samples.items():
+            file_path = os.path.join(directory, name + ".csv")
+            df = pd.DataFrame({"samples": np.asarray(values).ravel()})
+            if overwrite or not os.path.exists(file_path):
+                df.to_csv(file_path, mode="w", index=False)
+            else:
+                df.to_csv(file_path, mode="a", index=False, header=False)
+
+    def read(self, directory: str, names: list[str]) -> dict:
+        """
+        Parses the csv file of each name. See ResultsStore.read.
+        """
+        samples = {}
+        for name in names:
+            file_path = os.path.join(directory, f"{name}.csv")
+            if not os.path.exists(file_path):
+                continue
+            try:
+                # Try reading the .csv file using pandas with different
+                # delimiters
+                try:
+                    data = pd.read_csv(file_path, delimiter=",")
+                except pd.errors.ParserError:
+                    data = pd.read_csv(file_path, delimiter=";")
+
+                # Ensure the data has exactly one column
+                if data.shape[1] != 1:
+                    raise Exception(
+                        f"The file with samples of {name} should have a single column.", )
+
+                # Remove rows that do not contain valid numeric values
+                data = data.apply(pd.to_numeric, errors="coerce").dropna()
+
+                samples[name] = data.to_numpy()[:, 0]
+
+            except Exception as e:
+                print(e)
+                raise Exception(
+                    f"Error processing the sample file ({name}.csv) for {name}: {e}")
+
+        return samples
+
+    def has_results(self, directory: str) -> bool:
+        """
+        Checks if the directory holds any csv file. See ResultsStore.has_results.
+        """
+        return any(f.endswith(".csv") for f in os.listdir(directory))
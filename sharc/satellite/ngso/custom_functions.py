@@ -1,3 +1,5 @@
+import functools
+
 import numpy as np
 import matplotlib.pyplot as plt
 import cartopy.crs as ccrs
@@ -12,10 +14,14 @@ def wrap2pi(angle_rad):
     return (angle_rad + np.pi) % (2 * np.pi) - np.pi
 
 
-def eccentric_anomaly(e, M, terms=40, mod_2pi=True):
+# Kepler equation solvers accepted by eccentric_anomaly
+KEPLER_SOLVERS = ["BESSEL_SERIES", "HALLEY"]
+
+
+def eccentric_anomaly(e, M, terms=40, mod_2pi=True, method="BESSEL_SERIES", tol=1e-12, max_iter=50):
     """
     Calculate the eccentric anomaly E given the eccentricity e and
-    mean anomaly M using a Bessel series expansion.
+    mean anomaly M, solving Kepler's equation M = E - e * sin(E).
 
     Parameters:
     ----------
@@ -27,6 +33,15 @@ def eccentric_anomaly(e, M, terms=40, mod_2pi=True):
         Number of terms for the Bessel series expansion (default is 40).
     mod_2pi : bool, optional
         Whether to return E modulo 2π (default is True).
+    method : str, optional
+        "BESSEL_SERIES" (default) evaluates the Bessel series expansion, which
+        only converges for eccentricities below the Laplace limit (~0.6627).
+        "HALLEY" iterates Halley's method on all the anomalies at once, for any
+        eccentricity.
+    tol : float, optional
+        Convergence tolerance of the Halley iteration, in radians.
+    max_iter : int, optional
+        Maximum number of Halley iterations.
 
     Returns:
     -------
@@ -37,16 +52,31 @@ def eccentric_anomaly(e, M, terms=40, mod_2pi=True):
     if np.isclose(e, 0):
         return M
 
-    # Prepare for Bessel series expansion
-    n = np.arange(1, terms + 1)[:, None, None]  # Shape (terms, 1, 1)
-    M_expanded = M[None, ...]  # Add a new dimension to M, for broadcasting
-
-    # Calculate series sum using Bessel functions and sine terms
-    series_sum = np.sum((1 / n) * jv(n, n * e) *
-                        np.sin(n * M_expanded), axis=0)
-
-    # Calculate eccentric anomaly
-    E = M + 2 * series_sum
+    if method == "BESSEL_SERIES":
+        # Calculate series sum using Bessel functions and sine terms, one term
+        # at a time to avoid a (terms, *M.shape) array
+        coefficients = _bessel_series_coefficients(float(e), terms)
+        series_sum = np.zeros(np.shape(M))
+        for n, coefficient in enumerate(coefficients, start=1):
+            series_sum += coefficient * np.sin(n * M)
+
+        # Calculate eccentric anomaly
+        E = M + 2 * series_sum
+    elif method == "HALLEY":
+        # starting value that converges for any eccentricity (Danby, 1987)
+        E = M + 0.85 * e * np.sign(np.sin(M))
+        for _ in range(max_iter):
+            e_sin = e * np.sin(E)
+            e_cos = e * np.cos(E)
+            f = E - e_sin - M
+            f_prime = 1 - e_cos
+            delta = f / (f_prime - 0.5 * f * e_sin / f_prime)
+            E = E - delta
+            if np.all(np.abs(delta) < tol):
+                break
+    else:
+        raise ValueError(
+            f"eccentric_anomaly: method = {method} is not one of {KEPLER_SOLVERS}")
 
     # Apply modulo operation if specified
     if mod_2pi:
@@ -55,6 +85,13 @@ def eccentric_anomaly(e, M, terms=40, mod_2pi=True):
     return E
 
 
+@functools.lru_cache(maxsize=64)
+def _bessel_series_coefficients(e: float, terms: int) -> np.ndarray:
+    """Coefficients J_n(n * e) / n of the Bessel series of the eccentric anomaly."""
+    n = np.arange(1, terms + 1)
+    return jv(n, n * e) / n
+
+
 def keplerian2eci(a, e, delta, Omega, omega, nu):
     """
     Calculate the position vector in ECI coordinates for each RAAN and true anomaly.
@@ -0,0 +1,137 @@
+"""Tabulated satellite positions of an orbit model over one orbital period.
+
+In the ECI frame the satellites of an OrbitModel repeat their positions every
+orbital period, and the Earth rotation is applied afterwards, so the positions
+only need to be propagated once over a period. The table is stored as a .npy
+file and memory-mapped, so that campaigns simulating the same constellation
+share it and only read the pages of the sampled instants.
+"""
+
+import os
+
+import numpy as np
+
+from sharc.support.sharc_utils import get_cache_file_path, write_cache_file
+
+
+class OrbitEphemeris():
+    """ECI positions of the satellites of an orbit, tabulated over the mean anomaly.
+
+    Attributes
+    ----------
+    positions : np.ndarray
+        ECI positions [km] with shape (num_steps, 3, number of satellites),
+        where step k is the mean anomaly 2 * pi * k / num_steps of each
+        satellite.
+    """
+
+    # number of mean anomalies propagated at a time when building a table
+    STEPS_PER_CHUNK = 256
+
+    # tables already loaded by this process
+    _ephemerides = {}
+
+    def __init__(self, positions: np.ndarray):
+        """
+        Parameters
+        ----------
+        positions : np.ndarray
+            ECI positions [km] with shape (num_steps, 3, number of satellites)
+        """
+        self.positions = positions
+        self.num_steps = positions.shape[0]
+        self.step_rad = 2 * np.pi / self.num_steps
+
+    @classmethod
+    def load(
+        cls,
+        key: tuple,
+        num_steps: int,
+        propagate,
+        cache_dir: str | None = None,
+    ) -> "OrbitEphemeris":
+        """Returns the ephemeris of an orbit, building it if it was never stored.
+
+        Parameters
+        ----------
+        key : tuple
+            values that define the orbit
+        num_steps : int
+            number of mean anomaly steps over one period
+        propagate : callable
+            function that returns the ECI positions with shape
+            (3, number of satellites, len(M)) for an array of mean anomalies M
+            [rad], equal for all satellites
+        cache_dir : str or None
+            directory of the stored tables. Defaults to the one of
+            sharc_utils.get_cache_dir
+
+        Returns
+        -------
+        OrbitEphemeris
+            the ephemeris of the orbit
+        """
+        key = repr(("OrbitEphemeris", key, num_steps))
+        file_path = get_cache_file_path(key, ".npy", cache_dir)
+        if file_path in cls._ephemerides:
+            return cls._ephemerides[file_path]
+
+        positions = None
+        if os.path.exists(file_path):
+            positions = np.load(file_path, mmap_mode="r")
+
+        if positions is None:
+            mean_anomaly = 2 * np.pi * np.arange(num_steps) / num_steps
+            positions = np.concatenate([
+                propagate(mean_anomaly[k:k + cls.STEPS_PER_CHUNK]).transpose(2, 0, 1)
+                for k in range(0, num_steps, cls.STEPS_PER_CHUNK)
+            ])
+            if write_cache_file(file_path, lambda f: np.save(f, positions)):
+                positions = np.load(file_path, mmap_mode="r")
+
+        ephemeris = cls(positions)
+        cls._ephemerides[file_path] = ephemeris
+
+        return ephemeris
+
+    def get_eci_positions(self, mean_anomaly: np.ndarray) -> np.ndarray:
+        """Returns the ECI positions of the satellites at the given mean anomalies.
+
+        The direction is interpolated along the great circle between the two
+        nearest tabulated positions and the distance linearly, which is exact
+        for circular orbits.
+
+        Parameters
+        ----------
+        mean_anomaly : np.ndarray
+            mean anomalies [rad] with shape (number of satellites, T), in
+            [0, 2 * pi)
+
+        Returns
+        -------
+        np.ndarray
+            ECI positions [km] with shape (3, number of satellites, T)
+        """
+        step = mean_anomaly / self.step_rad
+        k0 = np.floor(step).astype(int) % self.num_steps
+        k1 = (k0 + 1) % self.num_steps
+        w = step - np.floor(step)
+
+        sat = np.arange(mean_anomaly.shape[0])[:, np.newaxis]
+        # shape (number of satellites, T, 3)
+        p0 = self.positions[k0, :, sat]
+        p1 = self.positions[k1, :, sat]
+
+        r0 = np.linalg.norm(p0, axis=-1, keepdims=True)
+        r1 = np.linalg.norm(p1, axis=-1, keepdims=True)
+        angle = np.arccos(np.clip(np.sum(p0 * p1, axis=-1, keepdims=True) / (r0 * r1), -1., 1.))
+        w = w[..., np.newaxis]
+        sin_angle = np.sin(angle)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            c0 = np.where(sin_angle > 0, np.sin((1 - w) * angle) / sin_angle, 1 - w)
+            c1 = np.where(sin_angle > 0, np.sin(w * angle) / sin_angle, w)
+
+        r = (1 - w) * r0 + w * r1
+        positions = (c0 * p0 / r0 + c1 * p1 / r1) * r
+
+        return positions.transpose(2, 0, 1)
@@ -3,8 +3,9 @@
 
 import numpy as np
 
-from sharc.satellite.ngso.custom_functions import wrap2pi, eccentric_anomaly, keplerian2eci, eci2ecef
+from sharc.satellite.ngso.custom_functions import wrap2pi, eccentric_anomaly, keplerian2eci, eci2ecef, KEPLER_SOLVERS
 from sharc.satellite.ngso.constants import EARTH_RADIUS_KM, KEPLER_CONST, EARTH_ROTATION_RATE
+from sharc.satellite.ngso.orbit_ephemeris import OrbitEphemeris
 
 
 class OrbitModel():
@@ -23,7 +24,9 @@ class OrbitModel():
                  *,
                  model_time_as_random_variable: bool,
                  t_min: float,
-                 t_max: float | None
+                 t_max: float | None,
+                 ephemeris_step_secs: float | None = None,
+                 kepler_solver: str = "BESSEL_SERIES",
              ):
         """Instantiates and OrbitModel object from the Orbit parameters as specified in S.1529.
 
@@ -55,6 +58,16 @@ class OrbitModel():
         t_max: float
             if model_time_as_random_variable == True,
             defines the upper bound of the time distribution
+        ephemeris_step_secs: float | None
+            if set, the positions of eccentric orbits are tabulated over one
+            orbital period with this time step and interpolated from the
+            table, which is cached on disk and shared between runs. Circular
+            orbits are always propagated, as that is cheaper than the lookup.
+        kepler_solver: str
+            method used to solve Kepler's equation for eccentric orbits, one
+            of custom_functions.KEPLER_SOLVERS. The Bessel series is only
+            accurate below the Laplace limit eccentricity (~0.6627), so
+            "HALLEY" should be used for highly eccentric orbits.
         """
         self.Nsp = Nsp
         self.Np = Np
@@ -66,6 +79,10 @@ class OrbitModel():
         self.perigee_alt_km = hp
         self.apogee_alt_km = ha
         self.Mo = Mo
+        if kepler_solver not in KEPLER_SOLVERS:
+            raise ValueError(
+                f"OrbitModel: kepler_solver = {kepler_solver} is not one of {KEPLER_SOLVERS}")
+        self.kepler_solver = kepler_solver
 
         # Derive other orbit parameters
         self.semi_major_axis = (
@@ -116,6 +133,18 @@ class OrbitModel():
         # computed true anomaly relative to the line of nodes
         self.true_anomaly_rel_line_nodes = None
 
+        self.ephemeris = None
+        if ephemeris_step_secs is not None and not np.isclose(self.eccentricity, 0):
+            self.ephemeris = OrbitEphemeris.load(
+                (Nsp, Np, phasing, long_asc, omega, delta, hp, ha, Mo, kepler_solver, KEPLER_CONST, EARTH_RADIUS_KM),
+                int(np.ceil(self.orbital_period_sec / ephemeris_step_secs)),
+                lambda mean_anomaly: self._propagate_eci(
+                    np.broadcast_to(mean_anomaly, (self.Np * self.Nsp, len(mean_anomaly))),
+                    self.inital_raan_rad[:, None],
+                    np.deg2rad(self.omega_0),
+                )[0],
+            )
+
     def get_satellite_positions_time_interval(
             self,
             initial_time_secs=0,
@@ -209,17 +238,63 @@ class OrbitModel():
                     A dictionary with satellite positions in spherical and ecef coordinates.
                         lat, lon, sx, sy, sz
         """
+        return self.get_orbit_positions_from_random_variables(
+            *self.sample_random_variables(rng, n_samples)
+        )
+
+    def sample_random_variables(
+            self,
+            rng: np.random.RandomState,
+            n_samples=1) -> tuple:
+        """Draws the random variables that define the satellite positions.
+
+        Parameters
+        ----------
+        rng : np.random.RandomState
+            Random number generator for reproducibility
+        n_samples : int
+            Number of random samples to generate, by default 1
+
+        Returns
+        -------
+        tuple
+            mean anomaly added to the initial mean anomalies [rad] and time
+            used for the Earth's rotation [s], each with n_samples elements
+        """
         if self.model_time_as_random_variable:
-            return self.get_orbit_positions_time_instant(
-                self.t_min + (self.t_max - self.t_min) * rng.random_sample(n_samples)
-            )
-        # Mean anomaly (M)
-        self.mean_anomaly = (self.initial_mean_anomalies_rad[:, None] +
-                             2 * np.pi * rng.random_sample(n_samples)) % (2 * np.pi)
+            t = self.t_min + (self.t_max - self.t_min) * rng.random_sample(n_samples)
+            return self.mean_motion * t, t
+
+        mean_anomaly_offset = 2 * np.pi * rng.random_sample(n_samples)
 
         # just selecting a random earth rotation for later coordinate transformation
         earth_rotated_t = 2 * np.pi * rng.random_sample(n_samples) / EARTH_ROTATION_RATE
 
+        return mean_anomaly_offset, earth_rotated_t
+
+    def get_orbit_positions_from_random_variables(
+            self,
+            mean_anomaly_offset: np.ndarray,
+            earth_rotated_t: np.ndarray) -> dict:
+        """Returns the satellite positions for given values of the random variables.
+
+        Parameters
+        ----------
+        mean_anomaly_offset : np.ndarray
+            mean anomaly added to the initial mean anomalies [rad]
+        earth_rotated_t : np.ndarray
+            time used for the Earth's rotation [s]
+
+        Returns
+        -------
+        dict
+            A dictionary with satellite positions in spherical and ecef coordinates.
+                lat, lon, alt, sx, sy, sz
+        """
+        # Mean anomaly (M)
+        self.mean_anomaly = (self.initial_mean_anomalies_rad[:, None] +
+                             mean_anomaly_offset) % (2 * np.pi)
+
         # Longitudes of the ascending node (OmegaG)
         # shape (Np*Nsp, len(t))
         # FIXME: previous implementation, due to unexpected behavior, did not
@@ -238,7 +313,7 @@ class OrbitModel():
             self.mean_anomaly,
             self.raan_rad,
             self.omega_rad,
-            earth_rotated_t,
+            np.atleast_1d(earth_rotated_t),
         )
 
     def __get_satellite_positions_from_angles(
@@ -263,9 +338,44 @@ class OrbitModel():
             raan_rad.shape == (self.Np * self.Nsp, 1)
         )
 
+        if self.ephemeris is not None:
+            # positions interpolated from the tabulated orbital period
+            r_eci = self.ephemeris.get_eci_positions(mean_anomaly)
+            r = np.sqrt(np.sum(r_eci ** 2, axis=0))
+        else:
+            r_eci, r = self._propagate_eci(mean_anomaly, raan_rad, omega_rad)
+
+        r_ecef = eci2ecef(earth_rotated_t, r_eci)
+        sx, sy, sz = r_ecef[0], r_ecef[1], r_ecef[2]
+        lat = np.degrees(np.arcsin(sz / r))
+        lon = np.degrees(np.arctan2(sy, sx))
+        # (lat, lon, _) = ecef2lla(sx, sy, sz)
+
+        pos_vector = {
+            'lat': lat,
+            'lon': lon,
+            'alt': r - EARTH_RADIUS_KM,
+            'sx': sx,
+            'sy': sy,
+            'sz': sz
+        }
+        return pos_vector
+
+    def _propagate_eci(
+        self,
+        mean_anomaly: np.ndarray,
+        raan_rad: np.ndarray,
+        omega_rad: np.array,
+    ) -> tuple:
+        """
+        Propagates the satellites to the given mean anomalies.
+
+        Returns the ECI positions [km], with shape (3, Np * Nsp, T), and the
+        distances to Earth's center [km], with shape (Np * Nsp, T).
+        """
         # Eccentric anomaly (E)
         self.eccentric_anom = eccentric_anomaly(
-            self.eccentricity, mean_anomaly)
+            self.eccentricity, mean_anomaly, method=self.kepler_solver)
 
         # True anomaly (v)
         self.true_anomaly = 2 * np.arctan(np.sqrt((1 + self.eccentricity) / (
@@ -298,21 +408,7 @@ class OrbitModel():
                               np.degrees(omega_rad),
                               np.degrees(self.true_anomaly))
 
-        r_ecef = eci2ecef(earth_rotated_t, r_eci)
-        sx, sy, sz = r_ecef[0], r_ecef[1], r_ecef[2]
-        lat = np.degrees(np.arcsin(sz / r))
-        lon = np.degrees(np.arctan2(sy, sx))
-        # (lat, lon, _) = ecef2lla(sx, sy, sz)
-
-        pos_vector = {
-            'lat': lat,
-            'lon': lon,
-            'alt': r - EARTH_RADIUS_KM,
-            'sx': sx,
-            'sy': sy,
-            'sz': sz
-        }
-        return pos_vector
+        return r_eci, r
 
 
 def main():
@@ -0,0 +1,209 @@
+"""Samples the random variables of orbit models restricted to the regions where
+satellites may be active.
+
+The positions of the satellites of an OrbitModel are defined by two random
+variables: the mean anomaly added to the initial mean anomalies and the Earth's
+rotation angle, which are either independent and uniform or both derived from a
+uniform time instant. A satellite can only be active if its sub-satellite point
+is inside some spherical caps (e.g., around the earth station for a minimum
+elevation, or around a country), so the (mean anomaly, Earth rotation) torus is
+divided in cells and the cells in which no satellite can be inside the caps are
+discarded once. Drawing uniformly from the remaining cells and then checking the
+exact conditions gives the same distribution as rejection sampling over the
+whole constellation, but without wasting draws where no satellite can be active.
+"""
+
+import numpy as np
+
+from sharc.satellite.ngso.constants import EARTH_ROTATION_RATE
+from sharc.satellite.ngso.orbit_model import OrbitModel
+
+
+class OrbitVisibilitySampler():
+    """Draws orbit random variables from the cells where satellites may be active."""
+
+    # number of cells of the grid along each of the torus dimensions
+    GRID_SIZE = 128
+
+    def __init__(self, orbits: list[OrbitModel], caps: list[list[tuple]]):
+        """Finds the cells of the (mean anomaly, Earth rotation) torus of each
+        orbit in which any satellite may be inside all of its caps.
+
+        Parameters
+        ----------
+        orbits : list[OrbitModel]
+            orbit models of the constellation
+        caps : list[list[tuple]]
+            for each orbit, the spherical caps that an active satellite's
+            sub-satellite point must be inside, as tuples with the ECEF unit
+            vector of the cap center and the cap angular radius [rad]
+        """
+        self.orbits = orbits
+        self.cell_size = 2 * np.pi / self.GRID_SIZE
+
+        # cells that may have active satellites, shape
+        # (len(orbits), GRID_SIZE, GRID_SIZE), indexed by mean anomaly and
+        # Earth rotation cells
+        self.candidate_cells = np.array([
+            self._get_candidate_cells(orbit, orbit_caps)
+            for orbit, orbit_caps in zip(orbits, caps)
+        ])
+
+        # the random time instants of the orbits modeling time as random
+        # variable sweep the torus along a line, which is split in the
+        # intervals between cell boundaries
+        self._time_intervals = [
+            self._get_time_intervals(orbit, cells) if orbit.model_time_as_random_variable else None
+            for orbit, cells in zip(orbits, self.candidate_cells)
+        ]
+
+        # probability that the random variables of each orbit fall in its
+        # candidate cells
+        self.candidate_probability = np.array([
+            cells.mean() if intervals is None else
+            np.sum(intervals[1][intervals[2]]) / (orbit.t_max - orbit.t_min)
+            for orbit, cells, intervals in zip(orbits, self.candidate_cells, self._time_intervals)
+        ])
+
+    def _get_candidate_cells(self, orbit: OrbitModel, caps: list[tuple]) -> np.ndarray:
+        """Returns the cells of the torus in which a satellite may be inside the caps."""
+        centers = (np.arange(self.GRID_SIZE) + 0.5) * self.cell_size
+        if len(caps) == 0:
+            return np.ones((self.GRID_SIZE, self.GRID_SIZE), dtype=bool)
+
+        # ECI directions of the satellites at the center of each mean anomaly
+        # cell, shape (GRID_SIZE, number of satellites, 3)
+        pos = orbit.get_orbit_positions_from_random_variables(centers, np.zeros(self.GRID_SIZE))
+        sat_dir = np.stack([pos["sx"], pos["sy"], pos["sz"]], axis=-1).transpose(1, 0, 2)
+        sat_dir /= np.linalg.norm(sat_dir, axis=-1, keepdims=True)
+
+        # A satellite moves by at most the maximum rate of change of the true
+        # anomaly times the mean anomaly, and the Earth rotation moves it by at
+        # most the rotation angle, from the center to the edges of a cell
+        e = orbit.eccentricity
+        max_true_anomaly_rate = (1 + e) ** 2 / (1 - e ** 2) ** 1.5
+        margin = 0.5 * self.cell_size * (max_true_anomaly_rate + 1) + 1e-9
+
+        candidates = np.ones((self.GRID_SIZE, self.GRID_SIZE), dtype=bool)
+        for k in range(self.GRID_SIZE):
+            inside_all = np.ones((sat_dir.shape[1], self.GRID_SIZE), dtype=bool)
+            for center, radius in caps:
+                if radius + margin >= np.pi:
+                    continue
+                # ECEF = Rz(-rotation) ECI, so the ECI cap center is rotated
+                # by the Earth rotation angle
+                rotated_x = center[0] * np.cos(centers) - center[1] * np.sin(centers)
+                rotated_y = center[0] * np.sin(centers) + center[1] * np.cos(centers)
+                cos_angle = sat_dir[k, :, 0:1] * rotated_x + sat_dir[k, :, 1:2] * rotated_y + \
+                    sat_dir[k, :, 2:3] * center[2]
+                inside_all &= cos_angle >= np.cos(radius + margin)
+            candidates[k] = np.any(inside_all, axis=0)
+
+        return candidates
+
+    def _get_time_intervals(self, orbit: OrbitModel, cells: np.ndarray) -> tuple:
+        """Returns the start, length and candidate flag of the time intervals in
+        which the time random variable stays inside a single cell."""
+        t_min, t_max = orbit.t_min, orbit.t_max
+        boundaries = [np.array([t_min, t_max])]
+        for rate in [orbit.mean_motion, EARTH_ROTATION_RATE]:
+            first = np.ceil(rate * t_min / self.cell_size)
+            last = np.floor(rate * t_max / self.cell_size)
+            boundaries.append(np.arange(first, last + 1) * self.cell_size / rate)
+        boundaries = np.unique(np.clip(np.concatenate(boundaries), t_min, t_max))
+
+        start = boundaries[:-1]
+        length = np.diff(boundaries)
+        middle = start + length / 2
+        is_candidate = cells[self._cell_index(orbit.mean_motion * middle), self._cell_index(EARTH_ROTATION_RATE * middle)]
+
+        return start, length, is_candidate
+
+    def _cell_index(self, angle: np.ndarray) -> np.ndarray:
+        """Returns the grid cell of an angle in radians."""
+        return np.minimum(
+            np.floor(np.mod(angle, 2 * np.pi) / self.cell_size).astype(int),
+            self.GRID_SIZE - 1,
+        )
+
+    def is_candidate(self, orbit_idx: int, mean_anomaly_offset: np.ndarray, earth_rotated_t: np.ndarray) -> np.ndarray:
+        """Checks whether the random variables of an orbit fall in its candidate cells."""
+        return self.candidate_cells[orbit_idx][
+            self._cell_index(mean_anomaly_offset),
+            self._cell_index(EARTH_ROTATION_RATE * earth_rotated_t),
+        ]
+
+    def sample_candidate(self, orbit_idx: int, rng: np.random.RandomState) -> tuple:
+        """Draws the random variables of an orbit uniformly from its candidate cells.
+
+        Parameters
+        ----------
+        orbit_idx : int
+            index of the orbit
+        rng : np.random.RandomState
+            random number generator
+
+        Returns
+        -------
+        tuple
+            mean anomaly offset [rad] and Earth rotation time [s], as in
+            OrbitModel.sample_random_variables
+        """
+        orbit = self.orbits[orbit_idx]
+        intervals = self._time_intervals[orbit_idx]
+        if intervals is not None:
+            start, length, is_candidate = intervals
+            cum_length = np.cumsum(length[is_candidate])
+            u = rng.random_sample() * cum_length[-1]
+            k = min(np.searchsorted(cum_length, u, side="right"), len(cum_length) - 1)
+            t = start[is_candidate][k] + (u - (cum_length[k] - length[is_candidate][k]))
+            t = np.array([min(t, orbit.t_max)])
+            return orbit.mean_motion * t, t
+
+        cells = np.flatnonzero(self.candidate_cells[orbit_idx])
+        cell = cells[rng.randint(len(cells))]
+        offset = (np.array(np.unravel_index(cell, (self.GRID_SIZE, self.GRID_SIZE))) +
+                  rng.random_sample(2)) * self.cell_size
+        return offset[:1], offset[1:] / EARTH_ROTATION_RATE
+
+    def sample(self, rng: np.random.RandomState) -> list[tuple]:
+        """Draws the random variables of all orbits uniformly from the set in
+        which at least one orbit falls in its candidate cells.
+
+        The orbit whose variables are drawn from the candidate cells is chosen
+        proportionally to its candidate probability, the other orbits are drawn
+        from their whole distribution, and the draw is kept with probability
+        1 / (number of orbits in their candidate cells), so that draws in the
+        intersection of the orbits' candidate sets are not overweighted.
+
+        Parameters
+        ----------
+        rng : np.random.RandomState
+            random number generator
+
+        Returns
+        -------
+        list[tuple]
+            mean anomaly offset [rad] and Earth rotation time [s] of each orbit,
+            or None if the draw was discarded
+        """
+        weights = np.cumsum(self.candidate_probability)
+        chosen = min(
+            np.searchsorted(weights, rng.random_sample() * weights[-1], side="right"),
+            len(self.orbits) - 1,
+        )
+
+        variables = []
+        num_candidates = 0
+        for orbit_idx, orbit in enumerate(self.orbits):
+            if orbit_idx == chosen:
+                variables.append(self.sample_candidate(orbit_idx, rng))
+                num_candidates += 1
+            else:
+                variables.append(orbit.sample_random_variables(rng))
+                num_candidates += bool(self.is_candidate(orbit_idx, *variables[-1])[0])
+
+        if rng.random_sample() * num_candidates >= 1:
+            return None
+
+        return variables
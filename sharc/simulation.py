@@ -14,10 +14,12 @@ import sys
 import matplotlib.pyplot as plt
 
 from sharc.support.enumerations import StationType
+from sharc.antenna.antenna_array_bank import AntennaArrayBank
 from sharc.topology.topology_factory import TopologyFactory
 from sharc.support.sharc_geom import GeometryConverter
 from sharc.parameters.parameters import Parameters
 from sharc.station_manager import StationManager
+from sharc.link_index import LinkIndex
 from sharc.results import Results
 from sharc.propagation.propagation_factory import PropagationFactory
 from sharc.support.sharc_utils import wrap2_180, clip_angle
@@ -124,7 +126,7 @@ class Simulation(ABC, Observable):
         self.bs = np.empty(0)
         self.system = np.empty(0)
 
-        self.link = dict()
+        self.link = LinkIndex([0], [])
 
         self.num_rb_per_bs = 0
         self.num_rb_per_ue = 0
@@ -152,18 +154,22 @@ class Simulation(ABC, Observable):
             raise ValueError(
                 "Both co_channel and adjacent_channel can't be false")
 
-        random_number_gen = np.random.RandomState(self.parameters.general.seed)
+        # the propagation models share a single random number generator,
+        # which is reseeded on every snapshot (see reseed_propagation)
+        self.propagation_random_number_gen = np.random.RandomState(
+            self.parameters.general.seed,
+        )
         self.propagation_imt = PropagationFactory.create_propagation(
             self.parameters.imt.channel_model,
             self.parameters,
             self.parameters.imt,
-            random_number_gen,
+            self.propagation_random_number_gen,
         )
         self.propagation_system = PropagationFactory.create_propagation(
             self.param_system.channel_model,
             self.parameters,
             self.param_system,
-            random_number_gen,
+            self.propagation_random_number_gen,
         )
 
     def add_observer_list(self, observers: list):
@@ -215,11 +221,33 @@ class Simulation(ABC, Observable):
         # this attribute indicates the list of UE's that are connected to each
         # base station. The position the the list indicates the resource block
         # group that is allocated to the given UE
-        self.link = dict([(bs, list()) for bs in range(num_bs)])
+        self.link = LinkIndex(np.zeros(num_bs + 1, dtype=int), [], num_ue)
+
+    @property
+    def link(self) -> LinkIndex:
+        """
+        Links between the base stations and the UEs they serve. It can also
+        be set from a dict with the list of UEs of each base station.
+        """
+        return self._link
+
+    @link.setter
+    def link(self, link):
+        if not isinstance(link, LinkIndex):
+            link = LinkIndex.from_lists(link)
+        self._link = link
 
     def initialize(self, *args, **kwargs):
         """
         This method is executed only once to initialize the simulation variables.
+
+        Keyword Arguments
+        -----------------
+            prepare_output : bool
+                If False, the output directory is not created and samples are
+                only kept in memory. This is used by the snapshot workers of a
+                multi-process run, which hand their samples back to the main
+                process. Default is True.
         """
 
         self.topology.calculate_coordinates()
@@ -238,12 +266,15 @@ class Simulation(ABC, Observable):
             self.num_rb_per_bs / self.parameters.imt.ue.k,
         )
 
-        self.results = Results().prepare_to_write(
-            self.parameters_filename,
-            self.parameters.general.overwrite_output,
-            self.parameters.general.output_dir,
-            self.parameters.general.output_dir_prefix,
-        )
+        if kwargs.get("prepare_output", True):
+            self.results = Results().prepare_to_write(
+                self.parameters_filename,
+                self.parameters.general.overwrite_output,
+                self.parameters.general.output_dir,
+                self.parameters.general.output_dir_prefix,
+            )
+        else:
+            self.results = Results()
 
         if hasattr(self.param_system, "polarization_loss"):
             if self.param_system.polarization_loss is not None:
@@ -267,6 +298,24 @@ class Simulation(ABC, Observable):
         snapshot_number = kwargs["snapshot_number"]
         self.results.write_files(snapshot_number)
 
+    def reseed_propagation(self, seed: int):
+        """
+        Reseeds the random number generator shared by the propagation models.
+
+        The generator is derived from the snapshot seed so that the random
+        draws of a snapshot (shadowing, clutter, building entry loss, etc.) do
+        not depend on the snapshots that were run before it. This makes every
+        snapshot reproducible on its own, which allows the snapshot range to be
+        split among processes.
+
+        Parameters
+        ----------
+        seed : int
+            Seed of the current snapshot
+        """
+        # use a different stream from the one used by the snapshot itself
+        self.propagation_random_number_gen.seed([seed, 1])
+
     def calculate_coupling_loss_system_imt(
         self,
         system_station: StationManager,
@@ -334,23 +383,9 @@ class Simulation(ABC, Observable):
                 f"Invalid IMT StationType! {
                     imt_station.station_type}")
 
-        # TODO: this performance betterment doesn't work when one of the stations is IMT_BS
-        # so do something that works for it
-        # # Calculate the path loss based on the propagation model only for active stations
-        # actv_sys = copy_active_stations(system_station)
-        # actv_imt = copy_active_stations(imt_station)
-        # path_loss = np.zeros((system_station.num_stations, imt_station.num_stations))
-        # actv_path_loss = self.propagation_system.get_loss(
-        #     self.parameters,
-        #     freq,
-        #     actv_sys,
-        #     actv_imt,
-        #     gain_sys_to_imt,
-        #     gain_imt_to_sys,
-        # )
-        # path_loss[np.ix_(system_station.active, imt_station.active)] = actv_path_loss
-
-        path_loss = self.propagation_system.get_loss(
+        # Calculate the path loss based on the propagation model only between
+        # active stations. The gains have one column per beam of the IMT BSs
+        path_loss = self.propagation_system.get_active_loss(
             self.parameters,
             freq,
             system_station,
@@ -460,13 +495,14 @@ class Simulation(ABC, Observable):
         """
         num_ue_per_bs = self.parameters.imt.ue.k * self.parameters.imt.ue.k_m
         bs_active = np.where(self.bs.active)[0]
-        for bs in bs_active:
-            ue_list = [
-                i for i in range(
-                    bs * num_ue_per_bs, bs * num_ue_per_bs + num_ue_per_bs,
-                )
-            ]
-            self.link[bs] = ue_list
+        num_links = np.zeros(self.bs.num_stations, dtype=int)
+        num_links[bs_active] = num_ue_per_bs
+        ue = bs_active[:, np.newaxis] * num_ue_per_bs + np.arange(num_ue_per_bs)
+        self.link = LinkIndex(
+            np.concatenate(([0], np.cumsum(num_links))),
+            ue.ravel(),
+            self.ue.num_stations,
+        )
 
     def select_ue(self, random_number_gen: np.random.RandomState):
         """
@@ -485,14 +521,17 @@ class Simulation(ABC, Observable):
         bs_active = np.where(self.bs.active)[0]
 
         assert np.all((-180 <= self.bs.azimuth) & (self.bs.azimuth <= 180)), "BS azimuth angles should be in [-180, 180] range"
+        # select K UE's among the ones that are connected to each BS. The UEs
+        # of each BS are shuffled in place, as self.link[bs] is a view
         for bs in bs_active:
-            # select K UE's among the ones that are connected to BS
             random_number_gen.shuffle(self.link[bs])
-            K = self.parameters.imt.ue.k
-            del self.link[bs][K:]
-            # Activate the selected UE's and create beams
+        K = self.parameters.imt.ue.k
+        self.link = self.link.truncate(K)
+
+        # Activate the selected UE's and create beams
+        self.ue.active[self.link.select(bs_active).ue] = True
+        for bs in bs_active:
             if self.bs.active[bs]:
-                self.ue.active[self.link[bs]] = np.ones(K, dtype=bool)
                 for ue in self.link[bs]:
                     # add beam to BS antennas
 
@@ -536,25 +575,36 @@ class Simulation(ABC, Observable):
         This scheduler divides the available resource blocks among UE's for
         a given BS
         """
-        bs_active = np.where(self.bs.active)[0]
+        bs_active, links = self.get_active_links()
         self.bs.center_freq = np.zeros(
             (self.bs.num_stations, self.parameters.imt.ue.k)
         )
-        for bs in bs_active:
-            ue = self.link[bs]
-            # NOTE: since all calculations are done per beam, we consider tx bw
-            # instead of channel bw
-            num_rb_per_beam = self.num_rb_per_ue
-            self.bs.bandwidth[bs] = num_rb_per_beam * \
-                self.parameters.imt.rb_bandwidth
-            self.ue.bandwidth[ue] = self.num_rb_per_ue * \
-                self.parameters.imt.rb_bandwidth
-            self.ue.center_freq[ue] = np.array([
-                self.parameters.imt.frequency +
-                self.num_rb_per_ue * self.parameters.imt.rb_bandwidth * (i - (len(ue) - 1) / 2) for i in range(len(ue))
-            ])
-            # NOTE: bs beam has same tx bw as its assigned UEs
-            self.bs.center_freq[bs] = self.ue.center_freq[ue]
+        # NOTE: since all calculations are done per beam, we consider tx bw
+        # instead of channel bw
+        num_rb_per_beam = self.num_rb_per_ue
+        self.bs.bandwidth[bs_active] = num_rb_per_beam * \
+            self.parameters.imt.rb_bandwidth
+        self.ue.bandwidth[links.ue] = self.num_rb_per_ue * \
+            self.parameters.imt.rb_bandwidth
+        self.ue.center_freq[links.ue] = self.parameters.imt.frequency + \
+            self.num_rb_per_ue * self.parameters.imt.rb_bandwidth * \
+            (links.beam - (links.segment_gather(links.num_links) - 1) / 2)
+        # NOTE: bs beam has same tx bw as its assigned UEs
+        self.bs.center_freq[bs_active[links.bs], links.beam] = \
+            self.ue.center_freq[links.ue]
+
+    def get_active_links(self) -> tuple:
+        """
+        Returns the links of the active base stations, so that calculations
+        over all links can be done with whole-array operations.
+
+        Returns
+        -------
+            tuple: indices of the active base stations, and their links as a
+                LinkIndex whose i-th base station is the i-th active one
+        """
+        bs_active = np.where(self.bs.active)[0]
+        return bs_active, self.link.select(bs_active)
 
     def calculate_gains(
         self,
@@ -593,37 +643,64 @@ class Simulation(ABC, Observable):
 
         # Calculate gains
         gains = np.zeros(phi.shape)
+        # the antennas of an AntennaArrayBank are evaluated in a single call
+        is_bank = isinstance(station_1.antenna, AntennaArrayBank)
         if station_1.station_type is StationType.IMT_BS and not station_2.is_imt_station():
-            off_axis_angle = station_1.get_off_axis_angle(station_2)
-            for k in station_1_active:
-                for b in range(
-                    k * self.parameters.imt.ue.k,
-                        (k + 1) * self.parameters.imt.ue.k):
-                    gains[b,
-                          station_2_active] = station_1.antenna[k].calculate_gain(phi_vec=phi[b,
-                                                                                              station_2_active],
-                                                                                  theta_vec=theta[b,
-                                                                                                  station_2_active,
-                                                                                                  ],
-                                                                                  beams_l=np.repeat(beams_idx[b],
-                                                                                                    len(station_2_active)),
-                                                                                  co_channel=c_channel,
-                                                                                  off_axis_angle_vec=off_axis_angle[k,
-                                                                                                                    station_2_active])
+            num_beams = self.parameters.imt.ue.k
+            num_active = len(station_2_active)
+            if is_bank:
+                beams = (
+                    station_1_active[:, np.newaxis] * num_beams +
+                    np.arange(num_beams)
+                ).ravel()
+                gains[np.ix_(beams, station_2_active)] = np.reshape(
+                    station_1.antenna.calculate_gains(
+                        stations=np.repeat(beams // num_beams, num_active),
+                        phi=phi[np.ix_(beams, station_2_active)].ravel(),
+                        theta=theta[np.ix_(beams, station_2_active)].ravel(),
+                        beams=np.repeat(beams_idx[beams], num_active),
+                        co_channel=c_channel,
+                    ),
+                    (len(beams), num_active),
+                )
+            else:
+                # all beams of a base station are evaluated in a single call
+                off_axis_angle = station_1.get_off_axis_angle(station_2)
+                for k in station_1_active:
+                    beams = np.arange(k * num_beams, (k + 1) * num_beams)
+                    beam_gains = station_1.antenna[k].calculate_gain(
+                        phi_vec=phi[np.ix_(beams, station_2_active)].ravel(),
+                        theta_vec=theta[np.ix_(beams, station_2_active)].ravel(),
+                        beams_l=np.repeat(beams_idx[beams], num_active),
+                        co_channel=c_channel,
+                        off_axis_angle_vec=np.tile(
+                            off_axis_angle[k, station_2_active], num_beams,
+                        ),
+                    )
+                    gains[np.ix_(beams, station_2_active)] = np.reshape(
+                        beam_gains, (num_beams, num_active),
+                    )
 
         elif station_1.station_type is StationType.IMT_UE and not station_2.is_imt_station():
-            off_axis_angle = station_1.get_off_axis_angle(station_2)
-            for k in station_1_active:
-                gains[k, station_2_active] = station_1.antenna[k].calculate_gain(
-                    off_axis_angle_vec=off_axis_angle[k, station_2_active],
-                    phi_vec=phi[k, station_2_active],
-                    theta_vec=theta[
-                        k,
-                        station_2_active,
-                    ],
-                    beams_l=beams_idx,
-                    co_channel=c_channel,
-                )
+            if is_bank:
+                gains[np.ix_(station_1_active, station_2_active)] = \
+                    self._calculate_bank_gains(
+                        station_1, station_1_active, station_2_active,
+                        phi, theta, beams_idx, c_channel,
+                    )
+            else:
+                off_axis_angle = station_1.get_off_axis_angle(station_2)
+                for k in station_1_active:
+                    gains[k, station_2_active] = station_1.antenna[k].calculate_gain(
+                        off_axis_angle_vec=off_axis_angle[k, station_2_active],
+                        phi_vec=phi[k, station_2_active],
+                        theta_vec=theta[
+                            k,
+                            station_2_active,
+                        ],
+                        beams_l=beams_idx,
+                        co_channel=c_channel,
+                    )
 
         elif station_1.station_type is StationType.RNS:
             gains[0, station_2_active] = station_1.antenna[0].calculate_gain(
@@ -642,6 +719,12 @@ class Simulation(ABC, Observable):
                         theta_vec=theta[k, station_2_active],
                         phi_vec=phi[k, station_2_active],
                 )
+        elif is_bank:  # for IMT <-> IMT
+            gains[np.ix_(station_1_active, station_2_active)] = \
+                self._calculate_bank_gains(
+                    station_1, station_1_active, station_2_active,
+                    phi, theta, beams_idx,
+                )
         else:  # for IMT <-> IMT
             off_axis_angle = station_1.get_off_axis_angle(station_2)
             for k in station_1_active:
@@ -656,6 +739,36 @@ class Simulation(ABC, Observable):
                 )
         return gains
 
+    @staticmethod
+    def _calculate_bank_gains(
+        station_1: StationManager,
+        station_1_active: np.array,
+        station_2_active: np.array,
+        phi: np.array,
+        theta: np.array,
+        beams_idx: np.array,
+        c_channel=True,
+    ) -> np.array:
+        """
+        Calculates the gains of the active antennas of an AntennaArrayBank in
+        the direction of the active stations of station_2, using the beams
+        in beams_idx for every antenna.
+
+        Returns
+        -------
+        np.array
+            gains with shape (len(station_1_active), len(station_2_active))
+        """
+        num_active = len(station_2_active)
+        gains = station_1.antenna.calculate_gains(
+            stations=np.repeat(station_1_active, num_active),
+            phi=phi[np.ix_(station_1_active, station_2_active)].ravel(),
+            theta=theta[np.ix_(station_1_active, station_2_active)].ravel(),
+            beams=np.tile(beams_idx, len(station_1_active)),
+            co_channel=c_channel,
+        )
+        return np.reshape(gains, (len(station_1_active), num_active))
+
     def calculate_imt_tput(
         self,
         sinr: np.array,
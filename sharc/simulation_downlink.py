@@ -49,6 +49,7 @@ class SimulationDownlink(Simulation):
         seed = kwargs["seed"]
 
         random_number_gen = np.random.RandomState(seed)
+        self.reseed_propagation(seed)
 
         # In case of hotspots, base stations coordinates have to be calculated
         # on every snapshot. Anyway, let topology decide whether to calculate
@@ -132,6 +133,10 @@ class SimulationDownlink(Simulation):
     def power_control(self):
         """
         Apply downlink power control algorithm to distribute power among selected UEs.
+
+        The transmit powers of the beams of the active BSs are stored in
+        bs_tx_power, with shape (active BSs, k), whose rows are shared with
+        the bs.tx_power dictionary.
         """
         # Currently, the maximum transmit power of the base station is equaly
         # divided among the selected UEs
@@ -143,8 +148,10 @@ class SimulationDownlink(Simulation):
         # pwr_1 is the transmit power from bs_1 to ue_1, pwr_2 is the transmit
         # power from bs_1 to ue_2, etc
         bs_active = np.where(self.bs.active)[0]
-        self.bs.tx_power = dict(
-            [(bs, tx_power * np.ones(self.parameters.imt.ue.k)) for bs in bs_active])
+        self.bs_tx_power = np.full(
+            (len(bs_active), self.parameters.imt.ue.k), tx_power,
+        )
+        self.bs.tx_power = dict(zip(bs_active, self.bs_tx_power))
 
         # Update the spectral mask
         if self.adjacent_channel:
@@ -153,24 +160,26 @@ class SimulationDownlink(Simulation):
     def calculate_sinr(self):
         """
         Calculates the downlink SINR for each UE.
+
+        The power received by every served UE from every active BS is kept in
+        linear scale [mW] as an (active BS x served UE) matrix, so the serving
+        power and the intra-system interference of all UEs are obtained with a
+        single masked reduction and converted to dB only once.
         """
-        bs_active = np.where(self.bs.active)[0]
-        for bs in bs_active:
-            ue = self.link[bs]
-            self.ue.rx_power[ue] = self.bs.tx_power[bs] - \
-                self.coupling_loss_imt[bs, ue]
+        bs_active, links = self.get_active_links()
+        ue = links.ue
+        if len(ue) > 0:
+            # received power from every active BS at every served UE [dBm]
+            rx_power = self.bs_tx_power[:, links.beam] - \
+                self.coupling_loss_imt[np.ix_(bs_active, ue)]
+            serving = links.bs == np.arange(len(bs_active))[:, np.newaxis]
 
-            # create a list with base stations that generate interference in
-            # ue_list
-            bs_interf = [b for b in bs_active if b not in [bs]]
+            self.ue.rx_power[ue] = rx_power[links.bs, np.arange(len(ue))]
 
             # calculate intra system interference
-            for bi in bs_interf:
-                interference = self.bs.tx_power[bi] - \
-                    self.coupling_loss_imt[bi, ue]
-
-                self.ue.rx_interference[ue] = 10 * np.log10(np.power(
-                    10, 0.1 * self.ue.rx_interference[ue]) + np.power(10, 0.1 * interference), )
+            interference_mw = np.power(10, 0.1 * self.ue.rx_interference[ue]) + \
+                np.sum(np.power(10, 0.1 * rx_power), axis=0, where=~serving)
+            self.ue.rx_interference[ue] = 10 * np.log10(interference_mw)
 
         # Thermal noise in dBm
         self.ue.thermal_noise = \
@@ -212,11 +221,11 @@ class SimulationDownlink(Simulation):
         # of the satellite's bandwidth
         active_sys = np.where(self.system.active)[0]
 
-        # All UEs are active on an active BS
-        bs_active = np.where(self.bs.active)[0]
-        for bs in bs_active:
-            ue = self.link[bs]
-
+        # All UEs are active on an active BS. The external interference of
+        # all of them is calculated at once, as an (UE x system) matrix of
+        # received powers in linear scale [mW]
+        ue = self.get_active_links()[1].ue
+        if len(ue) > 0:
             # Get the weight factor for the system overlaping bandwidth in each
             # UE band.
             weights = self.calculate_bw_weights(
@@ -226,7 +235,7 @@ class SimulationDownlink(Simulation):
                 float(self.param_system.frequency),
             )
 
-            in_band_interf_power = -500.
+            in_band_interf_mw = np.full((len(ue), 1), 1e-50)
             if self.co_channel:
                 # Inteferer transmit power in dBm over the overlapping band
                 # (MHz) with UEs.
@@ -244,8 +253,9 @@ class SimulationDownlink(Simulation):
                                 self.ue.bandwidth[ue, np.newaxis] * 1e6
                             ) + 10 * np.log10(weights)[:, np.newaxis] - \
                             self.coupling_loss_imt_system[ue, :][:, active_sys]
+                    in_band_interf_mw = np.power(10, 0.1 * in_band_interf_power)
 
-            oob_power = np.resize(-500., (len(ue), 1))
+            oob_mw = np.full((len(ue), 1), 1e-50)
             if self.adjacent_channel:
                 # emissions outside of tx bandwidth and inside of rx bw
                 # due to oob emissions on tx side
@@ -300,14 +310,12 @@ class SimulationDownlink(Simulation):
                         warnings.filterwarnings("ignore",
                                                 category=RuntimeWarning,
                                                 message="divide by zero encountered in log10")
-                        for i, center_freq, bw in zip(
-                                range(len(center_freqs)), center_freqs, ue_bws):
-                            # calculate tx emissions in UE in use bandwidth only
-                            # [dB]
-                            tx_oob[i] = self.system.spectral_mask.power_calc(
-                                center_freq,
-                                bw
-                            ) - 30
+                        # calculate tx emissions in UE in use bandwidth only
+                        # [dB]
+                        tx_oob[::] = self.system.spectral_mask.power_calc_many(
+                            center_freqs,
+                            ue_bws
+                        ) - 30
                 elif self.param_system.adjacent_ch_emissions == "ACLR":
                     # consider ACLR only over non co-channel RBs
                     # This should diminish some of the ACLR interference
@@ -343,25 +351,22 @@ class SimulationDownlink(Simulation):
                         f"No implementation for param_system.adjacent_ch_emissions == {
                             self.param_system.adjacent_ch_emissions}")
 
+                # one row per link, also when there are no tx oob emissions
+                tx_oob = tx_oob[:, np.newaxis]
                 if self.param_system.adjacent_ch_emissions != "OFF":
-                    tx_oob = tx_oob[:, np.newaxis] - self.coupling_loss_imt_system[ue, :][:, active_sys]
+                    tx_oob = tx_oob - self.coupling_loss_imt_system[ue, :][:, active_sys]
 
                 rx_oob = rx_oob[:, np.newaxis] - self.coupling_loss_imt_system_adjacent[ue, :][:, active_sys]
 
                 # Out of band power
                 # sum linearly power leaked into band and power received in the
                 # adjacent band
-                oob_power = 10 * np.log10(
-                    10 ** (0.1 * tx_oob) + 10 ** (0.1 * rx_oob)
-                )
-            # Total external interference into the UE in dBm
-            ue_ext_int = 10 * np.log10(np.power(10,
-                                                0.1 * in_band_interf_power) + np.power(10,
-                                                                                       0.1 * oob_power))
+                oob_mw = np.power(10, 0.1 * tx_oob) + np.power(10, 0.1 * rx_oob)
 
-            # Sum all the interferers for each UE
+            # Sum all the interferers for each UE, converting to dB only once
+            ext_interference_mw = np.sum(in_band_interf_mw + oob_mw, axis=1)
             self.ue.ext_interference[ue] = 10 * \
-                np.log10(np.sum(np.power(10, 0.1 * ue_ext_int), axis=1)) + 30
+                np.log10(ext_interference_mw) + 30
 
             self.ue.sinr_ext[ue] = \
                 self.ue.rx_power[ue] - (10 * np.log10(np.power(10, 0.1 * self.ue.total_interference[ue]) +
@@ -518,49 +523,41 @@ class SimulationDownlink(Simulation):
                 "Implementation does not support victim system with more than 1 active station"
             )
 
+        # beams of all the active BSs, one row per BS
+        active_beams = bs_active[:, np.newaxis] * self.parameters.imt.ue.k + \
+            np.arange(self.parameters.imt.ue.k)
+
         rx_interference = 0
-        for bs in bs_active:
-            active_beams = [
-                i for i in range(
-                    bs *
-                    self.parameters.imt.ue.k, (bs + 1) *
-                    self.parameters.imt.ue.k,
-                )
-            ]
-            if self.co_channel:
-                rx_interference += np.sum(
-                    10 ** (0.1 * (pow_coch - self.coupling_loss_imt_system[active_beams, sys_active]))
-                )
+        if self.co_channel:
+            rx_interference += np.sum(
+                10 ** (0.1 * (pow_coch - self.coupling_loss_imt_system[active_beams, sys_active]))
+            )
 
-            if self.adjacent_channel:
-                # oob_power per beam
-                # NOTE: we only consider one beam since all beams should have gain
-                # of a single element for IMT, and as such the coupling loss should be the
-                # same for all beams
-                adj_loss = self.coupling_loss_imt_system_adjacent[np.ix_(active_beams, sys_active)]
-
-                # FIXME: for more than 1 sys
-                # NOTE: sharc impl already doesn't really work with n_sys > 1
-                # so more would have to be fixed before this
-                assert np.all(adj_loss == adj_loss.flat[0])
-
-                tx_oob_s = tx_oob - adj_loss[0, :]
-                if self.param_system.adjacent_ch_reception != "OFF":
-                    rx_oob_s = rx_oob - self.coupling_loss_imt_system[active_beams, sys_active]
-                else:
-                    rx_oob_s = -np.inf
+        if self.adjacent_channel:
+            # oob_power per beam
+            # NOTE: we only consider one beam since all beams should have gain
+            # of a single element for IMT, and as such the coupling loss should be the
+            # same for all beams
+            adj_loss = self.coupling_loss_imt_system_adjacent[active_beams[..., np.newaxis], sys_active]
+
+            # FIXME: for more than 1 sys
+            # NOTE: sharc impl already doesn't really work with n_sys > 1
+            # so more would have to be fixed before this
+            assert np.all(adj_loss == adj_loss[:, :1, :1])
+
+            tx_oob_s = tx_oob - adj_loss[:, 0, :]
+            if self.param_system.adjacent_ch_reception != "OFF":
+                rx_oob_s = rx_oob - self.coupling_loss_imt_system[active_beams, sys_active]
+            else:
+                rx_oob_s = -np.inf
 
-                # Out of band power
-                # sum linearly power leaked into band and power received in the
-                # adjacent band
-                oob_power = 10 * np.log10(
-                    10 ** (0.1 * tx_oob_s) + 10 ** (0.1 * rx_oob_s)
-                )
+            # Out of band power
+            # sum linearly power leaked into band and power received in the
+            # adjacent band
+            oob_power_lin = 10 ** (0.1 * tx_oob_s) + 10 ** (0.1 * rx_oob_s)
 
-                # System rx interference
-                rx_interference += np.sum(
-                    np.power(10, 0.1 * oob_power)
-                )
+            # System rx interference
+            rx_interference += np.sum(oob_power_lin)
 
         # Total received interference - dBW
         self.system.rx_interference = 10 * np.log10(rx_interference)
@@ -608,103 +605,105 @@ class SimulationDownlink(Simulation):
                     "effective_area") and self.system.num_stations == 1:
                 self.results.system_pfd.extend([self.system.pfd])
 
-        bs_active = np.where(self.bs.active)[0]
+        # the results of all links are collected at once, in the same order
+        # as looping over the active BSs
+        bs_active, links = self.get_active_links()
         sys_active = np.where(self.system.active)[0]
-        for bs in bs_active:
-            ue = self.link[bs]
+        ue = links.ue
+        serving_bs = bs_active[links.bs]
 
-            if not self.parameters.imt.imt_dl_intra_sinr_calculation_disabled:
-                self.results.imt_path_loss.extend(self.path_loss_imt[bs, ue])
-                self.results.imt_coupling_loss.extend(
-                    self.coupling_loss_imt[bs, ue],
-                )
+        if not self.parameters.imt.imt_dl_intra_sinr_calculation_disabled:
+            self.results.imt_path_loss.extend(self.path_loss_imt[serving_bs, ue])
+            self.results.imt_coupling_loss.extend(
+                self.coupling_loss_imt[serving_bs, ue],
+            )
 
-                self.results.imt_bs_antenna_gain.extend(
-                    self.imt_bs_antenna_gain[bs, ue],
-                )
-                self.results.imt_ue_antenna_gain.extend(
-                    self.imt_ue_antenna_gain[bs, ue],
-                )
+            self.results.imt_bs_antenna_gain.extend(
+                self.imt_bs_antenna_gain[serving_bs, ue],
+            )
+            self.results.imt_ue_antenna_gain.extend(
+                self.imt_ue_antenna_gain[serving_bs, ue],
+            )
 
-                tput = self.calculate_imt_tput(
-                    self.ue.sinr[ue],
-                    self.parameters.imt.downlink.sinr_min,
-                    self.parameters.imt.downlink.sinr_max,
-                    self.parameters.imt.downlink.attenuation_factor,
-                )
-                self.results.imt_dl_tput.extend(tput.tolist())
-
-            # Results for IMT-SYSTEM
-            if self.parameters.imt.interfered_with:  # IMT suffers interference
-                tput_ext = self.calculate_imt_tput(
-                    self.ue.sinr_ext[ue],
-                    self.parameters.imt.downlink.sinr_min,
-                    self.parameters.imt.downlink.sinr_max,
-                    self.parameters.imt.downlink.attenuation_factor,
-                )
-                self.results.imt_dl_tput_ext.extend(tput_ext.tolist())
-                self.results.imt_dl_sinr_ext.extend(
-                    self.ue.sinr_ext[ue].tolist(),
-                )
-                self.results.imt_dl_inr.extend(self.ue.inr[ue].tolist())
+            tput = self.calculate_imt_tput(
+                self.ue.sinr[ue],
+                self.parameters.imt.downlink.sinr_min,
+                self.parameters.imt.downlink.sinr_max,
+                self.parameters.imt.downlink.attenuation_factor,
+            )
+            self.results.imt_dl_tput.extend(tput)
+
+        # Results for IMT-SYSTEM
+        if self.parameters.imt.interfered_with:  # IMT suffers interference
+            tput_ext = self.calculate_imt_tput(
+                self.ue.sinr_ext[ue],
+                self.parameters.imt.downlink.sinr_min,
+                self.parameters.imt.downlink.sinr_max,
+                self.parameters.imt.downlink.attenuation_factor,
+            )
+            self.results.imt_dl_tput_ext.extend(tput_ext)
+            self.results.imt_dl_sinr_ext.extend(
+                self.ue.sinr_ext[ue],
+            )
+            self.results.imt_dl_inr.extend(self.ue.inr[ue])
 
-                self.results.imt_dl_pfd_external.extend(
-                    self.ue.pfd_external[sys_active[:, np.newaxis], ue].flatten())
+            self.results.imt_dl_pfd_external.extend(
+                links.flatten(self.ue.pfd_external[sys_active[:, np.newaxis], ue]))
 
-                self.results.imt_dl_pfd_external_aggregated.extend(
-                    self.ue.pfd_external_aggregated[ue].tolist())
+            self.results.imt_dl_pfd_external_aggregated.extend(
+                self.ue.pfd_external_aggregated[ue])
 
-                self.results.system_imt_antenna_gain.extend(
-                    self.system_imt_antenna_gain[sys_active[:, np.newaxis], ue].flatten(),
+            self.results.system_imt_antenna_gain.extend(
+                links.flatten(self.system_imt_antenna_gain[sys_active[:, np.newaxis], ue]),
+            )
+            if len(self.imt_system_antenna_gain):
+                self.results.imt_system_antenna_gain.extend(
+                    links.flatten(self.imt_system_antenna_gain[sys_active[:, np.newaxis], ue]),
                 )
-                if len(self.imt_system_antenna_gain):
-                    self.results.imt_system_antenna_gain.extend(
-                        self.imt_system_antenna_gain[sys_active[:, np.newaxis], ue].flatten(),
-                    )
-                if len(self.imt_system_antenna_gain_adjacent):
-                    self.results.imt_system_antenna_gain_adjacent.extend(
-                        self.imt_system_antenna_gain_adjacent[sys_active[:, np.newaxis], ue].flatten(),
-                    )
-                self.results.imt_system_path_loss.extend(
-                    self.imt_system_path_loss[sys_active[:, np.newaxis], ue].flatten(),
+            if len(self.imt_system_antenna_gain_adjacent):
+                self.results.imt_system_antenna_gain_adjacent.extend(
+                    links.flatten(self.imt_system_antenna_gain_adjacent[sys_active[:, np.newaxis], ue]),
                 )
-                if self.param_system.channel_model == "HDFSS":
-                    self.results.imt_system_build_entry_loss.extend(
-                        self.imt_system_build_entry_loss[sys_active[:, np.newaxis], ue].flatten(),
-                    )
-                    self.results.imt_system_diffraction_loss.extend(
-                        self.imt_system_diffraction_loss[sys_active[:, np.newaxis], ue].flatten(),
-                    )
-                self.results.sys_to_imt_coupling_loss.extend(
-                    self.coupling_loss_imt_system[np.array(ue)[:, np.newaxis], sys_active].flatten())
-            else:  # IMT is the interferer
-                self.results.system_imt_antenna_gain.extend(
-                    self.system_imt_antenna_gain[sys_active[:, np.newaxis], ue].flatten(),
+            self.results.imt_system_path_loss.extend(
+                links.flatten(self.imt_system_path_loss[sys_active[:, np.newaxis], ue]),
+            )
+            if self.param_system.channel_model == "HDFSS":
+                self.results.imt_system_build_entry_loss.extend(
+                    links.flatten(self.imt_system_build_entry_loss[sys_active[:, np.newaxis], ue]),
                 )
-                if len(self.imt_system_antenna_gain):
-                    self.results.imt_system_antenna_gain.extend(
-                        self.imt_system_antenna_gain[sys_active[:, np.newaxis], ue].flatten(),
-                    )
-                if len(self.imt_system_antenna_gain_adjacent):
-                    self.results.imt_system_antenna_gain_adjacent.extend(
-                        self.imt_system_antenna_gain_adjacent[sys_active[:, np.newaxis], ue].flatten(),
-                    )
-                self.results.imt_system_path_loss.extend(
-                    self.imt_system_path_loss[sys_active[:, np.newaxis], ue].flatten(),
+                self.results.imt_system_diffraction_loss.extend(
+                    links.flatten(self.imt_system_diffraction_loss[sys_active[:, np.newaxis], ue]),
+                )
+            self.results.sys_to_imt_coupling_loss.extend(
+                self.coupling_loss_imt_system[ue[:, np.newaxis], sys_active].flatten())
+        else:  # IMT is the interferer
+            self.results.system_imt_antenna_gain.extend(
+                links.flatten(self.system_imt_antenna_gain[sys_active[:, np.newaxis], ue]),
+            )
+            if len(self.imt_system_antenna_gain):
+                self.results.imt_system_antenna_gain.extend(
+                    links.flatten(self.imt_system_antenna_gain[sys_active[:, np.newaxis], ue]),
+                )
+            if len(self.imt_system_antenna_gain_adjacent):
+                self.results.imt_system_antenna_gain_adjacent.extend(
+                    links.flatten(self.imt_system_antenna_gain_adjacent[sys_active[:, np.newaxis], ue]),
+                )
+            self.results.imt_system_path_loss.extend(
+                links.flatten(self.imt_system_path_loss[sys_active[:, np.newaxis], ue]),
+            )
+            if self.param_system.channel_model == "HDFSS":
+                self.results.imt_system_build_entry_loss.extend(
+                    self.imt_system_build_entry_loss[:, bs_active].T,
+                )
+                self.results.imt_system_diffraction_loss.extend(
+                    self.imt_system_diffraction_loss[:, bs_active].T,
                 )
-                if self.param_system.channel_model == "HDFSS":
-                    self.results.imt_system_build_entry_loss.extend(
-                        self.imt_system_build_entry_loss[:, bs],
-                    )
-                    self.results.imt_system_diffraction_loss.extend(
-                        self.imt_system_diffraction_loss[:, bs],
-                    )
 
-            self.results.imt_dl_tx_power.extend(self.bs.tx_power[bs].tolist())
+        self.results.imt_dl_tx_power.extend(links.segment_gather(self.bs_tx_power))
 
-            if not self.parameters.imt.imt_dl_intra_sinr_calculation_disabled:
-                self.results.imt_dl_sinr.extend(self.ue.sinr[ue].tolist())
-                self.results.imt_dl_snr.extend(self.ue.snr[ue].tolist())
+        if not self.parameters.imt.imt_dl_intra_sinr_calculation_disabled:
+            self.results.imt_dl_sinr.extend(self.ue.sinr[ue])
+            self.results.imt_dl_snr.extend(self.ue.snr[ue])
 
         if write_to_file:
             self.results.write_files(snapshot_number)
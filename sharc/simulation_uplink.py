@@ -38,6 +38,7 @@ class SimulationUplink(Simulation):
         seed = kwargs["seed"]
 
         random_number_gen = np.random.RandomState(seed)
+        self.reseed_propagation(seed)
 
         # In case of hotspots, base stations coordinates have to be calculated
         # on every snapshot. Anyway, let topology decide whether to calculate
@@ -106,67 +107,83 @@ class SimulationUplink(Simulation):
             self.ue.tx_power[ue_active] = self.parameters.imt.ue.p_cmax * \
                 np.ones(len(ue_active))
         else:
-            bs_active = np.where(self.bs.active)[0]
-            for bs in bs_active:
-                ue = self.link[bs]
-                p_cmax = self.parameters.imt.ue.p_cmax
-                m_pusch = self.num_rb_per_ue
-                p_o_pusch = self.parameters.imt.ue.p_o_pusch
-                alpha = self.parameters.imt.ue.alpha
-                ue_power_dynamic_range = self.parameters.imt.ue.power_dynamic_range
-                cl = self.coupling_loss_imt[bs, ue]
-                self.ue.tx_power[ue] = np.minimum(
-                    p_cmax, 10 * np.log10(m_pusch) + p_o_pusch + alpha * cl,
-                )
-                # apply the power dymanic range
-                self.ue.tx_power[ue] = np.maximum(
-                    self.ue.tx_power[ue], p_cmax - ue_power_dynamic_range,
-                )
+            # open-loop power control of all the served UEs at once
+            bs_active, links = self.get_active_links()
+            p_cmax = self.parameters.imt.ue.p_cmax
+            m_pusch = self.num_rb_per_ue
+            p_o_pusch = self.parameters.imt.ue.p_o_pusch
+            alpha = self.parameters.imt.ue.alpha
+            ue_power_dynamic_range = self.parameters.imt.ue.power_dynamic_range
+            ue = links.ue
+            cl = self.coupling_loss_imt[bs_active[links.bs], ue]
+            self.ue.tx_power[ue] = np.minimum(
+                p_cmax, 10 * np.log10(m_pusch) + p_o_pusch + alpha * cl,
+            )
+            # apply the power dymanic range
+            self.ue.tx_power[ue] = np.maximum(
+                self.ue.tx_power[ue], p_cmax - ue_power_dynamic_range,
+            )
         if self.adjacent_channel:
             self.ue_power_diff = self.parameters.imt.ue.p_cmax - self.ue.tx_power
 
     def calculate_sinr(self):
         """
         Calculates the uplink SINR for each BS.
+
+        The power received by every active BS from every served UE is kept in
+        linear scale [mW] as an (active BS x served UE) matrix. The
+        interference in each BS beam comes from the UEs of the other BSs that
+        use the same resource block group, so it is obtained for all beams by
+        masking the serving links and summing the UEs of each beam at once.
         """
-        # calculate uplink received power for each active BS
-        bs_active = np.where(self.bs.active)[0]
-        for bs in bs_active:
-            ue = self.link[bs]
-
-            self.bs.rx_power[bs] = self.ue.tx_power[ue] - \
-                self.coupling_loss_imt[bs, ue]
-            # create a list of BSs that serve the interfering UEs
-            bs_interf = [b for b in bs_active if b not in [bs]]
-
-            # calculate intra system interference
-            for bi in bs_interf:
-                ui = self.link[bi]
-                interference = self.ue.tx_power[ui] - \
-                    self.coupling_loss_imt[bs, ui]
-                self.bs.rx_interference[bs] = 10 * np.log10(
-                    np.power(10, 0.1 * self.bs.rx_interference[bs]) +
-                    np.power(10, 0.1 * interference),
-                )
+        bs_active, links = self.get_active_links()
+        ue = links.ue
+        if len(ue) == 0:
+            return
+
+        # received power from every served UE at every active BS [dBm]
+        rx_power = self.ue.tx_power[ue] - \
+            self.coupling_loss_imt[np.ix_(bs_active, ue)]
+
+        # calculate intra system interference
+        rx_power_mw = np.power(10, 0.1 * rx_power)
+        rx_power_mw[links.bs, np.arange(len(ue))] = 0.
+        ue_beam = links.beam[:, np.newaxis] == np.arange(links.beam.max() + 1)
+        interference_mw = rx_power_mw @ ue_beam.astype(float)
+
+        rx_interference = links.segment_gather(
+            [self.bs.rx_interference[bs] for bs in bs_active],
+        )
+        rx_interference = 10 * np.log10(
+            np.power(10, 0.1 * rx_interference) +
+            links.segment_gather(interference_mw),
+        )
 
-            # calculate N
-            # thermal noise in dBm
-            self.bs.thermal_noise[bs] = \
-                10 * np.log10(BOLTZMANN_CONSTANT * self.parameters.imt.noise_temperature * 1e3) + \
-                10 * np.log10(self.bs.bandwidth[bs] * 1e6) + \
-                self.bs.noise_figure[bs]
-
-            # calculate I+N
-            self.bs.total_interference[bs] = \
-                10 * np.log10(
-                    np.power(10, 0.1 * self.bs.rx_interference[bs]) +
-                    np.power(10, 0.1 * self.bs.thermal_noise[bs]),
+        # calculate N
+        # thermal noise in dBm
+        self.bs.thermal_noise[bs_active] = \
+            10 * np.log10(BOLTZMANN_CONSTANT * self.parameters.imt.noise_temperature * 1e3) + \
+            10 * np.log10(self.bs.bandwidth[bs_active] * 1e6) + \
+            self.bs.noise_figure[bs_active]
+        thermal_noise = links.segment_gather(self.bs.thermal_noise[bs_active])
+
+        # calculate I+N
+        total_interference = \
+            10 * np.log10(
+                np.power(10, 0.1 * rx_interference) +
+                np.power(10, 0.1 * thermal_noise),
             )
 
-            # calculate SNR and SINR
-            self.bs.sinr[bs] = self.bs.rx_power[bs] - \
-                self.bs.total_interference[bs]
-            self.bs.snr[bs] = self.bs.rx_power[bs] - self.bs.thermal_noise[bs]
+        # calculate SNR and SINR, and store the values of each beam
+        rx_power = rx_power[links.bs, np.arange(len(ue))]
+        for values, link_values in [
+            (self.bs.rx_power, rx_power),
+            (self.bs.rx_interference, rx_interference),
+            (self.bs.total_interference, total_interference),
+            (self.bs.sinr, rx_power - total_interference),
+            (self.bs.snr, rx_power - thermal_noise),
+        ]:
+            values.update(zip(bs_active, np.split(link_values, links.offsets[1:-1])))
 
     def calculate_sinr_ext(self):
         """
@@ -191,146 +208,156 @@ class SimulationUplink(Simulation):
                     is_co_channel=False,
                 )
 
-        bs_active = np.where(self.bs.active)[0]
+        bs_active, links = self.get_active_links()
         sys_active = np.where(self.system.active)[0]
-
-        for bs in bs_active:
-            active_beams = [
-                i for i in range(
-                    bs * self.parameters.imt.ue.k,
-                    (bs + 1) * self.parameters.imt.ue.k)]
-            # Get the weight factor for the system overlaping bandwidth in each beam tx band
-            beams_bw = self.ue.bandwidth[self.link[bs]]
+        if len(links.ue) == 0:
+            return
+
+        # The external interference of all the BS beams is calculated at once,
+        # as a (BS beam x system) matrix of received powers in linear scale.
+        # Rows of the BS beams in the coupling loss matrices:
+        active_beams = bs_active[links.bs] * self.parameters.imt.ue.k + links.beam
+        beams_center_freq = links.segment_gather(self.bs.center_freq[bs_active])
+
+        # Get the weight factor for the system overlaping bandwidth in each beam tx band
+        beams_bw = self.ue.bandwidth[links.ue]
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore",
+                                    category=RuntimeWarning,
+                                    message="divide by zero encountered in log10")
+            weights = self.calculate_bw_weights(
+                beams_bw,
+                beams_center_freq,
+                float(self.param_system.bandwidth),
+                float(self.param_system.frequency),)
+
+        in_band_interf_lin = np.array([0.0])
+        if self.co_channel:
+            # TODO: test this in integration testing
+            # Inteferer transmit power in dBm over the overlapping band (MHz)
+            # [dB]
             with warnings.catch_warnings():
                 warnings.filterwarnings("ignore",
                                         category=RuntimeWarning,
                                         message="divide by zero encountered in log10")
-                weights = self.calculate_bw_weights(
-                    beams_bw,
-                    self.bs.center_freq[bs],
-                    float(self.param_system.bandwidth),
-                    float(self.param_system.frequency),)
+                in_band_interf = self.param_system.tx_power_density + \
+                    10 * np.log10(beams_bw[:, np.newaxis] * 1e6) + \
+                    10 * np.log10(weights)[:, np.newaxis] - \
+                    self.coupling_loss_imt_system[active_beams, :][:, sys_active]
+                in_band_interf_lin = 10 ** (in_band_interf / 10)
 
-            in_band_interf_lin = np.array([0.0])
-            if self.co_channel:
-                # TODO: test this in integration testing
-                # Inteferer transmit power in dBm over the overlapping band (MHz)
-                # [dB]
+        oob_interf_lin = 0
+        if self.adjacent_channel:
+            # emissions outside of tx bandwidth and inside of rx bw
+            # due to oob emissions on tx side
+            tx_oob = np.resize(-500., len(active_beams))
+
+            # emissions outside of rx bw and inside of tx bw
+            # due to non ideal filtering on rx side
+            rx_oob = np.resize(-500., len(active_beams))
+
+            # NOTE: M.2101 states that:
+            # "The ACIR value should be calculated based on per UE allocated number of resource blocks"
+            if self.parameters.imt.adjacent_ch_reception == "ACS":
+                non_overlap_sys_bw = self.param_system.bandwidth - self.overlapping_bandwidth
+                if self.overlapping_bandwidth > 0:
+                    if not hasattr(self, "_acs_warned"):
+                        warn(
+                            "You're trying to use ACS on a partially overlapping band "
+                            "with UEs.\n\tVerify the code implements the behavior you expect!!"
+                        )
+                        self._acs_warned = True
+                acs_dB = self.parameters.imt.bs.adjacent_ch_selectivity
+                rx_oob[::] = self.param_system.tx_power_density + 10 * np.log10(non_overlap_sys_bw * 1e6) - acs_dB
+            elif self.parameters.imt.adjacent_ch_reception == "OFF":
+                pass
+            elif self.parameters.imt.adjacent_ch_reception is False:
+                pass
+            else:
+                raise ValueError(
+                    f"No implementation for parameters.imt.adjacent_ch_reception == {
+                        self.parameters.imt.adjacent_ch_reception}")
+
+            # for tx oob we accept ACLR and spectral mask
+            if self.param_system.adjacent_ch_emissions == "SPECTRAL_MASK":
                 with warnings.catch_warnings():
                     warnings.filterwarnings("ignore",
                                             category=RuntimeWarning,
                                             message="divide by zero encountered in log10")
-                    in_band_interf = self.param_system.tx_power_density + \
-                        10 * np.log10(beams_bw[:, np.newaxis] * 1e6) + \
-                        10 * np.log10(weights)[:, np.newaxis] - \
-                        self.coupling_loss_imt_system[active_beams, :][:, sys_active]
-                    in_band_interf_lin = 10 ** (in_band_interf / 10)
-
-            oob_interf_lin = 0
-            if self.adjacent_channel:
-                # emissions outside of tx bandwidth and inside of rx bw
-                # due to oob emissions on tx side
-                tx_oob = np.resize(-500., len(active_beams))
-
-                # emissions outside of rx bw and inside of tx bw
-                # due to non ideal filtering on rx side
-                rx_oob = np.resize(-500., len(active_beams))
-
-                # NOTE: M.2101 states that:
-                # "The ACIR value should be calculated based on per UE allocated number of resource blocks"
-                if self.parameters.imt.adjacent_ch_reception == "ACS":
-                    non_overlap_sys_bw = self.param_system.bandwidth - self.overlapping_bandwidth
-                    if self.overlapping_bandwidth > 0:
-                        if not hasattr(self, "_acs_warned"):
-                            warn(
-                                "You're trying to use ACS on a partially overlapping band "
-                                "with UEs.\n\tVerify the code implements the behavior you expect!!"
-                            )
-                            self._acs_warned = True
-                    acs_dB = self.parameters.imt.bs.adjacent_ch_selectivity
-                    rx_oob[::] = self.param_system.tx_power_density + 10 * np.log10(non_overlap_sys_bw * 1e6) - acs_dB
-                elif self.parameters.imt.adjacent_ch_reception == "OFF":
-                    pass
-                elif self.parameters.imt.adjacent_ch_reception is False:
-                    pass
-                else:
-                    raise ValueError(
-                        f"No implementation for parameters.imt.adjacent_ch_reception == {
-                            self.parameters.imt.adjacent_ch_reception}")
-
-                # for tx oob we accept ACLR and spectral mask
-                if self.param_system.adjacent_ch_emissions == "SPECTRAL_MASK":
-                    with warnings.catch_warnings():
-                        warnings.filterwarnings("ignore",
-                                                category=RuntimeWarning,
-                                                message="divide by zero encountered in log10")
-                        for i, center_freq, bw in zip(
-                                range(len(self.bs.center_freq[bs])), self.bs.center_freq[bs], beams_bw):
-                            # mask returns dBm
-                            # so we convert to [dB]
-                            tx_oob[i] = self.system.spectral_mask.power_calc(
-                                center_freq,
-                                bw
-                            ) - 30
-                elif self.param_system.adjacent_ch_emissions == "ACLR":
-                    # consider ACLR only over non co-channel RBs
-                    # This should diminish some of the ACLR interference
-                    # in a way that make sense
-                    non_overlap_imt_bw = beams_bw * (1. - weights)
-                    # NOTE: approximated equal to IMT bw
-                    measurement_bw = self.param_system.bandwidth
-                    aclr_dB = self.param_system.adjacent_ch_leak_ratio
-                    if self.parameters.imt.bandwidth - self.overlapping_bandwidth > measurement_bw:
-                        # NOTE: ACLR defines total leaked power over a fixed measurement bandwidth.
-                        # If the victim bandwidth is wider, you’re assuming the same leakage
-                        # profile extends beyond the ACLR-defined region, which may overestimate interference
-                        # FIXME: if the victim bw fully contains tx bw, then
-                        # EACH region should be <= measurement_bw
-                        warn(
-                            "Using System ACLR into IMT, but ACLR measurement bw is "
-                            f"{measurement_bw} while the IMT bw is bigger ({self.parameters.imt.bandwidth}).\n"
-                            "Are you sure you intend to apply the same ACLR to the entire IMT bw?"
-                        )
-
-                    # [dB]
-                    tx_oob[::] = self.param_system.tx_power_density + \
-                        10 * np.log10(1e6) -  \
-                        aclr_dB + 10 * np.log10(
-                            non_overlap_imt_bw)
-                elif self.param_system.adjacent_ch_emissions == "OFF":
-                    pass
-                else:
-                    raise ValueError(
-                        f"No implementation for param_system.adjacent_ch_emissions == {
-                            self.param_system.adjacent_ch_emissions}")
-
-                if self.param_system.adjacent_ch_emissions != "OFF":
-                    # oob for system is inband for IMT
-                    tx_oob = tx_oob[:, np.newaxis] - self.coupling_loss_imt_system[active_beams, :][:, sys_active]
-
-                # oob for IMT
-                rx_oob = rx_oob[:, np.newaxis] - self.coupling_loss_imt_system_adjacent[active_beams, :][:, sys_active]
-
-                # Out of band power
-                # sum linearly power leaked into band and power received in the
-                # adjacent band
-
-                # linear [W]:
-                oob_interf_lin = 10 ** (0.1 * tx_oob) + 10 ** (0.1 * rx_oob)
-
-            # [dBm]
-            ext_interference = 10 * np.log10(in_band_interf_lin + oob_interf_lin) + 30
+                    # mask returns dBm
+                    # so we convert to [dB]
+                    tx_oob[::] = self.system.spectral_mask.power_calc_many(
+                        beams_center_freq,
+                        beams_bw
+                    ) - 30
+            elif self.param_system.adjacent_ch_emissions == "ACLR":
+                # consider ACLR only over non co-channel RBs
+                # This should diminish some of the ACLR interference
+                # in a way that make sense
+                non_overlap_imt_bw = beams_bw * (1. - weights)
+                # NOTE: approximated equal to IMT bw
+                measurement_bw = self.param_system.bandwidth
+                aclr_dB = self.param_system.adjacent_ch_leak_ratio
+                if self.parameters.imt.bandwidth - self.overlapping_bandwidth > measurement_bw:
+                    # NOTE: ACLR defines total leaked power over a fixed measurement bandwidth.
+                    # If the victim bandwidth is wider, you’re assuming the same leakage
+                    # profile extends beyond the ACLR-defined region, which may overestimate interference
+                    # FIXME: if the victim bw fully contains tx bw, then
+                    # EACH region should be <= measurement_bw
+                    warn(
+                        "Using System ACLR into IMT, but ACLR measurement bw is "
+                        f"{measurement_bw} while the IMT bw is bigger ({self.parameters.imt.bandwidth}).\n"
+                        "Are you sure you intend to apply the same ACLR to the entire IMT bw?"
+                    )
 
-            # Sum all the interferers from each active system transmitters for each bs
-            self.bs.ext_interference[bs] = 10 * np.log10(
-                np.sum(np.power(10, 0.1 * ext_interference), axis=1))
+                # [dB]
+                tx_oob[::] = self.param_system.tx_power_density + \
+                    10 * np.log10(1e6) -  \
+                    aclr_dB + 10 * np.log10(
+                        non_overlap_imt_bw)
+            elif self.param_system.adjacent_ch_emissions == "OFF":
+                pass
+            else:
+                raise ValueError(
+                    f"No implementation for param_system.adjacent_ch_emissions == {
+                        self.param_system.adjacent_ch_emissions}")
+
+            # one row per link, also when there are no tx oob emissions
+            tx_oob = tx_oob[:, np.newaxis]
+            if self.param_system.adjacent_ch_emissions != "OFF":
+                # oob for system is inband for IMT
+                tx_oob = tx_oob - self.coupling_loss_imt_system[active_beams, :][:, sys_active]
+
+            # oob for IMT
+            rx_oob = rx_oob[:, np.newaxis] - self.coupling_loss_imt_system_adjacent[active_beams, :][:, sys_active]
+
+            # Out of band power
+            # sum linearly power leaked into band and power received in the
+            # adjacent band
+
+            # linear [W]:
+            oob_interf_lin = 10 ** (0.1 * tx_oob) + 10 ** (0.1 * rx_oob)
+
+        # Sum all the interferers from each active system transmitters for
+        # each beam [dBm]
+        ext_interference = 10 * np.log10(
+            np.sum(in_band_interf_lin + oob_interf_lin, axis=1)) + 30
+
+        rx_power = links.segment_gather([self.bs.rx_power[bs] for bs in bs_active])
+        total_interference = links.segment_gather(
+            [self.bs.total_interference[bs] for bs in bs_active],
+        )
+        sinr_ext = rx_power - (10 * np.log10(np.power(10, 0.1 * total_interference) +
+                                             np.power(10, 0.1 * ext_interference,),))
 
-            self.bs.sinr_ext[bs] = self.bs.rx_power[bs] \
-                - (10 * np.log10(np.power(10, 0.1 * self.bs.total_interference[bs]) +
-                                 np.power(10, 0.1 * self.bs.ext_interference[bs],),))
+        inr = ext_interference - links.segment_gather(self.bs.thermal_noise[bs_active])
 
-            self.bs.inr[bs] = self.bs.ext_interference[bs] - \
-                self.bs.thermal_noise[bs]
+        for values, link_values in [
+            (self.bs.ext_interference, ext_interference),
+            (self.bs.sinr_ext, sinr_ext),
+            (self.bs.inr, inr),
+        ]:
+            values.update(zip(bs_active, np.split(link_values, links.offsets[1:-1])))
 
     def calculate_external_interference(self):
         """
@@ -354,13 +381,12 @@ class SimulationUplink(Simulation):
         # applying a bandwidth scaling factor since UE transmits on a portion
         # of the satellite's bandwidth
         # calculate interference only from active UE's
+        # all the links are handled at once, as (UE x system) matrices
         rx_interference = 0
 
-        bs_active = np.where(self.bs.active)[0]
+        ue = self.get_active_links()[1].ue
         sys_active = np.where(self.system.active)[0]
-        for bs in bs_active:
-            ue = self.link[bs]
-
+        if len(ue) > 0:
             if self.co_channel:
                 # TODO: test this in integration testing
                 weights = self.calculate_bw_weights(
@@ -370,10 +396,10 @@ class SimulationUplink(Simulation):
                     self.param_system.frequency,
                 )
 
-                interference_ue = self.ue.tx_power[ue] - \
-                    self.coupling_loss_imt_system[ue, sys_active]
+                interference_ue = self.ue.tx_power[ue, np.newaxis] - \
+                    self.coupling_loss_imt_system[np.ix_(ue, sys_active)]
                 rx_interference += np.sum(
-                    weights * np.power(
+                    weights[:, np.newaxis] * np.power(
                         10,
                         0.1 * interference_ue,
                     ),
@@ -424,7 +450,8 @@ class SimulationUplink(Simulation):
                     pass
                 else:
                     raise ValueError(
-                        f"No implementation for self.parameters.imt.adjacent_ch_emissions == {self.parameters.imt.adjacent_ch_emissions}"
+                        "No implementation for self.parameters.imt.adjacent_ch_emissions == "
+                        f"{self.parameters.imt.adjacent_ch_emissions}"
                     )
 
                 # Calculate how much power is received in the adjacent channel
@@ -447,14 +474,17 @@ class SimulationUplink(Simulation):
                     pass
                 else:
                     raise ValueError(
-                        f"No implementation for self.param_system.adjacent_ch_reception == {self.param_system.adjacent_ch_reception}"
+                        "No implementation for self.param_system.adjacent_ch_reception == "
+                        f"{self.param_system.adjacent_ch_reception}"
                     )
 
                 # Out of band power
-                tx_oob -= self.coupling_loss_imt_system_adjacent[ue, sys_active]
+                tx_oob = np.reshape(tx_oob, (-1, 1)) - \
+                    self.coupling_loss_imt_system_adjacent[np.ix_(ue, sys_active)]
 
                 if self.param_system.adjacent_ch_reception != "OFF":
-                    rx_oob -= self.coupling_loss_imt_system[ue, sys_active]
+                    rx_oob = np.reshape(rx_oob, (-1, 1)) - \
+                        self.coupling_loss_imt_system[np.ix_(ue, sys_active)]
                 # Out of band power
                 # sum linearly power leaked into band and power received in the adjacent band
                 oob_power_lin = 10 ** (0.1 * tx_oob) + 10 ** (0.1 * rx_oob)
@@ -497,7 +527,7 @@ class SimulationUplink(Simulation):
             snapshot_number (int): The current snapshot number.
         """
         if not self.parameters.imt.interfered_with and np.any(self.bs.active):
-            self.results.system_inr.extend(self.system.inr.tolist())
+            self.results.system_inr.extend(self.system.inr)
             self.results.system_ul_interf_power.extend(
                 [self.system.rx_interference],
             )
@@ -510,101 +540,102 @@ class SimulationUplink(Simulation):
                     "effective_area") and self.system.num_stations == 1:
                 self.results.system_pfd.extend([self.system.pfd])
 
+        # the results of all links are collected at once, in the same order
+        # as looping over the active BSs
         sys_active = np.where(self.system.active)[0]
-        bs_active = np.where(self.bs.active)[0]
-        for bs in bs_active:
-            ue = self.link[bs]
-            self.results.imt_path_loss.extend(self.path_loss_imt[bs, ue])
-            self.results.imt_coupling_loss.extend(
-                self.coupling_loss_imt[bs, ue],
-            )
+        bs_active, links = self.get_active_links()
+        ue = links.ue
+        serving_bs = bs_active[links.bs]
 
-            self.results.imt_bs_antenna_gain.extend(
-                self.imt_bs_antenna_gain[bs, ue],
-            )
-            self.results.imt_ue_antenna_gain.extend(
-                self.imt_ue_antenna_gain[bs, ue],
-            )
+        self.results.imt_path_loss.extend(self.path_loss_imt[serving_bs, ue])
+        self.results.imt_coupling_loss.extend(
+            self.coupling_loss_imt[serving_bs, ue],
+        )
+
+        self.results.imt_bs_antenna_gain.extend(
+            self.imt_bs_antenna_gain[serving_bs, ue],
+        )
+        self.results.imt_ue_antenna_gain.extend(
+            self.imt_ue_antenna_gain[serving_bs, ue],
+        )
+
+        sinr = np.ravel([self.bs.sinr[bs] for bs in bs_active])
+        tput = self.calculate_imt_tput(
+            sinr,
+            self.parameters.imt.uplink.sinr_min,
+            self.parameters.imt.uplink.sinr_max,
+            self.parameters.imt.uplink.attenuation_factor,
+        )
+        self.results.imt_ul_tput.extend(tput)
 
-            tput = self.calculate_imt_tput(
-                self.bs.sinr[bs],
+        if self.parameters.imt.interfered_with:
+            sinr_ext = np.ravel([self.bs.sinr_ext[bs] for bs in bs_active])
+            tput_ext = self.calculate_imt_tput(
+                sinr_ext,
                 self.parameters.imt.uplink.sinr_min,
                 self.parameters.imt.uplink.sinr_max,
                 self.parameters.imt.uplink.attenuation_factor,
             )
-            self.results.imt_ul_tput.extend(tput.tolist())
-
-            if self.parameters.imt.interfered_with:
-                tput_ext = self.calculate_imt_tput(
-                    self.bs.sinr_ext[bs],
-                    self.parameters.imt.uplink.sinr_min,
-                    self.parameters.imt.uplink.sinr_max,
-                    self.parameters.imt.uplink.attenuation_factor,
-                )
-                self.results.imt_ul_tput_ext.extend(tput_ext.tolist())
-                self.results.imt_ul_sinr_ext.extend(
-                    self.bs.sinr_ext[bs].tolist(),
-                )
-                self.results.imt_ul_inr.extend(self.bs.inr[bs].tolist())
+            self.results.imt_ul_tput_ext.extend(tput_ext)
+            self.results.imt_ul_sinr_ext.extend(sinr_ext)
+            self.results.imt_ul_inr.extend(
+                [self.bs.inr[bs] for bs in bs_active],
+            )
 
-                active_beams = np.array([
-                    i for i in range(
-                        bs * self.parameters.imt.ue.k, (bs + 1) * self.parameters.imt.ue.k,
-                    )
-                ])
-                self.results.system_imt_antenna_gain.extend(
-                    self.system_imt_antenna_gain[np.ix_(sys_active, active_beams)].flatten(),
+            active_beams = serving_bs * self.parameters.imt.ue.k + links.beam
+            self.results.system_imt_antenna_gain.extend(
+                links.flatten(self.system_imt_antenna_gain[np.ix_(sys_active, active_beams)]),
+            )
+            self.results.imt_system_antenna_gain.extend(
+                links.flatten(self.imt_system_antenna_gain[np.ix_(sys_active, active_beams)]),
+            )
+            if len(self.imt_system_antenna_gain_adjacent):
+                self.results.imt_system_antenna_gain_adjacent.extend(
+                    links.flatten(self.imt_system_antenna_gain_adjacent[np.ix_(sys_active, active_beams)]),)
+            self.results.imt_system_path_loss.extend(
+                links.flatten(self.imt_system_path_loss[np.ix_(sys_active, active_beams)]),
+            )
+            if self.param_system.channel_model == "HDFSS":
+                self.results.imt_system_build_entry_loss.extend(
+                    links.flatten(self.imt_system_build_entry_loss[np.ix_(sys_active, active_beams)]),
+                )
+                self.results.imt_system_diffraction_loss.extend(
+                    links.flatten(self.imt_system_diffraction_loss[np.ix_(sys_active, active_beams)]),
                 )
+        else:  # IMT is the interferer
+            self.results.system_imt_antenna_gain.extend(
+                links.flatten(self.system_imt_antenna_gain[np.ix_(sys_active, ue)]),
+            )
+            if len(self.imt_system_antenna_gain):
                 self.results.imt_system_antenna_gain.extend(
-                    self.imt_system_antenna_gain[np.ix_(sys_active, active_beams)].flatten(),
+                    links.flatten(self.imt_system_antenna_gain[np.ix_(sys_active, ue)]),
                 )
-                if len(self.imt_system_antenna_gain_adjacent):
-                    self.results.imt_system_antenna_gain_adjacent.extend(
-                        self.imt_system_antenna_gain_adjacent[np.ix_(sys_active, active_beams)].flatten(),)
-                self.results.imt_system_path_loss.extend(
-                    self.imt_system_path_loss[np.ix_(sys_active, active_beams)].flatten(),
+            if len(self.imt_system_antenna_gain_adjacent):
+                self.results.imt_system_antenna_gain_adjacent.extend(
+                    links.flatten(self.imt_system_antenna_gain_adjacent[np.ix_(sys_active, ue)]),
                 )
-                if self.param_system.channel_model == "HDFSS":
-                    self.results.imt_system_build_entry_loss.extend(
-                        self.imt_system_build_entry_loss[np.ix_(sys_active, active_beams)],
-                    )
-                    self.results.imt_system_diffraction_loss.extend(
-                        self.imt_system_diffraction_loss[np.ix_(sys_active, active_beams)],
-                    )
-            else:  # IMT is the interferer
-                self.results.system_imt_antenna_gain.extend(
-                    self.system_imt_antenna_gain[np.ix_(sys_active, ue)].flatten(),
+            self.results.imt_system_path_loss.extend(
+                links.flatten(self.imt_system_path_loss[np.ix_(sys_active, ue)]),
+            )
+            if self.param_system.channel_model == "HDFSS":
+                self.results.imt_system_build_entry_loss.extend(
+                    links.flatten(self.imt_system_build_entry_loss[np.ix_(sys_active, ue)]),
                 )
-                if len(self.imt_system_antenna_gain):
-                    self.results.imt_system_antenna_gain.extend(
-                        self.imt_system_antenna_gain[np.ix_(sys_active, ue)].flatten(),
-                    )
-                if len(self.imt_system_antenna_gain_adjacent):
-                    self.results.imt_system_antenna_gain_adjacent.extend(
-                        self.imt_system_antenna_gain_adjacent[np.ix_(sys_active, ue)].flatten(),
-                    )
-                self.results.imt_system_path_loss.extend(
-                    self.imt_system_path_loss[np.ix_(sys_active, ue)].flatten(),
+                self.results.imt_system_diffraction_loss.extend(
+                    links.flatten(self.imt_system_diffraction_loss[np.ix_(sys_active, ue)]),
                 )
-                if self.param_system.channel_model == "HDFSS":
-                    self.results.imt_system_build_entry_loss.extend(
-                        self.imt_system_build_entry_loss[np.ix_(sys_active, ue)],
-                    )
-                    self.results.imt_system_diffraction_loss.extend(
-                        self.imt_system_diffraction_loss[np.ix_(sys_active, ue)],
-                    )
 
-            self.results.imt_ul_tx_power.extend(self.ue.tx_power[ue].tolist())
-            imt_ul_tx_power_density = 10 * np.log10(
-                np.power(10, 0.1 * self.ue.tx_power[ue]) / (
-                    self.num_rb_per_ue * self.parameters.imt.rb_bandwidth * 1e6
-                ),
-            )
-            self.results.imt_ul_tx_power_density.extend(
-                imt_ul_tx_power_density.tolist(),
-            )
-            self.results.imt_ul_sinr.extend(self.bs.sinr[bs].tolist())
-            self.results.imt_ul_snr.extend(self.bs.snr[bs].tolist())
+        self.results.imt_ul_tx_power.extend(self.ue.tx_power[ue])
+        imt_ul_tx_power_density = 10 * np.log10(
+            np.power(10, 0.1 * self.ue.tx_power[ue]) / (
+                self.num_rb_per_ue * self.parameters.imt.rb_bandwidth * 1e6
+            ),
+        )
+        self.results.imt_ul_tx_power_density.extend(
+            imt_ul_tx_power_density,
+        )
+        self.results.imt_ul_sinr.extend(sinr)
+        self.results.imt_ul_snr.extend([self.bs.snr[bs] for bs in bs_active])
 
         if write_to_file:
             self.results.write_files(snapshot_number)
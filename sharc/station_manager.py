@@ -5,11 +5,16 @@ Created on Fri Feb  3 15:29:48 2017
 @author: edgar
 """
 
+import copy
+import functools
+import weakref
+
 import numpy as np
 
 from sharc.support.enumerations import StationType
 from sharc.station import Station
 from sharc.antenna.antenna import Antenna
+from sharc.antenna.antenna_array_bank import AntennaArrayBank
 from sharc.mask.spectral_mask import SpectralMask
 
 
@@ -20,6 +25,21 @@ class StationManager(object):
     station properties to speed up calculations.
     """
 
+    # Offsets of the 7 wrap-around clusters, in units of intersite distance
+    WRAP_AROUND_OFFSETS = np.array([
+        [0.0, 0.0],
+        [3.5, 1.5 * np.sqrt(3.0)],
+        [-0.5, 2.5 * np.sqrt(3.0)],
+        [-4.0, 1.0 * np.sqrt(3.0)],
+        [-3.5, -1.5 * np.sqrt(3.0)],
+        [0.5, -2.5 * np.sqrt(3.0)],
+        [4.0, -1.0 * np.sqrt(3.0)],
+    ])
+
+    # Pairs of stations with more links than this are not kept in the
+    # geometry cache, to bound its memory
+    MAX_CACHED_GEOMETRY_LINKS = 4_000_000
+
     def __init__(self, n):
         self.num_stations = n
         self.x = np.empty(n)  # x coordinate
@@ -54,6 +74,11 @@ class StationManager(object):
         self.station_type = StationType.NONE
         self.is_space_station = False
         self.intersite_dist = 0.0
+        # number of stations of the set these stations were copied from (see
+        # copy_stations), e.g., to tell single from multiple entry interference
+        self.num_stations_total = n
+        # geometry to other stations, see _get_geometry
+        self._geometry_cache = {}
 
     def get_station_list(self, id=None) -> list:
         """Return a list of Station objects for the given indices.
@@ -115,6 +140,33 @@ class StationManager(object):
         station.station_type = self.station_type
         return station
 
+    def _get_geometry(self, station) -> "StationGeometry":
+        """Return the geometry between this manager's stations and another's.
+
+        The geometry is kept while both managers exist and is recomputed if
+        the coordinates or orientation of any station changed, so the methods
+        below share it within a snapshot, e.g., between the co-channel and
+        adjacent channel antenna gains.
+
+        Parameters
+        ----------
+        station : StationManager
+            StationManager to which the geometry is calculated.
+
+        Returns
+        -------
+        StationGeometry
+            geometry between the stations
+        """
+        geometry = self._geometry_cache.get(id(station))
+        if geometry is not None and geometry.is_valid(self, station):
+            return geometry
+
+        geometry = StationGeometry(self, station)
+        if self.num_stations * station.num_stations <= self.MAX_CACHED_GEOMETRY_LINKS:
+            self._geometry_cache[id(station)] = geometry
+        return geometry
+
     def get_distance_to(self, station) -> np.array:
         """Calculate the 2D distance between this manager's stations and another's.
 
@@ -128,13 +180,7 @@ class StationManager(object):
         np.array
             2D distance matrix between stations.
         """
-        distance = np.empty([self.num_stations, station.num_stations])
-        for i in range(self.num_stations):
-            distance[i] = np.sqrt(
-                np.power(self.x[i] - station.x, 2) +
-                np.power(self.y[i] - station.y, 2),
-            )
-        return distance
+        return np.copy(self._get_geometry(station).distance_2d)
 
     def get_3d_distance_to(self, station) -> np.array:
         """Calculate the 3D distance between this manager's stations and another's.
@@ -149,17 +195,7 @@ class StationManager(object):
         np.array
             3D distance matrix between stations.
         """
-        dx = np.subtract.outer(self.x, station.x).astype(np.float64)
-        dy = np.subtract.outer(self.y, station.y).astype(np.float64)
-        dz = np.subtract.outer(self.z, station.z).astype(np.float64)
-        np.square(dx, out=dx)
-        np.square(dy, out=dy)
-        np.square(dz, out=dz)
-        np.sqrt(
-            dx + dy + dz,
-            out=dx
-        )
-        return dx
+        return np.copy(self._get_geometry(station).distance_3d)
 
     def get_dist_angles_wrap_around(self, station) -> np.array:
         """Calculate distances and angles using the wrap-around technique.
@@ -177,61 +213,28 @@ class StationManager(object):
             phi (np.array): azimuth of pointing vector to other stations
             theta (np.array): elevation of pointing vector to other stations
         """
-        # Initialize variables
-        distance_3D = np.empty([self.num_stations, station.num_stations])
-        distance_2D = np.inf * np.ones_like(distance_3D)
-        cluster_num = np.zeros_like(distance_3D, dtype=int)
-
-        # Cluster coordinates
-        cluster_x = np.array([
-            station.x,
-            station.x + 3.5 * self.intersite_dist,
-            station.x - 0.5 * self.intersite_dist,
-            station.x - 4.0 * self.intersite_dist,
-            station.x - 3.5 * self.intersite_dist,
-            station.x + 0.5 * self.intersite_dist,
-            station.x + 4.0 * self.intersite_dist,
-        ])
-
-        cluster_y = np.array([
-            station.y,
-            station.y + 1.5 *
-            np.sqrt(3.0) * self.intersite_dist,
-            station.y + 2.5 *
-            np.sqrt(3.0) * self.intersite_dist,
-            station.y + 1.0 *
-            np.sqrt(3.0) * self.intersite_dist,
-            station.y - 1.5 *
-            np.sqrt(3.0) * self.intersite_dist,
-            station.y - 2.5 *
-            np.sqrt(3.0) * self.intersite_dist,
-            station.y - 1.0 * np.sqrt(3.0) * self.intersite_dist,
-        ])
-
-        # Calculate 2D distance
-        temp_distance = np.zeros_like(distance_2D)
-        for k, (x, y) in enumerate(zip(cluster_x, cluster_y)):
-            temp_distance = np.sqrt(
-                np.power(x - self.x[:, np.newaxis], 2) +
-                np.power(y - self.y[:, np.newaxis], 2),
-            )
-            is_shorter = temp_distance < distance_2D
-            distance_2D[is_shorter] = temp_distance[is_shorter]
-            cluster_num[is_shorter] = k
-
-        # Calculate 3D distance
-        distance_3D = np.sqrt(
-            np.power(distance_2D, 2) +
-            np.power(station.height - self.height[:, np.newaxis], 2),
-        )
-
-        # Calcualte pointing vector
-        point_vec_x = cluster_x[cluster_num, np.arange(station.num_stations)] \
-            - self.x[:, np.newaxis]
-        point_vec_y = cluster_y[cluster_num, np.arange(station.num_stations)] \
-            - self.y[:, np.newaxis]
+        # Coordinates of the images of this manager's stations in the 7
+        # clusters, shape (num_stations, 7). Moving the stations of this
+        # manager by -offset is the same as moving the other stations by
+        # +offset.
+        image_x, image_y = self._get_wrap_around_images()
+
+        # Squared 2D distance to the other stations from every image, shape
+        # (num_stations, 7, station.num_stations)
+        dx = station.x[np.newaxis, np.newaxis, :] - image_x[:, :, np.newaxis]
+        dy = station.y[np.newaxis, np.newaxis, :] - image_y[:, :, np.newaxis]
+        sq_distance = dx**2 + dy**2
+
+        # Keep the closest image of each pair of stations
+        cluster_num = np.argmin(sq_distance, axis=1)[:, np.newaxis, :]
+        sq_distance_2D = np.take_along_axis(sq_distance, cluster_num, axis=1)[:, 0]
+        point_vec_x = np.take_along_axis(dx, cluster_num, axis=1)[:, 0]
+        point_vec_y = np.take_along_axis(dy, cluster_num, axis=1)[:, 0]
         point_vec_z = station.height - self.height[:, np.newaxis]
 
+        distance_2D = np.sqrt(sq_distance_2D)
+        distance_3D = np.sqrt(sq_distance_2D + point_vec_z**2)
+
         phi = np.array(
             np.rad2deg(
                 np.arctan2(
@@ -243,6 +246,21 @@ class StationManager(object):
 
         return distance_2D, distance_3D, phi, theta
 
+    def _get_wrap_around_images(self) -> tuple:
+        """Return the coordinates of the stations' images in the 7 clusters.
+
+        Returns
+        -------
+        tuple
+            x and y coordinates of the images, each with shape
+            (num_stations, 7).
+        """
+        offset_x = self.intersite_dist * self.WRAP_AROUND_OFFSETS[:, 0]
+        offset_y = self.intersite_dist * self.WRAP_AROUND_OFFSETS[:, 1]
+        image_x = self.x[:, np.newaxis] - offset_x
+        image_y = self.y[:, np.newaxis] - offset_y
+        return image_x, image_y
+
     def get_elevation(self, station) -> np.array:
         """Calculate the elevation angle between this manager's stations and another's.
 
@@ -261,18 +279,7 @@ class StationManager(object):
         This implementation is essentially the same as get_elevation_angle (free-space elevation angle),
         despite the different matrix dimensions. The methods should be merged to reuse code.
         """
-
-        elevation = np.empty([self.num_stations, station.num_stations])
-
-        for i in range(self.num_stations):
-            distance = np.sqrt(
-                np.power(self.x[i] - station.x, 2) +
-                np.power(self.y[i] - station.y, 2),
-            )
-            rel_z = station.z - self.z[i]
-            elevation[i] = np.degrees(np.arctan2(rel_z, distance))
-
-        return elevation
+        return np.copy(self._get_geometry(station).elevation)
 
     def get_pointing_vector_to(self, station) -> tuple:
         """Calculate the pointing vector (angles) with respect to another station.
@@ -288,25 +295,8 @@ class StationManager(object):
             phi, theta (phi is calculated with respect to x counter-clockwise and
             theta is calculated with respect to z counter-clockwise).
         """
-
-        # malloc
-        dx = (station.x - self.x[:, np.newaxis]).astype(np.float64)
-        dy = (station.y - self.y[:, np.newaxis]).astype(np.float64)
-        dz = (station.z - self.z[:, np.newaxis]).astype(np.float64)
-
-        dist = self.get_3d_distance_to(station)
-
-        # NOTE: doing in place calculations
-        phi = np.rad2deg(np.arctan2(dy, dx, out=dx), out=dx)
-        # delete reference dx
-        del dx
-
-        # in place calculations
-        theta = np.rad2deg(np.arccos(np.clip(dz / dist, -1.0, 1.0, out=dz), out=dz), out=dz)
-        # delete reference dz
-        del dz
-
-        return phi, theta
+        geometry = self._get_geometry(station)
+        return np.copy(geometry.phi), np.copy(geometry.theta)
 
     def get_off_axis_angle(self, station) -> np.array:
         """Calculate the off-axis angle between this manager's stations and another's.
@@ -321,22 +311,7 @@ class StationManager(object):
         np.array
             Off-axis angle matrix (degrees).
         """
-        Az, b = self.get_pointing_vector_to(station)
-        Az0 = self.azimuth
-
-        a = 90 - self.elevation[:, np.newaxis]
-        C = Az0[:, np.newaxis] - Az
-
-        cos_phi = np.cos(np.radians(a)) * np.cos(np.radians(b)) \
-            + np.sin(np.radians(a)) * np.sin(np.radians(b)) * np.cos(np.radians(C))
-        phi = np.arccos(
-            # imprecision may accumulate enough for numbers to be slightly out
-            # of arccos range
-            np.clip(cos_phi, -1., 1.)
-        )
-        phi_deg = np.degrees(phi)
-
-        return phi_deg
+        return np.copy(self._get_geometry(station).off_axis_angle)
 
     def is_imt_station(self) -> bool:
         """Return whether this station manager represents IMT stations.
@@ -352,6 +327,129 @@ class StationManager(object):
             return False
 
 
+class StationGeometry():
+    """Geometry between two sets of stations.
+
+    The difference vectors between the stations are computed once and the
+    distances and angles are derived from them when first requested.
+
+    Attributes
+    ----------
+    dx, dy, dz : np.ndarray
+        coordinates of the vectors from the stations of station_a to the
+        stations of station_b, with shape
+        (station_a.num_stations, station_b.num_stations)
+    """
+
+    # attributes of station_a and station_b that define the geometry
+    STATION_A_ATTRIBUTES = ("x", "y", "z", "azimuth", "elevation")
+    STATION_B_ATTRIBUTES = ("x", "y", "z")
+
+    def __init__(self, station_a: StationManager, station_b: StationManager):
+        """
+        Parameters
+        ----------
+        station_a : StationManager
+            stations from which the geometry is calculated
+        station_b : StationManager
+            stations to which the geometry is calculated
+        """
+        # station_b is only referenced weakly, since station_a keeps this
+        # object in its cache
+        self._station_b = weakref.ref(station_b)
+        self._values_a = [np.copy(getattr(station_a, name)) for name in self.STATION_A_ATTRIBUTES]
+        self._values_b = [np.copy(getattr(station_b, name)) for name in self.STATION_B_ATTRIBUTES]
+
+        self.dx = (station_b.x - station_a.x[:, np.newaxis]).astype(np.float64)
+        self.dy = (station_b.y - station_a.y[:, np.newaxis]).astype(np.float64)
+        self.dz = (station_b.z - station_a.z[:, np.newaxis]).astype(np.float64)
+
+    def is_valid(self, station_a: StationManager, station_b: StationManager) -> bool:
+        """Checks whether the stations are still the ones the geometry was calculated for."""
+        return self._station_b() is station_b and all(
+            np.array_equal(value, getattr(station_a, name))
+            for name, value in zip(self.STATION_A_ATTRIBUTES, self._values_a)
+        ) and all(
+            np.array_equal(value, getattr(station_b, name))
+            for name, value in zip(self.STATION_B_ATTRIBUTES, self._values_b)
+        )
+
+    @functools.cached_property
+    def distance_2d(self) -> np.ndarray:
+        """2D distance between the stations."""
+        return np.sqrt(self.dx**2 + self.dy**2)
+
+    @functools.cached_property
+    def distance_3d(self) -> np.ndarray:
+        """3D distance between the stations."""
+        return np.sqrt(self.dx**2 + self.dy**2 + self.dz**2)
+
+    @functools.cached_property
+    def elevation(self) -> np.ndarray:
+        """Elevation angle (degrees) of station_b seen from station_a."""
+        return np.degrees(np.arctan2(self.dz, self.distance_2d))
+
+    @functools.cached_property
+    def phi(self) -> np.ndarray:
+        """Azimuth (degrees) of the pointing vector, counter-clockwise from x."""
+        return np.rad2deg(np.arctan2(self.dy, self.dx))
+
+    @functools.cached_property
+    def theta(self) -> np.ndarray:
+        """Angle (degrees) of the pointing vector from the z axis."""
+        return np.rad2deg(np.arccos(np.clip(self.dz / self.distance_3d, -1.0, 1.0)))
+
+    @functools.cached_property
+    def off_axis_angle(self) -> np.ndarray:
+        """Angle (degrees) between the pointing of station_a and station_b."""
+        azimuth, elevation = self._values_a[3], self._values_a[4]
+        a = 90 - elevation[:, np.newaxis]
+        C = azimuth[:, np.newaxis] - self.phi
+        b = self.theta
+
+        cos_phi = np.cos(np.radians(a)) * np.cos(np.radians(b)) \
+            + np.sin(np.radians(a)) * np.sin(np.radians(b)) * np.cos(np.radians(C))
+        phi = np.arccos(
+            # imprecision may accumulate enough for numbers to be slightly out
+            # of arccos range
+            np.clip(cos_phi, -1., 1.)
+        )
+        return np.degrees(phi)
+
+
+def copy_stations(stations: StationManager, indices: np.ndarray) -> StationManager:
+    """Return a new StationManager object containing only the given stations.
+
+    Every array attribute with one entry per station is indexed, as well as
+    the antennas of an AntennaArrayBank. The others (e.g., station type,
+    spectral mask, transmit power dictionaries) are shared with the original
+    object.
+
+    Parameters
+    ----------
+    stations : StationManager
+        StationManager object to copy from.
+    indices : np.ndarray
+        Indices of the stations to copy.
+
+    Returns
+    -------
+    StationManager
+        A new StationManager object with only the given stations.
+    """
+    indices = np.asarray(indices, dtype=int)
+    sub_sta = copy.copy(stations)
+    for name, value in vars(stations).items():
+        if isinstance(value, np.ndarray) and value.ndim > 0 and \
+                value.shape[0] == stations.num_stations:
+            setattr(sub_sta, name, value[indices])
+        elif isinstance(value, AntennaArrayBank):
+            setattr(sub_sta, name, value.subset(indices))
+    sub_sta.num_stations = len(indices)
+    sub_sta._geometry_cache = {}
+    return sub_sta
+
+
 def copy_active_stations(stations: StationManager) -> StationManager:
     """Return a new StationManager object containing only the active stations.
 
@@ -365,34 +463,4 @@ def copy_active_stations(stations: StationManager) -> StationManager:
     StationManager
         A new StationManager object with only the active stations.
     """
-    act_sta = StationManager(np.sum(stations.active))
-    for idx, active_idx in enumerate(np.where(stations.active)[0]):
-        act_sta.x[idx] = stations.x[active_idx]
-        act_sta.y[idx] = stations.y[active_idx]
-        act_sta.z[idx] = stations.z[active_idx]
-        act_sta.azimuth[idx] = stations.azimuth[active_idx]
-        act_sta.elevation[idx] = stations.elevation[active_idx]
-        act_sta.height[idx] = stations.height[active_idx]
-        act_sta.indoor[idx] = stations.indoor[active_idx]
-        act_sta.active[idx] = stations.active[active_idx]
-        act_sta.tx_power[idx] = stations.tx_power[active_idx]
-        act_sta.rx_power[idx] = stations.rx_power[active_idx]
-        act_sta.rx_interference[idx] = stations.rx_interference[active_idx]
-        act_sta.ext_interference[idx] = stations.ext_interference[active_idx]
-        act_sta.antenna[idx] = stations.antenna[active_idx]
-        act_sta.bandwidth[idx] = stations.bandwidth[active_idx]
-        act_sta.noise_figure[idx] = stations.noise_figure[active_idx]
-        act_sta.noise_temperature[idx] = stations.noise_temperature[active_idx]
-        act_sta.thermal_noise[idx] = stations.thermal_noise[active_idx]
-        act_sta.total_interference[idx] = stations.total_interference[active_idx]
-        act_sta.snr[idx] = stations.snr[active_idx]
-        act_sta.sinr[idx] = stations.sinr[active_idx]
-        act_sta.sinr_ext[idx] = stations.sinr_ext[active_idx]
-        act_sta.inr[idx] = stations.inr[active_idx]
-        act_sta.pfd[idx] = stations.pfd[active_idx]
-        act_sta.spectral_mask = stations.spectral_mask
-        act_sta.center_freq[idx] = stations.center_freq[active_idx]
-        act_sta.station_type = stations.station_type
-        act_sta.is_space_station = stations.is_space_station
-        act_sta.intersite_dist = stations.intersite_dist
-    return act_sta
+    return copy_stations(stations, np.flatnonzero(stations.active))
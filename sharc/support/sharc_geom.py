@@ -1,3 +1,7 @@
+import hashlib
+import os
+from pathlib import Path
+
 import numpy as np
 import shapely as shp
 import shapely.vectorized
@@ -7,7 +11,7 @@ import typing
 
 from sharc.satellite.utils.sat_utils import lla2ecef
 from sharc.station_manager import StationManager
-from sharc.support.sharc_utils import to_scalar
+from sharc.support.sharc_utils import to_scalar, load_gdf, get_cache_file_path, write_cache_file
 from sharc.satellite.ngso.constants import EARTH_RADIUS_M, EARTH_DEFAULT_CRS, EARTH_SPHERICAL_CRS
 
 
@@ -605,6 +609,113 @@ def shrink_countries_by_km(
     ]
 
 
+# shrunk country polygons already loaded by this process
+_country_polygons = {}
+
+
+def load_countries_polygon(
+    country_shapes_filename: typing.Union[Path, str],
+    country_names: list[str],
+    margin_km: float,
+    err_ctx: str = "load_countries_polygon",
+    cache_dir: typing.Union[str, None] = None,
+) -> shp.geometry.base.BaseGeometry:
+    """Load the union of some countries of a shapefile, shrunk by a margin.
+
+    Shrinking the countries is slow, and campaigns usually load the same
+    borders from many parameter files, so the resulting polygons are kept in
+    memory and stored in cache_dir, keyed by the contents of the shapefile, the
+    country names and the margin. The returned polygon is prepared for fast
+    point in polygon tests.
+
+    Parameters
+    ----------
+    country_shapes_filename : Path or str
+        Path to the shapefile, in EPSG:4326.
+    country_names : list of str
+        Names of the countries to load.
+    margin_km : float
+        Number of kilometers to shrink each country by. If negative, the
+        countries are enlarged.
+    err_ctx : str, optional
+        Context used in error messages.
+    cache_dir : str or None, optional
+        Directory of the stored polygons. Defaults to the one of
+        sharc_utils.get_cache_dir.
+
+    Returns
+    -------
+    shp.geometry.base.BaseGeometry
+        Union of the shrunk countries.
+    """
+    # the shapefile is made of several files with the same name
+    shapefile_hash = hashlib.sha1()
+    base_name = os.path.splitext(str(country_shapes_filename))[0]
+    for extension in [".shp", ".shx", ".dbf", ".prj", ".cpg"]:
+        if os.path.exists(base_name + extension):
+            with open(base_name + extension, "rb") as f:
+                shapefile_hash.update(f.read())
+
+    key = repr((shapefile_hash.hexdigest(), list(country_names), float(margin_km)))
+    if key in _country_polygons:
+        return _country_polygons[key]
+
+    polygon = None
+    file_path = get_cache_file_path(repr(("countries", key)), ".wkb", cache_dir)
+    if os.path.exists(file_path):
+        with open(file_path, "rb") as f:
+            polygon = shp.from_wkb(f.read())
+
+    if polygon is None:
+        filtered_gdf = load_gdf(
+            country_shapes_filename,
+            {
+                "NAME": list(country_names)
+            },
+            err_ctx,
+        )
+        # shrink countries and unite
+        # them into a single MultiPolygon
+        polygon = shp.ops.unary_union(shrink_countries_by_km(
+            filtered_gdf.geometry.values, margin_km
+        ))
+
+        write_cache_file(file_path, lambda f: f.write(shp.to_wkb(polygon)))
+
+    shp.prepare(polygon)
+    _country_polygons[key] = polygon
+
+    return polygon
+
+
+def points_inside_polygon(
+    polygon: shp.geometry.base.BaseGeometry,
+    lon: np.ndarray,
+    lat: np.ndarray,
+) -> np.ndarray:
+    """Check which (lon, lat) points are strictly inside a polygon.
+
+    Equivalent to testing the points with GeoSeries.within, but without
+    creating point geometries.
+
+    Parameters
+    ----------
+    polygon : shp.geometry.base.BaseGeometry
+        Polygon or MultiPolygon with (lon, lat) coordinates.
+    lon : np.ndarray
+        Longitudes of the points.
+    lat : np.ndarray
+        Latitudes of the points.
+
+    Returns
+    -------
+    np.ndarray
+        Boolean mask of the points inside the polygon.
+    """
+    shp.prepare(polygon)
+    return shp.contains_xy(polygon, lon, lat)
+
+
 def generate_grid_in_polygon(
     polygon: shp.geometry.Polygon,
     hexagon_radius: float,
@@ -1,3 +1,5 @@
+import hashlib
+import os
 import numpy as np
 import typing
 from pathlib import Path
@@ -76,6 +78,92 @@ def to_scalar(x):
     return x
 
 
+# environment variable with the directory of the files cached between runs
+CACHE_DIR_ENV_VAR = "SHARC_CACHE_DIR"
+
+
+def get_cache_dir(cache_dir: typing.Union[str, None] = None) -> str:
+    """Returns the directory of the files cached between runs
+
+    Parameters
+    ----------
+    cache_dir : str or None
+        directory to use. If None, the directory in the SHARC_CACHE_DIR
+        environment variable, or ~/.cache/sharc if it is not set
+
+    Returns
+    -------
+    str
+        the cache directory
+    """
+    if cache_dir is None:
+        cache_dir = os.environ.get(
+            CACHE_DIR_ENV_VAR, os.path.join(os.path.expanduser("~"), ".cache", "sharc"),
+        )
+    return cache_dir
+
+
+def get_cache_file_path(
+    key: str,
+    extension: str,
+    cache_dir: typing.Union[str, None] = None,
+) -> str:
+    """Returns the path of the cache file of some data, named after a hash of its key
+
+    Parameters
+    ----------
+    key : str
+        description of all the inputs that determine the data
+    extension : str
+        file extension, including the dot
+    cache_dir : str or None
+        cache directory, see get_cache_dir
+
+    Returns
+    -------
+    str
+        path of the cache file, which may not exist yet
+    """
+    file_name = hashlib.sha1(key.encode()).hexdigest() + extension
+    return os.path.join(get_cache_dir(cache_dir), file_name)
+
+
+def write_cache_file(file_path: str, write: typing.Callable) -> bool:
+    """Writes a cache file atomically
+
+    The data is written to a temporary file that is then moved into place,
+    so concurrent runs that compute the same file never read an incomplete
+    one. Errors such as a read-only cache directory are ignored, and the
+    caller keeps the data in memory.
+
+    Parameters
+    ----------
+    file_path : str
+        path of the cache file
+    write : callable
+        function that writes the data to the binary file object it receives
+
+    Returns
+    -------
+    bool
+        whether the file was written
+    """
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, file_path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        return False
+    return True
+
+
 def load_gdf(
     country_shapes_filename: typing.Union[Path, str],
     filters: dict[str, list[str]],
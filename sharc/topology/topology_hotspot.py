@@ -12,7 +12,7 @@ import matplotlib.pyplot as plt
 import matplotlib.axes
 import matplotlib.patches as patches
 
-from shapely.geometry import Polygon
+import shapely
 
 from sharc.topology.topology import Topology
 from sharc.topology.topology_macrocell import TopologyMacrocell
@@ -29,6 +29,13 @@ class TopologyHotspot(Topology):
     # overlap
     MAX_NUM_LOOPS = 1000
 
+    # Maximum number of candidate hotspots drawn and checked at a time
+    CANDIDATES_PER_PASS = 64
+
+    # Angles of the arc points of the hotspot coverage polygons, relative to
+    # the hotspot azimuth
+    SECTOR_ARC_ANGLES = np.linspace(-60, 60, 25)
+
     def __init__(
             self,
             param: ParametersHotspot,
@@ -56,89 +63,27 @@ class TopologyHotspot(Topology):
         Calculates coordinates of hotspots
         """
 
-        i = 0
         x = np.empty(0)
         y = np.empty(0)
         azimuth = np.empty(0)
+        # Hotspots are generated inside an inscribed circle of a regular hexagon (sector).
+        # The backoff factor (1.0) controls the overlapping rate between hotspots
+        # coverage areas (overlapping of hotspots in different macro cells)
+        r = np.maximum(
+            0, (self.macrocell.intersite_distance / 3) *
+            np.sqrt(3) / 2 - self.param.max_dist_hotspot_ue / 1.0,
+        )
         for cell_x, cell_y, cell_azimuth in zip(
                 self.macrocell.x, self.macrocell.y, self.macrocell.azimuth):
-            # print("base station #{}".format(i))
-            i += 1
             # find the center coordinates of the sector (hexagon)
             macro_cell_x = cell_x + self.macrocell.intersite_distance / \
                 3 * math.cos(math.radians(cell_azimuth))
             macro_cell_y = cell_y + self.macrocell.intersite_distance / \
                 3 * math.sin(math.radians(cell_azimuth))
-            # Hotspots are generated inside an inscribed circle of a regular hexagon (sector).
-            # The backoff factor (1.0) controls the overlapping rate between hotspots
-            # coverage areas (overlapping of hotspots in different macro cells)
-            r = np.maximum(
-                0, (self.macrocell.intersite_distance / 3) *
-                np.sqrt(3) / 2 - self.param.max_dist_hotspot_ue / 1.0,
+
+            hotspot_x, hotspot_y, hotspot_azimuth = self._place_cell_hotspots(
+                macro_cell_x, macro_cell_y, r, random_number_gen,
             )
-            hotspot_x = np.array(0)
-            hotspot_y = np.array(0)
-            hotspot_azimuth = np.array(0)
-
-            for hs in range(self.param.num_hotspots_per_cell):
-                num_attempts = 0
-                while (True):
-                    # create one hotspot
-                    hotspot_radius = r * random_number_gen.rand(1)
-                    hotspot_angle = 2 * np.pi * random_number_gen.rand(1)
-                    candidate_x = hotspot_radius * \
-                        np.cos(hotspot_angle) + macro_cell_x
-                    candidate_y = hotspot_radius * \
-                        np.sin(hotspot_angle) + macro_cell_y
-                    candidate_azimuth = 360 * random_number_gen.rand(1)
-                    if hs == 0:
-                        # the candidate is valid if it is the first to be
-                        # created
-                        hotspot_x = candidate_x
-                        hotspot_y = candidate_y
-                        hotspot_azimuth = candidate_azimuth
-                        break
-                    else:
-                        overlapping_hotspots = self.overlapping_hotspots(
-                            candidate_x,
-                            candidate_y,
-                            candidate_azimuth,
-                            hotspot_x,
-                            hotspot_y,
-                            hotspot_azimuth,
-                            self.cell_radius,
-                        )
-                        min_dist_validated = self.validade_min_dist_bs_hotspot(
-                            candidate_x,
-                            candidate_y,
-                            self.macrocell.x,
-                            self.macrocell.y,
-                            self.param.min_dist_bs_hotspot,
-                        )
-                        candidate_valid = (
-                            not overlapping_hotspots
-                        ) and min_dist_validated
-                        if candidate_valid:
-                            hotspot_x = np.concatenate(
-                                (hotspot_x, candidate_x),
-                            )
-                            hotspot_y = np.concatenate(
-                                (hotspot_y, candidate_y),
-                            )
-                            hotspot_azimuth = np.concatenate(
-                                (hotspot_azimuth, candidate_azimuth),
-                            )
-                            break
-                        else:
-                            num_attempts = num_attempts + 1
-
-                        if num_attempts > TopologyHotspot.MAX_NUM_LOOPS:
-                            sys.stderr.write(
-                                "ERROR\nInfinite loop while creating hotspots.\n \
-                                Try less hotspots per cell or greater macro cell intersite distance.\n",
-                            )
-                            sys.exit(1)
-                # if num_attempts > 1: print("number of attempts: {}".format(num_attempts))
             x = np.concatenate([x, hotspot_x])
             y = np.concatenate([y, hotspot_y])
             azimuth = np.concatenate([azimuth, hotspot_azimuth])
@@ -151,6 +96,141 @@ class TopologyHotspot(Topology):
         self.z = np.zeros(self.num_base_stations)
         self.indoor = np.zeros(self.num_base_stations, dtype=bool)
 
+    def _place_cell_hotspots(
+        self,
+        macro_cell_x: float,
+        macro_cell_y: float,
+        r: float,
+        random_number_gen: np.random.RandomState,
+    ) -> tuple:
+        """
+        Places the hotspots of a sector by rejection sampling. Candidates are
+        drawn in blocks and accepted in the order they were drawn, so that the
+        hotspots are the same as if the candidates were drawn one at a time,
+        and the random number generator is only advanced by the candidates
+        actually evaluated.
+
+        Parameters
+        ----------
+            macro_cell_x : x-coordinate of the center of the sector
+            macro_cell_y : y-coordinate of the center of the sector
+            r : radius of the circle where hotspots are placed
+            random_number_gen : random number generator
+
+        Returns
+        -------
+            x, y and azimuth of the hotspots
+        """
+        hotspot_x = np.empty(0)
+        hotspot_y = np.empty(0)
+        hotspot_azimuth = np.empty(0)
+        hotspot_polygons = np.empty(0, dtype=object)
+
+        num_attempts = 0
+        while len(hotspot_x) < self.param.num_hotspots_per_cell:
+            # the first candidate is always valid
+            num_candidates = 1 if len(hotspot_x) == 0 else min(
+                TopologyHotspot.CANDIDATES_PER_PASS,
+                2 * (self.param.num_hotspots_per_cell - len(hotspot_x)),
+            )
+            state = random_number_gen.get_state() if len(hotspot_x) else None
+            # radius, angle and azimuth of each candidate, in the order they
+            # were drawn for a single candidate
+            draws = random_number_gen.rand(num_candidates, 3)
+            hotspot_radius = r * draws[:, 0]
+            hotspot_angle = 2 * np.pi * draws[:, 1]
+            candidate_x = hotspot_radius * np.cos(hotspot_angle) + macro_cell_x
+            candidate_y = hotspot_radius * np.sin(hotspot_angle) + macro_cell_y
+            candidate_azimuth = 360 * draws[:, 2]
+
+            if len(hotspot_x) == 0:
+                hotspot_x = candidate_x
+                hotspot_y = candidate_y
+                hotspot_azimuth = candidate_azimuth
+                if self.param.num_hotspots_per_cell > 1:
+                    hotspot_polygons = self._get_hotspot_polygons(
+                        candidate_x, candidate_y, candidate_azimuth, self.cell_radius,
+                    )
+                continue
+
+            min_dist_validated = self._min_dist_bs_hotspot_validated(
+                candidate_x,
+                candidate_y,
+                self.macrocell.x,
+                self.macrocell.y,
+                self.param.min_dist_bs_hotspot,
+            )
+            polygons = self._get_hotspot_polygons(
+                candidate_x, candidate_y, candidate_azimuth, self.cell_radius,
+            )
+            # overlapping pairs of candidates and of candidates and hotspots,
+            # where the hotspots are the first indices of the tree
+            tree = shapely.STRtree(np.concatenate([hotspot_polygons, polygons]))
+            candidate_idx, tree_idx = tree.query(polygons, predicate="intersects")
+            num_hotspots = len(hotspot_polygons)
+            overlaps_hotspot = np.zeros(num_candidates, dtype=bool)
+            overlaps_hotspot[candidate_idx[tree_idx < num_hotspots]] = True
+            in_block = (tree_idx >= num_hotspots) & (tree_idx - num_hotspots < candidate_idx)
+            overlapping_candidates = [[] for _ in range(num_candidates)]
+            for i, j in zip(candidate_idx[in_block], tree_idx[in_block] - num_hotspots):
+                overlapping_candidates[i].append(j)
+
+            accepted = np.zeros(num_candidates, dtype=bool)
+            num_accepted = len(hotspot_x)
+            num_evaluated = num_candidates
+            for i in range(num_candidates):
+                candidate_valid = min_dist_validated[i] and not overlaps_hotspot[i] and \
+                    not accepted[overlapping_candidates[i]].any()
+                if candidate_valid:
+                    accepted[i] = True
+                    num_accepted += 1
+                    num_attempts = 0
+                    if num_accepted == self.param.num_hotspots_per_cell:
+                        num_evaluated = i + 1
+                        break
+                else:
+                    num_attempts = num_attempts + 1
+
+                if num_attempts > TopologyHotspot.MAX_NUM_LOOPS:
+                    sys.stderr.write(
+                        "ERROR\nInfinite loop while creating hotspots.\n \
+                        Try less hotspots per cell or greater macro cell intersite distance.\n",
+                    )
+                    sys.exit(1)
+
+            # draw again only the candidates that were evaluated
+            random_number_gen.set_state(state)
+            random_number_gen.rand(num_evaluated, 3)
+
+            hotspot_x = np.concatenate((hotspot_x, candidate_x[accepted]))
+            hotspot_y = np.concatenate((hotspot_y, candidate_y[accepted]))
+            hotspot_azimuth = np.concatenate((hotspot_azimuth, candidate_azimuth[accepted]))
+            hotspot_polygons = np.concatenate((hotspot_polygons, polygons[accepted]))
+
+        return hotspot_x, hotspot_y, hotspot_azimuth
+
+    @staticmethod
+    def _get_hotspot_polygons(
+        x: np.array,
+        y: np.array,
+        azimuth: np.array,
+        radius: float,
+    ) -> np.array:
+        """
+        Returns the polygons of the coverage areas of hotspots, as the center
+        and 25 points of the arc of the 120 degrees sector.
+        """
+        angles = np.radians(
+            np.asarray(azimuth, dtype=float)[:, np.newaxis] + TopologyHotspot.SECTOR_ARC_ANGLES,
+        )
+        x = np.asarray(x, dtype=float)[:, np.newaxis]
+        y = np.asarray(y, dtype=float)[:, np.newaxis]
+        coords = np.stack([
+            np.concatenate([x, x + radius * np.cos(angles)], axis=1),
+            np.concatenate([y, y + radius * np.sin(angles)], axis=1),
+        ], axis=-1)
+        return shapely.polygons(coords)
+
     def overlapping_hotspots(
         self,
         candidate_x: np.array,
@@ -181,62 +261,15 @@ class TopologyHotspot(Topology):
             True if there is intersection between any two hotspots
         """
         # Each hotspot coverage area corresponds to a Polygon object
-        # Creating the set of polygons
-        set_polygons = list()
-        azimuth_values = np.linspace(-60, 60, 25)
-        for x, y, azimuth in zip(set_x, set_y, set_azimuth):
-            set_points = list()
-            set_points.append((x, y))
-            for a in range(len(azimuth_values)):
-                set_points.append(
-                    (x +
-                     radius *
-                     math.cos(
-                         np.radians(
-                             azimuth +
-                             azimuth_values[a])),
-                        y +
-                        radius *
-                        math.sin(
-                         np.radians(
-                             azimuth +
-                             azimuth_values[a])),
-                     ))
-            set_polygons.append(Polygon(set_points))
-
-        # Creating the candidate polygon
-        points = list()
-        points.append((candidate_x, candidate_y))
-        for a in range(len(azimuth_values)):
-            points.append(
-                (candidate_x +
-                 radius *
-                 math.cos(
-                     np.radians(
-                         candidate_azimuth +
-                         azimuth_values[a])),
-                    candidate_y +
-                    radius *
-                    math.sin(
-                     np.radians(
-                         candidate_azimuth +
-                         azimuth_values[a])),
-                 ))
-        polygon = Polygon(points)
+        set_polygons = self._get_hotspot_polygons(set_x, set_y, set_azimuth, radius)
+        polygon = self._get_hotspot_polygons(
+            np.ravel(candidate_x)[:1], np.ravel(candidate_y)[:1], np.ravel(candidate_azimuth)[:1], radius,
+        )[0]
 
         # Check if there is overlapping between the candidate hotspot and
         # any of the hotspots of the set. In other words, check if any polygons
         # intersect
-        for p in range(len(set_polygons)):
-            overlapping = polygon.intersects(set_polygons[p])
-            if overlapping:
-                # An intersection was found! We stop here because we do not
-                # need to check other combinations
-                return True
-
-        # If this point is reached, then there is no intersection between
-        # polygons
-        return False
+        return bool(np.any(shapely.intersects(polygon, set_polygons)))
 
     def validade_min_dist_bs_hotspot(
         self,
@@ -256,6 +289,22 @@ class TopologyHotspot(Topology):
             True if hotspots coordinates meets the minimum 2D distance between
             macro cell base stations and hotspots
         """
+        return bool(np.all(self._min_dist_bs_hotspot_validated(
+            hotspot_x, hotspot_y, macrocell_x, macrocell_y, min_dist_bs_hotspot,
+        )))
+
+    @staticmethod
+    def _min_dist_bs_hotspot_validated(
+        hotspot_x: np.array,
+        hotspot_y: np.array,
+        macrocell_x: np.array,
+        macrocell_y: np.array,
+        min_dist_bs_hotspot: float,
+    ) -> np.array:
+        """
+        Checks, for each hotspot, the minimum 2D distance to the macro cell
+        base stations.
+        """
         # Here we have a 2D matrix whose values indicates the distance between
         # base station and hotspots. In this matrix, each line corresponds to
         # a macro cell base station and each column corresponds to a hotspot
@@ -263,11 +312,9 @@ class TopologyHotspot(Topology):
             (hotspot_x - macrocell_x.reshape((-1, 1)))**2 +
             (hotspot_y - macrocell_y.reshape((-1, 1)))**2,
         )
-        # count the number of values that are less than the minimum distance and
-        # return true if any value is equal os less than minimum 2D distance
-        # between macro cell base stations and hotspot centers
-        occ = np.where(distance < min_dist_bs_hotspot)[0]
-        return len(occ) == 0
+        # a hotspot is valid if no distance is less than the minimum 2D
+        # distance between macro cell base stations and hotspot centers
+        return ~np.any(distance < min_dist_bs_hotspot, axis=0)
 
     def plot(self, ax: matplotlib.axes.Axes):
         """Plot the macrocell and hotspot topology on the given axis."""
@@ -11,21 +11,23 @@ The azimuth and elevation angles are also rotated to the new coordinate system.
 The visible Space Stations are then used to generate the IMT Base Stations.
 """
 
+import hashlib
 import numpy as np
-import geopandas as gpd
+import shapely
 import functools
+from scipy.spatial import cKDTree
 
-from collections import defaultdict
 from sharc.support.sharc_utils import to_scalar
 from sharc.topology.topology import Topology
 from sharc.parameters.imt.parameters_imt_mss_dc import ParametersImtMssDc
 from sharc.parameters.parameters_orbit import ParametersOrbit
 from sharc.satellite.ngso.orbit_model import OrbitModel
+from sharc.satellite.ngso.orbit_visibility import OrbitVisibilitySampler
 from sharc.support.sharc_geom import GeometryConverter, rotate_angles_based_on_new_nadir
 from sharc.topology.topology_ntn import TopologyNTN
 from sharc.satellite.utils.sat_utils import calc_elevation
-from sharc.support.sharc_geom import lla2ecef, cartesian_to_polar, polar_to_cartesian
-from sharc.satellite.ngso.constants import EARTH_DEFAULT_CRS
+from sharc.support.sharc_geom import lla2ecef, cartesian_to_polar, polar_to_cartesian, points_inside_polygon
+from sharc.satellite.ngso.constants import EARTH_RADIUS_M
 
 
 class TopologyImtMssDc(Topology):
@@ -35,6 +37,10 @@ class TopologyImtMssDc(Topology):
     for direct connectivity scenarios using NGSO satellites.
     """
 
+    # Sampler of the orbit random variables of the last parameters, as
+    # (parameters key, OrbitVisibilitySampler)
+    _visibility_sampler_cache = None
+
     def __init__(self, params: ParametersImtMssDc,
                  geometry_converter: GeometryConverter):
         """Initialize the IMT MSS-DC topology with parameters and geometry converter.
@@ -93,9 +99,45 @@ class TopologyImtMssDc(Topology):
         # List to store indices of active satellites
         active_satellite_idxs = []
 
+        orbits = [
+            OrbitModel(
+                Nsp=param.sats_per_plane,  # Satellites per plane
+                Np=param.n_planes,  # Number of orbital planes
+                phasing=param.phasing_deg,  # Phasing angle in degrees
+                long_asc=param.long_asc_deg,  # Longitude of ascending node in degrees
+                omega=param.omega_deg,  # Argument of perigee in degrees
+                delta=param.inclination_deg,  # Orbital inclination in degrees
+                hp=param.perigee_alt_km,  # Perigee altitude in kilometers
+                ha=param.apogee_alt_km,  # Apogee altitude in kilometers
+                Mo=param.initial_mean_anomaly,  # Initial mean anomaly in degrees
+                # whether to use only time as random variable
+                model_time_as_random_variable=param.model_time_as_random_variable,
+                t_min=param.t_min,
+                t_max=param.t_max,
+                ephemeris_step_secs=param.ephemeris_step_secs,
+                kepler_solver=param.kepler_solver,
+            ) for param in orbit_params.orbits
+        ]
+        # Sampler restricted to the random variables for which satellites may
+        # be active, only built if the first draw has no active satellite
+        sampler = None
+
         MAX_ITER = 10000  # Maximum iterations to find at least one visible satellite
         i = 0  # Iteration counter for ensuring satellite visibility
         while len(active_satellite_idxs) == 0:
+            if sampler is None:
+                orbit_variables = [orbit.sample_random_variables(random_number_gen) for orbit in orbits]
+            else:
+                orbit_variables = sampler.sample(random_number_gen)
+                if orbit_variables is None:
+                    i += 1
+                    if i >= MAX_ITER:
+                        raise RuntimeError(
+                            "Maximum iterations reached, and no satellite was selected within the minimum "
+                            "elevation criteria."
+                        )
+                    continue
+
             # Initialize arrays to store satellite positions, angles and
             # distance from center of earth
             all_positions = {
@@ -112,25 +154,10 @@ class TopologyImtMssDc(Topology):
             current_sat_idx = 0  # Index tracker for satellites across all orbits
 
             # Iterate through each orbit defined in the parameters
-            for orbit_idx, param in enumerate(orbit_params.orbits):
-                orbit = OrbitModel(
-                    Nsp=param.sats_per_plane,  # Satellites per plane
-                    Np=param.n_planes,  # Number of orbital planes
-                    phasing=param.phasing_deg,  # Phasing angle in degrees
-                    long_asc=param.long_asc_deg,  # Longitude of ascending node in degrees
-                    omega=param.omega_deg,  # Argument of perigee in degrees
-                    delta=param.inclination_deg,  # Orbital inclination in degrees
-                    hp=param.perigee_alt_km,  # Perigee altitude in kilometers
-                    ha=param.apogee_alt_km,  # Apogee altitude in kilometers
-                    Mo=param.initial_mean_anomaly,  # Initial mean anomaly in degrees
-                    # whether to use only time as random variable
-                    model_time_as_random_variable=param.model_time_as_random_variable,
-                    t_min=param.t_min,
-                    t_max=param.t_max,
-                )
+            for orbit_idx, orbit in enumerate(orbits):
                 # Generate random positions for satellites in this orbit
-                pos_vec = orbit.get_orbit_positions_random(
-                    rng=random_number_gen)
+                pos_vec = orbit.get_orbit_positions_from_random_variables(
+                    *orbit_variables[orbit_idx])
 
                 # Determine the number of satellites in this orbit
                 num_satellites = len(pos_vec["sx"])
@@ -207,14 +234,11 @@ class TopologyImtMssDc(Topology):
                     flat_active_lat = pos_vec["lat"].flatten()[
                         active_sats_mask]
 
-                    # create points(lon, lat) to compare to country
-                    sats_points = gpd.points_from_xy(
-                        flat_active_lon, flat_active_lat, crs=EARTH_DEFAULT_CRS)
-
                     # Check if the satellite is inside the country polygon
                     polygon_mask = np.zeros_like(active_sats_mask)
-                    polygon_mask[active_sats_mask] = sats_points.within(
-                        orbit_params.sat_is_active_if.lat_long_inside_country.filter_polygon)
+                    polygon_mask[active_sats_mask] = points_inside_polygon(
+                        orbit_params.sat_is_active_if.lat_long_inside_country.filter_polygon,
+                        flat_active_lon, flat_active_lat)
 
                     active_sats_mask = active_sats_mask & polygon_mask
 
@@ -231,6 +255,17 @@ class TopologyImtMssDc(Topology):
                 raise RuntimeError(
                     "Maximum iterations reached, and no satellite was selected within the minimum elevation criteria."
                 )
+
+            if len(active_satellite_idxs) == 0 and sampler is None:
+                # Keep drawing only where satellites may be active. As the
+                # draws are uniform over a superset of the draws with active
+                # satellites, the accepted draws have the same distribution as
+                # when redrawing the whole constellation.
+                sampler = TopologyImtMssDc.get_visibility_sampler(geometry_converter, orbit_params, orbits)
+                if not np.any(sampler.candidate_probability > 0):
+                    raise RuntimeError(
+                        "No satellite can be selected within the active satellite criteria."
+                    )
         # We have the list of visible satellites, now create a Topolgy of this subset and move the coordinate system
         # reference.
         # Convert X-coordinates to meters
@@ -350,6 +385,106 @@ class TopologyImtMssDc(Topology):
             "sectors_z": np.zeros_like(sx)
         }
 
+    @staticmethod
+    def get_active_satellite_caps(
+        geometry_converter: GeometryConverter,
+        orbit_params: ParametersImtMssDc,
+        orbit: OrbitModel,
+    ) -> list:
+        """
+        Returns spherical caps that contain the sub-satellite points of the
+        active satellites of an orbit.
+
+        Parameters:
+            geometry_converter (GeometryConverter): converter with the earth
+                station reference
+            orbit_params (ParametersImtMssDc): parameters with the active
+                satellite conditions
+            orbit (OrbitModel): the orbit model
+
+        Returns:
+            list: tuples with the ECEF unit vector of the cap center and the
+                cap angular radius [rad]
+        """
+        def unit_vector(lat, lon):
+            lat = np.radians(lat)
+            lon = np.radians(lon)
+            return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+        caps = []
+        conditions = orbit_params.sat_is_active_if.conditions
+
+        if "MINIMUM_ELEVATION_FROM_ES" in conditions:
+            # central angle at which the highest satellite of the orbit is
+            # seen from the earth station with the minimum elevation
+            min_elev = np.radians(orbit_params.sat_is_active_if.minimum_elevation_from_es)
+            es_radius = EARTH_RADIUS_M + geometry_converter.ref_alt
+            sat_radius = EARTH_RADIUS_M + orbit.apogee_alt_km * 1e3
+            caps.append((
+                unit_vector(geometry_converter.ref_lat, geometry_converter.ref_long),
+                np.arccos(np.clip(es_radius * np.cos(min_elev) / sat_radius, -1., 1.)) - min_elev,
+            ))
+
+        if "LAT_LONG_INSIDE_COUNTRY" in conditions:
+            polygon = orbit_params.sat_is_active_if.lat_long_inside_country.filter_polygon
+            # the boundary is densified so that the polygon edges, which are
+            # straight in (lon, lat), are inside the cap of the boundary points
+            max_segment_deg = 1.0
+            boundary = shapely.get_coordinates(
+                shapely.segmentize(polygon.boundary, max_segment_deg),
+            )
+            points = unit_vector(boundary[:, 1], boundary[:, 0])
+            center = np.sum(points, axis=0)
+            center /= np.linalg.norm(center)
+            radius = np.max(np.arccos(np.clip(points @ center, -1., 1.))) + np.radians(max_segment_deg)
+            # the polygon is only known to be inside the cap of its boundary if
+            # it is small enough
+            if radius < np.pi / 2:
+                caps.append((center, radius))
+
+        return caps
+
+    @staticmethod
+    def get_visibility_sampler(
+        geometry_converter: GeometryConverter,
+        orbit_params: ParametersImtMssDc,
+        orbits: list,
+    ) -> OrbitVisibilitySampler:
+        """
+        Returns the sampler of the orbit random variables for which satellites
+        may be active. The sampler only depends on the parameters, so the last
+        one is kept and reused on the next snapshots.
+        """
+        filter_polygon = getattr(
+            orbit_params.sat_is_active_if.lat_long_inside_country, "filter_polygon", None,
+        )
+        # polygons are compared by their contents, since equal polygons may
+        # be different objects and a freed polygon id may be reused
+        polygon_hash = None
+        if filter_polygon is not None:
+            polygon_hash = hashlib.sha1(shapely.to_wkb(filter_polygon)).hexdigest()
+        key = (
+            repr(orbit_params.orbits),
+            tuple(orbit_params.sat_is_active_if.conditions),
+            orbit_params.sat_is_active_if.minimum_elevation_from_es,
+            polygon_hash,
+            geometry_converter.ref_lat,
+            geometry_converter.ref_long,
+            geometry_converter.ref_alt,
+        )
+        cache = TopologyImtMssDc._visibility_sampler_cache
+        if cache is None or cache[0] != key:
+            sampler = OrbitVisibilitySampler(
+                orbits,
+                [
+                    TopologyImtMssDc.get_active_satellite_caps(geometry_converter, orbit_params, orbit)
+                    for orbit in orbits
+                ],
+            )
+            TopologyImtMssDc._visibility_sampler_cache = (key, sampler)
+
+        return TopologyImtMssDc._visibility_sampler_cache[1]
+
     @staticmethod
     def get_satellite_pointing(
             random_number_gen: np.random.RandomState,
@@ -392,32 +527,25 @@ class TopologyImtMssDc(Topology):
 
             eligible_sats_msk = np.ones_like(all_sat_lat, dtype=bool)
 
-            # create points(lon, lat) to compare to country
-            sats_points = gpd.points_from_xy(
-                all_sat_lon[eligible_sats_msk],
-                all_sat_lat[eligible_sats_msk],
-                crs=EARTH_DEFAULT_CRS)
-
             # Check if the satellite is inside the country polygon
             polygon_mask = np.zeros_like(eligible_sats_msk, dtype=bool)
-            polygon_mask[eligible_sats_msk] = sats_points.within(
-                eligible_sats_polygon
+            polygon_mask[eligible_sats_msk] = points_inside_polygon(
+                eligible_sats_polygon,
+                all_sat_lon[eligible_sats_msk],
+                all_sat_lat[eligible_sats_msk],
             )
 
             eligible_sats_msk &= polygon_mask
             eligible_sats_idx = np.where(eligible_sats_msk)[0]
 
-            elev = calc_elevation(
-                grid_lat[:, np.newaxis],
-                all_sat_lat[eligible_sats_msk][np.newaxis, :],
-                grid_lon[:, np.newaxis],
-                all_sat_lon[eligible_sats_msk][np.newaxis, :],
-                sat_height=all_sat_altitude[eligible_sats_msk][np.newaxis, :],
-                es_height=0,
+            best_sats = TopologyImtMssDc.get_max_elevation_satellites(
+                grid_lat,
+                grid_lon,
+                all_sat_lat[eligible_sats_msk],
+                all_sat_lon[eligible_sats_msk],
+                all_sat_altitude[eligible_sats_msk],
             )
 
-            best_sats = elev.argmax(axis=-1)
-
             best_sats_true = eligible_sats_idx[best_sats]
 
             x = grid_x - all_sat_x[best_sats_true]
@@ -447,25 +575,17 @@ class TopologyImtMssDc(Topology):
             _, azim, elev = cartesian_to_polar(
                 pointing_vec_x, pointing_vec_y, pointing_vec_z)
 
-            sat_points_towards = defaultdict(list)
+            # group the grid points by the satellite that points towards them
+            # and only return the angles that the caller asked with the
+            # active_sat_idxs parameter
+            grid_order = np.argsort(best_sats_true, kind="stable")
+            sorted_sats = best_sats_true[grid_order]
+            first = np.searchsorted(sorted_sats, active_satellite_idxs, side="left")
+            last = np.searchsorted(sorted_sats, active_satellite_idxs, side="right")
 
-            for i, sat in enumerate(best_sats_true):
-                sat_points_towards[sat].append(i)
-
-            # now only return the angles that
-            # the caller asked with the active_sat_idxs parameter
-            beams_azim = []
-            beams_elev = []
-            n = 0
-
-            for act_sat in active_satellite_idxs:
-                if act_sat in sat_points_towards:
-                    n += len(sat_points_towards[act_sat])
-                    beams_azim.append(azim[sat_points_towards[act_sat]])
-                    beams_elev.append(elev[sat_points_towards[act_sat]])
-                else:
-                    beams_azim.append([])
-                    beams_elev.append([])
+            beams_azim = [azim[grid_order[i:j]] for i, j in zip(first, last)]
+            beams_elev = [elev[grid_order[i:j]] for i, j in zip(first, last)]
+            n = np.sum(last - first)
 
             # FIXME: change either this or the transform_ue_xyz to make this correct
             # we don't currently care
@@ -590,6 +710,82 @@ class TopologyImtMssDc(Topology):
 
         return beams_elev, beams_azim, sx, sy
 
+    @staticmethod
+    def get_max_elevation_satellites(
+        grid_lat: np.ndarray,
+        grid_lon: np.ndarray,
+        sat_lat: np.ndarray,
+        sat_lon: np.ndarray,
+        sat_altitude: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Finds the satellite seen with the highest elevation from each grid
+        point at ground level, without evaluating the elevation of every
+        (grid point, satellite) pair.
+
+        For a given altitude the elevation decreases with the central angle
+        between the grid point and the sub-satellite point, so the nearest
+        sub-satellite point in a KD-tree over their unit vectors is the best
+        satellite when all altitudes are equal. Otherwise, a satellite at the
+        highest altitude can only beat the nearest one up to a maximum central
+        angle, and the exact elevations are compared among the satellites
+        within that angle.
+
+        Parameters:
+            grid_lat (np.ndarray): latitudes of the grid points [deg]
+            grid_lon (np.ndarray): longitudes of the grid points [deg]
+            sat_lat (np.ndarray): latitudes of the sub-satellite points [deg]
+            sat_lon (np.ndarray): longitudes of the sub-satellite points [deg]
+            sat_altitude (np.ndarray): satellite altitudes [m]
+
+        Returns:
+            np.ndarray: index of the highest elevation satellite of each grid
+                point. Ties are resolved to the lowest index.
+        """
+        def unit_vectors(lat, lon):
+            lat = np.radians(lat)
+            lon = np.radians(lon)
+            return np.stack(
+                [np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)],
+                axis=-1,
+            )
+
+        grid_vec = unit_vectors(grid_lat, grid_lon)
+        tree = cKDTree(unit_vectors(sat_lat, sat_lon))
+        nearest_chord, nearest = tree.query(grid_vec)
+
+        nearest_elev = np.radians(calc_elevation(
+            grid_lat, sat_lat[nearest], grid_lon, sat_lon[nearest],
+            sat_height=sat_altitude[nearest], es_height=0,
+        ))
+
+        # central angle at which a satellite at the highest altitude is seen
+        # with the elevation of the nearest satellite
+        max_angle = np.arccos(np.clip(
+            EARTH_RADIUS_M * np.cos(nearest_elev) / (EARTH_RADIUS_M + np.max(sat_altitude)),
+            -1., 1.,
+        )) - nearest_elev
+        max_chord = np.maximum(
+            2 * np.sin(np.clip(max_angle, 0, np.pi) / 2), nearest_chord,
+        ) * (1 + 1e-9) + 1e-12
+
+        candidates = tree.query_ball_point(grid_vec, max_chord)
+        num_candidates = np.array([len(c) for c in candidates])
+        cand_grid = np.repeat(np.arange(len(grid_lat)), num_candidates)
+        cand_sat = np.concatenate(candidates).astype(int)
+
+        cand_elev = calc_elevation(
+            grid_lat[cand_grid], sat_lat[cand_sat], grid_lon[cand_grid], sat_lon[cand_sat],
+            sat_height=sat_altitude[cand_sat], es_height=0,
+        )
+
+        # best candidate of each grid point: highest elevation, then lowest
+        # satellite index
+        order = np.lexsort((cand_sat, -cand_elev, cand_grid))
+        first = np.concatenate(([0], np.cumsum(num_candidates)[:-1]))
+
+        return cand_sat[order[first]]
+
     @staticmethod
     def get_distr(
         random_number_gen: np.random.RandomState,
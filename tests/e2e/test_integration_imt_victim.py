@@ -1,6 +1,7 @@
 import numpy as np
 import math
 import unittest
+from unittest.mock import patch
 import numpy.testing as npt
 
 from sharc.simulation import Simulation
@@ -101,11 +102,12 @@ class SimulationE2EIMTVictim(unittest.TestCase):
 
         # replacing load parameters to be able to use parameters load validations
         # own load paarameters usage
-        ParametersBase.load_parameters_from_file = lambda x, y: None
-        self.param.imt.load_parameters_from_file("")
-        self.param.imt.validate("imt")
-        self.param.single_earth_station.load_parameters_from_file("")
-        self.param.single_earth_station.validate("single_earth_station")
+        # (restored afterwards, as other tests read parameter files)
+        with patch.object(ParametersBase, "load_parameters_from_file", lambda x, y: None):
+            self.param.imt.load_parameters_from_file("")
+            self.param.imt.validate("imt")
+            self.param.single_earth_station.load_parameters_from_file("")
+            self.param.single_earth_station.validate("single_earth_station")
 
     def lin(self, dB):
         """Convert dB value to linear scale."""
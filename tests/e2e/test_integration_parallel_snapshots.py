@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy.testing as npt
+import yaml
+
+from sharc.model import Model
+from sharc.results import Results
+from sharc.thread_simulation import ThreadSimulation
+# registers the yaml constructor of the tuples in the parameter files
+import sharc.parameters.parameters_base  # noqa: F401
+
+
+class SimulationE2EParallelSnapshotsTest(unittest.TestCase):
+    """
+    This is not an unit test, but also isn't that E2E.
+    It runs the same scenario in a single process and split among worker
+    processes, and checks that the output samples are the same.
+    """
+
+    def setUp(self):
+        """Write a short version of the parameter file of the tests."""
+        self.output_dir = tempfile.mkdtemp()
+
+        param_file = os.path.join(
+            os.path.dirname(__file__), "..", "parameters", "parameters_for_testing.yaml",
+        )
+        with open(param_file, "r") as f:
+            config = yaml.safe_load(f)
+
+        # snapshots of two and a half output batches, so that the last batch
+        # is incomplete
+        config["general"]["num_snapshots"] = 25
+        config["general"]["overwrite_output"] = True
+        config["general"]["enable_cochannel"] = True
+        config["general"]["enable_adjacent_channel"] = False
+
+        # shadowing and clutter draw from the generator shared by the
+        # propagation models
+        config["imt"]["topology"]["type"] = "MACROCELL"
+        config["imt"]["topology"]["macrocell"]["num_clusters"] = 1
+        config["imt"]["channel_model"] = "UMa"
+        config["imt"]["bandwidth"] = 100
+        config["imt"]["spectral_mask"] = "IMT-2020"
+        earth_station = config["single_earth_station"]
+        earth_station["polarization_loss"] = 3.0
+        earth_station["geometry"]["location"]["type"] = "FIXED"
+        earth_station["geometry"]["location"]["fixed"]["x"] = 3000
+        earth_station["channel_model"] = "P452"
+        earth_station["param_p452"]["clutter_type"] = "one_end"
+
+        self.param_files = {}
+        for num_workers in [1, 2]:
+            config["general"]["output_dir"] = os.path.join(
+                self.output_dir, f"workers_{num_workers}",
+            )
+            self.param_files[num_workers] = os.path.join(
+                self.output_dir, f"parameters_{num_workers}.yaml",
+            )
+            with open(self.param_files[num_workers], "w") as f:
+                yaml.dump(config, f)
+
+    def tearDown(self):
+        """Remove the output files."""
+        shutil.rmtree(self.output_dir)
+
+    def run_simulation(self, num_workers: int) -> Results:
+        """Run the scenario and read back its output samples."""
+        model = Model()
+        model.set_num_workers(num_workers)
+        model.set_param_file(self.param_files[num_workers])
+        ThreadSimulation(model).run()
+
+        return Results().load_from_dir(model.simulation.results.output_directory)
+
+    def test_parallel_snapshots(self):
+        """Test that worker processes yield the samples of a serial run."""
+        serial = self.run_simulation(1)
+        parallel = self.run_simulation(2)
+
+        attr_names = serial.get_relevant_attributes()
+        self.assertEqual(attr_names, parallel.get_relevant_attributes())
+        num_samples = 0
+        for attr_name in attr_names:
+            serial_samples = getattr(serial, attr_name)
+            parallel_samples = getattr(parallel, attr_name)
+            self.assertEqual(len(parallel_samples), len(serial_samples), attr_name)
+            # same samples in the same order
+            npt.assert_array_equal(
+                parallel_samples.view(), serial_samples.view(), err_msg=attr_name,
+            )
+            num_samples += len(serial_samples)
+
+        self.assertGreater(num_samples, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
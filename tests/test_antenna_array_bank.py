@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+import pickle
+import unittest
+
+import numpy as np
+import numpy.testing as npt
+
+from sharc.antenna.antenna_array_bank import AntennaArrayBank
+from sharc.antenna.antenna_beamforming_imt import AntennaBeamformingImt
+from sharc.parameters.imt.parameters_antenna_imt import ParametersAntennaImt
+
+
+class AntennaArrayBankTest(unittest.TestCase):
+    """Unit tests for the AntennaArrayBank class."""
+
+    def setUp(self):
+        """Create a bank and the equivalent standalone antennas."""
+        param = ParametersAntennaImt()
+        param.adjacent_antenna_model = "SINGLE_ELEMENT"
+        param.normalization = False
+        param.normalization_file = None
+        param.element_pattern = "M2101"
+        param.minimum_array_gain = -200
+        param.element_max_g = 5
+        param.element_phi_3db = 80
+        param.element_theta_3db = 60
+        param.element_am = 30
+        param.element_sla_v = 30
+        param.n_rows = 8
+        param.n_columns = 8
+        param.element_horiz_spacing = 0.5
+        param.element_vert_spacing = 0.5
+        param.multiplication_factor = 12
+        self.par = param.get_antenna_parameters()
+
+        self.azimuth = np.array([0., 120., -120.])
+        self.elevation = np.array([-10., -5., 0.])
+        self.bank = AntennaArrayBank(self.par, self.azimuth, self.elevation)
+        self.antennas = [
+            AntennaBeamformingImt(self.par, az, el)
+            for az, el in zip(self.azimuth, self.elevation)
+        ]
+
+    def test_pose(self):
+        """Test that the bank holds the pose of every antenna."""
+        self.assertEqual(len(self.bank), 3)
+        for view, antenna in zip(self.bank, self.antennas):
+            self.assertEqual(view.azimuth, antenna.azimuth)
+            self.assertEqual(view.elevation, antenna.elevation)
+            npt.assert_allclose(view.rotation_mtx, antenna.rotation_mtx, atol=1e-12)
+            npt.assert_allclose(
+                view.to_local_coord(30., 80.),
+                antenna.to_local_coord(30., 80.),
+            )
+
+    def test_beams_and_gains(self):
+        """Test that views behave as standalone antennas."""
+        for k, antenna in enumerate(self.antennas):
+            for phi, theta in [(10. + k, 100.), (-30., 95. - k)]:
+                self.bank[k].add_beam(phi, theta)
+                antenna.add_beam(phi, theta)
+
+        phi_vec = np.linspace(-170, 170, 20)
+        theta_vec = np.linspace(10, 170, 20)
+        beams_l = np.arange(20) % 2
+        for k, antenna in enumerate(self.antennas):
+            view = self.bank[k]
+            self.assertEqual(len(view.beams_list), 2)
+            npt.assert_allclose(view.beams_list, antenna.beams_list)
+            npt.assert_allclose(
+                view.calculate_gain(phi_vec=phi_vec, theta_vec=theta_vec, beams_l=beams_l),
+                antenna.calculate_gain(phi_vec=phi_vec, theta_vec=theta_vec, beams_l=beams_l),
+            )
+            npt.assert_allclose(
+                view.calculate_gain(phi_vec=phi_vec, theta_vec=theta_vec, co_channel=False),
+                antenna.calculate_gain(phi_vec=phi_vec, theta_vec=theta_vec, co_channel=False),
+            )
+
+        self.bank[1].reset_beams()
+        self.assertEqual(len(self.bank[1].beams_list), 0)
+        self.assertEqual(len(self.bank[0].beams_list), 2)
+
+        self.bank.reset_beams()
+        self.assertEqual(self.bank.w_vec.shape[1], 0)
+
+    def test_calculate_gains(self):
+        """Test the gains of many antennas at once."""
+        for k, antenna in enumerate(self.antennas):
+            for phi, theta in [(10. + k, 100.), (-30., 95. - k)]:
+                self.bank[k].add_beam(phi, theta)
+                antenna.add_beam(phi, theta)
+
+        rng = np.random.RandomState(0)
+        stations = rng.randint(0, 3, 50)
+        phi = rng.uniform(-180, 180, 50)
+        theta = rng.uniform(0, 180, 50)
+        beams = rng.randint(0, 2, 50)
+        max_gain = rng.rand(50) < .2
+
+        for co_channel in [True, False]:
+            gains = self.bank.calculate_gains(
+                stations, phi, theta, beams, co_channel=co_channel,
+            )
+            for k, antenna in enumerate(self.antennas):
+                directions = stations == k
+                npt.assert_allclose(
+                    gains[directions],
+                    antenna.calculate_gain(
+                        phi_vec=phi[directions], theta_vec=theta[directions],
+                        beams_l=beams[directions], co_channel=co_channel,
+                    ),
+                    atol=1e-9,
+                )
+
+        # beam of maximum gain in the direction, in small chunks
+        beams[max_gain] = -1
+        self.bank.pattern.GAIN_CHUNK_ELEMENTS = 7 * 64
+        gains = self.bank.calculate_gains(stations, phi, theta, beams)
+        for k, antenna in enumerate(self.antennas):
+            directions = stations == k
+            npt.assert_allclose(
+                gains[directions],
+                antenna.calculate_gain(
+                    phi_vec=phi[directions], theta_vec=theta[directions],
+                    beams_l=beams[directions],
+                ),
+                atol=1e-9,
+            )
+
+    def test_set_antenna(self):
+        """Test copying a standalone antenna into the bank."""
+        antenna = AntennaBeamformingImt(self.par, 45., -20.)
+        antenna.add_beam(50., 110.)
+        self.bank[2] = antenna
+
+        self.assertEqual(self.bank[2].azimuth, 45.)
+        self.assertEqual(self.bank[2].beams_list, antenna.beams_list)
+        npt.assert_allclose(self.bank[2].w_vec_list, antenna.w_vec_list)
+
+        other_param = ParametersAntennaImt()
+        other_param.n_rows = 2
+        with self.assertRaises(ValueError):
+            self.bank[0] = AntennaBeamformingImt(
+                other_param.get_antenna_parameters(), 0., 0.,
+            )
+
+    def test_indexing_and_pickle(self):
+        """Test slicing the bank and pickling it."""
+        views = self.bank[np.array([True, False, True])]
+        self.assertEqual(len(views), 2)
+        self.assertEqual(views[1].azimuth, -120.)
+        self.assertEqual(self.bank[-1].azimuth, -120.)
+        with self.assertRaises(IndexError):
+            self.bank[3]
+
+        self.bank[0].add_beam(10., 100.)
+        bank = pickle.loads(pickle.dumps(self.bank))
+        npt.assert_array_equal(bank.w_vec, self.bank.w_vec)
+
+
+if __name__ == '__main__':
+    unittest.main()
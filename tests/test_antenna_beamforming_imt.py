@@ -449,6 +449,59 @@ class AntennaBeamformingImtTest(unittest.TestCase):
         )
         npt.assert_allclose(gains, np.array([1.6667]), atol=eps)
 
+    def test_calculate_gain_vectorized(self):
+        """Test that all directions and beams are evaluated at once."""
+        par = self.ue_param.get_antenna_parameters()
+        antenna = AntennaBeamformingImt(par, 30, -10)
+        antenna.add_beam(45, 120)
+        antenna.add_beam(-20, 95)
+
+        phi_vec = np.linspace(-170, 170, 50)
+        theta_vec = np.linspace(5, 175, 50)
+        beams_l = np.arange(50) % 2
+        lo_phi, lo_theta = antenna.to_local_coord(phi_vec, theta_vec)
+
+        # array factor of ITU-R M.2101, one direction at a time
+        n = np.arange(par.n_rows)[:, np.newaxis]
+        m = np.arange(par.n_columns)
+        dv, dh = par.element_vert_spacing, par.element_horiz_spacing
+
+        def beam_gain(phi, theta, beam=-1):
+            if beam == -1:
+                phi_tilt, theta_tilt = phi, theta - 90
+            else:
+                phi_tilt, theta_tilt = antenna.beams_list[beam]
+            r_phi, r_theta = np.deg2rad(phi), np.deg2rad(theta)
+            r_phi_tilt, r_theta_tilt = np.deg2rad(phi_tilt), np.deg2rad(theta_tilt)
+            v_vec = np.exp(
+                2j * np.pi * (n * dv * np.cos(r_theta) + m * dh * np.sin(r_theta) * np.sin(r_phi)),
+            )
+            w_vec = np.exp(
+                2j * np.pi * (n * dv * np.sin(r_theta_tilt) - m * dh * np.cos(r_theta_tilt) * np.sin(r_phi_tilt)),
+            ) / np.sqrt(par.n_rows * par.n_columns)
+            array_g = 10 * np.log10(np.abs(np.sum(v_vec * w_vec))**2)
+            return antenna.element.element_pattern(phi, theta) + array_g
+
+        expected = [
+            beam_gain(lo_phi[g], lo_theta[g], beams_l[g])
+            for g in range(50)
+        ]
+        gains = antenna.calculate_gain(
+            phi_vec=phi_vec, theta_vec=theta_vec, beams_l=beams_l,
+        )
+        npt.assert_allclose(gains, np.maximum(expected, -200), atol=1e-6)
+
+        # evaluating in small chunks does not change the result
+        antenna.GAIN_CHUNK_ELEMENTS = 3 * par.n_rows * par.n_columns
+        chunked_gains = antenna.calculate_gain(
+            phi_vec=phi_vec, theta_vec=theta_vec, beams_l=beams_l,
+        )
+        npt.assert_allclose(chunked_gains, gains)
+
+        expected = [beam_gain(lo_phi[g], lo_theta[g]) for g in range(50)]
+        gains = antenna.calculate_gain(phi_vec=phi_vec, theta_vec=theta_vec)
+        npt.assert_allclose(gains, np.maximum(expected, -200), atol=1e-6)
+
     def test_normalization(self):
         """Test normalization logic for the antenna pattern."""
         # Create dummy normalization data
@@ -41,6 +41,18 @@ class TestAtmosphere(unittest.TestCase):
         npt.assert_array_less(specific_att_p676_lower, specific_att)
         npt.assert_array_less(specific_att, specific_att_p676_upper)
 
+    def test_atmospheric_params(self):
+        """Test the atmospheric parameters of many layers at once."""
+        altitude_km = np.array([0.5, 15., 30.])
+        params = self.atmosphere.get_atmospheric_params(altitude_km, 7.5, 10000.)
+        for index, altitude in enumerate(altitude_km):
+            npt.assert_allclose(
+                [param[index] for param in params],
+                self.atmosphere.get_atmospheric_params(altitude, 7.5, 10000.),
+            )
+        npt.assert_allclose(params[0], [284.9, 216.65, 226.65])
+        npt.assert_allclose(params[4], [0.011944332052241723, 0.0002580129544816029, 2.1458238430119237e-06])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import numpy.testing as npt
+
+from sharc.propagation.atmosphere import ReferenceAtmosphere
+from sharc.propagation.atmospheric_loss_table import (
+    AtmosphericLossTable,
+    trace_atmospheric_gasses_loss,
+)
+
+
+class AtmosphericLossTableTest(unittest.TestCase):
+    """Unit tests for the AtmosphericLossTable class."""
+
+    def setUp(self):
+        """Create a coarse table, stored in a temporary directory."""
+        self.cache_dir = tempfile.mkdtemp()
+        self.elevations = np.array([0., 10., 90.])
+        self.horizon_fractions = np.array([-.9, -.5])
+        self.table = AtmosphericLossTable(
+            14.1, elevations=self.elevations, cache_dir=self.cache_dir,
+            horizon_fractions=self.horizon_fractions,
+        )
+        self.atmosphere = ReferenceAtmosphere()
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        shutil.rmtree(self.cache_dir)
+
+    def test_get_loss(self):
+        """Test the loss at and between the grid elevations."""
+        traced = np.array([
+            trace_atmospheric_gasses_loss(self.atmosphere, 2680., el, 1000., 14.1)
+            for el in self.elevations
+        ])
+
+        loss = self.table.get_loss(np.array([[0., 10.], [90., 50.]]), 2680., 1000.)
+        self.assertEqual(loss.shape, (2, 2))
+        npt.assert_allclose(loss[0], traced[:2])
+        npt.assert_allclose(loss[1, 0], traced[2])
+        npt.assert_allclose(loss[1, 1], (traced[1] + traced[2]) / 2)
+
+        # below the horizontal, down to the horizon dip
+        dip = self.table.get_horizon_dip(2680., 1000.)
+        traced = trace_atmospheric_gasses_loss(
+            self.atmosphere, 2680., dip * self.horizon_fractions, 1000., 14.1,
+        )
+        npt.assert_allclose(self.table.get_loss(-dip / 2, 2680., 1000.), traced[1])
+        npt.assert_allclose(
+            self.table.get_loss(-dip * .7, 2680., 1000.),
+            (traced[0] + traced[1]) / 2,
+        )
+
+        # extrapolated below the grid, as the city lookup tables
+        npt.assert_allclose(
+            self.table.get_loss(-dip * 1.3, 2680., 1000.),
+            traced[0] + (traced[0] - traced[1]),
+        )
+
+    def test_grid_and_cache(self):
+        """Test growing the grid and loading the stored tables."""
+        loss = self.table.get_loss(self.elevations, 2680., 1000.)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        self.table.get_loss(self.elevations, 10000., 1000.)
+        self.assertEqual(self.table.losses.shape, (5, 2, 1))
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+        npt.assert_allclose(self.table.losses[2:, 0, 0], loss)
+        npt.assert_array_less(self.table.losses[:, 0, 0], self.table.losses[:, 1, 0])
+
+        # a new table reads the stored values instead of tracing again
+        table = AtmosphericLossTable(
+            14.1, elevations=self.elevations, cache_dir=self.cache_dir,
+            horizon_fractions=self.horizon_fractions,
+        )
+        for name in os.listdir(self.cache_dir):
+            file_path = os.path.join(self.cache_dir, name)
+            np.save(file_path, np.load(file_path) + 1)
+        npt.assert_allclose(table.get_loss(self.elevations, 2680., 1000.), loss + 1)
+
+    def test_horizon_dip(self):
+        """Test the grid below the horizontal against the ray tracing."""
+        # refraction bends the rays down, so the apparent dip is smaller than
+        # the geometric one
+        dip = self.table.get_horizon_dip(2680., 1000.)
+        geometric_dip = np.degrees(np.arccos(6371. / (6371. + 1.)))
+        self.assertLess(dip, geometric_dip)
+        self.assertGreater(dip, .85 * geometric_dip)
+
+        table = AtmosphericLossTable(
+            14.1, elevations=self.elevations, cache_dir=self.cache_dir,
+            horizon_fractions=[-.95, -.85, -.75],
+        )
+        npt.assert_allclose(
+            table.get_loss(-.8, 2680., 1000.),
+            trace_atmospheric_gasses_loss(self.atmosphere, 2680., -.8, 1000., 14.1),
+            rtol=1e-2,
+        )
+
+        # rays below the dip hit the ground and cannot be traced
+        with self.assertRaises(ValueError):
+            trace_atmospheric_gasses_loss(
+                self.atmosphere, 2680., [10., -1.01 * dip], 1000., 14.1,
+            )
+
+        # stations on the ground have no rays below the horizontal
+        self.assertEqual(table.get_horizon_dip(2680., 0.), 0.)
+        with self.assertRaises(ValueError):
+            trace_atmospheric_gasses_loss(self.atmosphere, 2680., -.1, 0., 14.1)
+        loss = table.get_loss(self.elevations[:2], 2680., 0.)
+        npt.assert_allclose(
+            table.get_loss(-5., 2680., 0.), loss[0] - (loss[1] - loss[0]) / 2,
+        )
+
+    def test_trace(self):
+        """Test the batched ray tracing against the layer by layer one."""
+        elevation = np.array([[-1., 0.], [3., 60.]])
+        # computed layer by layer
+        expected = [[5.208165012605022, 1.892096847215882], [0.5253238257773076, 0.03593048678344998]]
+
+        loss = trace_atmospheric_gasses_loss(self.atmosphere, 10000., elevation, 3000., 7.5)
+        npt.assert_allclose(loss, expected, rtol=1e-9)
+
+        loss = trace_atmospheric_gasses_loss(
+            self.atmosphere, 10000., elevation, 3000., 7.5, layers_per_chunk=7,
+        )
+        npt.assert_allclose(loss, expected, rtol=1e-9)
+
+    def test_get_table(self):
+        """Test that tables are created once per process."""
+        table = AtmosphericLossTable.get_table(14.1, cache_dir=self.cache_dir)
+        self.assertIs(AtmosphericLossTable.get_table(14.1, cache_dir=self.cache_dir), table)
+        self.assertIsNot(AtmosphericLossTable.get_table(7.5, cache_dir=self.cache_dir), table)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,6 +9,9 @@ import unittest
 import numpy as np
 import numpy.testing as npt
 import os
+import shutil
+import tempfile
+from unittest.mock import patch
 
 from sharc.antenna.beamforming_normalization.beamforming_normalizer import BeamformingNormalizer
 from sharc.parameters.imt.parameters_antenna_imt import ParametersAntennaImt
@@ -222,6 +225,89 @@ class BeamformingNormalizerTest(unittest.TestCase):
         data.close()
         os.remove(file_name)
 
+    def test_calculate_correction_factors(self):
+        """Test calculating the correction factors of many beams at once."""
+        self.norm_3.antenna = AntennaBeamformingImt(self.par_3, 0, 0)
+        phi = np.array([0., 30., -120.])
+        theta = np.array([90., 60., 170.])
+        c_fac, err = self.norm_3.calculate_correction_factors(phi, theta)
+        self.assertEqual(err.shape, (3, 2))
+        for k in range(3):
+            c_fac_k, err_k = self.norm_3.calculate_correction_factor(
+                phi[k], theta[k], True,
+            )
+            self.assertAlmostEqual(c_fac[k], c_fac_k, delta=1e-3)
+            self.assertLess(err_k[0], c_fac_k)
+            self.assertGreater(err_k[1], c_fac_k)
+
+    def test_generate_with_workers(self):
+        """Test splitting the correction matrix among processes."""
+        norm = BeamformingNormalizer(60, 5e-2)
+        norm.generate_correction_matrix(self.par_2, "test_serial.npz", True)
+        norm.generate_correction_matrix(
+            self.par_2, "test_parallel.npz", True, num_workers=2,
+        )
+        with np.load("test_serial.npz") as serial, \
+                np.load("test_parallel.npz") as parallel:
+            self.assertEqual(serial["correction_factor_co_channel"].shape, (6, 3))
+            self.assertEqual(serial["error_co_channel"].shape, (6, 3, 2))
+            for key in serial:
+                if key == "parameters":
+                    self.assertEqual(parallel[key], serial[key])
+                else:
+                    npt.assert_allclose(parallel[key], serial[key], atol=1e-12)
+        os.remove("test_serial.npz")
+        os.remove("test_parallel.npz")
+
+    def test_get_normalization_data(self):
+        """Test the cache of normalization data."""
+        cache_dir = tempfile.mkdtemp()
+        try:
+            # antennas without normalization file use the cache
+            self.par_3.normalization = True
+            with patch.dict(os.environ, {"SHARC_CACHE_DIR": cache_dir}):
+                antenna = AntennaBeamformingImt(self.par_3, 0, 0)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            self.assertEqual(antenna.resolution, 5)
+            self.assertEqual(antenna.co_correction_factor.shape, (72, 36))
+            self.assertAlmostEqual(antenna.adj_correction_factor, 4.8, delta=1e-1)
+            self.assertAlmostEqual(antenna.co_correction_factor[36, 18], 0.38, delta=1e-2)
+
+            data = BeamformingNormalizer.get_normalization_data(self.par_3, cache_dir)
+            self.assertIs(data, self.par_3.normalization_data)
+
+            # files are read again in new processes
+            file_name = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+            BeamformingNormalizer._normalization_data.clear()
+            data_dict = dict(data)
+            data_dict["correction_factor_adj_channel"] = 1.0
+            np.savez(file_name, **data_dict)
+            data = BeamformingNormalizer.get_normalization_data(self.par_3, cache_dir)
+            self.assertEqual(data["correction_factor_adj_channel"], 1.0)
+
+            # other antennas get other files
+            BeamformingNormalizer.get_normalization_data(self.par_2, cache_dir)
+            self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+            # explicitly configured files must exist
+            self.par_3.normalization_file = os.path.join(cache_dir, "missing.npz")
+            with self.assertRaises(FileNotFoundError):
+                self.par_3.get_normalization_data_if_needed()
+            self.par_3.normalization_file = file_name
+            self.par_3.get_normalization_data_if_needed()
+            self.assertEqual(self.par_3.normalization_data["correction_factor_adj_channel"], 1.0)
+
+            # the data is kept in memory if the cache cannot be written
+            unwritable_dir = os.path.join(file_name, "cache")
+            BeamformingNormalizer._normalization_data.clear()
+            data = BeamformingNormalizer.get_normalization_data(self.par_2, unwritable_dir)
+            self.assertAlmostEqual(data["correction_factor_adj_channel"], 2.4, delta=1e-1)
+            self.assertIs(BeamformingNormalizer.get_normalization_data(self.par_2, unwritable_dir), data)
+            self.assertEqual(len(os.listdir(cache_dir)), 2)
+        finally:
+            BeamformingNormalizer._normalization_data.clear()
+            shutil.rmtree(cache_dir)
+
 
 if __name__ == '__main__':
     unittest.main()
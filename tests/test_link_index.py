@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import numpy as np
+import numpy.testing as npt
+
+from sharc.link_index import LinkIndex
+
+
+class LinkIndexTest(unittest.TestCase):
+    """Unit tests for the LinkIndex class."""
+
+    def setUp(self):
+        """Create an index with an unlinked base station."""
+        self.links = LinkIndex.from_lists({0: [4, 1], 2: [0, 3, 5]}, num_bs=3, num_ue=7)
+
+    def test_index(self):
+        """Test the link arrays and the dict interface."""
+        npt.assert_array_equal(self.links.offsets, [0, 2, 2, 5])
+        npt.assert_array_equal(self.links.ue, [4, 1, 0, 3, 5])
+        npt.assert_array_equal(self.links.bs, [0, 0, 2, 2, 2])
+        npt.assert_array_equal(self.links.beam, [0, 1, 0, 1, 2])
+        npt.assert_array_equal(self.links.serving_bs, [2, 0, -1, 2, 0, 2, -1])
+        npt.assert_array_equal(self.links.num_links, [2, 0, 3])
+
+        self.assertEqual(len(self.links), 3)
+        npt.assert_array_equal(self.links[2], [0, 3, 5])
+        self.assertEqual(self.links.to_dict(), {0: [4, 1], 1: [], 2: [0, 3, 5]})
+        self.assertEqual(self.links, {0: [4, 1], 2: [0, 3, 5]})
+        self.assertNotEqual(self.links, {0: [1, 4], 2: [0, 3, 5]})
+
+        with self.assertRaises(ValueError):
+            LinkIndex([0, 3], [1, 2])
+
+    def test_select_and_truncate(self):
+        """Test selecting base stations and truncating their links."""
+        selected = self.links.select([2, 0])
+        self.assertEqual(selected.to_dict(), {0: [0, 3, 5], 1: [4, 1]})
+        npt.assert_array_equal(selected.serving_bs, [0, 1, -1, 0, 1, 0, -1])
+
+        truncated = self.links.truncate(1)
+        self.assertEqual(truncated.to_dict(), {0: [4], 1: [], 2: [0]})
+
+    def test_segments(self):
+        """Test the segment helpers."""
+        values = np.array([1., 2., 3., 4., 5.])
+        npt.assert_array_equal(self.links.segment_sum(values), [3., 0., 12.])
+        npt.assert_array_equal(
+            self.links.segment_sum(np.stack([values, 2 * values], axis=-1)),
+            [[3., 6.], [0., 0.], [12., 24.]],
+        )
+        npt.assert_array_equal(
+            self.links.segment_gather([10., 20., 30.]), [10., 10., 30., 30., 30.],
+        )
+        npt.assert_array_equal(
+            self.links.segment_gather(np.arange(9).reshape(3, 3)), [0, 1, 6, 7, 8],
+        )
+
+        # flattened as a loop over the base stations
+        per_sys = np.stack([values, -values])
+        npt.assert_array_equal(
+            self.links.flatten(per_sys), [1., 2., -1., -2., 3., 4., 5., -3., -4., -5.],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
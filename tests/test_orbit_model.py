@@ -1,6 +1,10 @@
+import os
+import tempfile
 import unittest
 import numpy as np
 from sharc.satellite.ngso.orbit_model import OrbitModel
+from sharc.satellite.ngso.orbit_ephemeris import OrbitEphemeris
+from sharc.satellite.ngso.custom_functions import eccentric_anomaly
 from sharc.support.sharc_utils import angular_dist
 
 
@@ -140,6 +144,73 @@ class TestOrbitModel(unittest.TestCase):
             self.assertLessEqual(phi, max_traveled_angular_dist)
             self.assertGreaterEqual(phi, max_traveled_angular_dist * 0.9)
 
+    def test_ephemeris(self):
+        """Test positions interpolated from the tabulated orbital period."""
+        params = dict(
+            Nsp=4, Np=3, phasing=7.5, long_asc=0, omega=30, delta=52,
+            hp=500, ha=1500, Mo=0,
+            model_time_as_random_variable=False, t_min=0.0, t_max=None,
+        )
+        orbit = OrbitModel(**params)
+        tabulated = OrbitModel(**params, ephemeris_step_secs=10)
+        self.assertIsNone(orbit.ephemeris)
+        self.assertIsNotNone(tabulated.ephemeris)
+
+        t = np.random.RandomState(0).uniform(0, 1e6, 20)
+        pos = orbit.get_orbit_positions_time_instant(t)
+        tab_pos = tabulated.get_orbit_positions_time_instant(t)
+        for k in ["sx", "sy", "sz", "alt"]:
+            np.testing.assert_allclose(tab_pos[k], pos[k], atol=0.05)
+
+        # circular orbits are always propagated
+        self.assertIsNone(
+            OrbitModel(**dict(params, ha=500), ephemeris_step_secs=10).ephemeris
+        )
+
+        # the table is stored and memory-mapped
+        with tempfile.TemporaryDirectory() as cache_dir:
+            def propagate(mean_anomaly):
+                # two satellites in opposite circular orbits
+                xyz = 7000 * np.stack([
+                    np.cos(mean_anomaly), np.sin(mean_anomaly), np.zeros_like(mean_anomaly),
+                ])
+                return np.stack([xyz, -xyz], axis=1)
+            eph = OrbitEphemeris.load(("test",), 100, propagate, cache_dir)
+            self.assertEqual(eph.positions.shape, (100, 3, 2))
+            np.testing.assert_allclose(
+                eph.get_eci_positions(np.array([[np.pi / 3], [np.pi / 3]]))[:, :, 0],
+                7000 * np.array([[0.5, -0.5], [np.sqrt(3) / 2, -np.sqrt(3) / 2], [0, 0]]),
+                atol=1e-9,
+            )
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            OrbitEphemeris._ephemerides.clear()
+            eph = OrbitEphemeris.load(("test",), 100, None, cache_dir)
+            self.assertIsInstance(eph.positions, np.memmap)
+            del eph
+
+    def test_kepler_solvers(self):
+        """Test the Kepler equation solvers against each other and at HEO eccentricities."""
+        M = np.random.RandomState(1).uniform(0, 2 * np.pi, (5, 200))
+
+        # both solvers agree where the Bessel series converges
+        np.testing.assert_allclose(
+            eccentric_anomaly(0.3, M, method="HALLEY"),
+            eccentric_anomaly(0.3, M),
+            atol=1e-9,
+        )
+
+        # Halley's method solves Kepler's equation for highly eccentric orbits
+        E = eccentric_anomaly(0.9, M, method="HALLEY", mod_2pi=False)
+        self.assertEqual(E.shape, M.shape)
+        np.testing.assert_allclose(E - 0.9 * np.sin(E), M, atol=1e-10)
+
+        with self.assertRaises(ValueError):
+            eccentric_anomaly(0.3, M, method="NEWTON")
+        with self.assertRaises(ValueError):
+            OrbitModel(Nsp=1, Np=1, phasing=0, long_asc=0, omega=0, delta=0,
+                       hp=500, ha=1000, Mo=0, model_time_as_random_variable=False,
+                       t_min=0, t_max=None, kepler_solver="NEWTON")
+
 
 if __name__ == '__main__':
     unittest.main()
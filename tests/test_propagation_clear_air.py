@@ -3,8 +3,10 @@
 
 import unittest
 import numpy as np
+import numpy.testing as npt
 from sharc.parameters.parameters_p452 import ParametersP452
 from sharc.propagation.propagation_clear_air_452 import PropagationClearAir
+from sharc.propagation import clear_air_452_batch
 
 
 class PropagationClearAirTest(unittest.TestCase):
@@ -144,6 +146,87 @@ class PropagationClearAirTest(unittest.TestCase):
     #     ax.grid(True)
     #     fig.savefig('clear_air_att.png', dpi=350, format='png')
 
+    def test_basic_loss(self):
+        """Test that the batched loss matches the per-link calculation."""
+        rng = np.random.RandomState(101)
+        distances = np.array([0.05, 0.5, 1., 5., 20., 60., 150., 300.])
+        d = np.linspace(0, distances, 100, axis=1)
+        h = np.zeros(d.shape)
+        h[-2, 40:60] = 300
+        h[-1] = 50 * rng.rand(100)
+        p = 50 * rng.rand(distances.size)
+        tx_gain = 30 * rng.rand(distances.size)
+        rx_gain = 30 * rng.rand(distances.size)
+
+        for polarization in ["horizontal", "vertical"]:
+            self.prop_clear_air.model_params.polarization = polarization
+            expected = [
+                self.prop_clear_air.basic_loss_single_link(
+                    d[i], h[i], 27., p[i], tx_gain[i], rx_gain[i],
+                ) for i in range(distances.size)
+            ]
+
+            loss = self.prop_clear_air.basic_loss(d, h, 27., p, tx_gain, rx_gain)
+            npt.assert_allclose(loss, expected, atol=1e-9)
+
+            loss = self.prop_clear_air.basic_loss(
+                d, h, 27., p, tx_gain, rx_gain, chunk_size=3,
+            )
+            npt.assert_allclose(loss, expected, atol=1e-9)
+
+        # median time percentage
+        expected = self.prop_clear_air.basic_loss_single_link(
+            d[3], h[3], 27., 50., 0., 0.,
+        )
+        loss = self.prop_clear_air.basic_loss(d, h, 27., 50., 0., 0.)
+        npt.assert_allclose(loss[3], expected, atol=1e-9)
+
+        self.prop_clear_air.model_params.polarization = "circular"
+        with self.assertRaises(ValueError):
+            self.prop_clear_air.basic_loss(d, h, 27., p, tx_gain, rx_gain)
+
+    def test_zones(self):
+        """Test the land and sea sections of the path profiles."""
+        d = np.arange(10.)
+        zone = np.array([2, 2, 2, 3, 3, 3, 3, 2, 2, 2])
+        profiles = np.stack([d, 2 * d])
+        zones = np.stack([zone, np.full(10, 2)])
+
+        npt.assert_allclose(
+            clear_air_452_batch.longest_cont_dist(profiles, zones, 3), [4., 0.],
+        )
+        npt.assert_allclose(
+            clear_air_452_batch.longest_cont_dist(profiles, zones, 12), [2.5, 18.],
+        )
+        npt.assert_allclose(
+            clear_air_452_batch.path_fraction(profiles, zones, 3), [4. / 9., 0.],
+        )
+        self.assertEqual(self.prop_clear_air.longest_cont_dist(d, zone, 12), 2.5)
+
+    def test_loss_with_profiles(self):
+        """Test that the given path profiles are used."""
+        distance = np.array([[10., 10.]])
+        d = np.linspace(0, 10., 100)[np.newaxis].repeat(2, axis=0)
+        h = np.zeros(d.shape)
+        h[1, 45:55] = 200
+        zone = np.full(d.shape, 2)
+
+        self.prop_clear_air.model_params.percentage_p = 10
+        self.prop_clear_air.model_params.clutter_loss = False
+        args = (
+            distance, np.array([[27.]]), np.zeros((1, 2), dtype=bool),
+            np.zeros((2, 1)), np.zeros((1, 2)), np.zeros((1, 2)),
+        )
+        flat = self.prop_clear_air.get_loss(*args)
+        loss = self.prop_clear_air.get_loss(*args, profiles=(d, h, zone))
+
+        npt.assert_allclose(loss[0, 0], flat[0, 0])
+        self.assertGreater(loss[0, 1], flat[0, 1] + 10)
+
+        # all sea path
+        sea = self.prop_clear_air.get_loss(*args, profiles=(d, np.zeros(d.shape), np.full(d.shape, 3)))
+        self.assertFalse(np.allclose(sea, flat))
+
 
 if __name__ == '__main__':
     unittest.main()
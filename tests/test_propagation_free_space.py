@@ -10,6 +10,8 @@ import numpy as np
 import numpy.testing as npt
 
 from sharc.propagation.propagation_free_space import PropagationFreeSpace
+from sharc.parameters.parameters import Parameters
+from sharc.station_manager import StationManager
 
 
 class PropagationFreeSpaceTest(unittest.TestCase):
@@ -48,6 +50,42 @@ class PropagationFreeSpaceTest(unittest.TestCase):
         ])
         npt.assert_allclose(ref_loss, loss, atol=1e-2)
 
+    def test_active_loss(self):
+        """Test that the loss between active stations is scattered back into the full matrix."""
+        station_a = StationManager(3)
+        station_a.x = np.array([0., 10., 20.])
+        station_a.y = np.zeros(3)
+        station_a.z = np.zeros(3)
+        station_a.active = np.array([True, False, True])
+        station_b = StationManager(4)
+        station_b.x = np.array([0., 100., 200., 300.])
+        station_b.y = np.ones(4)
+        station_b.z = np.ones(4)
+        station_b.active = np.array([False, True, True, False])
+
+        # two beams per station_b station
+        gains = np.arange(3 * 8, dtype=float).reshape(3, 8)
+        params = Parameters()
+        loss = self.freeSpace.get_active_loss(params, 1000., station_a, station_b, gains, gains)
+        ref_loss = self.freeSpace.get_loss(params, 1000., station_a, station_b, gains, gains)
+        active = np.ix_([0, 2], [1, 2])
+        npt.assert_allclose(loss[active], ref_loss[active])
+        self.assertTrue(np.all(np.isinf(loss[1, :])))
+        self.assertTrue(np.all(np.isinf(loss[:, [0, 3]])))
+
+        # the gain columns of the beams of the active stations are selected
+        received_gains = []
+
+        def get_loss(params, frequency, sta_a, sta_b, gains_a, gains_b):
+            received_gains.append(gains_a)
+            return np.zeros((sta_a.num_stations, sta_b.num_stations))
+        self.freeSpace.get_loss = get_loss
+        self.freeSpace.get_active_loss(params, 1000., station_a, station_b, gains, gains)
+        npt.assert_array_equal(received_gains[0], [[2, 3, 4, 5], [18, 19, 20, 21]])
+
+        with self.assertRaises(ValueError):
+            self.freeSpace.get_active_loss(params, 1000., station_a, station_b, gains[:, :7], gains)
+
 
 if __name__ == '__main__':
     unittest.main()
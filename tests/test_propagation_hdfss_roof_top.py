@@ -288,6 +288,20 @@ class PropagationHDFSSRoofTopTest(unittest.TestCase):
         )
         npt.assert_allclose(distances, expected_distances, atol=1e-1)
 
+    def test_get_clipped_length(self):
+        """Test the length of segments inside a rectangle."""
+        x0 = np.array([0., 0., -20., -20., -20., 5., 0.])
+        y0 = np.array([0., 0., 5., 20., 0., 5., 0.])
+        x1 = np.array([20., 5., 20., 20., -20., 5., 0.])
+        y1 = np.array([20., 5., 5., 20., 20., 20., 0.])
+        length = self.propagation.get_clipped_length(x0, y0, x1, y1, -10., 10., -5., 10.)
+        npt.assert_allclose(
+            length,
+            # diagonal leaving through a corner, inside, crossing, parallel
+            # outside, outside, leaving through an edge and degenerate
+            [10 * np.sqrt(2), 5 * np.sqrt(2), 20., 0., 0., 5., 0.],
+        )
+
     def test_diffration_loss(self):
         """Test diffraction loss calculation for various scenarios."""
         # Test diffraction loss
@@ -6,10 +6,13 @@ Created on Mon Dec 18 20:10:14 2017
 """
 
 import unittest
-# import numpy as np
+import numpy as np
+import numpy.testing as npt
 
 # from sharc.propagation.propagation_indoor import PropagationIndoor
 # from sharc.parameters.parameters_indoor import ParametersIndoor
+from sharc.propagation.propagation_indoor import PropagationIndoor
+from sharc.parameters.imt.parameters_indoor import ParametersIndoor
 
 
 class PropagationIndoorTest(unittest.TestCase):
@@ -46,6 +49,41 @@ class PropagationIndoorTest(unittest.TestCase):
     #     propagation_indoor = PropagationIndoor(
     #         np.random.RandomState(), params, ue_per_bs)
 
+    def test_block_loss(self):
+        """Test that the loss is only calculated between stations of the same building."""
+        params = ParametersIndoor()
+        params.basic_path_loss = "INH_OFFICE"
+        params.num_cells = 3
+        params.building_class = "TRADITIONAL"
+        ue_per_bs = 2
+        propagation = PropagationIndoor(np.random.RandomState(101), params, ue_per_bs)
+
+        # 3 buildings, with 2 UE's missing in the last one
+        num_bs = 9
+        num_ue = 16
+        distance_2D = 10 + 50 * np.random.RandomState(0).random_sample((num_bs, num_ue))
+        distance_3D = np.sqrt(distance_2D**2 + 1.5**2)
+        frequency = 27000 * np.ones(distance_2D.shape)
+        elevation = np.degrees(np.arctan(1.5 / distance_2D))
+        indoor = np.tile(np.arange(num_ue) % 4 != 0, (num_bs, 1))
+
+        loss = propagation.get_loss(distance_3D, distance_2D, frequency, elevation, indoor, False)
+        self.assertEqual(loss.shape, (num_bs, num_ue))
+
+        in_building = np.zeros((num_bs, num_ue), dtype=bool)
+        for b in range(3):
+            in_building[3 * b:3 * (b + 1), 6 * b:6 * (b + 1)] = True
+        npt.assert_array_equal(loss[~in_building], PropagationIndoor.HIGH_PATH_LOSS)
+
+        # InH office loss is bounded by the LOS loss and the NLOS loss, plus
+        # building entry loss for the outdoor UE's
+        loss_los = propagation.bpl.get_loss_los(distance_3D, frequency, 0)
+        self.assertTrue(np.all(loss[in_building] >= loss_los[in_building] - 1e-9))
+        self.assertTrue(np.all(loss[in_building & indoor] < 200))
+        self.assertTrue(np.all(
+            loss[in_building & ~indoor] > propagation.bpl.get_loss_nlos(distance_3D, frequency, 0)[in_building & ~indoor],
+        ))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,10 @@
+import pickle
 import unittest
 
-from sharc.results import Results
+import numpy as np
+import numpy.testing as npt
+
+from sharc.results import Results, SampleList
 
 
 class StationTest(unittest.TestCase):
@@ -100,6 +104,62 @@ class StationTest(unittest.TestCase):
 
         self.assertIn(dir_2024_01_01_10, dirs)
 
+    def test_merge(self):
+        """Test that merging partial results keeps the sample order."""
+        partial_1 = Results()
+        partial_1.imt_coupling_loss.extend([1., 2., 3.])
+        partial_1.imt_dl_sinr.extend([10., 20.])
+
+        partial_2 = Results()
+        partial_2.imt_coupling_loss.extend([4., 5.])
+
+        self.results.merge(partial_1).merge(partial_2)
+
+        self.assertEqual(
+            self.results.imt_coupling_loss,
+            [1., 2., 3., 4., 5.])
+        self.assertEqual(self.results.imt_dl_sinr, [10., 20.])
+        self.assertEqual(self.results.imt_bs_antenna_gain, [])
+
+    def test_sample_list(self):
+        """Test the array backed SampleList."""
+        samples = SampleList()
+        self.assertEqual(len(samples), 0)
+        self.assertEqual(samples, [])
+
+        samples.extend(np.arange(100.))
+        samples.extend([[100., 101.]])
+        samples.append(102.)
+        self.assertEqual(len(samples), 103)
+        self.assertEqual(samples, list(range(103)))
+        self.assertEqual(samples[-1], 102.)
+        npt.assert_array_equal(samples - 1., np.arange(103.) - 1.)
+
+        # views share memory with the buffer
+        view = samples.view()
+        self.assertTrue(np.shares_memory(view, np.asarray(samples)))
+
+        unpickled = pickle.loads(pickle.dumps(samples))
+        self.assertEqual(unpickled, samples)
+
+        samples.clear()
+        self.assertEqual(len(samples), 0)
+
+        single = SampleList([1.1, 2.2], dtype=np.float32)
+        self.assertEqual(single.dtype, np.float32)
+        npt.assert_array_equal(single, np.array([1.1, 2.2], dtype=np.float32))
+
+    def test_sample_list_does_not_write_to_given_array(self):
+        """Test that arrays wrapped without copy are never modified."""
+        arr = np.array([1., 2., 3.])
+        samples = SampleList(arr)
+        self.assertTrue(np.shares_memory(samples.view(), arr))
+
+        samples.clear()
+        samples.extend([4., 5.])
+        npt.assert_array_equal(arr, [1., 2., 3.])
+        self.assertEqual(samples, [4., 5.])
+
     def test_get_prefix_date_and_id(self):
         """Test extraction of prefix, date, and id from directory name."""
         dir_2024_01_01_04 = "caminho_abs/prefixo_2024-01-01_04"
@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import numpy.testing as npt
+
+from sharc.results import Results
+from sharc.results_store import NpyResultsStore, CsvResultsStore
+
+
+class ResultsStoreTest(unittest.TestCase):
+    """Unit tests for the binary and csv results stores."""
+
+    def setUp(self):
+        """Create a temporary output directory."""
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the temporary output directory."""
+        shutil.rmtree(self.output_dir)
+
+    def test_npy_append_and_read(self):
+        """Test that chunks are appended and read back memory-mapped."""
+        store = NpyResultsStore()
+        self.assertFalse(store.has_results(self.output_dir))
+
+        store.write(self.output_dir, {"a": [1., 2., 3.]}, overwrite=True)
+        store.write(self.output_dir, {"a": [4., 5.], "b": [6.]}, overwrite=False)
+        self.assertTrue(store.has_results(self.output_dir))
+
+        samples = store.read(self.output_dir, ["a", "b", "c"])
+        self.assertEqual(set(samples.keys()), {"a", "b"})
+        self.assertIsInstance(samples["a"], np.memmap)
+        npt.assert_array_equal(samples["a"], [1., 2., 3., 4., 5.])
+        npt.assert_array_equal(samples["b"], [6.])
+
+        chunks = list(store.iter_chunks(self.output_dir, "a"))
+        self.assertEqual(len(chunks), 2)
+        npt.assert_array_equal(chunks[1], [4., 5.])
+
+        # overwriting discards everything written before
+        store.write(self.output_dir, {"b": [7.]}, overwrite=True)
+        samples = store.read(self.output_dir, ["a", "b"])
+        self.assertEqual(list(samples.keys()), ["b"])
+        npt.assert_array_equal(samples["b"], [7.])
+
+    def test_npy_float32(self):
+        """Test storing samples in single precision."""
+        store = NpyResultsStore(dtype=np.float32)
+        store.write(self.output_dir, {"a": [1.5, 2.5]}, overwrite=True)
+        samples = store.read(self.output_dir, ["a"])
+        self.assertEqual(samples["a"].dtype, np.float32)
+        npt.assert_array_equal(samples["a"], [1.5, 2.5])
+
+    def test_export_csv_and_load_legacy_dir(self):
+        """Test exporting to csv and loading a directory with csv files only."""
+        results = Results()
+        results.output_directory = self.output_dir
+        results.imt_coupling_loss.extend([1., 2., 3.])
+        results.write_files(1)
+
+        export_dir = os.path.join(self.output_dir, "csv")
+        results.export_csv(export_dir)
+        self.assertTrue(CsvResultsStore().has_results(export_dir))
+        self.assertFalse(NpyResultsStore().has_results(export_dir))
+
+        loaded = Results().load_from_dir(export_dir)
+        self.assertEqual(loaded.imt_coupling_loss, [1., 2., 3.])
+        self.assertEqual(loaded.imt_dl_sinr, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
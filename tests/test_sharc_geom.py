@@ -1,11 +1,15 @@
+import os
+import tempfile
 import unittest
+import geopandas as gpd
 import numpy as np
 import numpy.testing as npt
 import shapely as shp
 import shapely.vectorized
 from pathlib import Path
 
-from sharc.support.sharc_geom import generate_grid_in_multipolygon
+from sharc.support.sharc_geom import generate_grid_in_multipolygon, load_countries_polygon, \
+    points_inside_polygon, shrink_countries_by_km
 from sharc.support.sharc_utils import load_gdf
 from sharc.satellite.utils.sat_utils import haversine
 
@@ -109,6 +113,47 @@ class TestSharcGeom(unittest.TestCase):
         expected_dist = np.sqrt((np.sqrt(3) / 2 * hx_r)**2 + (3 / 2 * hx_r)**2)
         npt.assert_allclose(nn_dists, expected_dist, rtol=0.02)
 
+    def test_load_countries_polygon(self):
+        """Test the cached loading of shrunk countries and the point in polygon test."""
+        from sharc.support import sharc_geom
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            poly = load_countries_polygon(
+                self.countries_shapefile, ["Brazil", "Chile"], 10, cache_dir=cache_dir,
+            )
+            gdf = load_gdf(
+                self.countries_shapefile,
+                {"NAME": ["Brazil", "Chile"]}
+            )
+            ref_poly = shp.ops.unary_union(
+                shrink_countries_by_km(gdf.geometry.values, 10))
+            self.assertTrue(poly.equals(ref_poly))
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+            # kept in memory
+            self.assertIs(
+                load_countries_polygon(
+                    self.countries_shapefile, ["Brazil", "Chile"], 10, cache_dir=cache_dir,
+                ),
+                poly,
+            )
+
+            # and stored in the cache directory
+            sharc_geom._country_polygons.clear()
+            cached_poly = load_countries_polygon(
+                self.countries_shapefile, ["Brazil", "Chile"], 10, cache_dir=cache_dir,
+            )
+            self.assertIsNot(cached_poly, poly)
+            self.assertTrue(cached_poly.equals(ref_poly))
+
+        rng = np.random.RandomState(0)
+        lon = rng.uniform(-80, -30, 2000)
+        lat = rng.uniform(-55, 5, 2000)
+        npt.assert_array_equal(
+            points_inside_polygon(poly, lon, lat),
+            gpd.points_from_xy(lon, lat).within(ref_poly),
+        )
+
 
 if __name__ == '__main__':
     unittest.main()
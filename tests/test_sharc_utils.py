@@ -1,6 +1,14 @@
+import os
+import tempfile
 import unittest
+from unittest.mock import patch
 
-from sharc.support.sharc_utils import clip_angle
+from sharc.support.sharc_utils import (
+    clip_angle,
+    get_cache_dir,
+    get_cache_file_path,
+    write_cache_file,
+)
 
 
 class StationTest(unittest.TestCase):
@@ -60,6 +68,35 @@ class StationTest(unittest.TestCase):
         self.assertEqual(clip_angle(91, -180, 0), -180)
         self.assertEqual(clip_angle(89, -180, 0), 0)
 
+    def test_cache_files(self):
+        """
+        Testing the paths and the atomic writes of cache files
+        """
+        with tempfile.TemporaryDirectory() as cache_dir:
+            self.assertEqual(get_cache_dir(cache_dir), cache_dir)
+            with patch.dict(os.environ, {"SHARC_CACHE_DIR": cache_dir}):
+                self.assertEqual(get_cache_dir(), cache_dir)
+                file_path = get_cache_file_path("key", ".bin")
+            self.assertEqual(os.path.dirname(file_path), cache_dir)
+            self.assertTrue(file_path.endswith(".bin"))
+            self.assertNotEqual(get_cache_file_path("other key", ".bin", cache_dir), file_path)
+
+            file_path = get_cache_file_path("key", ".bin", os.path.join(cache_dir, "sub"))
+            self.assertTrue(write_cache_file(file_path, lambda f: f.write(b"data")))
+            with open(file_path, "rb") as f:
+                self.assertEqual(f.read(), b"data")
+
+            # a cache directory that cannot be created
+            file_path = get_cache_file_path("key", ".bin", os.path.join(file_path, "sub"))
+            self.assertFalse(write_cache_file(file_path, lambda f: f.write(b"data")))
+
+            # failed writes leave no temporary files
+            def fail(f):
+                raise OSError("disk full")
+            file_path = get_cache_file_path("key", ".bin", cache_dir)
+            self.assertFalse(write_cache_file(file_path, fail))
+            self.assertEqual(os.listdir(cache_dir), ["sub"])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -11,6 +11,7 @@ import numpy.testing as npt
 import math
 
 from sharc.simulation_downlink import SimulationDownlink
+from sharc.results import Results
 from sharc.parameters.parameters import Parameters
 from sharc.antenna.antenna_omni import AntennaOmni
 from sharc.station_factory import StationFactory
@@ -393,6 +394,17 @@ class SimulationDownlinkTest(unittest.TestCase):
             delta=.01,
         )
 
+        # the transmit power of each link is collected, also when the base
+        # stations have different numbers of beams
+        self.simulation.collect_results(False, 0)
+        npt.assert_allclose(self.simulation.results.imt_dl_tx_power, np.full(4, tx_power))
+
+        self.simulation.link = {0: [0, 1], 1: [2]}
+        self.simulation.calculate_sinr()
+        self.simulation.results = Results()
+        self.simulation.collect_results(False, 0)
+        npt.assert_allclose(self.simulation.results.imt_dl_tx_power, np.full(3, tx_power))
+
     def test_simulation_2bs_4ue_fss_es(self):
         """Test simulation with 2 base stations and 4 UEs for FSS-ES scenario."""
         self.param.general.system = "FSS_ES"
@@ -179,7 +179,7 @@ class SimulationIndoorTest(unittest.TestCase):
         self.simulation.select_ue(random_number_gen)
         self.assertTrue(np.all(self.simulation.ue.active))
         self.assertDictEqual(
-            self.simulation.link, {
+            self.simulation.link.to_dict(), {
                 0: [0], 1: [1], 2: [2], 3: [3],
             },
         )
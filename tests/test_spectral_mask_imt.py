@@ -136,6 +136,32 @@ class SpectalMaskImtTest(unittest.TestCase):
         poob = self.mask_ue_26GHz.power_calc(fc, band)
         self.assertAlmostEqual(poob, 13.02, delta=1e-2)
 
+    def test_power_calc_many(self):
+        """Test power calculation over arrays of bands and its cache."""
+        fc = np.array([[43300, 43000], [45000, 43300]])
+        band = np.array([[600, 1200], [1000, 600]])
+        poob = self.mask_bs_40GHz.power_calc_many(fc, band)
+        self.assertEqual(poob.shape, (2, 2))
+        for f, b, p in zip(fc.flat, band.flat, poob.flat):
+            self.assertAlmostEqual(
+                p, self.mask_bs_40GHz.power_calc(f, b), delta=1e-9,
+            )
+        np.testing.assert_allclose(
+            poob, [[11.8003, 14.8106], [17, 11.8003]], atol=1e-2,
+        )
+        self.assertEqual(len(self.mask_bs_40GHz._power_cache), 3)
+
+        # setting the mask again discards the cached powers
+        fc = np.array([23800, 23700, 23800])
+        band = np.array([400, 400, 400])
+        poob = self.mask_bs_26GHz.power_calc_many(fc, band)
+        np.testing.assert_allclose(poob, [11.53, 12.58, 11.53], atol=1e-2)
+        self.mask_bs_26GHz.set_mask(20)
+        self.assertTrue(
+            np.all(self.mask_bs_26GHz.power_calc_many(fc, band) < poob),
+        )
+        self.assertEqual(len(self.mask_bs_26GHz._power_cache), 2)
+
 
 if __name__ == '__main__':
     unittest.main()
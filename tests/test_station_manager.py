@@ -10,10 +10,11 @@ import numpy as np
 import numpy.testing as npt
 
 from sharc.support.enumerations import StationType
+from sharc.antenna.antenna_array_bank import AntennaArrayBank
 from sharc.antenna.antenna_beamforming_imt import AntennaBeamformingImt
 from sharc.parameters.imt.parameters_antenna_imt import ParametersAntennaImt
 from sharc.station import Station
-from sharc.station_manager import StationManager
+from sharc.station_manager import StationManager, copy_stations, copy_active_stations
 
 
 class StationManagerTest(unittest.TestCase):
@@ -388,6 +389,12 @@ class StationManagerTest(unittest.TestCase):
         ])
         npt.assert_allclose(theta, ref_theta, atol=1e-2)
 
+        # Moving the stations moves their images
+        self.station_manager.x = np.array([10, 150])
+        d_2D, _, _, _ = self.station_manager.get_dist_angles_wrap_around(
+            self.station_manager2, )
+        npt.assert_allclose(d_2D[:, 0], [15.0, 147.68], atol=1e-2)
+
     def test_pointing_vector_to(self):
         """Test calculation of pointing vectors between station managers."""
         eps = 1e-1
@@ -555,6 +562,78 @@ class StationManagerTest(unittest.TestCase):
         elevation_ref = np.array([[0, 45], [0, 26.56]])
         npt.assert_allclose(elevation_ref, sm3.get_elevation(sm4), atol=1e-2)
 
+    def test_copy_stations(self):
+        """Test copying a subset of the stations."""
+        self.station_manager.active = np.array([True, False, True])
+        sub = copy_active_stations(self.station_manager)
+        self.assertEqual(sub.num_stations, 2)
+        self.assertEqual(sub.num_stations_total, 3)
+        npt.assert_array_equal(sub.x, self.station_manager.x[[0, 2]])
+        npt.assert_array_equal(sub.height, self.station_manager.height[[0, 2]])
+        self.assertIs(sub.antenna[1], self.station_manager.antenna[2])
+        self.assertEqual(sub.station_type, self.station_manager.station_type)
+        # non per-station attributes are shared
+        self.assertIs(sub.tx_power, self.station_manager.tx_power)
+
+        sub = copy_stations(self.station_manager, [2, 1])
+        npt.assert_array_equal(sub.y, self.station_manager.y[[2, 1]])
+        self.assertEqual(len(sub.active), 2)
+
+    def test_copy_stations_bank(self):
+        """Test copying a subset of stations whose antennas are in a bank."""
+        bank = AntennaArrayBank(
+            self.bs_param.get_antenna_parameters(),
+            np.array([60., 180., 300.]), np.array([-10., -10., -10.]),
+        )
+        bank[1].add_beam(170., 100.)
+        bank[2].add_beam(280., 95.)
+        bank[2].add_beam(320., 110.)
+        self.station_manager.antenna = bank
+
+        sub = copy_stations(self.station_manager, [2, 1])
+        self.assertIsInstance(sub.antenna, AntennaArrayBank)
+        self.assertEqual(len(sub.antenna), 2)
+        self.assertIs(sub.antenna.pattern, bank.pattern)
+        npt.assert_array_equal(sub.antenna.azimuth, [300., 180.])
+        npt.assert_array_equal(sub.antenna.num_beams, [2, 1])
+        self.assertEqual(sub.antenna[0].beams_list, bank[2].beams_list)
+        self.assertEqual(sub.antenna[1].beams_list, bank[1].beams_list)
+
+        phi = np.array([290., 315., 175.])
+        theta = np.array([98., 105., 99.])
+        npt.assert_array_equal(
+            sub.antenna.calculate_gains([0, 0, 1], phi, theta, [0, 1, 0]),
+            bank.calculate_gains([2, 2, 1], phi, theta, [0, 1, 0]),
+        )
+
+        # the copied antennas are independent of the original ones
+        sub.antenna[1].reset_beams()
+        self.assertEqual(len(bank[1].beams_list), 1)
+
+    def test_geometry_cache(self):
+        """Test that the geometry is shared between methods and recomputed when stations move."""
+        phi, theta = self.station_manager.get_pointing_vector_to(self.station_manager2)
+        geometry = self.station_manager._get_geometry(self.station_manager2)
+        self.assertIs(self.station_manager._get_geometry(self.station_manager2), geometry)
+        npt.assert_array_equal(geometry.phi, phi)
+
+        # the returned arrays are copies
+        phi[:] = 0
+        self.assertFalse(np.all(geometry.phi == 0))
+
+        distance = self.station_manager.get_3d_distance_to(self.station_manager2)
+        self.station_manager2.x[0] += 10
+        self.assertIsNot(self.station_manager._get_geometry(self.station_manager2), geometry)
+        self.assertFalse(np.array_equal(
+            self.station_manager.get_3d_distance_to(self.station_manager2), distance,
+        ))
+
+        self.station_manager.azimuth = self.station_manager.azimuth + 10
+        geometry = self.station_manager._get_geometry(self.station_manager2)
+        self.station_manager.get_off_axis_angle(self.station_manager2)
+        self.station_manager.elevation = self.station_manager.elevation + 10
+        self.assertIsNot(self.station_manager._get_geometry(self.station_manager2), geometry)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import numpy.testing as npt
+
+from sharc.propagation.terrain import TerrainDatabase, great_circle_points
+from sharc.satellite.ngso.constants import EARTH_RADIUS_KM
+
+
+class TerrainDatabaseTest(unittest.TestCase):
+    """Unit tests for the TerrainDatabase class."""
+
+    def setUp(self):
+        """Write a small HGT tile with heights linear in latitude and longitude."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.num_samples = 11
+        row, col = np.meshgrid(
+            np.arange(self.num_samples), np.arange(self.num_samples), indexing="ij",
+        )
+        self.tile = (100 * row + col).astype(">i2")
+        self.tile[0, 0] = TerrainDatabase.VOID
+        self.tile.tofile(os.path.join(self.tmp_dir.name, "S24W047.hgt"))
+
+        self.terrain = TerrainDatabase(self.tmp_dir.name, cache_size=1)
+
+    def tearDown(self):
+        """Remove the temporary tiles."""
+        self.terrain = None
+        self.tmp_dir.cleanup()
+
+    def test_tile_name(self):
+        """Test the names of the tiles."""
+        self.assertEqual(TerrainDatabase.tile_name(-24, -47), "S24W047.hgt")
+        self.assertEqual(TerrainDatabase.tile_name(5, 120), "N05E120.hgt")
+
+    def test_get_heights(self):
+        """Test the bilinear interpolation of the tile heights."""
+        lat = np.array([[-23.05, -23.5], [-23.999, -23.2]])
+        lon = np.array([[-46.95, -46.5], [-46.001, -46.73]])
+        last = self.num_samples - 1
+        expected = 100 * (-23 - lat) * last + (lon + 47) * last
+
+        npt.assert_allclose(self.terrain.get_heights(lat, lon), expected)
+
+        # void samples and points outside the tiles are at sea level
+        self.assertEqual(self.terrain.get_heights(-23., -47.), 0)
+        npt.assert_equal(self.terrain.get_heights([10., -23.5], [10., -47.5]), 0)
+
+        # the antimeridian is in the W180 tiles
+        self.tile.tofile(os.path.join(self.tmp_dir.name, "S24W180.hgt"))
+        npt.assert_allclose(
+            self.terrain.get_heights([-23.5, -23.5], [180., -180.]), 100 * 0.5 * last,
+        )
+        npt.assert_allclose(
+            self.terrain.get_heights(-23.5, 180.5), 100 * 0.5 * last + 0.5 * last,
+        )
+
+    def test_tile_cache(self):
+        """Test that tiles are memory-mapped once and evicted when the cache is full."""
+        tile = self.terrain.get_tile(-24, -47)
+        self.assertIsInstance(tile, np.memmap)
+        self.assertIs(self.terrain.get_tile(-24, -47), tile)
+        npt.assert_array_equal(tile, self.tile)
+
+        self.assertIsNone(self.terrain.get_tile(0, 0))
+        self.assertEqual(list(self.terrain._tiles.keys()), [(0, 0)])
+        self.assertIsNot(self.terrain.get_tile(-24, -47), tile)
+
+    def test_get_profiles(self):
+        """Test the great-circle profiles."""
+        d, h = self.terrain.get_profiles(
+            [-23.9, -23.1], [-46.9, -46.9], [-23.9, -23.9], [-46.1, -46.9], 5,
+        )
+        self.assertEqual(d.shape, (2, 5))
+        self.assertEqual(h.shape, (2, 5))
+        npt.assert_allclose(d[1], np.linspace(0, 0.8, 5) * np.pi / 180 * EARTH_RADIUS_KM)
+        npt.assert_allclose(h[1], 100 * np.linspace(0.1, 0.9, 5) * 10 + 1)
+
+    def test_great_circle_points(self):
+        """Test the points along great circles."""
+        lat, lon, d = great_circle_points([0., 10.], [0., 20.], [0., 10.], [90., 20.], 4)
+        npt.assert_allclose(lat[0], 0, atol=1e-12)
+        npt.assert_allclose(lon[0], [0, 30, 60, 90])
+        npt.assert_allclose(d[0], np.array([0, 30, 60, 90]) * np.pi / 180 * EARTH_RADIUS_KM)
+
+        # coincident ends
+        npt.assert_allclose(lat[1], 10)
+        npt.assert_allclose(lon[1], 20)
+        npt.assert_allclose(d[1], 0)
+
+    def test_invalid_directory(self):
+        """Test that a missing directory is rejected."""
+        with self.assertRaises(ValueError):
+            TerrainDatabase(os.path.join(self.tmp_dir.name, "missing"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -232,6 +232,42 @@ class TopologyHotspotTest(unittest.TestCase):
             ),
         )
 
+    def test_calculate_coordinates_many_hotspots(self):
+        """Test that many hotspots per cell neither overlap nor get close to base stations."""
+        param = ParametersHotspot()
+        param.num_hotspots_per_cell = 10
+        param.max_dist_hotspot_ue = 60
+        param.min_dist_hotspot_ue = 5
+        param.min_dist_bs_hotspot = 30
+        topology = TopologyHotspot(param, 1000, 1)
+        topology.calculate_coordinates(np.random.RandomState(3))
+        self.assertEqual(topology.num_base_stations, 57 * 10)
+
+        for cell in range(57):
+            idx = np.arange(cell * 10, (cell + 1) * 10)
+            for k in range(1, 10):
+                self.assertFalse(
+                    topology.overlapping_hotspots(
+                        topology.x[idx[k:k + 1]],
+                        topology.y[idx[k:k + 1]],
+                        topology.azimuth[idx[k:k + 1]],
+                        topology.x[idx[:k]],
+                        topology.y[idx[:k]],
+                        topology.azimuth[idx[:k]],
+                        topology.cell_radius,
+                    ),
+                )
+            # the first hotspot of a cell is not checked
+            self.assertTrue(
+                topology.validade_min_dist_bs_hotspot(
+                    topology.x[idx[1:]],
+                    topology.y[idx[1:]],
+                    topology.macrocell.x,
+                    topology.macrocell.y,
+                    param.min_dist_bs_hotspot,
+                ),
+            )
+
 
 if __name__ == '__main__':
     unittest.main()
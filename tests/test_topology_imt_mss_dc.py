@@ -1,11 +1,14 @@
 import unittest
 import numpy as np
 import numpy.testing as npt
+import shapely
 from sharc.topology.topology_imt_mss_dc import TopologyImtMssDc
 from sharc.parameters.imt.parameters_imt_mss_dc import ParametersImtMssDc
 from sharc.station_manager import StationManager
 from sharc.parameters.parameters_orbit import ParametersOrbit
+from sharc.satellite.ngso.orbit_model import OrbitModel
 from sharc.support.sharc_geom import GeometryConverter, lla2ecef
+from sharc.satellite.utils.sat_utils import calc_elevation
 
 
 class TestTopologyImtMssDc(unittest.TestCase):
@@ -152,6 +155,83 @@ class TestTopologyImtMssDc(unittest.TestCase):
         # oblateness
         npt.assert_array_less(min_elevation_angle, xy_plane_elevations)
 
+    def test_max_elevation_satellites(self):
+        """Test the highest elevation satellite search against all pairs."""
+        rng = np.random.RandomState(3)
+        grid_lat = rng.uniform(-30, 0, 500)
+        grid_lon = rng.uniform(-70, -40, 500)
+        sat_lat = rng.uniform(-60, 60, 800)
+        sat_lon = rng.uniform(-180, 180, 800)
+
+        for sat_altitude in [np.full(800, 525e3), rng.uniform(300e3, 1200e3, 800)]:
+            elev = calc_elevation(
+                grid_lat[:, np.newaxis], sat_lat[np.newaxis, :],
+                grid_lon[:, np.newaxis], sat_lon[np.newaxis, :],
+                sat_height=sat_altitude[np.newaxis, :], es_height=0,
+            )
+            best_sats = TopologyImtMssDc.get_max_elevation_satellites(
+                grid_lat, grid_lon, sat_lat, sat_lon, sat_altitude,
+            )
+            npt.assert_array_equal(best_sats, elev.argmax(axis=-1))
+
+    def test_restricted_sampling(self):
+        """Test that sparse visibility conditions are met after redrawing only candidate positions."""
+        self.params.orbits[0].n_planes = 2
+        self.params.orbits[0].sats_per_plane = 4
+        self.params.sat_is_active_if.minimum_elevation_from_es = 75.0
+
+        coords = TopologyImtMssDc.get_coordinates(
+            self.geometry_converter, self.params, np.random.RandomState(5))
+        elev = calc_elevation(
+            self.geometry_converter.ref_lat, coords["sat_lat"],
+            self.geometry_converter.ref_long, coords["sat_lon"],
+            sat_height=coords["sat_alt"], es_height=self.geometry_converter.ref_alt,
+        )
+        self.assertGreater(len(elev), 0)
+        npt.assert_array_less(75.0, elev)
+
+        # the candidate cells are a small superset of the positions with
+        # visible satellites
+        sampler = TopologyImtMssDc._visibility_sampler_cache[1]
+        self.assertLess(sampler.candidate_probability[0], 0.1)
+        rng = np.random.RandomState(0)
+        for _ in range(100):
+            variables = sampler.sample(rng)
+            if variables is not None:
+                self.assertTrue(sampler.is_candidate(0, *variables[0])[0])
+
+    def test_visibility_sampler_cache(self):
+        """Test that the visibility sampler is reused for the same parameters."""
+        param = self.params.orbits[0]
+        orbits = [
+            OrbitModel(
+                Nsp=param.sats_per_plane, Np=param.n_planes, phasing=param.phasing_deg,
+                long_asc=param.long_asc_deg, omega=param.omega_deg, delta=param.inclination_deg,
+                hp=param.perigee_alt_km, ha=param.apogee_alt_km, Mo=param.initial_mean_anomaly,
+                model_time_as_random_variable=param.model_time_as_random_variable,
+                t_min=param.t_min, t_max=param.t_max,
+            ),
+        ]
+        country = self.params.sat_is_active_if.lat_long_inside_country
+        country.filter_polygon = shapely.box(-50, -20, -40, -10)
+        sampler = TopologyImtMssDc.get_visibility_sampler(
+            self.geometry_converter, self.params, orbits,
+        )
+
+        # an equal polygon in another object
+        country.filter_polygon = shapely.box(-50, -20, -40, -10)
+        self.assertIs(
+            TopologyImtMssDc.get_visibility_sampler(self.geometry_converter, self.params, orbits),
+            sampler,
+        )
+
+        # a different polygon
+        country.filter_polygon = shapely.box(-60, -20, -40, -10)
+        self.assertIsNot(
+            TopologyImtMssDc.get_visibility_sampler(self.geometry_converter, self.params, orbits),
+            sampler,
+        )
+
 
 if __name__ == '__main__':
     unittest.main()